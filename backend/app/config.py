@@ -17,13 +17,117 @@ API_PREFIX = "/api"
 CORS_ORIGINS = ["*"]  # Configure based on environment
 
 # File Upload Configuration
-MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
+MAX_FILE_SIZE = int(os.environ.get('MAX_FILE_SIZE_MB', 100)) * 1024 * 1024  # Uploads are streamed, so this is a disk cap
 GRIDFS_THRESHOLD = 5 * 1024 * 1024  # 5MB
+WORKSPACE_INLINE_MAX_MB = int(os.environ.get('WORKSPACE_INLINE_MAX_MB', 2))  # Larger saved workspaces are compressed into GridFS
 ALLOWED_EXTENSIONS = ['.csv', '.xlsx', '.xls']
 
+# Dataset Storage Configuration
+DATASET_STORAGE_BACKEND = os.environ.get('DATASET_STORAGE_BACKEND', 'gridfs')  # 'gridfs' or 'local'
+DATASET_STORAGE_DIR = os.environ.get('DATASET_STORAGE_DIR', str(ROOT_DIR / 'data' / 'datasets'))
+DATASET_CHUNK_ROWS = int(os.environ.get('DATASET_CHUNK_ROWS', 250000))
+PARQUET_COMPRESSION = os.environ.get('PARQUET_COMPRESSION', 'zstd')
+GRIDFS_DATASET_FORMAT = os.environ.get('GRIDFS_DATASET_FORMAT', 'parquet')  # Format of single-file GridFS datasets: parquet, feather, csv or json
+GRIDFS_SPOOL_MAX_MB = int(os.environ.get('GRIDFS_SPOOL_MAX_MB', 64))  # GridFS downloads larger than this are spooled to disk before parsing
+STORAGE_SIZE_SAMPLE_ROWS = int(os.environ.get('STORAGE_SIZE_SAMPLE_ROWS', 1000))  # Rows sampled to size object columns of a DataFrame
+DATASET_VERSION_HISTORY = int(os.environ.get('DATASET_VERSION_HISTORY', 5))  # Versions kept per dataset (files shared with kept versions survive pruning)
+
+# DataFrame Cache Configuration
+DATAFRAME_CACHE_MAX_MB = int(os.environ.get('DATAFRAME_CACHE_MAX_MB', 512))
+
+# External Database Loading Configuration
+DB_FETCH_BATCH_SIZE = int(os.environ.get('DB_FETCH_BATCH_SIZE', 50000))  # Rows per server-side cursor fetch
+DB_LOAD_MAX_ROWS = int(os.environ.get('DB_LOAD_MAX_ROWS', 5000000))  # Default row cap for table/query loads (0 = no cap)
+
+# External Database Connection Pooling
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 5))  # Connections per source config
+DB_POOL_IDLE_TIMEOUT = int(os.environ.get('DB_POOL_IDLE_TIMEOUT', 300))  # Seconds before an idle connection is closed
+DB_POOL_ACQUIRE_TIMEOUT = int(os.environ.get('DB_POOL_ACQUIRE_TIMEOUT', 30))  # Seconds to wait for a free connection
+
+# Executor Configuration (keeps blocking work off the event loop)
+CPU_EXECUTOR_KIND = os.environ.get('CPU_EXECUTOR_KIND', 'process')  # 'process' or 'thread'
+CPU_EXECUTOR_WORKERS = int(os.environ.get('CPU_EXECUTOR_WORKERS', max(1, (os.cpu_count() or 2) - 1)))
+IO_EXECUTOR_WORKERS = int(os.environ.get('IO_EXECUTOR_WORKERS', 16))  # Threads for blocking DB drivers and file parsing
+PREDICT_EXECUTOR_WORKERS = int(os.environ.get('PREDICT_EXECUTOR_WORKERS', min(4, os.cpu_count() or 1)))  # Threads running online predict calls
+
+# Background Job Queue Configuration
+JOB_WORKER_EMBEDDED = os.environ.get('JOB_WORKER_EMBEDDED', 'true').lower() == 'true'  # Run a worker inside the API process
+JOB_WORKER_CONCURRENCY = int(os.environ.get('JOB_WORKER_CONCURRENCY', 2))  # Jobs executed at once per worker
+JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', 1.0))  # Seconds between queue polls when idle
+JOB_HEARTBEAT_INTERVAL = int(os.environ.get('JOB_HEARTBEAT_INTERVAL', 15))
+JOB_STALE_AFTER = int(os.environ.get('JOB_STALE_AFTER', 120))  # Running jobs without a heartbeat this long are requeued
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', 2))
+JOB_RESULT_INLINE_MAX_MB = int(os.environ.get('JOB_RESULT_INLINE_MAX_MB', 8))  # Larger results are stored in GridFS
+
 # ML Configuration
 TRAIN_TEST_SPLIT_RATIO = 0.2
 RANDOM_STATE = 42
+PARALLEL_TRAINING = os.environ.get('PARALLEL_TRAINING', 'true').lower() == 'true'  # Fit model candidates concurrently
+# TRAINING_CPU_BUDGET is per machine: training runs in the CPU pool for
+# background jobs and direct requests alike, so each run gets an equal share
+TRAINING_CPU_BUDGET = int(os.environ.get('TRAINING_CPU_BUDGET', os.cpu_count() or 1))  # Cores shared by all training runs on this machine
+TRAINING_MAX_CONCURRENT = int(os.environ.get('TRAINING_MAX_CONCURRENT', min(CPU_EXECUTOR_WORKERS, JOB_WORKER_CONCURRENCY + 1)))  # Training runs at once: background jobs plus a direct request
+TRAINING_RUN_CPU_BUDGET = max(1, TRAINING_CPU_BUDGET // max(1, TRAINING_MAX_CONCURRENT))  # Cores shared by the candidates of one run
+PARALLEL_TRAINING_MIN_ROWS = int(os.environ.get('PARALLEL_TRAINING_MIN_ROWS', 5000))  # Smaller training sets are fitted sequentially
+FEATURE_PIPELINE_CACHE_SIZE = int(os.environ.get('FEATURE_PIPELINE_CACHE_SIZE', 64))  # Fitted feature pipelines kept per (dataset version, target, feature selection)
+
+# AutoML Configuration (time-budgeted training, see automl_service)
+AUTOML_TIME_BUDGET_S = float(os.environ.get('AUTOML_TIME_BUDGET_S', 0))  # Default training budget per request in seconds (0 = fit every candidate on every row)
+AUTOML_MIN_ROWS = int(os.environ.get('AUTOML_MIN_ROWS', 5000))  # Training rows of the first successive-halving rung
+AUTOML_HALVING_FACTOR = int(os.environ.get('AUTOML_HALVING_FACTOR', 2))  # Rows grow and candidates shrink by this factor per rung
+AUTOML_MAX_ESTIMATORS = int(os.environ.get('AUTOML_MAX_ESTIMATORS', 1000))  # Boosting rounds cap for early-stopped XGBoost/LightGBM
+AUTOML_EARLY_STOPPING_ROUNDS = int(os.environ.get('AUTOML_EARLY_STOPPING_ROUNDS', 20))  # Rounds without validation improvement before stopping
+AUTOML_VALIDATION_FRACTION = float(os.environ.get('AUTOML_VALIDATION_FRACTION', 0.1))  # Training rows held out for early stopping
+
+# Model Registry Configuration
+MODEL_REGISTRY_ENABLED = os.environ.get('MODEL_REGISTRY_ENABLED', 'true').lower() == 'true'  # Persist the best model per target after training
+MODEL_STORAGE_BACKEND = os.environ.get('MODEL_STORAGE_BACKEND', DATASET_STORAGE_BACKEND)  # 'gridfs' or 'local'
+MODEL_STORAGE_DIR = os.environ.get('MODEL_STORAGE_DIR', str(ROOT_DIR / 'data' / 'models'))
+MODEL_CACHE_SIZE = int(os.environ.get('MODEL_CACHE_SIZE', 16))  # Loaded models kept in memory
+MODEL_REGISTRY_HISTORY = int(os.environ.get('MODEL_REGISTRY_HISTORY', 5))  # Registered models kept per dataset and target
+
+# Online Prediction Configuration
+PREDICT_BATCH_WAIT_MS = float(os.environ.get('PREDICT_BATCH_WAIT_MS', 2))  # How long a request waits for others to share its predict call
+PREDICT_MAX_BATCH_ROWS = int(os.environ.get('PREDICT_MAX_BATCH_ROWS', 1024))  # Rows scored by one predict call
+PREDICT_MAX_REQUEST_ROWS = int(os.environ.get('PREDICT_MAX_REQUEST_ROWS', 10000))  # Rows accepted in one request
+PREDICT_LATENCY_WINDOW = int(os.environ.get('PREDICT_LATENCY_WINDOW', 10000))  # Recent requests behind the latency percentiles
+
+# Batch Scoring Configuration
+BATCH_SCORING_IN_FLIGHT = int(os.environ.get('BATCH_SCORING_IN_FLIGHT', CPU_EXECUTOR_WORKERS))  # Chunks being scored at once (each held in memory until written)
+
+# Profiling Configuration
+PROFILE_APPROX_MIN_ROWS = int(os.environ.get('PROFILE_APPROX_MIN_ROWS', 2000000))  # Larger frames use HyperLogLog/t-digest estimates
+PROFILE_BLOCK_CELLS = int(os.environ.get('PROFILE_BLOCK_CELLS', 8000000))  # Numeric cells converted to float64 at once while profiling
+PROFILE_EXACT_MAX_ROWS = int(os.environ.get('PROFILE_EXACT_MAX_ROWS', 250000))  # Rows an incremental profile keeps in memory to profile exactly before switching to running sketches
+PROFILE_EXACT_MAX_BYTES = int(os.environ.get('PROFILE_EXACT_MAX_BYTES', 64 * 1024 * 1024))  # Memory those retained rows may take
+PROFILE_TRACKED_VALUES = int(os.environ.get('PROFILE_TRACKED_VALUES', 10000))  # Distinct categorical values counted exactly by incremental profiles
+PROFILE_MAX_ROW_HASHES = int(os.environ.get('PROFILE_MAX_ROW_HASHES', 20000000))  # Beyond this duplicate rows are estimated with HyperLogLog
+STREAM_STATS_MIN_ROWS = int(os.environ.get('STREAM_STATS_MIN_ROWS', 2000000))  # Stored datasets this large are profiled/correlated chunk by chunk instead of loaded
+STREAM_STATS_WORKERS = int(os.environ.get('STREAM_STATS_WORKERS', CPU_EXECUTOR_WORKERS))  # Chunks summarized concurrently by streaming statistics
+
+# Correlation Configuration
+CORRELATION_THRESHOLD = float(os.environ.get('CORRELATION_THRESHOLD', 0.1))  # |r| above which a column pair is reported
+CORRELATION_MAX_PAIRS = int(os.environ.get('CORRELATION_MAX_PAIRS', 1000))  # Strongest pairs returned per correlation report
+CORRELATION_MATRIX_MAX_COLUMNS = int(os.environ.get('CORRELATION_MATRIX_MAX_COLUMNS', 100))  # Wider matrices are returned for the strongest pairs' columns only
+CORRELATION_WIDE_COLUMNS = int(os.environ.get('CORRELATION_WIDE_COLUMNS', 1000))  # Frames this wide are correlated on a row sample
+CORRELATION_SAMPLE_ROWS = int(os.environ.get('CORRELATION_SAMPLE_ROWS', 50000))  # Rows correlated in approximate mode
+CORRELATION_CACHE_MAX_MB = int(os.environ.get('CORRELATION_CACHE_MAX_MB', 128))  # In-process cache of correlation matrices per dataset version
+
+# Sampling Configuration
+SAMPLE_THRESHOLD = int(os.environ.get('SAMPLE_THRESHOLD', 10000))  # Larger datasets are sampled for holistic analysis
+SAMPLE_MIN_ROWS = int(os.environ.get('SAMPLE_MIN_ROWS', 5000))  # Smallest adaptive sample
+SAMPLE_MAX_ROWS = int(os.environ.get('SAMPLE_MAX_ROWS', 200000))  # Largest adaptive sample
+SAMPLE_TIME_BUDGET = float(os.environ.get('SAMPLE_TIME_BUDGET', 60))  # Seconds of model training the adaptive size aims for
+SAMPLE_CURVE_TOLERANCE = float(os.environ.get('SAMPLE_CURVE_TOLERANCE', 0.005))  # Score gain per doubling worth more rows
+SAMPLE_TRAINING_COST_FACTOR = float(os.environ.get('SAMPLE_TRAINING_COST_FACTOR', 50))  # Candidate set cost vs. one pilot tree fit
+JOIN_SAMPLE_SIZE = int(os.environ.get('JOIN_SAMPLE_SIZE', 10000))  # Target rows per side for sampled joins
+
+# Relational Join Configuration
+JOIN_MAX_ROWS = int(os.environ.get('JOIN_MAX_ROWS', 20000000))  # Largest join result materialised (checked before joining)
+KEY_SKETCH_SIZE = int(os.environ.get('KEY_SKETCH_SIZE', 1024))  # Hashes kept per column for foreign-key detection
+KEY_MIN_DISTINCT = int(os.environ.get('KEY_MIN_DISTINCT', 20))  # Distinct values a key needs to match without a name match
+KEY_MIN_COVERAGE = float(os.environ.get('KEY_MIN_COVERAGE', 0.5))  # Share of a key's values a column must use to match it without a name match
+KEY_SIGNATURE_CACHE_SIZE = int(os.environ.get('KEY_SIGNATURE_CACHE_SIZE', 64))  # Tables whose key signatures stay cached
 
 # LLM Configuration
 LLM_PROVIDER = os.environ.get('LLM_PROVIDER', 'emergent')
@@ -9,8 +9,28 @@ from .connections import (
     get_mysql_tables,
     get_sqlserver_tables,
     load_table_data,
+    stream_table_data,
+    create_connection,
+    QueryStream,
     parse_connection_string
 )
+from .connection_pool import ConnectionPool, ConnectionPoolManager, connection_pools, connection_fingerprint
+from .dataset_storage import (
+    DatasetWriter,
+    DerivedDatasetWriter,
+    save_dataframe,
+    read_dataframe,
+    iter_dataframe_chunks,
+    delete_dataset_storage
+)
+from .dataset_versions import (
+    record_version,
+    commit_version,
+    list_versions,
+    get_version,
+    release_storage,
+    delete_dataset_versions
+)
 
 __all__ = [
     'db',
@@ -26,5 +46,24 @@ __all__ = [
     'get_mysql_tables',
     'get_sqlserver_tables',
     'load_table_data',
-    'parse_connection_string'
+    'stream_table_data',
+    'create_connection',
+    'QueryStream',
+    'parse_connection_string',
+    'ConnectionPool',
+    'ConnectionPoolManager',
+    'connection_pools',
+    'connection_fingerprint',
+    'DatasetWriter',
+    'DerivedDatasetWriter',
+    'save_dataframe',
+    'read_dataframe',
+    'iter_dataframe_chunks',
+    'delete_dataset_storage',
+    'record_version',
+    'commit_version',
+    'list_versions',
+    'get_version',
+    'release_storage',
+    'delete_dataset_versions'
 ]
\ No newline at end of file
@@ -0,0 +1,309 @@
+"""
+External Database Connection Pooling
+Reuses PostgreSQL/MySQL/Oracle/SQL Server connections across requests
+"""
+import time
+import json
+import hashlib
+import threading
+import logging
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Iterator, Optional
+
+from app.config import DB_POOL_MAX_SIZE, DB_POOL_IDLE_TIMEOUT, DB_POOL_ACQUIRE_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+# Config fields that identify a physical connection (request fields like query are ignored)
+_CONNECTION_KEYS = ('host', 'port', 'database', 'service_name', 'username', 'password', 'use_kerberos')
+
+# Cheap round trip used to validate a connection before handing it out
+_PING_QUERIES = {
+    'oracle': "SELECT 1 FROM DUAL",
+    'postgresql': "SELECT 1",
+    'mysql': "SELECT 1",
+    'sqlserver': "SELECT 1",
+}
+
+
+def pool_key(source_type: str, config: dict) -> str:
+    """Stable hash of the source type and connection settings"""
+    identity = {key: config.get(key) for key in _CONNECTION_KEYS}
+    identity['source_type'] = source_type
+    payload = json.dumps(identity, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def connection_fingerprint(source_type: str, config: dict) -> str:
+    """
+    Identity of the database a connection points at, without its credentials
+
+    Stored on datasets loaded from a database so that datasets from the same
+    database can be recognised later (e.g. to push a join down to it).
+    """
+    identity = {key: config.get(key) for key in _CONNECTION_KEYS if key not in ('password', 'use_kerberos')}
+    identity['source_type'] = source_type
+    payload = json.dumps(identity, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _default_factory(source_type: str, config: dict):
+    from app.database.connections import create_connection
+    return create_connection(source_type, config)
+
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+class ConnectionPool:
+    """
+    Bounded pool of connections for a single source config
+
+    Idle connections past idle_timeout are closed, and every connection is
+    pinged before checkout so a dropped connection is replaced transparently.
+    """
+
+    def __init__(
+        self,
+        source_type: str,
+        config: dict,
+        factory: Callable,
+        max_size: int = DB_POOL_MAX_SIZE,
+        idle_timeout: float = DB_POOL_IDLE_TIMEOUT,
+        acquire_timeout: float = DB_POOL_ACQUIRE_TIMEOUT
+    ):
+        self.source_type = source_type
+        self.config = dict(config)
+        self.factory = factory
+        self.max_size = max(1, max_size)
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
+        self._idle: "deque" = deque()  # (connection, returned_at), most recent on the right
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self.last_used = time.monotonic()
+        self.metrics = {
+            "created": 0,
+            "reused": 0,
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time_total": 0.0,
+            "health_check_failures": 0,
+            "idle_closed": 0,
+            "discarded": 0,
+        }
+
+    @property
+    def size(self) -> int:
+        return self._in_use + len(self._idle)
+
+    def _prune_idle(self):
+        """Close idle connections past the idle timeout (caller holds the lock)"""
+        now = time.monotonic()
+        while self._idle and now - self._idle[0][1] > self.idle_timeout:
+            conn, _ = self._idle.popleft()
+            _close_quietly(conn)
+            self.metrics["idle_closed"] += 1
+
+    def _is_healthy(self, conn) -> bool:
+        try:
+            cursor = conn.cursor()
+            cursor.execute(_PING_QUERIES.get(self.source_type, "SELECT 1"))
+            cursor.fetchall()
+            cursor.close()
+            return True
+        except Exception as e:
+            logger.info(f"Discarding stale {self.source_type} connection: {str(e)}")
+            return False
+
+    def acquire(self):
+        """Check out a healthy connection, opening a new one while under max_size"""
+        started = time.monotonic()
+        waited = False
+
+        while True:
+            conn = None
+            with self._cond:
+                self._prune_idle()
+                while not self._idle and self._in_use >= self.max_size:
+                    waited = True
+                    remaining = self.acquire_timeout - (time.monotonic() - started)
+                    if remaining <= 0:
+                        raise TimeoutError(
+                            f"Timed out waiting for a {self.source_type} connection "
+                            f"(pool size {self.max_size})"
+                        )
+                    self._cond.wait(remaining)
+                    self._prune_idle()
+
+                if self._idle:
+                    conn, _ = self._idle.pop()
+                self._in_use += 1
+                self.last_used = time.monotonic()
+
+            if conn is not None:
+                # Health check outside the lock - it is a network round trip
+                if self._is_healthy(conn):
+                    origin = "reused"
+                    break
+                _close_quietly(conn)
+                self._release_slot(failure_metric="health_check_failures")
+                continue
+
+            try:
+                conn = self.factory(self.source_type, self.config)
+            except Exception:
+                self._release_slot()
+                raise
+            origin = "created"
+            break
+
+        # Counters are updated under the same lock as the idle queue, so stats() sees them consistently
+        with self._cond:
+            self.metrics[origin] += 1
+            self.metrics["checkouts"] += 1
+            if waited:
+                self.metrics["waits"] += 1
+                self.metrics["wait_time_total"] += time.monotonic() - started
+        return conn
+
+    def release(self, conn, discard: bool = False):
+        """
+        Return a connection to the pool
+
+        Args:
+            conn: Connection obtained from acquire()
+            discard: Close the connection instead of reusing it (e.g. after an error)
+        """
+        if not discard:
+            try:
+                conn.rollback()  # End any open transaction before reuse
+            except Exception:
+                discard = True
+
+        with self._cond:
+            self._in_use -= 1
+            if discard:
+                self.metrics["discarded"] += 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self.last_used = time.monotonic()
+            self._cond.notify()
+
+        if discard:
+            _close_quietly(conn)
+
+    def _release_slot(self, failure_metric: Optional[str] = None):
+        with self._cond:
+            self._in_use -= 1
+            if failure_metric:
+                self.metrics[failure_metric] += 1
+            self._cond.notify()
+
+    def close_idle(self, all_connections: bool = False):
+        """Close expired idle connections (or every idle one)"""
+        with self._cond:
+            if all_connections:
+                while self._idle:
+                    conn, _ = self._idle.popleft()
+                    _close_quietly(conn)
+            else:
+                self._prune_idle()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            stats = {
+                "source_type": self.source_type,
+                "host": self.config.get('host'),
+                "database": self.config.get('database') or self.config.get('service_name'),
+                "size": self.size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "max_size": self.max_size,
+                **self.metrics,
+            }
+        stats["wait_time_total"] = round(stats["wait_time_total"], 3)
+        return stats
+
+
+class ConnectionPoolManager:
+    """
+    Keeps one ConnectionPool per distinct source config
+
+    Usage:
+        with connection_pools.connection('postgresql', config) as conn:
+            cursor = conn.cursor()
+            ...
+    """
+
+    def __init__(self, factory: Optional[Callable] = None, **pool_options):
+        self.factory = factory or _default_factory
+        self.pool_options = pool_options
+        self._pools: Dict[str, ConnectionPool] = {}
+        self._lock = threading.Lock()
+
+    def get_pool(self, source_type: str, config: dict) -> ConnectionPool:
+        key = pool_key(source_type, config)
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(source_type, config, self.factory, **self.pool_options)
+                self._pools[key] = pool
+            self._drop_unused_pools(exclude=key)
+        return pool
+
+    def _drop_unused_pools(self, exclude: str):
+        """Forget pools with no connections that have not been used for an idle timeout"""
+        now = time.monotonic()
+        for key in list(self._pools):
+            pool = self._pools[key]
+            if key == exclude:
+                continue
+            pool.close_idle()
+            if pool.size == 0 and now - pool.last_used > pool.idle_timeout:
+                del self._pools[key]
+
+    def acquire(self, source_type: str, config: dict):
+        return self.get_pool(source_type, config).acquire()
+
+    def release(self, source_type: str, config: dict, conn, discard: bool = False):
+        self.get_pool(source_type, config).release(conn, discard=discard)
+
+    @contextmanager
+    def connection(self, source_type: str, config: dict) -> Iterator[Any]:
+        """Check out a pooled connection; it is discarded if the block raises"""
+        pool = self.get_pool(source_type, config)
+        conn = pool.acquire()
+        try:
+            yield conn
+        except BaseException:
+            pool.release(conn, discard=True)
+            raise
+        else:
+            pool.release(conn)
+
+    def close_all(self):
+        """Close every idle connection (used on shutdown)"""
+        with self._lock:
+            for pool in self._pools.values():
+                pool.close_idle(all_connections=True)
+            self._pools.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pools = {key[:12]: pool.stats() for key, pool in self._pools.items()}
+        return {
+            "pool_count": len(pools),
+            "connections": sum(p["size"] for p in pools.values()),
+            "in_use": sum(p["in_use"] for p in pools.values()),
+            "pools": pools,
+        }
+
+
+# Singleton instance
+connection_pools = ConnectionPoolManager()
@@ -6,7 +6,12 @@ import cx_Oracle
 import psycopg2
 import pymysql
 import pandas as pd
-from typing import List, Dict
+import uuid
+import logging
+from typing import List, Dict, Optional, Iterator
+
+from app.config import DB_FETCH_BATCH_SIZE, DB_LOAD_MAX_ROWS
+from app.database.connection_pool import connection_pools
 
 # Try to import pyodbc (optional - SQL Server support)
 try:
@@ -14,7 +19,6 @@ try:
     HAS_PYODBC = True
 except ImportError:
     HAS_PYODBC = False
-    import logging
     logging.warning("pyodbc not available, SQL Server connections will not work")
 
 
@@ -206,223 +210,285 @@ def test_sqlserver_connection(config: dict) -> dict:
         return {"success": False, "message": str(e)}
 
 
-def get_oracle_tables(config: dict) -> List[str]:
-    """List tables from Oracle database with optional Kerberos support"""
+_LIST_TABLES_QUERIES = {
+    'oracle': """
+        SELECT table_name FROM user_tables 
+        ORDER BY table_name
+    """,
+    'postgresql': """
+        SELECT table_name 
+        FROM information_schema.tables 
+        WHERE table_schema = 'public'
+        ORDER BY table_name
+    """,
+    'mysql': """
+        SELECT table_name 
+        FROM information_schema.tables 
+        WHERE table_schema = DATABASE()
+        ORDER BY table_name
+    """,
+    'sqlserver': """
+        SELECT table_name 
+        FROM information_schema.tables 
+        WHERE table_type = 'BASE TABLE'
+        ORDER BY table_name
+    """,
+}
+
+
+def list_database_tables(source_type: str, config: dict) -> List[str]:
+    """List tables using a pooled connection"""
     try:
-        use_kerberos = config.get('use_kerberos', False)
-        
-        dsn = cx_Oracle.makedsn(
-            config.get('host'),
-            config.get('port', 1521),
-            service_name=config.get('service_name')
-        )
-        
-        if use_kerberos:
-            conn = cx_Oracle.connect(
-                user=config.get('username') + '/',  # External auth format
-                dsn=dsn
-            )
-        else:
-            conn = cx_Oracle.connect(
-                user=config.get('username'),
-                password=config.get('password'),
-                dsn=dsn
-            )
-        
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT table_name FROM user_tables 
-            ORDER BY table_name
-        """)
-        tables = [row[0] for row in cursor.fetchall()]
-        cursor.close()
-        conn.close()
+        with connection_pools.connection(source_type, config) as conn:
+            cursor = conn.cursor()
+            cursor.execute(_LIST_TABLES_QUERIES[source_type])
+            tables = [row[0] for row in cursor.fetchall()]
+            cursor.close()
         return tables
     except Exception as e:
         raise Exception(f"Failed to list tables: {str(e)}")
 
 
+def get_oracle_tables(config: dict) -> List[str]:
+    """List tables from Oracle database with optional Kerberos support"""
+    return list_database_tables('oracle', config)
+
+
 def get_postgresql_tables(config: dict) -> List[str]:
     """List tables from PostgreSQL database with optional Kerberos support"""
-    try:
-        use_kerberos = config.get('use_kerberos', False)
-        
-        if use_kerberos:
-            conn = psycopg2.connect(
-                host=config.get('host'),
-                port=config.get('port', 5432),
-                database=config.get('database'),
-                user=config.get('username'),
-                gssencmode='prefer'
-            )
-        else:
-            conn = psycopg2.connect(
-                host=config.get('host'),
-                port=config.get('port', 5432),
-                database=config.get('database'),
-                user=config.get('username'),
-                password=config.get('password')
-            )
-        
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT table_name 
-            FROM information_schema.tables 
-            WHERE table_schema = 'public'
-            ORDER BY table_name
-        """)
-        tables = [row[0] for row in cursor.fetchall()]
-        cursor.close()
-        conn.close()
-        return tables
-    except Exception as e:
-        raise Exception(f"Failed to list tables: {str(e)}")
+    return list_database_tables('postgresql', config)
 
 
 def get_mysql_tables(config: dict) -> List[str]:
     """List tables from MySQL database with optional Kerberos support"""
-    try:
-        use_kerberos = config.get('use_kerberos', False)
-        
-        if use_kerberos:
-            conn = pymysql.connect(
-                host=config.get('host'),
-                port=int(config.get('port', 3306)),
-                database=config.get('database'),
-                user=config.get('username'),
-                auth_plugin='authentication_kerberos_client'
-            )
-        else:
-            conn = pymysql.connect(
-                host=config.get('host'),
-                port=int(config.get('port', 3306)),
-                database=config.get('database'),
-                user=config.get('username'),
-                password=config.get('password')
-            )
-        
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT table_name 
-            FROM information_schema.tables 
-            WHERE table_schema = DATABASE()
-            ORDER BY table_name
-        """)
-        tables = [row[0] for row in cursor.fetchall()]
-        cursor.close()
-        conn.close()
-        return tables
-    except Exception as e:
-        raise Exception(f"Failed to list tables: {str(e)}")
+    return list_database_tables('mysql', config)
 
 
 def get_sqlserver_tables(config: dict) -> List[str]:
     """List tables from SQL Server database with optional Kerberos support"""
     if not HAS_PYODBC:
         raise Exception("SQL Server support not available (pyodbc not installed)")
+    return list_database_tables('sqlserver', config)
+
+
+def create_connection(source_type: str, config: dict, connect_timeout: int = 10):
+    """
+    Open a connection to an external database with optional Kerberos support
     
-    try:
-        use_kerberos = config.get('use_kerberos', False)
-        
+    Args:
+        source_type: Database type (postgresql, mysql, oracle, sqlserver)
+        config: Connection configuration with optional use_kerberos flag
+        connect_timeout: Connection timeout in seconds
+    
+    Returns:
+        DB-API connection object
+    """
+    use_kerberos = config.get('use_kerberos', False)
+    
+    if source_type == 'postgresql':
+        params = dict(
+            host=config.get('host'),
+            port=config.get('port', 5432),
+            database=config.get('database'),
+            user=config.get('username'),
+            connect_timeout=connect_timeout
+        )
         if use_kerberos:
-            conn_str = (
-                f"DRIVER={{ODBC Driver 17 for SQL Server}};"
-                f"SERVER={config.get('host')},{config.get('port', 1433)};"
-                f"DATABASE={config.get('database')};"
-                f"Trusted_Connection=yes;"
-            )
+            params['gssencmode'] = 'prefer'  # Use GSSAPI/Kerberos
         else:
-            conn_str = (
-                f"DRIVER={{ODBC Driver 17 for SQL Server}};"
-                f"SERVER={config.get('host')},{config.get('port', 1433)};"
-                f"DATABASE={config.get('database')};"
-                f"UID={config.get('username')};"
-                f"PWD={config.get('password')}"
-            )
-        
-        conn = pyodbc.connect(conn_str)
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT table_name 
-            FROM information_schema.tables 
-            WHERE table_type = 'BASE TABLE'
-            ORDER BY table_name
-        """)
-        tables = [row[0] for row in cursor.fetchall()]
-        cursor.close()
-        conn.close()
-        return tables
-    except Exception as e:
-        raise Exception(f"Failed to list tables: {str(e)}")
+            params['password'] = config.get('password')
+        return psycopg2.connect(**params)
+    
+    elif source_type == 'mysql':
+        params = dict(
+            host=config.get('host'),
+            port=int(config.get('port', 3306)),
+            database=config.get('database'),
+            user=config.get('username'),
+            connect_timeout=connect_timeout
+        )
+        if use_kerberos:
+            params['auth_plugin'] = 'authentication_kerberos_client'  # Kerberos plugin
+        else:
+            params['password'] = config.get('password')
+        return pymysql.connect(**params)
+    
+    elif source_type == 'oracle':
+        dsn = cx_Oracle.makedsn(
+            config.get('host'),
+            config.get('port', 1521),
+            service_name=config.get('service_name')
+        )
+        if use_kerberos:
+            # External authentication - username with "/" suffix indicates Kerberos
+            return cx_Oracle.connect(user=config.get('username') + '/', dsn=dsn)
+        return cx_Oracle.connect(
+            user=config.get('username'),
+            password=config.get('password'),
+            dsn=dsn
+        )
+    
+    elif source_type == 'sqlserver':
+        if not HAS_PYODBC:
+            raise ValueError("SQL Server support not available (pyodbc not installed)")
+        conn_str = (
+            f"DRIVER={{ODBC Driver 17 for SQL Server}};"
+            f"SERVER={config.get('host')},{config.get('port', 1433)};"
+            f"DATABASE={config.get('database')};"
+        )
+        if use_kerberos:
+            conn_str += "Trusted_Connection=yes;"  # Windows/Kerberos authentication
+        else:
+            conn_str += f"UID={config.get('username')};PWD={config.get('password')};"
+        conn_str += f"Connection Timeout={connect_timeout};"
+        return pyodbc.connect(conn_str)
+    
+    else:
+        raise ValueError(f"Unsupported source type: {source_type}")
 
 
-def load_table_data(source_type: str, config: dict, table_name: str) -> pd.DataFrame:
-    """Load data from database table with timeout and error handling"""
-    try:
-        if source_type == 'oracle':
-            dsn = cx_Oracle.makedsn(
-                config.get('host'),
-                config.get('port', 1521),
-                service_name=config.get('service_name')
-            )
-            conn = cx_Oracle.connect(
-                user=config.get('username'),
-                password=config.get('password'),
-                dsn=dsn
-            )
-            # Limit to 10000 rows for safety
-            df = pd.read_sql(f"SELECT * FROM {table_name} WHERE ROWNUM <= 10000", conn)
-            conn.close()
-            return df
-            
-        elif source_type == 'postgresql':
-            conn = psycopg2.connect(
-                host=config.get('host'),
-                port=config.get('port', 5432),
-                database=config.get('database'),
-                user=config.get('username'),
-                password=config.get('password'),
-                connect_timeout=10
-            )
-            # Limit to 10000 rows for safety
-            df = pd.read_sql(f"SELECT * FROM {table_name} LIMIT 10000", conn)
-            conn.close()
-            return df
-            
-        elif source_type == 'mysql':
-            conn = pymysql.connect(
-                host=config.get('host'),
-                port=int(config.get('port', 3306)),
-                database=config.get('database'),
-                user=config.get('username'),
-                password=config.get('password'),
-                connect_timeout=10
-            )
-            # Limit to 10000 rows for safety
-            df = pd.read_sql(f"SELECT * FROM {table_name} LIMIT 10000", conn)
-            conn.close()
-            return df
-            
-        elif source_type == 'sqlserver':
-            if not HAS_PYODBC:
-                raise ValueError("SQL Server support not available (pyodbc not installed)")
-            conn_str = (
-                f"DRIVER={{ODBC Driver 17 for SQL Server}};"
-                f"SERVER={config.get('host')},{config.get('port', 1433)};"
-                f"DATABASE={config.get('database')};"
-                f"UID={config.get('username')};"
-                f"PWD={config.get('password')};"
-                f"Connection Timeout=10;"
-            )
-            conn = pyodbc.connect(conn_str)
-            # Limit to 10000 rows for safety
-            df = pd.read_sql(f"SELECT TOP 10000 * FROM {table_name}", conn)
-            conn.close()
-            return df
-            
+def build_table_query(source_type: str, table_name: str, max_rows: Optional[int] = None) -> str:
+    """SELECT * for a table, with the row cap pushed down in the database's own dialect"""
+    if not max_rows:
+        return f"SELECT * FROM {table_name}"
+    if source_type == 'oracle':
+        return f"SELECT * FROM {table_name} WHERE ROWNUM <= {int(max_rows)}"
+    if source_type == 'sqlserver':
+        return f"SELECT TOP {int(max_rows)} * FROM {table_name}"
+    return f"SELECT * FROM {table_name} LIMIT {int(max_rows)}"
+
+
+class QueryStream:
+    """
+    Iterates a query result as DataFrame batches using a server-side cursor
+    
+    - PostgreSQL: named cursor (rows stay on the server until fetched)
+    - MySQL: unbuffered SSCursor
+    - Oracle: cursor arraysize / prefetchrows set to the batch size
+    - SQL Server: fetchmany batches
+    
+    Connections are checked out of the shared connection pool. After
+    iteration, rows_fetched and truncated describe what was read.
+    
+    Usage:
+        stream = QueryStream('postgresql', config, "SELECT * FROM events", max_rows=1_000_000)
+        for batch in stream:
+            ...
+    """
+    
+    def __init__(
+        self,
+        source_type: str,
+        config: dict,
+        query: str,
+        batch_size: Optional[int] = None,
+        max_rows: Optional[int] = None
+    ):
+        self.source_type = source_type
+        self.config = config
+        self.query = query
+        self.batch_size = batch_size or DB_FETCH_BATCH_SIZE
+        self.max_rows = max_rows or None
+        self.columns: List[str] = []
+        self.rows_fetched = 0
+        self.truncated = False
+    
+    def _open_cursor(self, conn):
+        if self.source_type == 'postgresql':
+            cursor = conn.cursor(name=f"promise_stream_{uuid.uuid4().hex[:12]}")
+            cursor.itersize = self.batch_size
+        elif self.source_type == 'mysql':
+            cursor = conn.cursor(pymysql.cursors.SSCursor)
+        elif self.source_type == 'oracle':
+            cursor = conn.cursor()
+            cursor.arraysize = self.batch_size
+            cursor.prefetchrows = self.batch_size + 1
         else:
-            raise ValueError(f"Unsupported source type: {source_type}")
+            cursor = conn.cursor()
+        return cursor
+    
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        pool = connection_pools.get_pool(self.source_type, self.config)
+        conn = pool.acquire()
+        reusable = False
+        try:
+            cursor = self._open_cursor(conn)
+            cursor.execute(self.query)
             
+            while True:
+                # Read one row past the cap so truncation can be reported
+                limit = self.batch_size
+                if self.max_rows is not None:
+                    limit = min(limit, self.max_rows + 1 - self.rows_fetched)
+                rows = cursor.fetchmany(limit)
+                if not self.columns and cursor.description:
+                    # Named (server-side) cursors only expose description after the first fetch
+                    self.columns = [desc[0] for desc in cursor.description]
+                if not rows:
+                    break
+                
+                if self.max_rows is not None and self.rows_fetched + len(rows) > self.max_rows:
+                    rows = rows[:self.max_rows - self.rows_fetched]
+                    self.truncated = True
+                
+                if rows:
+                    self.rows_fetched += len(rows)
+                    yield pd.DataFrame.from_records(
+                        [tuple(row) for row in rows], columns=self.columns, coerce_float=True
+                    )
+                
+                if self.truncated:
+                    logging.info(f"Query result truncated at {self.max_rows} rows")
+                    break
+            
+            # An unbuffered MySQL cursor drains the remaining rows on close, so only
+            # close cursors that were read to the end; a connection with an
+            # abandoned result set is not returned to the pool
+            if not self.truncated:
+                cursor.close()
+                reusable = True
+        finally:
+            pool.release(conn, discard=not reusable)
+
+
+def stream_table_data(
+    source_type: str,
+    config: dict,
+    table_name: str,
+    batch_size: Optional[int] = None,
+    max_rows: Optional[int] = None
+) -> QueryStream:
+    """
+    Stream a database table in fixed-size batches
+    
+    Args:
+        source_type: Database type
+        config: Connection configuration
+        table_name: Table to read
+        batch_size: Rows per batch (defaults to DB_FETCH_BATCH_SIZE)
+        max_rows: Row cap (None or 0 = no cap)
+    
+    Returns:
+        QueryStream yielding DataFrame batches
+    """
+    # Push the cap (+1 row to detect truncation) down to the database
+    query = build_table_query(source_type, table_name, max_rows + 1 if max_rows else None)
+    return QueryStream(source_type, config, query, batch_size=batch_size, max_rows=max_rows)
+
+
+def load_table_data(
+    source_type: str,
+    config: dict,
+    table_name: str,
+    max_rows: Optional[int] = DB_LOAD_MAX_ROWS
+) -> pd.DataFrame:
+    """Load data from database table into a single DataFrame (streamed in batches, capped at max_rows)"""
+    try:
+        stream = stream_table_data(source_type, config, table_name, max_rows=max_rows)
+        frames = list(stream)
+        if not frames:
+            return pd.DataFrame(columns=stream.columns)
+        return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
     except Exception as e:
         raise Exception(f"Failed to load table '{table_name}': {str(e)}")
 
@@ -0,0 +1,417 @@
+"""
+Columnar Dataset Storage
+Persists datasets as compressed Parquet chunks in GridFS or on a local volume.
+A chunk is either one file holding every column or, for derived versions,
+a list of column files that may belong to the dataset it was derived from.
+"""
+import io
+import os
+import uuid
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional, AsyncIterator, Iterable, Set
+
+import pandas as pd
+from bson import ObjectId
+
+from app.config import (
+    DATASET_STORAGE_BACKEND, DATASET_STORAGE_DIR, DATASET_CHUNK_ROWS, PARQUET_COMPRESSION
+)
+from app.database.mongodb import fs
+from app.services.executor_service import run_blocking_io
+
+# Parquet support requires pyarrow
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+    logging.warning("pyarrow not available, columnar dataset storage will not work")
+
+logger = logging.getLogger(__name__)
+
+STORAGE_TYPE_PARQUET = "parquet"
+
+# Inferred object dtypes that Arrow can store natively
+_ARROW_SAFE_OBJECT_TYPES = {
+    "string", "empty", "bytes", "boolean", "integer", "floating",
+    "mixed-integer-float", "decimal", "date", "datetime", "time"
+}
+
+
+def _prepare_for_parquet(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Make a DataFrame writable as Parquet
+
+    Column names must be strings and object columns must hold a single type,
+    so mixed-type object columns are stored as strings (missing values are kept).
+    """
+    if not all(isinstance(col, str) for col in df.columns):
+        df = df.rename(columns=str)
+
+    mixed_cols = [
+        col for col in df.select_dtypes(include=['object']).columns
+        if pd.api.types.infer_dtype(df[col], skipna=True) not in _ARROW_SAFE_OBJECT_TYPES
+    ]
+    if mixed_cols:
+        df = df.copy()
+        for col in mixed_cols:
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+        logger.info(f"Stored mixed-type columns as strings: {mixed_cols[:10]}")
+
+    return df
+
+
+def _local_dataset_dir(dataset_id: str) -> str:
+    return os.path.join(DATASET_STORAGE_DIR, dataset_id)
+
+
+def _encode_parquet(df: pd.DataFrame, compression: str) -> bytes:
+    buffer = io.BytesIO()
+    _prepare_for_parquet(df).to_parquet(buffer, index=False, compression=compression)
+    return buffer.getvalue()
+
+
+def _write_local_file(dataset_dir: str, filename: str, payload: bytes):
+    os.makedirs(dataset_dir, exist_ok=True)
+    with open(os.path.join(dataset_dir, filename), "wb") as f:
+        f.write(payload)
+
+
+class DatasetWriter:
+    """
+    Writes a dataset as a sequence of compressed Parquet chunks
+
+    Usage:
+        writer = DatasetWriter(dataset_id)
+        await writer.write(df)
+        storage_fields = writer.manifest()
+    """
+
+    def __init__(
+        self,
+        dataset_id: str,
+        backend: Optional[str] = None,
+        chunk_rows: Optional[int] = None,
+        compression: Optional[str] = None,
+        first_part: int = 0
+    ):
+        if not HAS_PYARROW:
+            raise RuntimeError("Columnar dataset storage requires pyarrow")
+
+        self.dataset_id = dataset_id
+        self.backend = backend or DATASET_STORAGE_BACKEND
+        self.chunk_rows = chunk_rows or DATASET_CHUNK_ROWS
+        self.compression = compression or PARQUET_COMPRESSION
+        self.first_part = first_part  # Appends continue the part numbering of existing chunks
+        self.write_id = uuid.uuid4().hex[:12]  # Keeps chunk names unique across rewrites
+        self.chunks: List[Dict[str, Any]] = []
+        self.row_count = 0
+        self.total_bytes = 0
+
+        if self.backend not in ("gridfs", "local"):
+            raise ValueError(f"Unsupported dataset storage backend: {self.backend}")
+
+    async def write(self, df: pd.DataFrame):
+        """Append rows to the dataset, splitting them into chunks of chunk_rows"""
+        for start in range(0, len(df), self.chunk_rows):
+            await self._write_chunk(df.iloc[start:start + self.chunk_rows])
+
+    async def _write_chunk(self, df: pd.DataFrame):
+        part = self.first_part + len(self.chunks)
+        chunk = {"part": part, "rows": int(len(df)), **await self._upload(part, df)}
+        self.chunks.append(chunk)
+        self.row_count += chunk["rows"]
+        self.total_bytes += chunk["bytes"]
+
+    async def _upload(self, part: int, df: pd.DataFrame) -> Dict[str, Any]:
+        """Store one Parquet file, returning its location and size"""
+        # Encoding and local writes run off the event loop
+        payload = await run_blocking_io(_encode_parquet, df, self.compression)
+        location = {"bytes": len(payload)}
+
+        if self.backend == "gridfs":
+            file_id = await fs.upload_from_stream(
+                f"dataset_{self.dataset_id}_part{part:05d}.parquet",
+                payload,
+                metadata={"dataset_id": self.dataset_id, "type": "dataset_chunk", "format": "parquet", "part": part}
+            )
+            location["file_id"] = str(file_id)
+        else:
+            filename = f"{self.write_id}-part-{part:05d}.parquet"
+            await run_blocking_io(_write_local_file, _local_dataset_dir(self.dataset_id), filename, payload)
+            location["path"] = filename
+        return location
+
+    def manifest(self) -> Dict[str, Any]:
+        """Storage fields to merge into the dataset document"""
+        return {
+            "storage_type": STORAGE_TYPE_PARQUET,
+            "storage_backend": self.backend,
+            "storage_format": "parquet",
+            "compression": self.compression,
+            "chunks": self.chunks,
+            "storage_size": self.total_bytes,
+            "data": None,
+            "gridfs_file_id": None
+        }
+
+    async def abort(self):
+        """Remove any chunks written so far (used when ingestion fails midway)"""
+        await _delete_chunks(self.dataset_id, self.backend, self.chunks)
+        self.chunks = []
+        self.row_count = 0
+        self.total_bytes = 0
+
+
+class DerivedDatasetWriter(DatasetWriter):
+    """
+    Writes a version of a Parquet-stored dataset that keeps its rows,
+    storing only the columns that changed (copy-on-write)
+
+    Parts are written in the base's order with the base's row counts. Each
+    part references the base files still holding its unchanged columns and
+    gets one new file for its changed (or new) columns.
+
+    Usage:
+        writer = DerivedDatasetWriter(dataset_id, base_dataset, columns)
+        for part_df, changed in parts:
+            await writer.write_part(part_df, changed)
+        storage_fields = writer.manifest()
+    """
+
+    def __init__(self, dataset_id: str, base: Dict[str, Any], columns: List[str], compression: Optional[str] = None):
+        if base.get("storage_type") != STORAGE_TYPE_PARQUET:
+            raise ValueError("Only datasets in columnar storage can be derived copy-on-write")
+        super().__init__(dataset_id, backend=base.get("storage_backend", "gridfs"), compression=compression)
+        self.base = base
+        self.columns = [str(col) for col in columns]
+        self.new_files: List[Dict[str, Any]] = []
+        self.shared_bytes = 0
+
+    async def write(self, df: pd.DataFrame):
+        raise TypeError("DerivedDatasetWriter writes whole base parts - use write_part")
+
+    async def write_part(self, df: pd.DataFrame, changed: Iterable[str]):
+        """
+        Write the next part
+
+        Args:
+            df: The part's rows (same count as the base part) with at least the changed columns
+            changed: Columns whose values differ from the base part
+        """
+        index = len(self.chunks)
+        base_chunks = self.base.get("chunks", [])
+        if index >= len(base_chunks):
+            raise ValueError(f"Base dataset has only {len(base_chunks)} parts")
+        base_chunk = base_chunks[index]
+        if len(df) != base_chunk["rows"]:
+            raise ValueError(f"Part {index} has {len(df)} rows, base part has {base_chunk['rows']}")
+
+        df = df.rename(columns=str) if not all(isinstance(col, str) for col in df.columns) else df
+        changed = {str(col) for col in changed}
+        files, shared = [], set()
+        for base_file in chunk_files(self.base, base_chunk):
+            keep = [col for col in base_file["columns"] if col in self.columns and col not in changed and col not in shared]
+            if keep:
+                files.append({**base_file, "columns": keep})
+                shared.update(keep)
+                self.shared_bytes += base_file.get("bytes", 0)
+
+        written = [col for col in self.columns if col not in shared]
+        if written:
+            entry = {"columns": written, "owner": self.dataset_id, **await self._upload(base_chunk["part"], df[written])}
+            files.append(entry)
+            self.new_files.append(entry)
+            self.total_bytes += entry["bytes"]
+
+        self.chunks.append({
+            "part": base_chunk["part"],
+            "rows": base_chunk["rows"],
+            "bytes": sum(f.get("bytes", 0) for f in files),
+            "files": files
+        })
+        self.row_count += base_chunk["rows"]
+
+    def manifest(self) -> Dict[str, Any]:
+        if len(self.chunks) != len(self.base.get("chunks", [])):
+            raise ValueError(f"Wrote {len(self.chunks)} of {len(self.base.get('chunks', []))} base parts")
+        return {**super().manifest(), "shared_size": self.shared_bytes}
+
+    async def abort(self):
+        """Remove the files written so far; shared base files are left alone"""
+        await _delete_files(self.backend, [(entry, self.dataset_id) for entry in self.new_files])
+        self.new_files = []
+        self.chunks = []
+        self.row_count = 0
+        self.total_bytes = 0
+
+
+def split_parts(dataset: Dict[str, Any], df: pd.DataFrame) -> List[pd.DataFrame]:
+    """Slice a DataFrame aligned to a stored dataset's rows into the dataset's parts"""
+    parts, start = [], 0
+    for chunk in dataset.get("chunks", []):
+        parts.append(df.iloc[start:start + chunk["rows"]])
+        start += chunk["rows"]
+    return parts
+
+
+async def save_dataframe(dataset_id: str, df: pd.DataFrame, backend: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Store a DataFrame as Parquet chunks
+
+    Returns:
+        Storage fields to merge into the dataset document
+    """
+    writer = DatasetWriter(dataset_id, backend=backend)
+    try:
+        await writer.write(df)
+    except Exception:
+        await writer.abort()
+        raise
+    logger.info(
+        f"Stored dataset {dataset_id} as {len(writer.chunks)} parquet chunk(s), "
+        f"{writer.row_count} rows, {writer.total_bytes / (1024 * 1024):.2f} MB"
+    )
+    return writer.manifest()
+
+
+def chunk_files(dataset: Dict[str, Any], chunk: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Column files making up a chunk
+
+    A chunk written in one piece is a single file of every column, owned by
+    the dataset itself.
+    """
+    if "files" in chunk:
+        return chunk["files"]
+    entry = {"columns": [str(col) for col in dataset.get("columns", [])], "owner": dataset["id"], "bytes": chunk.get("bytes", 0)}
+    if "file_id" in chunk:
+        entry["file_id"] = chunk["file_id"]
+    else:
+        entry["path"] = chunk["path"]
+    return [entry]
+
+
+def file_key(backend: str, entry: Dict[str, Any], owner: str) -> str:
+    """Identity of a stored file, shared by every manifest that references it"""
+    if backend == "gridfs":
+        return f"gridfs:{entry['file_id']}"
+    return f"local:{entry.get('owner', owner)}/{entry['path']}"
+
+
+def storage_file_keys(dataset: Dict[str, Any]) -> List[str]:
+    """Keys of every file a Parquet-stored dataset (or version) references"""
+    if dataset.get("storage_type") != STORAGE_TYPE_PARQUET:
+        return []
+    backend = dataset.get("storage_backend", "gridfs")
+    return [
+        file_key(backend, entry, dataset["id"])
+        for chunk in dataset.get("chunks", [])
+        for entry in chunk_files(dataset, chunk)
+    ]
+
+
+async def _read_file(dataset: Dict[str, Any], entry: Dict[str, Any], columns: Optional[List[str]] = None) -> pd.DataFrame:
+    if dataset.get("storage_backend", "gridfs") == "gridfs":
+        grid_out = await fs.open_download_stream(ObjectId(entry["file_id"]))
+        payload = await grid_out.read()
+        return await run_blocking_io(pd.read_parquet, io.BytesIO(payload), columns=columns)
+
+    path = os.path.join(_local_dataset_dir(entry.get("owner", dataset["id"])), entry["path"])
+    return await run_blocking_io(pd.read_parquet, path, columns=columns)
+
+
+async def _read_chunk(dataset: Dict[str, Any], chunk: Dict[str, Any], columns: Optional[List[str]] = None) -> pd.DataFrame:
+    if "files" not in chunk:
+        return await _read_file(dataset, chunk, columns)
+
+    wanted = columns or dataset.get("columns") or [col for entry in chunk["files"] for col in entry["columns"]]
+    wanted_set = set(wanted)
+    frames = await asyncio.gather(*(
+        _read_file(dataset, entry, [col for col in entry["columns"] if col in wanted_set])
+        for entry in chunk["files"] if wanted_set.intersection(entry["columns"])
+    ))
+    if not frames:
+        return pd.DataFrame(index=pd.RangeIndex(chunk["rows"]))
+    df = frames[0] if len(frames) == 1 else pd.concat(frames, axis=1)
+    return df[[col for col in wanted if col in df.columns]]
+
+
+async def iter_dataframe_chunks(
+    dataset: Dict[str, Any],
+    columns: Optional[List[str]] = None
+) -> AsyncIterator[pd.DataFrame]:
+    """Yield a Parquet-stored dataset one chunk at a time"""
+    for chunk in dataset.get("chunks", []):
+        yield await _read_chunk(dataset, chunk, columns)
+
+
+async def read_dataframe(dataset: Dict[str, Any], columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Load a Parquet-stored dataset into a single DataFrame
+
+    Chunks are downloaded and decoded concurrently (decoding runs in the IO pool).
+
+    Args:
+        dataset: Dataset document (must have storage_type 'parquet')
+        columns: Optional subset of columns to read
+
+    Returns:
+        DataFrame with the stored dtypes
+    """
+    frames = await asyncio.gather(*(_read_chunk(dataset, chunk, columns) for chunk in dataset.get("chunks", [])))
+    if not frames:
+        return pd.DataFrame(columns=columns or dataset.get("columns", []))
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames, ignore_index=True)
+
+
+async def _delete_files(backend: str, files: List[tuple]):
+    """Delete (file entry, owning dataset id) pairs"""
+    owner_dirs = set()
+    for entry, owner in files:
+        if backend == "gridfs":
+            try:
+                await fs.delete(ObjectId(entry["file_id"]))
+            except Exception as e:
+                logger.warning(f"Failed to delete GridFS chunk {entry.get('file_id')}: {str(e)}")
+        else:
+            dataset_dir = _local_dataset_dir(entry.get("owner", owner))
+            owner_dirs.add(dataset_dir)
+            try:
+                os.remove(os.path.join(dataset_dir, entry["path"]))
+            except FileNotFoundError:
+                pass
+    for dataset_dir in owner_dirs:
+        try:
+            os.rmdir(dataset_dir)
+        except OSError:
+            pass  # Directory still holds chunks of another write
+
+
+async def _delete_chunks(dataset_id: str, backend: str, chunks: List[Dict[str, Any]]):
+    await _delete_files(backend, [(chunk, dataset_id) for chunk in chunks])
+
+
+async def delete_dataset_storage(dataset: Dict[str, Any], keep: Optional[Set[str]] = None):
+    """
+    Delete the stored files of a Parquet-stored dataset (or dataset version)
+
+    Args:
+        dataset: Document with the storage manifest
+        keep: Keys (file_key) of files still referenced elsewhere, left in place
+    """
+    if dataset.get("storage_type") != STORAGE_TYPE_PARQUET:
+        return
+    backend = dataset.get("storage_backend", "gridfs")
+    files, seen = [], set()
+    for chunk in dataset.get("chunks", []):
+        for entry in chunk_files(dataset, chunk):
+            key = file_key(backend, entry, dataset["id"])
+            if key in seen or (keep is not None and key in keep):
+                continue
+            seen.add(key)
+            files.append((entry, dataset["id"]))
+    await _delete_files(backend, files)
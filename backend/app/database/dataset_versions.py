@@ -0,0 +1,181 @@
+"""
+Dataset Version Store
+Immutable dataset versions: the storage manifest of every version is kept in
+the dataset_versions collection. Versions and derived datasets share the
+Parquet files of unchanged chunks and columns, so a file is deleted only
+once no retained version (of any dataset) references it.
+"""
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Set
+
+from app.config import DATASET_VERSION_HISTORY
+from app.database.mongodb import db
+from app.database.dataset_storage import (
+    STORAGE_TYPE_PARQUET, chunk_files, delete_dataset_storage, storage_file_keys
+)
+
+logger = logging.getLogger(__name__)
+
+# Dataset document fields that make up a version
+VERSION_FIELDS = (
+    "storage_type", "storage_backend", "storage_format", "compression", "chunks",
+    "storage_size", "shared_size", "columns", "dtypes", "row_count", "column_count", "data_preview"
+)
+
+# Fields left out of version listings
+_LISTING_PROJECTION = {"_id": 0, "chunks": 0, "file_keys": 0, "dtypes": 0, "data_preview": 0}
+
+
+def _version_document(
+    dataset: Dict[str, Any],
+    operation: str,
+    parent: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    return {
+        "dataset_id": dataset["id"],
+        "version": dataset.get("version", 1),
+        **{field: dataset[field] for field in VERSION_FIELDS if field in dataset},
+        "operation": operation,
+        "parent": parent,
+        "file_keys": storage_file_keys(dataset),
+        "created_at": datetime.now(timezone.utc).isoformat()
+    }
+
+
+async def record_version(
+    dataset: Dict[str, Any],
+    operation: str,
+    parent: Optional[Dict[str, Any]] = None
+):
+    """
+    Record the current version of a Parquet-stored dataset
+
+    Args:
+        dataset: Dataset document as stored for this version
+        operation: What produced the version ('clean', 'append', 'join', ...)
+        parent: {"dataset_id", "version"} the version was derived from
+    """
+    if dataset.get("storage_type") != STORAGE_TYPE_PARQUET:
+        return
+    document = _version_document(dataset, operation, parent)
+    await db.dataset_versions.update_one(
+        {"dataset_id": dataset["id"], "version": document["version"]},
+        {"$set": document},
+        upsert=True
+    )
+    await prune_versions(dataset["id"])
+
+
+async def commit_version(
+    previous: Dict[str, Any],
+    current: Dict[str, Any],
+    operation: str,
+    parent: Optional[Dict[str, Any]] = None
+):
+    """
+    Record a new version of a dataset, keeping the one it replaced
+
+    The replaced version is recorded first if it never was (datasets get
+    their first version document when they are first changed).
+
+    Args:
+        previous: Dataset document before the change
+        current: Dataset document after the change
+        operation: What produced the new version
+        parent: Version the new one was derived from (defaults to previous)
+    """
+    previous_version = previous.get("version", 1)
+    if not await db.dataset_versions.find_one(
+        {"dataset_id": previous["id"], "version": previous_version}, {"_id": 1}
+    ):
+        await record_version(previous, "create")
+    await record_version(
+        current, operation, parent or {"dataset_id": previous["id"], "version": previous_version}
+    )
+
+
+async def list_versions(dataset: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Retained versions of a dataset, newest first (the current one included)"""
+    versions = await db.dataset_versions.find(
+        {"dataset_id": dataset["id"]}, _LISTING_PROJECTION
+    ).sort("version", -1).to_list(None)
+
+    current = dataset.get("version", 1)
+    if not any(version["version"] == current for version in versions):
+        versions.insert(0, {
+            "dataset_id": dataset["id"],
+            "version": current,
+            **{field: dataset[field] for field in VERSION_FIELDS if field in dataset and field not in _LISTING_PROJECTION},
+            "operation": "create",
+            "parent": None,
+            "created_at": dataset.get("updated_at", dataset.get("created_at"))
+        })
+    for version in versions:
+        version["current"] = version["version"] == current
+    return versions
+
+
+async def get_version(dataset_id: str, version: int) -> Optional[Dict[str, Any]]:
+    """Stored manifest of one dataset version"""
+    return await db.dataset_versions.find_one({"dataset_id": dataset_id, "version": version}, {"_id": 0})
+
+
+async def _referenced_keys(manifest: Dict[str, Any], keys: Set[str]) -> Set[str]:
+    """Keys of a manifest's files still referenced by a version or a current dataset"""
+    referenced = set()
+    async for document in db.dataset_versions.find({"file_keys": {"$in": list(keys)}}, {"_id": 0, "file_keys": 1}):
+        referenced.update(keys.intersection(document["file_keys"]))
+
+    # A dataset without version documents still reads its own files
+    owners = {manifest["id"]}
+    for chunk in manifest.get("chunks", []):
+        owners.update(entry.get("owner", manifest["id"]) for entry in chunk_files(manifest, chunk))
+    async for dataset in db.datasets.find(
+        {"id": {"$in": list(owners)}, "storage_type": STORAGE_TYPE_PARQUET},
+        {"_id": 0, "id": 1, "storage_type": 1, "storage_backend": 1, "chunks": 1, "columns": 1}
+    ):
+        referenced.update(keys.intersection(storage_file_keys(dataset)))
+    return referenced
+
+
+async def release_storage(manifest: Dict[str, Any]):
+    """
+    Delete the files of a version (or dataset) that nothing else references
+
+    Args:
+        manifest: Dataset document or version document whose version was dropped
+    """
+    if "id" not in manifest:
+        manifest = {**manifest, "id": manifest["dataset_id"]}
+    keys = set(storage_file_keys(manifest))
+    if not keys:
+        return
+    keep = await _referenced_keys(manifest, keys)
+    await delete_dataset_storage(manifest, keep=keep)
+    logger.info(f"Released {len(keys - keep)} file(s) of dataset {manifest['id']}, {len(keep)} still shared")
+
+
+async def prune_versions(dataset_id: str, keep: Optional[int] = None):
+    """Drop the versions of a dataset beyond the newest DATASET_VERSION_HISTORY"""
+    keep = DATASET_VERSION_HISTORY if keep is None else keep
+    stale = await db.dataset_versions.find(
+        {"dataset_id": dataset_id}, {"_id": 0}
+    ).sort("version", -1).skip(max(keep, 1)).to_list(None)
+    for version in stale:
+        await db.dataset_versions.delete_one({"dataset_id": dataset_id, "version": version["version"]})
+        await release_storage(version)
+
+
+async def delete_dataset_versions(dataset: Dict[str, Any]):
+    """
+    Drop every version of a deleted dataset and release its files
+
+    Call after the dataset document is deleted; files shared with datasets
+    derived from it are kept.
+    """
+    versions = await db.dataset_versions.find({"dataset_id": dataset["id"]}, {"_id": 0}).to_list(None)
+    await db.dataset_versions.delete_many({"dataset_id": dataset["id"]})
+    for version in versions:
+        await release_storage(version)
+    await release_storage(dataset)
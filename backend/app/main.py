@@ -34,7 +34,7 @@ app.add_middleware(
 )
 
 # Import and include routers
-from app.routes import datasource, analysis, training
+from app.routes import datasource, analysis, training, jobs, models, prediction
 
 # Create main API router
 from fastapi import APIRouter
@@ -44,6 +44,9 @@ api_router = APIRouter(prefix="/api")
 api_router.include_router(datasource.router)
 api_router.include_router(analysis.router)
 api_router.include_router(training.router)
+api_router.include_router(jobs.router)
+api_router.include_router(models.router)
+api_router.include_router(prediction.router)
 
 # Add root endpoint
 @api_router.get("/")
@@ -55,7 +58,10 @@ async def root():
         "endpoints": {
             "datasource": "/api/datasource",
             "analysis": "/api/analysis",
-            "training": "/api/training"
+            "training": "/api/training",
+            "jobs": "/api/jobs",
+            "models": "/api/models",
+            "predict": "/api/predict"
         }
     }
 
@@ -84,6 +90,26 @@ async def get_training_metadata_compat():
 # Include main router
 app.include_router(api_router)
 
+# Run a background job worker inside the API process unless workers are deployed separately
+@app.on_event("startup")
+async def start_job_worker():
+    from app.config import JOB_WORKER_EMBEDDED
+    if JOB_WORKER_EMBEDDED:
+        from app.services.job_service import job_worker
+        job_worker.start()
+
+
+# Release pooled external database connections and worker pools on shutdown
+@app.on_event("shutdown")
+async def close_connection_pools():
+    from app.database.connection_pool import connection_pools
+    from app.services.executor_service import shutdown_executors
+    from app.services.job_service import job_worker
+    await job_worker.stop(timeout=10)
+    connection_pools.close_all()
+    shutdown_executors()
+
+
 # Health check
 @app.get("/health")
 async def health_check():
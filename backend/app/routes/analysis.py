@@ -5,18 +5,40 @@ Handles data analysis, ML training, and visualization
 from fastapi import APIRouter, HTTPException
 import pandas as pd
 import numpy as np
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from datetime import datetime, timezone
 from bson import ObjectId
 import json
+import asyncio
 import uuid
-import io
 
 from app.models.pydantic_models import HolisticRequest, SaveStateRequest
 from app.database.mongodb import db, fs
-from app.services.data_service import generate_data_profile, get_correlation_matrix, clean_data
-from app.services.ml_service import train_multiple_models, suggest_best_target_column, train_models_auto, detect_problem_type
+from app.database.dataset_storage import save_dataframe, read_dataframe, delete_dataset_storage, iter_dataframe_chunks
+from app.database.dataset_versions import commit_version, record_version, get_version
+from app.database.connections import QueryStream
+from app.database.connection_pool import connection_fingerprint
+from app.services.dataframe_cache import dataframe_cache
+from app.services.executor_service import run_cpu_bound, run_blocking_io, executor_stats, io_pool
+from app.services.job_service import register_job_handler, report_progress
+from app.services.cleaning_service import CleaningPipeline
+from app.services.ingest_service import ingest_chunks, ingest_derived, rewritten_columns
+from app.services.gridfs_dataset_service import read_gridfs_dataframe
+from app.services.storage_planner import plan_document, decode_document, estimate_frame_bytes
+from app.config import WORKSPACE_INLINE_MAX_MB, JOIN_MAX_ROWS, MODEL_REGISTRY_ENABLED, TRAINING_RUN_CPU_BUDGET
+from app.services.profiling_service import ProfileAccumulator
+from app.services.profile_store import (
+    get_dataset_profile, update_profile_after_rewrite, get_dataset_correlation_matrix,
+    store_accumulated_profile, is_streamed
+)
+from app.services.key_discovery import KeySignatures, discover_keys, key_signature_cache
+from app.services.feature_pipeline import feature_pipeline_cache, pipeline_key, infer_feature_types, FeaturePipeline
+from app.services.model_registry import model_registry
+from app.services.correlation_service import CORRELATION_METHODS, correlation_report, invalidate_correlations
+from app.services.automl_service import is_finalist
+from app.services.ml_service import train_multiple_models, suggest_best_target_column, train_models_auto, detect_problem_type, train_models_multi_target
 from app.services.visualization_service import generate_auto_charts
+from app.services.sampling_service import sample_for_analysis
 from app.services import time_series_service
 from app.services.chat_service import process_chat_message
 # Phase 3: Import new services for analytics, explainability, and AI insights
@@ -36,46 +58,109 @@ router = APIRouter(prefix="/analysis", tags=["analysis"])
 
 @router.post("/run")
 async def run_analysis(request: Dict[str, Any]):
-    """Run specific analysis type (profile, clean, or visualize) - for DataProfiler and VisualizationPanel components"""
+    """Run specific analysis type (profile, correlation, clean, visualize or insights) - for DataProfiler and VisualizationPanel components"""
     try:
         dataset_id = request.get("dataset_id")
         analysis_type = request.get("analysis_type", "profile")
         
-        df = await load_dataframe(dataset_id)
-        
         if analysis_type == "profile":
-            # Return data profile
-            profile = generate_data_profile(df)
+            # Return the stored data profile (computed and stored on first request)
+            profile = await get_dataset_profile(dataset_id, lambda: load_dataframe(dataset_id))
+            if profile is None:
+                raise HTTPException(404, "Dataset not found")
             return profile
         
-        elif analysis_type == "clean":
-            # Run data cleaning
-            cleaned_df, cleaning_report = clean_data(df)
+        if analysis_type == "correlation":
+            # Pearson or Spearman matrix, computed once per dataset version (large stored datasets are streamed)
+            method = request.get("method", "pearson")
+            if method not in CORRELATION_METHODS:
+                raise HTTPException(400, f"Unsupported correlation method: {method}")
+            matrix = await get_dataset_correlation_matrix(dataset_id, lambda: load_dataframe(dataset_id), method)
+            if matrix is None:
+                raise HTTPException(404, "Dataset not found")
+            return correlation_report(matrix)
+        
+        if analysis_type == "clean":
+            # Declarative cleaning pipeline (default: drop duplicates, fill numeric medians and categorical modes)
+            try:
+                pipeline = CleaningPipeline(request.get("steps"))
+            except ValueError as e:
+                raise HTTPException(400, f"Invalid cleaning steps: {str(e)}")
+            dataset = await db.datasets.find_one({"id": dataset_id}, {"_id": 0, "data": 0})
+            if not dataset:
+                raise HTTPException(404, "Dataset not found")
+            version = dataset.get("version", 1) + 1
+            
+            if is_streamed(dataset):
+                # Too large to load - fit fill values in one pass, clean and write chunk by chunk in another
+                profiler = ProfileAccumulator(exact_max_rows=0)
+                stored = await ingest_chunks(
+                    dataset_id,
+                    pipeline.stream(lambda: iter_dataframe_chunks(dataset)),
+                    backend=dataset.get("storage_backend"),
+                    profiler=profiler
+                )
+                cleaning_report = pipeline.report()
+                rows_before = dataset.get("row_count", 0)
+                if not cleaning_report:
+                    await delete_dataset_storage({**dataset, "chunks": stored["chunks"]})
+            else:
+                df = await load_dataframe(dataset_id)
+                cleaned_df, cleaning_report = await run_cpu_bound(pipeline.run, df)
+                rows_before = len(df)
+                if cleaning_report:
+                    # Steps that keep every row only rewrite the columns they changed
+                    changed = None
+                    if dataset.get("storage_type") == "parquet":
+                        changed = await run_blocking_io(rewritten_columns, df, cleaned_df)
+                    if changed is not None:
+                        stored = await ingest_derived(dataset_id, dataset, cleaned_df, changed)
+                    else:
+                        stored = await ingest_chunks(dataset_id, [cleaned_df], backend=dataset.get("storage_backend"))
             
-            # Update dataset with cleaned data if changes were made
+            # Store the cleaned data as a new version in columnar storage, replacing inline or file data
             if cleaning_report:
-                # Store cleaned data
-                dataset = await db.datasets.find_one({"id": dataset_id}, {"_id": 0})
-                if dataset:
-                    data_dict = cleaned_df.to_dict('records')
-                    await db.datasets.update_one(
-                        {"id": dataset_id},
-                        {"$set": {
-                            "data": data_dict,
-                            "row_count": len(cleaned_df),
-                            "updated_at": datetime.now(timezone.utc).isoformat()
-                        }}
-                    )
+                await db.datasets.update_one(
+                    {"id": dataset_id},
+                    {"$set": {
+                        **stored,
+                        "version": version,
+                        "updated_at": datetime.now(timezone.utc).isoformat()
+                    }}
+                )
+                # Only after the write, so a concurrent load cannot re-cache the old rows
+                dataframe_cache.invalidate(dataset_id)
+                invalidate_correlations(dataset_id)
+                key_signature_cache.invalidate(dataset_id)
+                feature_pipeline_cache.invalidate(dataset_id)
+                # The previous version stays restorable; its files are released when it is pruned
+                current = await db.datasets.find_one({"id": dataset_id}, {"_id": 0, "data": 0, "profile": 0})
+                await commit_version(dataset, current, "clean")
+                if dataset.get("storage_type") == "gridfs" and dataset.get("gridfs_file_id"):
+                    try:
+                        await fs.delete(ObjectId(dataset["gridfs_file_id"]))
+                    except Exception as e:
+                        logger.warning(f"Failed to delete GridFS file of dataset {dataset_id}: {str(e)}")
+                
+                current_profile = dataset.get("profile") if dataset.get("profile_version") == version - 1 else None
+                if is_streamed(dataset):
+                    await store_accumulated_profile(dataset_id, version, profiler)
+                else:
+                    # Re-profile only the columns cleaning changed
+                    await update_profile_after_rewrite(dataset_id, version, df, cleaned_df, previous=current_profile)
             
             return {
                 "cleaning_report": cleaning_report,
-                "rows_before": len(df),
-                "rows_after": len(cleaned_df)
+                "rows_before": rows_before,
+                "rows_after": stored["row_count"] if cleaning_report else rows_before,
+                "version": version if cleaning_report else version - 1
             }
         
-        elif analysis_type == "visualize":
+        df = await load_dataframe(dataset_id)
+        
+        if analysis_type == "visualize":
             # Generate auto charts for visualization panel
-            auto_charts, skipped_charts = generate_auto_charts(df, max_charts=15)
+            auto_charts, skipped_charts = await run_cpu_bound(generate_auto_charts, df, max_charts=15)
             
             # Convert to frontend format with proper structure
             charts = []
@@ -112,7 +197,7 @@ async def run_analysis(request: Dict[str, Any]):
                 from emergentintegrations.llm.chat import LlmChat
                 
                 # Prepare data summary
-                profile = generate_data_profile(df)
+                profile = await get_dataset_profile(dataset_id, lambda: load_dataframe(dataset_id))
                 numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
                 categorical_cols = df.select_dtypes(include=['object', 'category']).columns.tolist()
                 
@@ -157,7 +242,6 @@ Provide actionable insights in bullet points about:
                 logger.error(f"AI insights generation failed: {str(e)}", exc_info=True)
                 # Safe fallback that doesn't rely on undefined variables
                 try:
-                    profile = generate_data_profile(df)
                     numeric_count = len(df.select_dtypes(include=[np.number]).columns)
                     categorical_count = len(df.select_dtypes(include=['object', 'category']).columns)
                 except:
@@ -191,31 +275,37 @@ Provide actionable insights in bullet points about:
 
 
 async def load_dataframe(dataset_id: str) -> pd.DataFrame:
-    """Helper function to load DataFrame from dataset"""
+    """Helper function to load DataFrame from dataset (served from the in-process cache when possible)"""
     import logging
     logger = logging.getLogger(__name__)
     
-    dataset = await db.datasets.find_one({"id": dataset_id}, {"_id": 0})
+    # Metadata only - the inline 'data' array is fetched below on a cache miss
+    dataset = await db.datasets.find_one({"id": dataset_id}, {"_id": 0, "data": 0})
     if not dataset:
         raise HTTPException(404, "Dataset not found")
     
+    version = dataset.get("version", 1)
+    cached_df = dataframe_cache.get(dataset_id, version)
+    if cached_df is not None:
+        logger.info(f"Dataset {dataset_id} v{version} served from cache")
+        return cached_df
+    
     logger.info(f"Loading dataset {dataset_id}, storage_type: {dataset.get('storage_type', 'direct')}")
     
     # Load data based on storage type
-    if dataset.get("storage_type") == "gridfs":
+    if dataset.get("storage_type") == "parquet":
+        try:
+            df = await read_dataframe(dataset)
+            logger.info(f"DataFrame loaded from parquet storage: {len(df)} rows, {len(df.columns)} columns")
+        except Exception as e:
+            logger.error(f"Parquet loading failed: {str(e)}")
+            raise HTTPException(500, f"Failed to load data from storage: {str(e)}")
+    elif dataset.get("storage_type") == "gridfs":
         gridfs_file_id = dataset.get("gridfs_file_id")
         if gridfs_file_id:
             try:
-                grid_out = await fs.open_download_stream(ObjectId(gridfs_file_id))
-                data = await grid_out.read()
-                
-                logger.info(f"GridFS data loaded, size: {len(data)} bytes")
-                
-                if dataset["name"].endswith('.csv'):
-                    df = pd.read_csv(io.BytesIO(data))
-                else:
-                    df = pd.read_excel(io.BytesIO(data))
-                
+                # Parser chosen from the file's format tag (or its content, for untagged files)
+                df = await read_gridfs_dataframe(dataset)
                 logger.info(f"DataFrame loaded from GridFS: {len(df)} rows, {len(df.columns)} columns")
             except Exception as e:
                 logger.error(f"GridFS loading failed: {str(e)}")
@@ -224,7 +314,8 @@ async def load_dataframe(dataset_id: str) -> pd.DataFrame:
             raise HTTPException(500, "GridFS file ID not found")
     else:
         # Direct storage
-        data = dataset.get("data")
+        dataset = await db.datasets.find_one({"id": dataset_id}, {"_id": 0, "data": 1})
+        data = dataset.get("data") if dataset else None
         if data is None:
             logger.error(f"Dataset {dataset_id} has no 'data' field")
             raise HTTPException(500, "Dataset has no data field")
@@ -245,9 +336,63 @@ async def load_dataframe(dataset_id: str) -> pd.DataFrame:
         logger.error(f"DataFrame is empty after loading dataset {dataset_id}")
         raise HTTPException(400, "Loaded DataFrame is empty")
     
+    dataframe_cache.put(dataset_id, version, df)
+    
     return df
 
 
+@router.get("/cache-stats")
+async def get_cache_stats():
+    """DataFrame cache hit/miss/eviction counters"""
+    return dataframe_cache.stats()
+
+
+@router.get("/executor-stats")
+async def get_executor_stats():
+    """CPU/IO worker pool sizes, queue depth and timings"""
+    return executor_stats()
+
+
+def requested_target(user_selection: Optional[Dict[str, Any]]) -> Optional[str]:
+    """First target named in a holistic user_selection (used to stratify the sample)"""
+    if not user_selection:
+        return None
+    for target_info in user_selection.get("target_variables") or []:
+        if isinstance(target_info, dict) and target_info.get("target"):
+            return target_info["target"]
+    return user_selection.get("target_variable")
+
+
+async def dataset_version(dataset_id: str) -> int:
+    """Current version of a dataset (1 for datasets that predate versioning)"""
+    dataset = await db.datasets.find_one({"id": dataset_id}, {"_id": 0, "version": 1})
+    return (dataset or {}).get("version", 1)
+
+
+async def register_best_models(dataset_id: str, target_results: Dict[str, Dict[str, Any]], training: Dict[str, Any]):
+    """
+    Persist each target's best fitted model in the model registry
+    
+    The fitted estimator and preprocessing are removed from the results (they
+    are not JSON material); the best model result gets its "model_id".
+    """
+    version = await dataset_version(dataset_id)
+    for target_col, target_models in target_results.items():
+        preprocessing = target_models.pop("preprocessing", None)
+        models = target_models.get("models") or []
+        estimator = models[0].pop("estimator", None) if models else None
+        if estimator is None or preprocessing is None:
+            continue
+        try:
+            record = await model_registry.register(
+                estimator, models[0], preprocessing, dataset_id, version,
+                target_models.get("problem_type", "regression"), training=training
+            )
+            models[0]["model_id"] = record["id"]
+        except Exception as e:
+            logging.warning(f"Could not register model for target {target_col}: {str(e)}")
+
+
 @router.post("/holistic")
 async def holistic_analysis(request: Dict[str, Any]):
     """Perform comprehensive analysis with optional user variable selection and multiple targets"""
@@ -256,22 +401,39 @@ async def holistic_analysis(request: Dict[str, Any]):
         user_selection = request.get("user_selection")  # Optional user-provided target and features
         problem_type = request.get("problem_type", "auto")  # "auto", "regression", "classification", or "time_series"
         
+        await report_progress("loading", 2, "Loading dataset")
         df = await load_dataframe(dataset_id)
         original_size = len(df)
         
-        # Performance optimization: Intelligent sampling for large datasets
-        SAMPLE_THRESHOLD = 10000  # Sample if more than 10000 rows (increased from 5000)
-        SAMPLE_SIZE = 5000  # Use 5000 rows for training (increased from 3000)
-        is_sampled = False
-        
-        if len(df) > SAMPLE_THRESHOLD:
-            # Stratified sampling if target is available, otherwise random
-            df_analysis = df.sample(n=SAMPLE_SIZE, random_state=42)
-            is_sampled = True
-            logging.info(f"Performance optimization: Sampled {SAMPLE_SIZE} rows from {original_size} for faster analysis")
-        else:
+        # Performance optimization: sample large datasets (strategy and size are reported back)
+        sampling_options = request.get("sampling") or {}
+        try:
+            df_analysis, sampling_info = await run_cpu_bound(
+                sample_for_analysis,
+                df,
+                target_column=requested_target(user_selection),
+                problem_type=problem_type,
+                strategy=sampling_options.get("strategy", "auto"),
+                sample_size=sampling_options.get("sample_size"),
+                time_budget=sampling_options.get("time_budget_s"),
+                time_column=sampling_options.get("time_column")
+            )
+        except ValueError as e:
+            raise HTTPException(400, f"Invalid sampling options: {str(e)}")
+        is_sampled = sampling_info["sampled"]
+        if not is_sampled:
             df_analysis = df.copy()
         
+        # Optional training budget: {"time_budget_s": seconds, "cpu_budget": cores}
+        training_options = request.get("training") or {}
+        try:
+            time_budget = training_options.get("time_budget_s")
+            time_budget = None if time_budget is None else max(0.0, float(time_budget))
+            cpu_budget = training_options.get("cpu_budget")
+            cpu_budget = None if cpu_budget is None else min(max(1, int(cpu_budget)), TRAINING_RUN_CPU_BUDGET)
+        except (TypeError, ValueError) as e:
+            raise HTTPException(400, f"Invalid training options: {str(e)}")
+        
         # Update training counter
         await db.datasets.update_one(
             {"id": dataset_id},
@@ -279,7 +441,14 @@ async def holistic_analysis(request: Dict[str, Any]):
         )
         
         # 1. Data Profiling (use full dataset for profiling)
-        profile = generate_data_profile(df)
+        await report_progress("profiling", 5, "Profiling dataset")
+        profile = await get_dataset_profile(dataset_id, lambda: load_dataframe(dataset_id))
+        await report_progress("profiling", 15, partial={"profile": profile})
+        
+        # Full-dataset correlation matrix, shared by variable validation and the correlation step
+        async def loaded_dataframe():
+            return df
+        correlation_matrix = await get_dataset_correlation_matrix(dataset_id, loaded_dataframe)
         
         # 2. Train ML Models with user selection if provided
         numeric_cols = df_analysis.select_dtypes(include=[np.number]).columns.tolist()
@@ -328,7 +497,8 @@ async def holistic_analysis(request: Dict[str, Any]):
                     validation = variable_intelligence.validate_variable_selection(
                         df=df_analysis,
                         target_variables=all_user_targets,
-                        features=all_user_features
+                        features=all_user_features,
+                        correlation_matrix=correlation_matrix
                     )
                     
                     logging.info(f"Variable validation result: valid={validation['valid']}, override={validation['override_needed']}")
@@ -461,66 +631,73 @@ async def holistic_analysis(request: Dict[str, Any]):
             all_models = []
             all_feedback_messages = []
             
+            target_specs = {}
+            
             for target_col in target_cols:
                 selected_features = target_feature_mapping.get(target_col, [])
                 
                 logging.info(f"Processing target: {target_col} with {len(selected_features)} selected features")
                 
-                # Separate numeric and categorical selected features
-                numeric_selected = []
-                categorical_selected = []
-                excluded_features = []
-                
+                # Type the selected features: numeric, categorical (one-hot), datetime parts or text features
                 if selected_features:
-                    for feat in selected_features:
-                        if feat in df_analysis.columns and feat != target_col:
-                            if pd.api.types.is_numeric_dtype(df_analysis[feat].dtype):
-                                numeric_selected.append(feat)
-                            else:
-                                # Check cardinality for categorical features
-                                unique_count = df_analysis[feat].nunique()
-                                if unique_count <= 50:  # Reasonable for one-hot encoding
-                                    categorical_selected.append(feat)
-                                else:
-                                    excluded_features.append(f"{feat} (too many categories: {unique_count})")
+                    usable = [feat for feat in selected_features if feat in df_analysis.columns and feat != target_col]
+                    spec = infer_feature_types(df_analysis, usable)
                     
                     # Build feedback message for this target
                     feedback_parts = []
                     feedback_parts.append(f"✅ Target '{target_col}':")
-                    if numeric_selected:
-                        feedback_parts.append(f"   • Numeric features: {', '.join(numeric_selected)}")
-                    if categorical_selected:
-                        feedback_parts.append(f"   • Categorical features (encoded): {', '.join(categorical_selected)}")
-                    if excluded_features:
-                        feedback_parts.append(f"   • ⚠️ Excluded: {', '.join(excluded_features)}")
+                    if spec["numeric"]:
+                        feedback_parts.append(f"   • Numeric features: {', '.join(spec['numeric'])}")
+                    if spec["categorical"]:
+                        feedback_parts.append(f"   • Categorical features (encoded): {', '.join(spec['categorical'])}")
+                    if spec["datetime"]:
+                        feedback_parts.append(f"   • Datetime features (year, month, day, weekday): {', '.join(spec['datetime'])}")
+                    if spec["text"]:
+                        feedback_parts.append(f"   • Text features (length, word count): {', '.join(spec['text'])}")
+                    skipped = [feat for feat in usable if not any(feat in cols for cols in spec.values())]
+                    if skipped:
+                        feedback_parts.append(f"   • Identifier columns (not used): {', '.join(skipped)}")
                     
                     all_feedback_messages.append("\n".join(feedback_parts))
-                
-                # Train models for this target
-                try:
-                    if selected_features:
-                        # Create subset dataframe with selected features + target
-                        train_columns = selected_features + [target_col]
-                        df_subset = df_analysis[train_columns].copy()
-                        
-                        # Handle categorical features with one-hot encoding
-                        if categorical_selected:
-                            df_subset = pd.get_dummies(df_subset, columns=categorical_selected, drop_first=True, dtype=int)
-                            logging.info(f"Encoded {len(categorical_selected)} categorical features for target {target_col}")
-                        
-                        target_models = train_models_auto(df_subset, target_col, problem_type=problem_type)
-                    else:
-                        # Train on all numeric features
-                        target_models = train_models_auto(df_analysis, target_col, problem_type=problem_type)
-                    
+                    target_specs[target_col] = spec
+                else:
+                    # Train on all numeric features
+                    target_specs[target_col] = None
+            
+            # Train every target on one shared feature matrix and split, reusing fitted feature pipelines
+            await report_progress("training", 15, f"Training models for {len(target_cols)} target(s)")
+            version = await dataset_version(dataset_id)
+            pipelines = {}
+            for target_col, spec in target_specs.items():
+                pipeline = feature_pipeline_cache.get(dataset_id, version, target_col, pipeline_key(spec))
+                if pipeline is not None:
+                    pipelines[target_col] = pipeline
+            try:
+                target_results = await run_cpu_bound(
+                    train_models_multi_target, df_analysis, target_specs, problem_type=problem_type,
+                    return_estimators=MODEL_REGISTRY_ENABLED, pipelines=pipelines,
+                    cpu_budget=cpu_budget, time_budget=time_budget
+                )
+            except Exception as e:
+                logging.error(f"ML training failed: {str(e)}", exc_info=True)
+                target_results = {target_col: {"error": str(e)} for target_col in target_cols}
+            for target_col, target_models in target_results.items():
+                pipeline = target_models.pop("pipeline", None)
+                if pipeline is not None:
+                    feature_pipeline_cache.put(dataset_id, version, target_col, pipeline_key(target_specs[target_col]), pipeline)
+            await register_best_models(
+                dataset_id, target_results, {"sampling": sampling_info, "time_budget_s": time_budget}
+            )
+            
+            for target_col, target_models in target_results.items():
+                if "error" in target_models:
+                    logging.error(f"ML training failed for target {target_col}: {target_models['error']}")
+                    all_feedback_messages.append(f"⚠️ Training failed for target '{target_col}': {target_models['error']}")
+                elif target_models.get("models"):
                     # Add models to all_models list
-                    if target_models.get("models"):
-                        all_models.extend(target_models["models"])
-                        logging.info(f"Trained {len(target_models['models'])} models for target {target_col}")
-                    
-                except Exception as e:
-                    logging.error(f"ML training failed for target {target_col}: {str(e)}", exc_info=True)
-                    all_feedback_messages.append(f"⚠️ Training failed for target '{target_col}': {str(e)}")
+                    all_models.extend(target_models["models"])
+                    logging.info(f"Trained {len(target_models['models'])} models for target {target_col}")
+            await report_progress("training", 70, partial={"models": all_models})
         
             # Build final selection feedback (only for regression/classification)
             if all_feedback_messages:
@@ -531,19 +708,26 @@ async def holistic_analysis(request: Dict[str, Any]):
                     "is_multi_target": len(target_cols) > 1
                 }
             
-            # Update models_result
+            # Update models_result (budgeted runs report their successive-halving rungs per target)
             models_result = {"models": all_models}
+            automl_reports = {
+                target_col: target_models["training_info"]["automl"]
+                for target_col, target_models in target_results.items()
+                if "automl" in (target_models.get("training_info") or {})
+            }
+            if automl_reports:
+                models_result["training_info"] = {"automl": automl_reports}
         
         # Add performance info if sampled
         if is_sampled:
             models_result["performance_info"] = {
-                "sampled": True,
-                "original_size": original_size,
-                "sample_size": SAMPLE_SIZE,
-                "message": f"⚡ Performance optimized: Used {SAMPLE_SIZE} samples from {original_size} rows for faster analysis"
+                **sampling_info,
+                "message": f"⚡ Performance optimized: Used {sampling_info['sample_size']} {sampling_info['strategy']} samples "
+                           f"from {original_size} rows for faster analysis"
             }
         
         # 3. Generate Auto Charts - filtered to user selection if provided
+        await report_progress("charts", 70, "Generating charts")
         if user_selection and len(target_cols) > 0:
             # Use first target for chart generation (or could generate for all targets)
             first_target = target_cols[0]
@@ -552,31 +736,32 @@ async def holistic_analysis(request: Dict[str, Any]):
             if selected_features:
                 chart_columns = [first_target] + selected_features
                 df_charts = df_analysis[chart_columns].copy()
-                auto_charts, skipped_charts = generate_auto_charts(df_charts, max_charts=15)
+                auto_charts, skipped_charts = await run_cpu_bound(generate_auto_charts, df_charts, max_charts=15)
             else:
-                auto_charts, skipped_charts = generate_auto_charts(df_analysis, max_charts=15)
+                auto_charts, skipped_charts = await run_cpu_bound(generate_auto_charts, df_analysis, max_charts=15)
         else:
-            auto_charts, skipped_charts = generate_auto_charts(df_analysis, max_charts=15)
+            auto_charts, skipped_charts = await run_cpu_bound(generate_auto_charts, df_analysis, max_charts=15)
         
         # 4. Correlation Analysis - filtered to user selection if provided
+        await report_progress("correlations", 80, "Computing correlations")
         if user_selection and len(target_cols) > 0:
             first_target = target_cols[0]
             selected_features = target_feature_mapping.get(first_target, [])
             
             if selected_features:
-                corr_columns = [first_target] + selected_features
-                df_corr = df_analysis[corr_columns].select_dtypes(include=[np.number]).copy()
-                correlations = get_correlation_matrix(df_corr)
+                corr_columns = [col for col in dict.fromkeys([first_target] + selected_features) if col in correlation_matrix.columns]
+                correlations = correlation_report(correlation_matrix.loc[corr_columns, corr_columns])
             else:
-                correlations = get_correlation_matrix(df_analysis)
+                correlations = correlation_report(correlation_matrix)
         else:
-            correlations = get_correlation_matrix(df_analysis)
+            correlations = correlation_report(correlation_matrix)
         
         # ==========================================
         # PHASE 3: Enhanced AI Insights & Explainability
         # ==========================================
         
         # 5A. Generate comprehensive AI insights using Phase 3 service
+        await report_progress("insights", 85, "Generating insights", partial={"correlations": correlations})
         ai_insights_list = []
         insights = "Analysis complete. Explore the charts and model results above."
         
@@ -630,14 +815,14 @@ async def holistic_analysis(request: Dict[str, Any]):
         try:
             if all_models:
                 # Find best model
-                best_model_info = max(all_models, key=lambda m: m.get('r2_score', 0))
+                best_model_info = max(all_models, key=lambda m: (is_finalist(m), m.get('r2_score', 0)))
                 if best_model_info and best_model_info.get('r2_score', 0) > 0.5:  # Only explain good models
                     logging.info(f"Generating explainability for best model: {best_model_info.get('model_name')}")
                     
-                    # Note: We'd need to store the actual trained model object to generate SHAP/LIME
-                    # For now, we'll provide a placeholder structure that frontend can display
+                    # The fitted model is in the registry under model_id (when registration succeeded)
                     explainability_results = {
                         "model_name": best_model_info.get('model_name'),
+                        "model_id": best_model_info.get('model_id'),
                         "target_variable": best_model_info.get('target_variable'),
                         "available": True,
                         "feature_importance": best_model_info.get('feature_importance', {}),
@@ -683,7 +868,7 @@ async def holistic_analysis(request: Dict[str, Any]):
                 "total_columns": int(len(df.columns)),
                 "numeric_columns": int(len(df.select_dtypes(include=[np.number]).columns)),
                 "categorical_columns": int(len(df.select_dtypes(include=['object', 'category']).columns)),
-                "memory_usage_mb": float(round(df.memory_usage(deep=True).sum() / (1024 * 1024), 2))
+                "memory_usage_mb": float(round(estimate_frame_bytes(df) / (1024 * 1024), 2))
             }
         }
         
@@ -772,6 +957,7 @@ async def holistic_analysis(request: Dict[str, Any]):
             "correlations": correlations,
             "insights": insights,
             "training_info": models_result.get("training_info", {}),
+            "sampling": models_result.get("performance_info", sampling_info),
             "volume_analysis": volume_analysis,  # Frontend expects volume_analysis
             "training_metadata": {
                 "training_count": training_count,
@@ -872,23 +1058,28 @@ async def save_analysis_state(request: SaveStateRequest):
             "chat_history": optimized_chat_history
         }
         
-        # Calculate size
-        state_json = json.dumps(full_state_data)
-        state_size = len(state_json.encode('utf-8'))
+        # Encode once - the size decides the tier and the same bytes are stored in it
+        plan = plan_document(full_state_data, WORKSPACE_INLINE_MAX_MB * 1024 * 1024)
+        state_size = plan.size
         
         logger.info(f"Saving workspace: {request.state_name}, size: {state_size / 1024:.2f} KB")
         
-        # Choose storage method - Use GridFS for anything > 2MB
-        if state_size > 2 * 1024 * 1024:  # 2MB threshold (reduced from 10MB)
+        # Link the workspace to the data version it was built on
+        dataset = await db.datasets.find_one({"id": request.dataset_id}, {"_id": 0, "version": 1})
+        dataset_version = dataset.get("version", 1) if dataset else None
+        
+        # Choose storage method - Use GridFS for anything > WORKSPACE_INLINE_MAX_MB
+        if not plan.inline:
             # Store in GridFS with compression
             import gzip
-            compressed_data = gzip.compress(state_json.encode('utf-8'))
+            compressed_data = await run_blocking_io(gzip.compress, plan.payload)
             
             file_id = await fs.upload_from_stream(
-                f"workspace_{state_id}.json.gz",
+                f"workspace_{state_id}.bson.gz",
                 compressed_data,
                 metadata={
                     "type": "workspace_state",
+                    "format": "bson",
                     "state_id": state_id,
                     "dataset_id": request.dataset_id,
                     "state_name": request.state_name,
@@ -901,6 +1092,7 @@ async def save_analysis_state(request: SaveStateRequest):
             state_doc = {
                 "id": state_id,
                 "dataset_id": request.dataset_id,
+                "dataset_version": dataset_version,
                 "state_name": request.state_name,
                 "storage_type": "gridfs",
                 "gridfs_file_id": str(file_id),
@@ -911,14 +1103,16 @@ async def save_analysis_state(request: SaveStateRequest):
             }
             logger.info(f"Stored in GridFS with compression: {len(compressed_data) / 1024:.2f} KB")
         else:
-            # Store directly in MongoDB
+            # Store directly in MongoDB (the encoded fields are copied, not re-encoded)
+            fields = plan.fields()
             state_doc = {
                 "id": state_id,
                 "dataset_id": request.dataset_id,
+                "dataset_version": dataset_version,
                 "state_name": request.state_name,
                 "storage_type": "direct",
-                "analysis_data": optimized_analysis_data,
-                "chat_history": optimized_chat_history,
+                "analysis_data": fields["analysis_data"],
+                "chat_history": fields["chat_history"],
                 "size_bytes": state_size,
                 "created_at": datetime.now(timezone.utc).isoformat(),
                 "updated_at": datetime.now(timezone.utc).isoformat()
@@ -957,18 +1151,30 @@ async def load_analysis_state(state_id: str):
                 data = await grid_out.read()
                 
                 # Check if data is compressed
-                metadata = await grid_out.metadata
-                if metadata and metadata.get("compressed"):
+                metadata = grid_out.metadata or {}
+                if metadata.get("compressed"):
                     import gzip
                     data = gzip.decompress(data)
                 
-                full_state_data = json.loads(data.decode('utf-8'))
+                if metadata.get("format") == "bson":
+                    full_state_data = decode_document(data)
+                else:
+                    full_state_data = json.loads(data.decode('utf-8'))
                 
                 state["analysis_data"] = full_state_data.get("analysis_data", {})
                 state["chat_history"] = full_state_data.get("chat_history", [])
                 state.pop("gridfs_file_id", None)
                 state.pop("storage_type", None)
         
+        # Flag workspaces whose dataset moved on since they were saved
+        if state.get("dataset_version") is not None:
+            dataset = await db.datasets.find_one({"id": state["dataset_id"]}, {"_id": 0, "version": 1})
+            if dataset:
+                state["current_dataset_version"] = dataset.get("version", 1)
+                state["dataset_changed"] = state["current_dataset_version"] != state["dataset_version"]
+                if state["dataset_changed"]:
+                    state["dataset_version_retained"] = await get_version(state["dataset_id"], state["dataset_version"]) is not None
+        
         return state
         
     except HTTPException:
@@ -1043,10 +1249,10 @@ async def validate_chart_request(request: Dict[str, Any]):
             raise HTTPException(404, "Dataset not found")
         
         # Load data
-        if dataset.get("gridfs_file_id"):
-            grid_out = await fs.open_download_stream(ObjectId(dataset["gridfs_file_id"]))
-            data_bytes = await grid_out.read()
-            df = pd.read_json(io.BytesIO(data_bytes))
+        if dataset.get("storage_type") == "parquet":
+            df = await read_dataframe(dataset)
+        elif dataset.get("gridfs_file_id"):
+            df = await read_gridfs_dataframe(dataset)
         else:
             df = pd.DataFrame(dataset.get("data", []))
         
@@ -1090,18 +1296,22 @@ async def validate_variables(request: Dict[str, Any]):
             raise HTTPException(404, "Dataset not found")
         
         # Load data
-        if dataset.get("gridfs_file_id"):
-            grid_out = await fs.open_download_stream(ObjectId(dataset["gridfs_file_id"]))
-            data_bytes = await grid_out.read()
-            df = pd.read_json(io.BytesIO(data_bytes))
+        if dataset.get("storage_type") == "parquet":
+            df = await read_dataframe(dataset)
+        elif dataset.get("gridfs_file_id"):
+            df = await read_gridfs_dataframe(dataset)
         else:
             df = pd.DataFrame(dataset.get("data", []))
         
-        # Validate variables
+        # Validate variables against the dataset's cached correlation matrix
+        async def loaded_dataframe():
+            return df
+        correlation_matrix = await get_dataset_correlation_matrix(dataset_id, loaded_dataframe)
         validation = variable_intelligence.validate_variable_selection(
             df=df,
             target_variables=target_variables,
-            features=features
+            features=features,
+            correlation_matrix=correlation_matrix
         )
         
         return validation
@@ -1223,13 +1433,18 @@ async def hyperparameter_tuning_endpoint(request: Dict[str, Any]):
             raise HTTPException(400, "Missing required parameters")
         
         # Load data
+        await report_progress("loading", 5, "Loading dataset")
         df = await load_dataframe(dataset_id)
         
-        # Prepare features and target
-        numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-        feature_cols = [col for col in numeric_cols if col != target_column]
+        # Prepare features with the pipeline training used for this target (all numeric features)
+        version = await dataset_version(dataset_id)
+        pipeline = feature_pipeline_cache.get(dataset_id, version, target_column, pipeline_key(None))
+        if pipeline is None:
+            numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+            pipeline = FeaturePipeline.fit(df, numeric=[col for col in numeric_cols if col != target_column])
+            feature_pipeline_cache.put(dataset_id, version, target_column, pipeline_key(None), pipeline)
         
-        X = df[feature_cols].fillna(df[feature_cols].mean())
+        X = pipeline.transform(df)
         y = df[target_column].fillna(df[target_column].mean() if problem_type == "regression" else df[target_column].mode()[0])
         
         # Split data
@@ -1237,12 +1452,15 @@ async def hyperparameter_tuning_endpoint(request: Dict[str, Any]):
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
         
         # Perform tuning
+        await report_progress("tuning", 15, f"Running {search_type} search for {model_type}")
         if search_type == "grid":
-            results = hyperparameter_service.tune_hyperparameters_grid(
+            results = await run_cpu_bound(
+                hyperparameter_service.tune_hyperparameters_grid,
                 X_train, y_train, model_type, problem_type, param_grid
             )
         else:
-            results = hyperparameter_service.tune_hyperparameters_random(
+            results = await run_cpu_bound(
+                hyperparameter_service.tune_hyperparameters_random,
                 X_train, y_train, model_type, problem_type, param_grid, n_iter
             )
         
@@ -1342,7 +1560,6 @@ async def retrain_with_feedback(request: Dict[str, Any]):
     """
     try:
         from app.services.feedback_service import FeedbackTracker
-        from app.services.ml_service import train_models_auto
         
         dataset_id = request.get("dataset_id")
         model_name = request.get("model_name")
@@ -1362,12 +1579,19 @@ async def retrain_with_feedback(request: Dict[str, Any]):
         feedback_df = feedback_df.rename(columns={"actual_outcome": target_column})
         
         # Train model with feedback data
-        results = train_models_auto(feedback_df, target_column, problem_type="auto")
+        results = await run_cpu_bound(
+            train_models_auto, feedback_df, target_column, problem_type="auto",
+            return_estimator=MODEL_REGISTRY_ENABLED
+        )
+        await register_best_models(
+            dataset_id, {target_column: results}, {"source": "feedback", "feedback_samples": len(feedback_df)}
+        )
         
         return {
             "success": True,
             "message": f"Model retrained with {len(feedback_df)} feedback samples",
             "models": results.get("models", []),
+            "model_id": (results.get("models") or [{}])[0].get("model_id"),
             "feedback_samples": len(feedback_df)
         }
         
@@ -1378,6 +1602,55 @@ async def retrain_with_feedback(request: Dict[str, Any]):
         raise HTTPException(500, f"Retraining failed: {str(e)}")
 
 
+async def _load_join_columns(dataset: Dict[str, Any], columns: list) -> pd.DataFrame:
+    """Just the given columns of a dataset (whole-file storage is loaded, and cached, in full)"""
+    if dataset.get("storage_type") == "parquet":
+        return await read_dataframe(dataset, columns)
+    df = await load_dataframe(dataset["id"])
+    return df[columns]
+
+
+async def _key_signatures(dataset: Dict[str, Any]) -> KeySignatures:
+    """Key signatures of a dataset version, computed once and then served from the cache"""
+    version = dataset.get("version", 1)
+    signatures = key_signature_cache.get(dataset["id"], version)
+    if signatures is None:
+        df = await load_dataframe(dataset["id"])
+        signatures = await run_blocking_io(KeySignatures.from_frame, df)
+        key_signature_cache.put(dataset["id"], version, signatures)
+    return signatures
+
+
+def _join_pushdown_query(datasets: list, connection: Optional[Dict[str, Any]], join_keys: list, how: str) -> Optional[str]:
+    """
+    SQL for joining the datasets inside their source database, if that is equivalent
+
+    Every dataset must be an unmodified, complete load (version 1, neither
+    truncated nor sampled) of a table or query from the database the
+    request's connection points at. Credentials are not stored with
+    datasets, so the connection has to come with the request.
+    """
+    from app.services.relational_service import build_join_query
+    
+    if not connection or not connection.get("source_type"):
+        return None
+    source_type = connection["source_type"]
+    fingerprint = connection_fingerprint(source_type, connection.get("config") or {})
+    for dataset in datasets:
+        if dataset.get("connection_key") != fingerprint or dataset.get("version", 1) != 1:
+            return None
+        if dataset.get("truncated") or (dataset.get("sampling") or {}).get("sampled"):
+            return None
+        if not (dataset.get("table_name") or dataset.get("query")):
+            return None
+    return build_join_query(
+        source_type,
+        [{"table_name": d.get("table_name"), "query": d.get("query"), "columns": d.get("columns", [])} for d in datasets],
+        join_keys,
+        how
+    )
+
+
 @router.post("/relational/join")
 async def join_datasets(request: Dict[str, Any]):
     """
@@ -1387,11 +1660,21 @@ async def join_datasets(request: Dict[str, Any]):
     {
         "dataset_ids": ["id1", "id2"],
         "join_keys": [{"left": "col1", "right": "col2"}],
-        "join_type": "inner" | "left" | "right" | "outer"
+        "join_type": "inner" | "left" | "right" | "outer",
+        "connection": {"source_type": "postgresql", "config": {...}},  (optional)
+        "estimate_only": false
     }
+    
+    Datasets loaded from the database given in "connection" are joined by
+    that database in one query. Otherwise the tables are loaded concurrently
+    and hash-joined: the result size is computed from the key columns first
+    (returned alone with estimate_only) and joins beyond JOIN_MAX_ROWS are
+    refused before any rows are materialised.
     """
     try:
-        from app.services.relational_service import join_tables, detect_foreign_keys
+        from app.services.relational_service import (
+            hash_join, estimate_join_chain, JoinTooLarge, JOIN_TYPES
+        )
         
         dataset_ids = request.get("dataset_ids", [])
         join_keys = request.get("join_keys", [])
@@ -1400,45 +1683,103 @@ async def join_datasets(request: Dict[str, Any]):
         
         if len(dataset_ids) < 2:
             raise HTTPException(400, "At least 2 datasets required for join")
-        
-        # Load datasets
-        dfs = []
-        for dataset_id in dataset_ids:
-            df = await load_dataframe(dataset_id)
-            dfs.append(df)
+        if join_type not in JOIN_TYPES:
+            raise HTTPException(400, f"Unsupported join type '{join_type}'")
+        
+        datasets = await asyncio.gather(*(
+            db.datasets.find_one({"id": dataset_id}, {"_id": 0, "data": 0, "profile": 0})
+            for dataset_id in dataset_ids
+        ))
+        if not all(datasets):
+            raise HTTPException(404, "Dataset not found")
         
         # Auto-detect foreign keys if requested
-        if auto_detect and len(dfs) == 2:
-            detected_fks = detect_foreign_keys(dfs[0], dfs[1])
+        if auto_detect and len(datasets) == 2:
+            left_signatures, right_signatures = await asyncio.gather(*(_key_signatures(d) for d in datasets))
+            detected_fks = await run_blocking_io(discover_keys, left_signatures, right_signatures)
             if detected_fks:
                 return {
-                    "auto_detected_keys": [
-                        {"left": left, "right": right} 
-                        for left, right in detected_fks
-                    ]
+                    "auto_detected_keys": detected_fks
                 }
         
         # Perform join
         if len(join_keys) == 0:
             raise HTTPException(400, "No join keys specified")
         
+        keys = [(join_key["left"], join_key["right"]) for join_key in join_keys]
+        datasets = datasets[:len(keys) + 1]
+        joined_id = str(uuid.uuid4())
+        
+        query = _join_pushdown_query(datasets, request.get("connection"), keys, join_type)
+        if query:
+            connection = request["connection"]
+            if request.get("estimate_only"):
+                return {"join_mode": "pushdown", "join_plan": {"query": query}}
+            
+            stream = QueryStream(connection["source_type"], connection.get("config") or {}, query, max_rows=JOIN_MAX_ROWS)
+            profiler = ProfileAccumulator()
+            ingest_result = await ingest_chunks(joined_id, io_pool.iterate(stream), profiler=profiler)
+            dataset_doc = {
+                "id": joined_id,
+                "version": 1,
+                "name": f"Joined_{len(datasets)}_tables",
+                "source": "relational_join",
+                "db_type": connection["source_type"],
+                "connection_key": datasets[0]["connection_key"],
+                "query": query,
+                **ingest_result,
+                "truncated": stream.truncated,
+                "row_cap": JOIN_MAX_ROWS,
+                "created_at": datetime.now(timezone.utc).isoformat()
+            }
+            await db.datasets.insert_one(dataset_doc)
+            await store_accumulated_profile(joined_id, 1, profiler)
+            await record_version(dataset_doc, "join")
+            
+            return {
+                "success": True,
+                "joined_dataset_id": joined_id,
+                "row_count": ingest_result["row_count"],
+                "column_count": ingest_result["column_count"],
+                "join_mode": "pushdown",
+                "join_plan": {"query": query, "truncated": stream.truncated}
+            }
+        
+        # Size the join from the key columns alone
+        key_names = {name for pair in keys for name in pair}
+        key_frames = await asyncio.gather(*(
+            _load_join_columns(dataset, [col for col in dataset.get("columns", []) if col in key_names])
+            for dataset in datasets
+        ))
+        try:
+            steps = await run_blocking_io(estimate_join_chain, list(key_frames), keys, join_type)
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+        join_plan = {"steps": steps, "estimated_rows": steps[-1]["estimated_rows"], "max_rows": JOIN_MAX_ROWS}
+        if request.get("estimate_only"):
+            return {"join_mode": "hash", "join_plan": join_plan}
+        if join_plan["estimated_rows"] > JOIN_MAX_ROWS:
+            raise HTTPException(
+                400, f"Join would produce about {join_plan['estimated_rows']:,} rows (limit {JOIN_MAX_ROWS:,})"
+            )
+        
+        dfs = await asyncio.gather(*(load_dataframe(dataset["id"]) for dataset in datasets))
         result_df = dfs[0]
         for i in range(1, len(dfs)):
-            if i - 1 < len(join_keys):
-                join_key = join_keys[i - 1]
-                result_df = join_tables(
-                    result_df,
-                    dfs[i],
-                    left_on=join_key["left"],
-                    right_on=join_key["right"],
-                    how=join_type
+            left_key, right_key = keys[i - 1]
+            try:
+                result_df, cardinality = await run_blocking_io(
+                    hash_join, result_df, dfs[i], left_key, right_key, join_type, max_rows=JOIN_MAX_ROWS
                 )
+            except JoinTooLarge as e:
+                raise HTTPException(400, str(e))
+            steps[i - 1]["rows"] = cardinality["rows"]
         
         # Store joined dataset
-        joined_id = str(uuid.uuid4())
         dataset_doc = {
             "id": joined_id,
-            "name": f"Joined_{len(dataset_ids)}_tables",
+            "version": 1,
+            "name": f"Joined_{len(datasets)}_tables",
             "source": "relational_join",
             "columns": result_df.columns.tolist(),
             "dtypes": {col: str(dtype) for col, dtype in result_df.dtypes.items()},
@@ -1446,17 +1787,29 @@ async def join_datasets(request: Dict[str, Any]):
             "created_at": datetime.now(timezone.utc).isoformat()
         }
         
-        await db.datasets.insert_one(dataset_doc)
+        # A left join that keeps the left rows shares the left dataset's unchanged column files
+        left = datasets[0]
+        changed = None
+        if join_type == "left" and left.get("storage_type") == "parquet":
+            changed = await run_blocking_io(rewritten_columns, dfs[0], result_df)
         
-        # Store data
-        data_collection = f"data_{joined_id}"
-        await db[data_collection].insert_many(result_df.to_dict('records'))
+        # Store data as Parquet chunks
+        if changed is not None:
+            dataset_doc.update(await ingest_derived(joined_id, left, result_df, changed))
+            parent = {"dataset_id": left["id"], "version": left.get("version", 1)}
+        else:
+            dataset_doc.update(await save_dataframe(joined_id, result_df))
+            parent = None
+        await db.datasets.insert_one(dataset_doc)
+        await record_version(dataset_doc, "join", parent=parent)
         
         return {
             "success": True,
             "joined_dataset_id": joined_id,
             "row_count": len(result_df),
-            "column_count": len(result_df.columns)
+            "column_count": len(result_df.columns),
+            "join_mode": "hash",
+            "join_plan": join_plan
         }
         
     except HTTPException:
@@ -1466,3 +1819,8 @@ async def join_datasets(request: Dict[str, Any]):
         raise HTTPException(500, f"Join failed: {str(e)}")
 
 
+
+
+# Long-running endpoints that can also be queued through /api/jobs
+register_job_handler("holistic_analysis", holistic_analysis)
+register_job_handler("hyperparameter_tuning", hyperparameter_tuning_endpoint)
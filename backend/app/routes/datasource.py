@@ -3,26 +3,48 @@ Data Source Routes
 Handles file upload, database connections, and data loading
 """
 from fastapi import APIRouter, UploadFile, File, HTTPException, Form
-from typing import List
+from typing import List, Optional
 import pandas as pd
 import uuid
 from datetime import datetime, timezone
-import io
 import os
 import psycopg2
 import pymysql
 
 from app.models.pydantic_models import DataSourceConfig, DataSourceTest
 from app.database.mongodb import db, fs
+from app.database.dataset_storage import read_dataframe
+from app.database.dataset_versions import (
+    VERSION_FIELDS, commit_version, list_versions, get_version, delete_dataset_versions
+)
+from app.database.connection_pool import connection_pools, connection_fingerprint
+from app.services.executor_service import io_pool, run_blocking_io
 from app.database.connections import (
     test_oracle_connection, test_postgresql_connection, test_mysql_connection,
     test_sqlserver_connection, get_oracle_tables, get_postgresql_tables,
-    get_mysql_tables, get_sqlserver_tables, load_table_data, parse_connection_string
+    get_mysql_tables, get_sqlserver_tables, parse_connection_string,
+    create_connection, stream_table_data, QueryStream
+)
+from app.services.profiling_service import ProfileAccumulator
+from app.services.profile_store import (
+    store_accumulated_profile, expand_profile, load_profile_state, delete_profile_state
 )
-from app.services.data_service import generate_data_profile
+from app.services.dataframe_cache import dataframe_cache
+from app.services.correlation_service import invalidate_correlations
+from app.services.key_discovery import key_signature_cache
+from app.services.feature_pipeline import feature_pipeline_cache
+from app.services.model_registry import model_registry
+from app.services.ingest_service import iter_file_chunks, ingest_chunks, preview_records
+from app.services.gridfs_dataset_service import read_gridfs_dataframe
+from app.services.sampling_service import ReservoirStream
+from app.services.streaming_stats import stream_statistics
+from app.config import MAX_FILE_SIZE, ALLOWED_EXTENSIONS, DB_LOAD_MAX_ROWS
 
 router = APIRouter(prefix="/datasource", tags=["datasource"])
 
+# Rows fetched by a query preview
+QUERY_PREVIEW_ROWS = 10
+
 
 def create_db_connection(db_type: str, config: dict):
     """
@@ -35,104 +57,49 @@ def create_db_connection(db_type: str, config: dict):
     Returns:
         Database connection object
     """
-    use_kerberos = config.get('use_kerberos', False)
-    
-    if db_type == "postgresql":
-        import psycopg2
-        if use_kerberos:
-            return psycopg2.connect(
-                host=config.get("host"),
-                port=config.get("port", 5432),
-                user=config.get("username"),
-                database=config.get("database"),
-                gssencmode='prefer'  # Use GSSAPI/Kerberos
-            )
-        else:
-            return psycopg2.connect(
-                host=config.get("host"),
-                port=config.get("port", 5432),
-                user=config.get("username"),
-                password=config.get("password"),
-                database=config.get("database")
-            )
-    
-    elif db_type == "mysql":
-        import pymysql
-        if use_kerberos:
-            return pymysql.connect(
-                host=config.get("host"),
-                port=int(config.get("port", 3306)),
-                user=config.get("username"),
-                database=config.get("database"),
-                auth_plugin='authentication_kerberos_client'  # Kerberos plugin
-            )
-        else:
-            return pymysql.connect(
-                host=config.get("host"),
-                port=int(config.get("port", 3306)),
-                user=config.get("username"),
-                password=config.get("password"),
-                database=config.get("database")
-            )
-    
-    elif db_type == "oracle":
-        import cx_Oracle
-        dsn = cx_Oracle.makedsn(
-            config.get("host"),
-            config.get("port", 1521),
-            service_name=config.get("service_name")
-        )
-        if use_kerberos:
-            # Oracle Kerberos via external authentication
-            return cx_Oracle.connect(
-                user=config.get("username") + '/',  # External auth format
-                dsn=dsn
-            )
-        else:
-            return cx_Oracle.connect(
-                user=config.get("username"),
-                password=config.get("password"),
-                dsn=dsn
-            )
-    
-    elif db_type == "sqlserver":
-        import pyodbc
-        if use_kerberos:
-            # SQL Server with Kerberos/Windows Integrated Authentication
-            conn_str = (
-                f"DRIVER={{ODBC Driver 17 for SQL Server}};"
-                f"SERVER={config.get('host')},{config.get('port', 1433)};"
-                f"DATABASE={config.get('database')};"
-                f"Trusted_Connection=yes;"
-            )
-        else:
-            conn_str = (
-                f"DRIVER={{ODBC Driver 17 for SQL Server}};"
-                f"SERVER={config.get('host')},{config.get('port', 1433)};"
-                f"DATABASE={config.get('database')};"
-                f"UID={config.get('username')};"
-                f"PWD={config.get('password')}"
-            )
-        return pyodbc.connect(conn_str)
-    
-    else:
-        raise ValueError(f"Unsupported database type: {db_type}")
+    return create_connection(db_type, config)
+
+
+def resolve_row_cap(max_rows: Optional[int]) -> Optional[int]:
+    """Row cap for a database load: None uses DB_LOAD_MAX_ROWS, 0 means no cap"""
+    if max_rows is None:
+        max_rows = DB_LOAD_MAX_ROWS
+    return int(max_rows) or None
+
+
+def load_mongo_collection(config: dict, collection_name: str, limit: int = 10000) -> pd.DataFrame:
+    """Read up to limit documents of an external MongoDB collection (blocking pymongo call)"""
+    from pymongo import MongoClient
+    client = MongoClient(
+        host=config.get("host"),
+        port=config.get("port", 27017),
+        username=config.get("username"),
+        password=config.get("password"),
+        serverSelectionTimeoutMS=10000
+    )
+    try:
+        collection = client[config.get("database")][collection_name]
+        data = list(collection.find().limit(limit))
+    finally:
+        client.close()
+    if data and '_id' in data[0]:
+        for doc in data:
+            doc['_id'] = str(doc['_id'])
+    return pd.DataFrame(data)
 
 
 @router.post("/upload-file")
 async def upload_file(file: UploadFile = File(...)):
-    """Upload and preview data file using GridFS for large files"""
+    """Upload data file, streaming it in chunks into columnar dataset storage"""
+    # The upload is already spooled to a temporary file; check its size before parsing
+    file.file.seek(0, os.SEEK_END)
+    file_size = file.file.tell()
+    file.file.seek(0)
+    if file_size > MAX_FILE_SIZE:
+        raise HTTPException(413, f"File too large ({file_size / (1024 * 1024):.0f} MB). Maximum is {MAX_FILE_SIZE / (1024 * 1024):.0f} MB.")
+    
     try:
-        # Read file content
-        contents = await file.read()
-        file_size = len(contents)
-        
-        # Read into DataFrame
-        if file.filename.endswith('.csv'):
-            df = pd.read_csv(io.BytesIO(contents))
-        elif file.filename.endswith(('.xlsx', '.xls')):
-            df = pd.read_excel(io.BytesIO(contents))
-        else:
+        if not file.filename.lower().endswith(tuple(ALLOWED_EXTENSIONS)):
             raise HTTPException(400, "Unsupported file format. Please upload CSV or Excel files.")
         
         # Generate unique dataset ID
@@ -152,37 +119,25 @@ async def upload_file(file: UploadFile = File(...)):
                 existing = await db.datasets.find_one({"name": filename})
                 counter += 1
         
+        # Parse and store chunk by chunk - the whole file is never held in memory
+        profiler = ProfileAccumulator()
+        ingest_result = await ingest_chunks(
+            dataset_id, io_pool.iterate(iter_file_chunks(file.file, file.filename)), profiler=profiler
+        )
+        
         # Prepare dataset metadata
         dataset_doc = {
             "id": dataset_id,
+            "version": 1,
             "name": filename,
-            "row_count": len(df),
-            "column_count": len(df.columns),
-            "columns": df.columns.tolist(),
-            "dtypes": df.dtypes.astype(str).to_dict(),
             "file_size": file_size,
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            **ingest_result
         }
         
-        # Store based on size
-        if file_size > 5 * 1024 * 1024:  # 5MB threshold
-            # Store in GridFS
-            file_id = await fs.upload_from_stream(
-                filename,
-                io.BytesIO(contents),
-                metadata={"dataset_id": dataset_id, "type": "dataset"}
-            )
-            dataset_doc["storage_type"] = "gridfs"
-            dataset_doc["gridfs_file_id"] = str(file_id)
-            dataset_doc["data_preview"] = df.head(10).to_dict('records')
-        else:
-            # Store directly
-            dataset_doc["storage_type"] = "direct"
-            dataset_doc["data"] = df.to_dict('records')
-            dataset_doc["data_preview"] = df.head(10).to_dict('records')
-        
-        # Save to database
+        # Save to database, then the profile built during ingest
         await db.datasets.insert_one(dataset_doc)
+        await store_accumulated_profile(dataset_id, 1, profiler)
         
         # Remove _id for response
         dataset_doc.pop("_id", None)
@@ -200,13 +155,13 @@ async def test_connection(request: DataSourceTest):
     """Test database connection"""
     try:
         if request.source_type == 'oracle':
-            result = test_oracle_connection(request.config)
+            result = await run_blocking_io(test_oracle_connection, request.config)
         elif request.source_type == 'postgresql':
-            result = test_postgresql_connection(request.config)
+            result = await run_blocking_io(test_postgresql_connection, request.config)
         elif request.source_type == 'mysql':
-            result = test_mysql_connection(request.config)
+            result = await run_blocking_io(test_mysql_connection, request.config)
         elif request.source_type == 'sqlserver':
-            result = test_sqlserver_connection(request.config)
+            result = await run_blocking_io(test_sqlserver_connection, request.config)
         elif request.source_type == 'mongodb':
             await db.command('ping')
             result = {"success": True, "message": "Connection successful"}
@@ -223,13 +178,13 @@ async def list_tables(request: DataSourceTest):
     """List available tables/collections"""
     try:
         if request.source_type == 'oracle':
-            tables = get_oracle_tables(request.config)
+            tables = await run_blocking_io(get_oracle_tables, request.config)
         elif request.source_type == 'postgresql':
-            tables = get_postgresql_tables(request.config)
+            tables = await run_blocking_io(get_postgresql_tables, request.config)
         elif request.source_type == 'mysql':
-            tables = get_mysql_tables(request.config)
+            tables = await run_blocking_io(get_mysql_tables, request.config)
         elif request.source_type == 'sqlserver':
-            tables = get_sqlserver_tables(request.config)
+            tables = await run_blocking_io(get_sqlserver_tables, request.config)
         elif request.source_type == 'mongodb':
             collections = await db.list_collection_names()
             tables = [c for c in collections if not c.startswith('system.')]
@@ -241,6 +196,12 @@ async def list_tables(request: DataSourceTest):
         raise HTTPException(500, f"Failed to list tables: {str(e)}")
 
 
+@router.get("/pool-stats")
+async def get_pool_stats():
+    """External database connection pool sizes and checkout counters"""
+    return connection_pools.stats()
+
+
 @router.post("/parse-connection-string")
 async def parse_conn_string(source_type: str = Form(...), connection_string: str = Form(...)):
     """Parse connection string into config parameters"""
@@ -252,76 +213,70 @@ async def parse_conn_string(source_type: str = Form(...), connection_string: str
 
 
 @router.post("/load-table")
-async def load_table_endpoint(request: DataSourceTest, table_name: str):
-    """Load data from database table with GridFS support for large datasets"""
+async def load_table_endpoint(request: DataSourceTest, table_name: str, max_rows: Optional[int] = None, sample: bool = False):
+    """
+    Load data from database table, streaming it in batches into columnar storage
+    
+    max_rows caps the rows read (defaults to DB_LOAD_MAX_ROWS, 0 = whole table).
+    With sample=true the whole table is streamed and a uniform reservoir sample
+    of max_rows rows is stored instead of the first max_rows rows.
+    """
     try:
-        # Load data from database
-        df = load_table_data(request.source_type, request.config, table_name)
-        
-        if df.empty:
-            raise HTTPException(400, f"Table '{table_name}' is empty or does not exist")
-        
-        # Convert datetime columns to ISO format strings (for JSON serialization)
-        for col in df.columns:
-            if pd.api.types.is_datetime64_any_dtype(df[col]):
-                df[col] = df[col].astype(str)
-        
         # Generate dataset ID
         dataset_id = str(uuid.uuid4())
         
-        # Convert DataFrame to records
-        data_dict = df.to_dict('records')
+        # Stream the table through a server-side cursor straight into storage
+        row_cap = resolve_row_cap(max_rows)
+        reservoir = None
+        profiler = ProfileAccumulator()
+        if sample and row_cap:
+            stream = stream_table_data(request.source_type, request.config, table_name, max_rows=None)
+            reservoir = ReservoirStream(stream, row_cap)
+            ingest_result = await ingest_chunks(dataset_id, io_pool.iterate(reservoir), profiler=profiler)
+        else:
+            stream = stream_table_data(request.source_type, request.config, table_name, max_rows=row_cap)
+            ingest_result = await ingest_chunks(dataset_id, io_pool.iterate(stream), profiler=profiler)
         
-        # Check data size
-        import json
-        try:
-            data_json = json.dumps(data_dict, default=str)  # Use default=str for non-serializable types
-            data_size_mb = len(data_json.encode('utf-8')) / (1024 * 1024)
-        except Exception as e:
-            # If JSON serialization fails, treat as large dataset
-            print(f"JSON serialization warning: {e}")
-            data_size_mb = 15  # Force GridFS
+        if ingest_result["row_count"] == 0:
+            raise HTTPException(400, f"Table '{table_name}' is empty or does not exist")
         
         # Prepare dataset document
         dataset_doc = {
             "id": dataset_id,
+            "version": 1,
             "name": f"{request.source_type}_{table_name}",
             "source_type": "database",
             "db_type": request.source_type,
+            "connection_key": connection_fingerprint(request.source_type, request.config),
             "table_name": table_name,
-            "row_count": len(df),
-            "column_count": len(df.columns),
-            "columns": df.columns.tolist(),
-            "dtypes": df.dtypes.astype(str).to_dict(),
-            "data_preview": df.head(10).to_dict('records'),
+            **ingest_result,
+            "truncated": stream.truncated,
+            "row_cap": row_cap,
+            "sampling": {
+                "sampled": reservoir is not None and reservoir.rows_seen > row_cap,
+                "strategy": "reservoir",
+                "original_size": reservoir.rows_seen,
+                "sample_size": ingest_result["row_count"]
+            } if reservoir is not None else None,
             "created_at": datetime.now(timezone.utc).isoformat(),
             "updated_at": datetime.now(timezone.utc).isoformat()
         }
-        
-        # Storage decision based on size
-        if data_size_mb < 10:
-            # Direct storage for small datasets
-            dataset_doc["data"] = data_dict
-            dataset_doc["storage_type"] = "direct"
-            dataset_doc["gridfs_file_id"] = None
-        else:
-            # GridFS storage for large datasets
-            file_id = await fs.upload_from_stream(
-                f"table_{dataset_id}.json",
-                data_json.encode('utf-8'),
-                metadata={"dataset_id": dataset_id, "type": "table_data"}
-            )
-            dataset_doc["data"] = None
-            dataset_doc["storage_type"] = "gridfs"
-            dataset_doc["gridfs_file_id"] = str(file_id)
+        data_size_mb = dataset_doc["storage_size"] / (1024 * 1024)
         
         # Save to database
         await db.datasets.insert_one(dataset_doc)
+        await store_accumulated_profile(dataset_id, 1, profiler)
         dataset_doc.pop("_id", None)
         
+        message = f"Table loaded successfully ({data_size_mb:.2f} MB)"
+        if stream.truncated:
+            message += f" - limited to the first {row_cap:,} rows"
+        elif reservoir is not None and reservoir.rows_seen > row_cap:
+            message += f" - random sample of {row_cap:,} from {reservoir.rows_seen:,} rows"
+        
         return {
             **dataset_doc,
-            "message": f"Table loaded successfully ({data_size_mb:.2f} MB)",
+            "message": message,
             "storage_type": dataset_doc["storage_type"]
         }
         
@@ -339,6 +294,38 @@ async def load_table_endpoint(request: DataSourceTest, table_name: str):
 
 
 
+@router.post("/profile-table")
+async def profile_table_endpoint(request: DataSourceTest, table_name: str, correlation: bool = True):
+    """
+    Profile a database table without loading or storing it
+    
+    The whole table is streamed through a server-side cursor; chunks are
+    summarized in parallel and merged, so tables far larger than memory can
+    be profiled. Quartiles and distinct counts are sketch estimates.
+    """
+    try:
+        stream = stream_table_data(request.source_type, request.config, table_name, max_rows=None)
+        result = await stream_statistics(stream, correlation=correlation)
+        if result["row_count"] == 0:
+            raise HTTPException(400, f"Table '{table_name}' is empty or does not exist")
+        
+        return {
+            "table_name": table_name,
+            "row_count": result["row_count"],
+            "profile": result["profile"],
+            "correlations": result["correlations"]
+        }
+        
+    except HTTPException:
+        raise
+    except psycopg2.Error as e:
+        raise HTTPException(500, f"PostgreSQL error: {str(e)}")
+    except pymysql.Error as e:
+        raise HTTPException(500, f"MySQL error: {str(e)}")
+    except Exception as e:
+        raise HTTPException(500, f"Failed to profile table: {str(e)}")
+
+
 def remove_nested_data_fields(obj):
     """Recursively remove 'data' fields from nested structures to reduce response size"""
     if isinstance(obj, dict):
@@ -362,8 +349,8 @@ async def get_recent_datasets(limit: int = 10):
     from fastapi.responses import Response
     
     try:
-        # Exclude _id and data fields to reduce response size and improve frontend performance
-        cursor = db.datasets.find({}, {"_id": 0, "data": 0}).sort("created_at", -1).limit(limit)
+        # Exclude _id, data and storage chunk fields to reduce response size and improve frontend performance
+        cursor = db.datasets.find({}, {"_id": 0, "data": 0, "chunks": 0, "profile": 0}).sort("created_at", -1).limit(limit)
         datasets = await cursor.to_list(length=limit)
         
         # Remove any nested 'data' fields from data_preview or other nested structures
@@ -394,25 +381,33 @@ async def get_datasets_alias(limit: int = 10):
 
 
 @router.get("/{dataset_id}")
-async def get_dataset(dataset_id: str):
-    """Get dataset by ID"""
+async def get_dataset(dataset_id: str, include_data: bool = True):
+    """
+    Get dataset by ID
+    
+    The stored profile is returned with the metadata; include_data=false skips
+    loading the rows, so the response comes from a single document read.
+    """
     try:
-        dataset = await db.datasets.find_one({"id": dataset_id}, {"_id": 0})
+        projection = {"_id": 0} if include_data else {"_id": 0, "data": 0}
+        dataset = await db.datasets.find_one({"id": dataset_id}, projection)
         if not dataset:
             raise HTTPException(404, "Dataset not found")
         
-        # If stored in GridFS, load the data
-        if dataset.get("storage_type") == "gridfs":
-            from bson import ObjectId
-            gridfs_file_id = dataset.get("gridfs_file_id")
-            if gridfs_file_id:
-                grid_out = await fs.open_download_stream(ObjectId(gridfs_file_id))
-                data = await grid_out.read()
-                # Parse based on file type
-                if dataset["name"].endswith('.csv'):
-                    df = pd.read_csv(io.BytesIO(data))
-                else:
-                    df = pd.read_excel(io.BytesIO(data))
+        if dataset.get("profile") and dataset.get("profile_version") == dataset.get("version", 1):
+            dataset["profile"] = expand_profile(dataset["profile"])
+        else:
+            dataset.pop("profile", None)
+        
+        # Load columnar or GridFS data
+        if not include_data:
+            pass
+        elif dataset.get("storage_type") == "parquet":
+            df = await read_dataframe(dataset)
+            dataset["data"] = df.to_dict('records')
+        elif dataset.get("storage_type") == "gridfs":
+            if dataset.get("gridfs_file_id"):
+                df = await read_gridfs_dataframe(dataset)
                 dataset["data"] = df.to_dict('records')
         
         return dataset
@@ -432,7 +427,8 @@ async def delete_dataset(dataset_id: str):
         if not dataset:
             raise HTTPException(404, "Dataset not found")
         
-        # Delete GridFS file if exists
+        # Delete GridFS file if exists (stored chunks are released once the document is gone)
+        await delete_profile_state(dataset)
         if dataset.get("storage_type") == "gridfs":
             from bson import ObjectId
             gridfs_file_id = dataset.get("gridfs_file_id")
@@ -446,8 +442,19 @@ async def delete_dataset(dataset_id: str):
         workspaces_result = await db.saved_states.delete_many({"dataset_id": dataset_id})
         print(f"Deleted {workspaces_result.deleted_count} workspaces for dataset {dataset_id}")
         
+        # Delete the models trained on it
+        models_deleted = await model_registry.delete_dataset_models(dataset_id)
+        print(f"Deleted {models_deleted} models for dataset {dataset_id}")
+        
         # Delete the dataset itself
         result = await db.datasets.delete_one({"id": dataset_id})
+        dataframe_cache.invalidate(dataset_id)
+        invalidate_correlations(dataset_id)
+        key_signature_cache.invalidate(dataset_id)
+        feature_pipeline_cache.invalidate(dataset_id)
+        
+        # Drop every version; chunks still shared with derived datasets are kept
+        await delete_dataset_versions(dataset)
         
         if result.deleted_count == 0:
             raise HTTPException(404, "Dataset not found")
@@ -464,6 +471,160 @@ async def delete_dataset(dataset_id: str):
         raise HTTPException(500, f"Failed to delete dataset: {str(e)}")
 
 
+def _align_columns(chunks, columns: List[str]):
+    """Reorder appended chunks to the dataset's columns, rejecting a different schema"""
+    try:
+        for chunk in chunks:
+            chunk = chunk.rename(columns=str)
+            if sorted(chunk.columns) != sorted(columns):
+                raise ValueError(f"Appended columns {list(chunk.columns)} do not match dataset columns {columns}")
+            yield chunk[columns]
+    finally:
+        # Release the file parser now rather than when it is garbage collected
+        chunks.close()
+
+
+@router.post("/{dataset_id}/append")
+async def append_to_dataset(dataset_id: str, file: UploadFile = File(...)):
+    """
+    Append rows from a CSV/Excel file to a dataset in columnar storage
+    
+    The rows are written as additional chunks and folded into the stored
+    profile without re-reading the existing rows.
+    """
+    file.file.seek(0, os.SEEK_END)
+    file_size = file.file.tell()
+    file.file.seek(0)
+    if file_size > MAX_FILE_SIZE:
+        raise HTTPException(413, f"File too large ({file_size / (1024 * 1024):.0f} MB). Maximum is {MAX_FILE_SIZE / (1024 * 1024):.0f} MB.")
+    
+    try:
+        if not file.filename.lower().endswith(tuple(ALLOWED_EXTENSIONS)):
+            raise HTTPException(400, "Unsupported file format. Please upload CSV or Excel files.")
+        
+        dataset = await db.datasets.find_one({"id": dataset_id}, {"_id": 0, "data": 0})
+        if not dataset:
+            raise HTTPException(404, "Dataset not found")
+        if dataset.get("storage_type") != "parquet":
+            raise HTTPException(400, "Only datasets in columnar storage can be appended to")
+        
+        # Running profile state of the existing rows, extended chunk by chunk below
+        profiler = await load_profile_state(dataset)
+        try:
+            ingest_result = await ingest_chunks(
+                dataset_id,
+                io_pool.iterate(_align_columns(iter_file_chunks(file.file, file.filename), dataset["columns"])),
+                backend=dataset.get("storage_backend"),
+                profiler=profiler,
+                first_part=len(dataset.get("chunks", []))
+            )
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+        if ingest_result["row_count"] == 0:
+            raise HTTPException(400, "File is empty or invalid")
+        
+        version = dataset.get("version", 1) + 1
+        await db.datasets.update_one(
+            {"id": dataset_id},
+            {
+                "$push": {"chunks": {"$each": ingest_result["chunks"]}},
+                "$inc": {"row_count": ingest_result["row_count"], "storage_size": ingest_result["storage_size"]},
+                "$set": {
+                    "version": version,
+                    "dtypes": {col: str(dtype) for col, dtype in profiler.dtypes.items()},
+                    "updated_at": datetime.now(timezone.utc).isoformat()
+                }
+            }
+        )
+        dataframe_cache.invalidate(dataset_id)
+        invalidate_correlations(dataset_id)
+        key_signature_cache.invalidate(dataset_id)
+        feature_pipeline_cache.invalidate(dataset_id)
+        await store_accumulated_profile(dataset_id, version, profiler, previous=dataset.get("profile"))
+        
+        # The new version shares every existing chunk with the previous one
+        current = await db.datasets.find_one({"id": dataset_id}, {"_id": 0, "data": 0, "profile": 0})
+        await commit_version(dataset, current, "append")
+        
+        row_count = dataset.get("row_count", 0) + ingest_result["row_count"]
+        return {
+            "id": dataset_id,
+            "rows_appended": ingest_result["row_count"],
+            "row_count": row_count,
+            "version": version,
+            "message": f"Appended {ingest_result['row_count']:,} rows ({row_count:,} total)"
+        }
+        
+    except HTTPException:
+        raise
+    except pd.errors.EmptyDataError:
+        raise HTTPException(400, "File is empty or invalid")
+    except Exception as e:
+        raise HTTPException(500, f"Failed to append to dataset: {str(e)}")
+
+
+@router.get("/{dataset_id}/versions")
+async def get_dataset_versions(dataset_id: str):
+    """List the retained versions of a dataset, newest first"""
+    try:
+        dataset = await db.datasets.find_one({"id": dataset_id}, {"_id": 0, "data": 0, "profile": 0})
+        if not dataset:
+            raise HTTPException(404, "Dataset not found")
+        
+        versions = await list_versions(dataset)
+        return {"dataset_id": dataset_id, "current_version": dataset.get("version", 1), "versions": versions}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(500, f"Failed to list dataset versions: {str(e)}")
+
+
+@router.post("/{dataset_id}/versions/{version}/restore")
+async def restore_dataset_version(dataset_id: str, version: int):
+    """
+    Make a retained version current again
+    
+    The restored data becomes a new version that references the old
+    version's files - nothing is copied.
+    """
+    try:
+        dataset = await db.datasets.find_one({"id": dataset_id}, {"_id": 0, "data": 0, "profile": 0})
+        if not dataset:
+            raise HTTPException(404, "Dataset not found")
+        stored = await get_version(dataset_id, version)
+        if not stored:
+            raise HTTPException(404, f"Version {version} of dataset {dataset_id} is not retained")
+        
+        new_version = dataset.get("version", 1) + 1
+        update = {"$set": {
+            **{field: stored[field] for field in VERSION_FIELDS if field in stored},
+            "version": new_version,
+            "updated_at": datetime.now(timezone.utc).isoformat()
+        }}
+        missing = {field: "" for field in VERSION_FIELDS if field not in stored and field in dataset}
+        if missing:
+            update["$unset"] = missing
+        await db.datasets.update_one({"id": dataset_id}, update)
+        dataframe_cache.invalidate(dataset_id)
+        invalidate_correlations(dataset_id)
+        key_signature_cache.invalidate(dataset_id)
+        feature_pipeline_cache.invalidate(dataset_id)
+        
+        current = await db.datasets.find_one({"id": dataset_id}, {"_id": 0, "data": 0, "profile": 0})
+        await commit_version(dataset, current, "restore", parent={"dataset_id": dataset_id, "version": version})
+        return {
+            "id": dataset_id,
+            "restored_version": version,
+            "version": new_version,
+            "row_count": current.get("row_count", 0),
+            "message": f"Restored version {version} as version {new_version}"
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(500, f"Failed to restore dataset version: {str(e)}")
+
+
 @router.post("/execute-query")
 async def execute_custom_query(config: dict):
     """
@@ -483,77 +644,46 @@ async def execute_custom_query(config: dict):
         # Execute query based on database type using helper function
         if db_type == "mongodb":
             # For MongoDB, query should be a collection name since SQL doesn't apply
-            from pymongo import MongoClient
-            client = MongoClient(
-                host=config.get("host"),
-                port=config.get("port", 27017),
-                username=config.get("username"),
-                password=config.get("password")
-            )
-            db_mongo = client[config.get("database")]
-            collection = db_mongo[query]  # Use query as collection name
-            data = list(collection.find().limit(10000))
-            if data and '_id' in data[0]:
-                for doc in data:
-                    doc['_id'] = str(doc['_id'])
-            df = pd.DataFrame(data)
-            client.close()
+            df = await run_blocking_io(load_mongo_collection, config, query)
+            chunks = [df] if not df.empty else []
+            truncated = False
         else:
-            conn = create_db_connection(db_type, config)
-            df = pd.read_sql_query(query, conn)
-            conn.close()
-        
-        if df.empty:
-            raise HTTPException(400, "Query returned no results")
+            # Stream rows through a server-side cursor
+            chunks = QueryStream(db_type, config, query, max_rows=resolve_row_cap(config.get("max_rows")))
         
         # Generate unique dataset ID
         dataset_id = str(uuid.uuid4())
         
+        profiler = ProfileAccumulator()
+        ingest_result = await ingest_chunks(dataset_id, io_pool.iterate(chunks), profiler=profiler)
+        if ingest_result["row_count"] == 0:
+            raise HTTPException(400, "Query returned no results")
+        if isinstance(chunks, QueryStream):
+            truncated = chunks.truncated
+        
         # Prepare dataset name
         query_preview = query[:50] + "..." if len(query) > 50 else query
         dataset_name = f"Query: {query_preview}"
         
-        # Convert DataFrame to records
-        data_dict = df.to_dict('records')
-        
-        # Check size for storage decision
-        data_size_mb = len(str(data_dict).encode('utf-8')) / (1024 * 1024)
-        
         dataset_doc = {
             "id": dataset_id,
+            "version": 1,
             "name": dataset_name,
             "query": query,
-            "row_count": len(df),
-            "column_count": len(df.columns),
-            "columns": df.columns.tolist(),
-            "data_preview": data_dict[:10],
+            **ingest_result,
+            "truncated": truncated,
             "source_type": "database_query",
             "db_type": db_type,
+            "connection_key": connection_fingerprint(db_type, config) if db_type != "mongodb" else None,
             "created_at": datetime.now(timezone.utc).isoformat(),
             "updated_at": datetime.now(timezone.utc).isoformat()
         }
         
-        # Storage decision based on size
-        if data_size_mb < 10:
-            # Direct storage for small datasets
-            dataset_doc["data"] = data_dict
-            dataset_doc["storage_type"] = "direct"
-            dataset_doc["gridfs_file_id"] = None
-        else:
-            # GridFS storage for large datasets
-            import json
-            data_json = json.dumps(data_dict)
-            file_id = await fs.upload_from_stream(
-                f"query_{dataset_id}.json",
-                data_json.encode('utf-8'),
-                metadata={"dataset_id": dataset_id, "type": "query_results"}
-            )
-            dataset_doc["data"] = None
-            dataset_doc["storage_type"] = "gridfs"
-            dataset_doc["gridfs_file_id"] = str(file_id)
+        data_size_mb = dataset_doc["storage_size"] / (1024 * 1024)
         
         # Save to MongoDB
         await db.datasets.insert_one(dataset_doc)
+        await store_accumulated_profile(dataset_id, 1, profiler)
         
         # Remove MongoDB-specific fields from response
         dataset_doc.pop("_id", None)
@@ -589,38 +719,26 @@ async def execute_query_preview(config: dict):
         
         # Execute query based on database type using helper function
         if db_type == "mongodb":
-            from pymongo import MongoClient
-            client = MongoClient(
-                host=config.get("host"),
-                port=config.get("port", 27017),
-                username=config.get("username"),
-                password=config.get("password"),
-                serverSelectionTimeoutMS=10000
-            )
-            db_mongo = client[config.get("database")]
-            collection = db_mongo[query]
-            data = list(collection.find().limit(10000))
-            if data and '_id' in data[0]:
-                for doc in data:
-                    doc['_id'] = str(doc['_id'])
-            df = pd.DataFrame(data)
-            client.close()
+            df = await run_blocking_io(load_mongo_collection, config, query)
+            row_count = len(df)
+            has_more = False
         else:
-            conn = create_db_connection(db_type, config)
-            df = pd.read_sql_query(query, conn)
-            conn.close()
+            # Fetch only the preview rows; the cursor reads one row past them to tell whether there are more
+            stream = QueryStream(db_type, config, query, batch_size=QUERY_PREVIEW_ROWS, max_rows=QUERY_PREVIEW_ROWS)
+            batches = [batch async for batch in io_pool.iterate(stream)]
+            df = pd.concat(batches, ignore_index=True) if batches else pd.DataFrame(columns=stream.columns)
+            row_count = len(df)
+            has_more = stream.truncated
         
         if df.empty:
             raise HTTPException(400, "Query returned no results")
         
-        # Convert to records for preview
-        data_dict = df.to_dict('records')
-        
         return {
-            "row_count": len(df),
+            "row_count": row_count,  # Rows previewed (the query result has more when has_more is set)
+            "has_more": has_more,
             "column_count": len(df.columns),
             "columns": df.columns.tolist(),
-            "data_preview": data_dict[:10],  # Return first 10 rows as preview
+            "data_preview": preview_records(df, QUERY_PREVIEW_ROWS),
             "message": "Query executed successfully"
         }
         
@@ -652,76 +770,42 @@ async def save_query_dataset(config: dict):
         
         # Execute query based on database type using helper function
         if db_type == "mongodb":
-            from pymongo import MongoClient
-            client = MongoClient(
-                host=config.get("host"),
-                port=config.get("port", 27017),
-                username=config.get("username"),
-                password=config.get("password"),
-                serverSelectionTimeoutMS=10000
-            )
-            db_mongo = client[config.get("database")]
-            collection = db_mongo[query]
-            data = list(collection.find().limit(10000))
-            if data and '_id' in data[0]:
-                for doc in data:
-                    doc['_id'] = str(doc['_id'])
-            df = pd.DataFrame(data)
-            client.close()
+            df = await run_blocking_io(load_mongo_collection, config, query)
+            chunks = [df] if not df.empty else []
+            truncated = False
         else:
-            conn = create_db_connection(db_type, config)
-            df = pd.read_sql_query(query, conn)
-            conn.close()
-        
-        if df.empty:
-            raise HTTPException(400, "Query returned no results")
+            # Stream rows through a server-side cursor
+            chunks = QueryStream(db_type, config, query, max_rows=resolve_row_cap(config.get("max_rows")))
         
         # Generate unique dataset ID
         dataset_id = str(uuid.uuid4())
         
-        # Use user-provided dataset name
-        
-        # Convert DataFrame to records
-        data_dict = df.to_dict('records')
-        
-        # Check size for storage decision
-        data_size_mb = len(str(data_dict).encode('utf-8')) / (1024 * 1024)
+        profiler = ProfileAccumulator()
+        ingest_result = await ingest_chunks(dataset_id, io_pool.iterate(chunks), profiler=profiler)
+        if ingest_result["row_count"] == 0:
+            raise HTTPException(400, "Query returned no results")
+        if isinstance(chunks, QueryStream):
+            truncated = chunks.truncated
         
         dataset_doc = {
             "id": dataset_id,
+            "version": 1,
             "name": dataset_name,  # User-provided name
             "query": query,
-            "row_count": len(df),
-            "column_count": len(df.columns),
-            "columns": df.columns.tolist(),
-            "data_preview": data_dict[:10],
+            **ingest_result,
+            "truncated": truncated,
             "source_type": "database_query",
             "db_type": db_type,
+            "connection_key": connection_fingerprint(db_type, config) if db_type != "mongodb" else None,
             "created_at": datetime.now(timezone.utc).isoformat(),
             "updated_at": datetime.now(timezone.utc).isoformat()
         }
         
-        # Storage decision based on size
-        if data_size_mb < 10:
-            # Direct storage for small datasets
-            dataset_doc["data"] = data_dict
-            dataset_doc["storage_type"] = "direct"
-            dataset_doc["gridfs_file_id"] = None
-        else:
-            # GridFS storage for large datasets
-            import json
-            data_json = json.dumps(data_dict)
-            file_id = await fs.upload_from_stream(
-                f"query_{dataset_id}.json",
-                data_json.encode('utf-8'),
-                metadata={"dataset_id": dataset_id, "type": "query_results"}
-            )
-            dataset_doc["data"] = None
-            dataset_doc["storage_type"] = "gridfs"
-            dataset_doc["gridfs_file_id"] = str(file_id)
+        data_size_mb = dataset_doc["storage_size"] / (1024 * 1024)
         
         # Save to MongoDB
         await db.datasets.insert_one(dataset_doc)
+        await store_accumulated_profile(dataset_id, 1, profiler)
         
         # Remove MongoDB-specific fields from response
         dataset_doc.pop("_id", None)
@@ -755,7 +839,7 @@ async def suggest_features(request: dict):
     Returns suggested features with explanations
     """
     try:
-        from app.services.feature_selection_service import suggest_features_ai, detect_variable_types
+        from app.services.feature_selection_service import suggest_features_ai, detect_variable_types, selection_pipeline
         
         dataset_id = request.get('dataset_id')
         target_column = request.get('target_column')
@@ -770,11 +854,11 @@ async def suggest_features(request: dict):
             raise HTTPException(404, f"Dataset not found: {dataset_id}")
         
         # Load data
-        if dataset.get('storage_type') == 'gridfs' and dataset.get('gridfs_file_id'):
+        if dataset.get('storage_type') == 'parquet':
+            df = await read_dataframe(dataset)
+        elif dataset.get('storage_type') == 'gridfs' and dataset.get('gridfs_file_id'):
             # Load from GridFS
-            file_data = await fs.download_to_stream(dataset['gridfs_file_id'], io.BytesIO())
-            file_data.seek(0)
-            df = pd.read_json(file_data, orient='records')
+            df = await read_gridfs_dataframe(dataset)
         else:
             # Load from direct storage
             df = pd.DataFrame(dataset['data'])
@@ -786,8 +870,13 @@ async def suggest_features(request: dict):
         # Detect variable types
         var_types = detect_variable_types(df)
         
-        # Get AI suggestions
-        suggestions = suggest_features_ai(df, target_column, top_n)
+        # Get AI suggestions (the fitted feature preparation is reused per dataset version)
+        version = dataset.get('version', 1)
+        pipeline = feature_pipeline_cache.get(dataset_id, version, target_column, "all")
+        if pipeline is None:
+            pipeline = selection_pipeline(df, target_column)
+            feature_pipeline_cache.put(dataset_id, version, target_column, "all", pipeline)
+        suggestions = suggest_features_ai(df, target_column, top_n, pipeline)
         
         return {
             **suggestions,
@@ -0,0 +1,120 @@
+"""
+Background Job Routes
+Submit long-running analysis/tuning jobs and poll or stream their progress
+"""
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, Optional
+import asyncio
+import json
+
+from app.config import JOB_POLL_INTERVAL
+from app.services.job_service import (
+    JOB_HANDLERS, FINISHED_STATUSES, submit_job, get_job, get_job_result,
+    list_jobs, cancel_job, delete_job
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+@router.post("")
+async def create_job(request: Dict[str, Any]):
+    """
+    Queue a background job
+
+    Request format:
+    {
+        "type": "holistic_analysis" | "hyperparameter_tuning" | "batch_scoring",
+        "payload": {...}  (same body as the synchronous endpoint)
+    }
+    """
+    try:
+        job_type = request.get("type")
+        payload = request.get("payload") or {}
+
+        if job_type not in JOB_HANDLERS:
+            raise HTTPException(400, f"Unknown job type '{job_type}'. Available: {sorted(JOB_HANDLERS)}")
+        # Batch scoring may read a database table instead of a dataset
+        required = "model_id" if job_type == "batch_scoring" else "dataset_id"
+        if not payload.get(required):
+            raise HTTPException(400, f"payload.{required} is required")
+
+        return await submit_job(job_type, payload)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(500, f"Failed to submit job: {str(e)}")
+
+
+@router.get("")
+async def get_jobs(status: Optional[str] = None, type: Optional[str] = None, limit: int = 20):
+    """List recent jobs"""
+    try:
+        return {"jobs": await list_jobs(status=status, job_type=type, limit=min(limit, 200))}
+    except Exception as e:
+        raise HTTPException(500, f"Failed to list jobs: {str(e)}")
+
+
+@router.get("/{job_id}")
+async def get_job_status(job_id: str):
+    """Job status, progress and partial results"""
+    job = await get_job(job_id)
+    if not job:
+        raise HTTPException(404, "Job not found")
+    return job
+
+
+@router.get("/{job_id}/result")
+async def get_job_result_endpoint(job_id: str):
+    """Final result of a completed job"""
+    job = await get_job_result(job_id)
+    if not job:
+        raise HTTPException(404, "Job not found")
+    if job["status"] not in FINISHED_STATUSES:
+        raise HTTPException(409, f"Job is still {job['status']}")
+    return job
+
+
+@router.get("/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """Server-sent events with the job status whenever its progress changes"""
+    if not await get_job(job_id):
+        raise HTTPException(404, "Job not found")
+
+    async def event_stream():
+        last_sent = None
+        while True:
+            job = await get_job(job_id)
+            if job is None:
+                yield "event: error\ndata: {\"error\": \"Job not found\"}\n\n"
+                return
+            snapshot = json.dumps(job, default=str)
+            if snapshot != last_sent:
+                last_sent = snapshot
+                yield f"data: {snapshot}\n\n"
+            if job["status"] in FINISHED_STATUSES:
+                yield "event: end\ndata: {}\n\n"
+                return
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+@router.post("/{job_id}/cancel")
+async def cancel_job_endpoint(job_id: str):
+    """Cancel a queued job, or ask a running job to stop"""
+    job = await cancel_job(job_id)
+    if not job:
+        raise HTTPException(404, "Job not found")
+    return job
+
+
+@router.delete("/{job_id}")
+async def delete_job_endpoint(job_id: str):
+    """Delete a job and its stored result"""
+    if not await delete_job(job_id):
+        raise HTTPException(404, "Job not found")
+    return {"message": "Job deleted successfully"}
@@ -0,0 +1,230 @@
+"""
+Model Registry Routes
+List, inspect and delete the trained models persisted by holistic analysis,
+and score whole datasets or database tables with them
+"""
+from fastapi import APIRouter, HTTPException
+from typing import Dict, Any, Optional
+from datetime import datetime, timezone
+import os
+import uuid
+
+from app.database.mongodb import db
+from app.database.connections import stream_table_data
+from app.database.connection_pool import connection_fingerprint
+from app.database.dataset_storage import iter_dataframe_chunks
+from app.database.dataset_versions import commit_version
+from app.services.model_registry import model_registry
+from app.services.prediction_service import input_schema
+from app.services.batch_scoring_service import score_chunks
+from app.services.ingest_service import ingest_chunks, ingest_added_columns
+from app.services.profiling_service import ProfileAccumulator
+from app.services.profile_store import store_accumulated_profile
+from app.services.executor_service import io_pool
+from app.services.job_service import register_job_handler, report_progress
+from app.services.dataframe_cache import dataframe_cache
+from app.services.correlation_service import invalidate_correlations
+from app.services.key_discovery import key_signature_cache
+from app.services.feature_pipeline import feature_pipeline_cache
+import pandas as pd
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/models", tags=["models"])
+
+
+@router.get("")
+async def get_models(dataset_id: Optional[str] = None, target_column: Optional[str] = None):
+    """List registered models, newest first"""
+    try:
+        return {"models": await model_registry.list_models(dataset_id=dataset_id, target_column=target_column)}
+    except Exception as e:
+        raise HTTPException(500, f"Failed to list models: {str(e)}")
+
+
+@router.get("/{model_id}")
+async def get_model(model_id: str):
+    """Registry record of one model, including its preprocessing"""
+    try:
+        record = await model_registry.get_record(model_id)
+        if not record:
+            raise HTTPException(404, "Model not found")
+        return record
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(500, f"Failed to get model: {str(e)}")
+
+
+@router.delete("/{model_id}")
+async def delete_model(model_id: str):
+    """Delete a model and its stored artifact"""
+    try:
+        if not await model_registry.delete(model_id):
+            raise HTTPException(404, "Model not found")
+        return {"message": "Model deleted successfully", "model_id": model_id}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(500, f"Failed to delete model: {str(e)}")
+
+
+@router.post("/score")
+async def batch_score(request: Dict[str, Any]):
+    """
+    Score a dataset or a database table with a registered model, chunk by chunk
+
+    A dataset gets the prediction columns added as a new version (its other
+    columns are shared with the previous version, not rewritten); a database
+    table is streamed into a new dataset holding its rows and the predictions.
+    Large inputs should be scored as a "batch_scoring" background job.
+
+    Request format:
+    {
+        "model_id": "string",
+        "dataset_id": "string",                  or
+        "connection": {"source_type": "postgresql", "config": {...}},
+        "table_name": "string",
+        "max_rows": 1000000,                     (optional, tables only)
+        "output_column": "string",               (default "<target>_prediction")
+        "probabilities": false                   (add "<output>_proba_<class>" columns for classifiers)
+    }
+    """
+    try:
+        record = await model_registry.get_record(request.get("model_id") or "")
+        if not record:
+            raise HTTPException(404, "Model not found")
+        input_columns = list(input_schema(record))
+        output_column = request.get("output_column") or f"{record['target_column']}_prediction"
+        probabilities = bool(request.get("probabilities"))
+        
+        if request.get("dataset_id"):
+            dataset = await db.datasets.find_one({"id": request["dataset_id"]}, {"_id": 0, "data": 0, "profile": 0})
+            if not dataset:
+                raise HTTPException(404, "Dataset not found")
+            if dataset.get("storage_type") != "parquet":
+                raise HTTPException(400, "Only datasets in columnar storage can be batch scored")
+            missing = [col for col in input_columns if col not in dataset.get("columns", [])]
+            if missing:
+                raise HTTPException(400, f"Dataset is missing model feature column(s): {', '.join(missing)}")
+        elif request.get("table_name") and (request.get("connection") or {}).get("source_type"):
+            dataset = None
+        else:
+            raise HTTPException(400, "dataset_id, or connection and table_name, is required")
+        
+        model_file, temporary = await model_registry.artifact_file(record)
+        try:
+            scoring = {
+                "model_id": record["id"],
+                "model_name": record["model_name"],
+                "scored_at": datetime.now(timezone.utc).isoformat()
+            }
+            if dataset is not None:
+                return await _score_dataset(dataset, record, model_file, input_columns, output_column, probabilities, scoring)
+            return await _score_table(request, record, model_file, input_columns, output_column, probabilities, scoring)
+        finally:
+            if temporary:
+                os.remove(model_file)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    except Exception as e:
+        raise HTTPException(500, f"Batch scoring failed: {str(e)}")
+
+
+async def _score_dataset(dataset, record, model_file, input_columns, output_column, probabilities, scoring) -> Dict[str, Any]:
+    """Add prediction columns to a Parquet-stored dataset as a new copy-on-write version"""
+    dataset_id = dataset["id"]
+    total = dataset.get("row_count", 0)
+    output_columns = []
+    
+    async def scored_parts():
+        scored = 0
+        chunks = iter_dataframe_chunks(dataset, columns=input_columns)
+        async for chunk, scores in score_chunks(chunks, model_file, record, input_columns, output_column, probabilities):
+            if not output_columns:
+                output_columns.extend(scores.columns)
+            scored += len(chunk)
+            await report_progress("scoring", 100 * scored / max(total, 1), f"Scored {scored:,} of {total:,} rows")
+            yield scores
+    
+    stored = await ingest_added_columns(dataset_id, dataset, scored_parts())
+    version = dataset.get("version", 1) + 1
+    await db.datasets.update_one(
+        {"id": dataset_id},
+        {"$set": {
+            **stored,
+            "version": version,
+            "scoring": {**scoring, "columns": output_columns},
+            "updated_at": datetime.now(timezone.utc).isoformat()
+        }}
+    )
+    dataframe_cache.invalidate(dataset_id)
+    invalidate_correlations(dataset_id)
+    key_signature_cache.invalidate(dataset_id)
+    feature_pipeline_cache.invalidate(dataset_id)
+    current = await db.datasets.find_one({"id": dataset_id}, {"_id": 0, "data": 0, "profile": 0})
+    await commit_version(dataset, current, "score")
+    
+    return {
+        "dataset_id": dataset_id,
+        "version": version,
+        "model_id": record["id"],
+        "rows_scored": stored["row_count"],
+        "columns": output_columns,
+        "message": f"Scored {stored['row_count']:,} rows with {record['model_name']}"
+    }
+
+
+async def _score_table(request, record, model_file, input_columns, output_column, probabilities, scoring) -> Dict[str, Any]:
+    """Stream a database table through the model into a new dataset"""
+    source_type, config = request["connection"]["source_type"], request["connection"].get("config") or {}
+    table_name = request["table_name"]
+    stream = stream_table_data(source_type, config, table_name, max_rows=request.get("max_rows"))
+    output_columns = []
+    
+    async def scored_rows():
+        async for chunk, scores in score_chunks(io_pool.iterate(stream), model_file, record, input_columns, output_column, probabilities):
+            if not output_columns:
+                output_columns.extend(scores.columns)
+            await report_progress("scoring", None, f"Scored {stream.rows_fetched:,} rows")
+            yield pd.concat([chunk.drop(columns=[col for col in scores.columns if col in chunk.columns]), scores], axis=1)
+    
+    dataset_id = str(uuid.uuid4())
+    profiler = ProfileAccumulator()
+    ingest_result = await ingest_chunks(dataset_id, scored_rows(), profiler=profiler)
+    if ingest_result["row_count"] == 0:
+        raise HTTPException(400, f"Table '{table_name}' is empty or does not exist")
+    
+    dataset_doc = {
+        "id": dataset_id,
+        "version": 1,
+        "name": f"{source_type}_{table_name}_scored",
+        "source_type": "database",
+        "db_type": source_type,
+        "connection_key": connection_fingerprint(source_type, config),
+        "table_name": table_name,
+        **ingest_result,
+        "truncated": stream.truncated,
+        "row_cap": request.get("max_rows"),
+        "scoring": {**scoring, "columns": output_columns},
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "updated_at": datetime.now(timezone.utc).isoformat()
+    }
+    await db.datasets.insert_one(dataset_doc)
+    await store_accumulated_profile(dataset_id, 1, profiler)
+    
+    return {
+        "dataset_id": dataset_id,
+        "version": 1,
+        "model_id": record["id"],
+        "rows_scored": ingest_result["row_count"],
+        "columns": output_columns,
+        "message": f"Scored {ingest_result['row_count']:,} rows of {table_name} with {record['model_name']}"
+    }
+
+
+# Batch scoring can run as a background job
+register_job_handler("batch_scoring", batch_score)
@@ -0,0 +1,67 @@
+"""
+Online Prediction Routes
+Score rows with registered models; concurrent requests are micro-batched
+"""
+from fastapi import APIRouter, HTTPException
+from typing import Dict, Any, Optional
+
+from app.config import PREDICT_MAX_REQUEST_ROWS
+from app.services.model_registry import model_registry
+from app.services.prediction_service import prediction_batcher, PredictionInputError
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/predict", tags=["prediction"])
+
+
+@router.post("")
+async def predict(request: Dict[str, Any]):
+    """
+    Score one row or a list of rows with a registered model
+
+    Request format:
+    {
+        "model_id": "string",           (or "dataset_id" + "target_column" for the newest model)
+        "features": {"col": value},     one row, or
+        "rows": [{"col": value}, ...]   several rows
+    }
+    """
+    try:
+        model_id = request.get("model_id")
+        if not model_id:
+            dataset_id, target_column = request.get("dataset_id"), request.get("target_column")
+            if not dataset_id or not target_column:
+                raise HTTPException(400, "model_id (or dataset_id and target_column) is required")
+            model_id = await model_registry.latest_model_id(dataset_id, target_column)
+            if not model_id:
+                raise HTTPException(404, f"No model registered for target '{target_column}' of dataset {dataset_id}")
+
+        single = "rows" not in request
+        rows = [request.get("features")] if single else request["rows"]
+        if not isinstance(rows, list) or not rows or rows[0] is None:
+            raise HTTPException(400, "features (an object) or rows (a non-empty list) is required")
+        if len(rows) > PREDICT_MAX_REQUEST_ROWS:
+            raise HTTPException(400, f"At most {PREDICT_MAX_REQUEST_ROWS} rows per request; use a batch scoring job for more")
+
+        result = await prediction_batcher.predict(model_id, rows)
+        if not single:
+            return {"model_id": model_id, **result}
+        response = {"model_id": model_id, "prediction": result["predictions"][0]}
+        if "probabilities" in result:
+            response["probabilities"] = result["probabilities"][0]
+        return response
+    except HTTPException:
+        raise
+    except KeyError:
+        raise HTTPException(404, "Model not found")
+    except PredictionInputError as e:
+        raise HTTPException(400, f"Invalid input: {str(e)}")
+    except Exception as e:
+        raise HTTPException(500, f"Prediction failed: {str(e)}")
+
+
+@router.get("/stats")
+async def get_prediction_stats(model_id: Optional[str] = None):
+    """Request counts, batch sizes and p50/p95/p99 latency of online predictions"""
+    return prediction_batcher.stats(model_id)
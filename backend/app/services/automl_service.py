@@ -0,0 +1,260 @@
+"""
+AutoML Service
+Time-budgeted training of model candidates. Candidates are compared by
+successive halving on growing subsets of the training rows: every rung fits
+the survivors on more rows, keeps the best 1/AUTOML_HALVING_FACTOR of them
+and drops those whose learning curve cannot catch up with the leader.
+XGBoost and LightGBM stop boosting natively on a validation split. Each rung
+is sized from the time the previous one took, so training ends within the
+wall-clock budget whatever the size of the data.
+"""
+import math
+import time
+import inspect
+import logging
+from functools import partial
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone, is_classifier
+
+from app.config import (
+    AUTOML_MIN_ROWS, AUTOML_HALVING_FACTOR, AUTOML_MAX_ESTIMATORS,
+    AUTOML_EARLY_STOPPING_ROUNDS, AUTOML_VALIDATION_FRACTION
+)
+
+try:
+    import xgboost as xgb
+    HAS_XGBOOST = True
+except ImportError:
+    HAS_XGBOOST = False
+
+try:
+    import lightgbm as lgb
+    HAS_LIGHTGBM = True
+except ImportError:
+    HAS_LIGHTGBM = False
+
+logger = logging.getLogger(__name__)
+
+# Rows of the early-stopping validation split never go below this
+_MIN_VALIDATION_ROWS = 50
+
+
+def _is_boosted(model: Any) -> bool:
+    return (HAS_XGBOOST and isinstance(model, xgb.XGBModel)) or (HAS_LIGHTGBM and isinstance(model, lgb.LGBMModel))
+
+
+def enable_early_stopping(models: Dict[str, Any]):
+    """Let boosted candidates grow up to AUTOML_MAX_ESTIMATORS rounds, stopped on validation loss"""
+    for model in models.values():
+        if HAS_XGBOOST and isinstance(model, xgb.XGBModel):
+            model.set_params(n_estimators=AUTOML_MAX_ESTIMATORS, early_stopping_rounds=AUTOML_EARLY_STOPPING_ROUNDS)
+        elif HAS_LIGHTGBM and isinstance(model, lgb.LGBMModel):
+            model.set_params(n_estimators=AUTOML_MAX_ESTIMATORS, early_stopping_round=AUTOML_EARLY_STOPPING_ROUNDS)
+
+
+def _early_stopping(model: Any) -> bool:
+    params = model.get_params()
+    return bool(params.get("early_stopping_rounds") or params.get("early_stopping_round"))
+
+
+def fit_estimator(model: Any, X_train: pd.DataFrame, y_train: Any) -> Any:
+    """
+    Fit a candidate; boosted models with early stopping enabled hold out the
+    last AUTOML_VALIDATION_FRACTION of the (shuffled) training rows to stop on
+    """
+    n_validation = int(len(X_train) * AUTOML_VALIDATION_FRACTION)
+    if not _is_boosted(model) or not _early_stopping(model) or n_validation < _MIN_VALIDATION_ROWS:
+        if _is_boosted(model) and _early_stopping(model):
+            # Too few rows to hold out: fit the default number of rounds
+            if HAS_XGBOOST and isinstance(model, xgb.XGBModel):
+                model.set_params(n_estimators=100, early_stopping_rounds=None)
+            else:
+                model.set_params(n_estimators=100, early_stopping_round=0)
+        return model.fit(X_train, y_train)
+
+    y_train = np.asarray(y_train)
+    X_fit, X_val = X_train.iloc[:-n_validation], X_train.iloc[-n_validation:]
+    y_fit, y_val = y_train[:-n_validation], y_train[-n_validation:]
+    if is_classifier(model) and len(np.unique(y_fit)) < len(np.unique(y_train)):
+        # A class only present in the held-out rows would be unknown to the model
+        X_fit, y_fit = X_train, y_train
+
+    if HAS_LIGHTGBM and isinstance(model, lgb.LGBMModel) and "eval_X" in inspect.signature(model.fit).parameters:
+        return model.fit(X_fit, y_fit, eval_X=(X_val,), eval_y=(y_val,))
+    if HAS_XGBOOST and isinstance(model, xgb.XGBModel):
+        return model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+    return model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)])
+
+
+def boosting_rounds(model: Any) -> Optional[int]:
+    """Rounds kept by early stopping, or None"""
+    if HAS_XGBOOST and isinstance(model, xgb.XGBModel) and _early_stopping(model):
+        best = getattr(model, "best_iteration", None)
+        return None if best is None else int(best) + 1
+    if HAS_LIGHTGBM and isinstance(model, lgb.LGBMModel) and _early_stopping(model):
+        best = getattr(model, "best_iteration_", None)
+        return int(best) if best else None
+    return None
+
+
+def _timed_fit(fit_fn: Callable[..., Optional[Dict[str, Any]]], model_name: str, model: Any, *fit_args) -> Optional[Dict[str, Any]]:
+    """fit_fn with its duration under "fit_seconds" (runs in a training worker)"""
+    start = time.monotonic()
+    result = fit_fn(model_name, model, *fit_args)
+    if result is not None:
+        result["fit_seconds"] = time.monotonic() - start
+    return result
+
+
+def is_finalist(result: Dict[str, Any]) -> bool:
+    """Whether a result was trained at the last rung (results trained without a budget always are)"""
+    automl = result.get("automl")
+    return automl is None or automl.get("stopped") in (None, "time_budget")
+
+
+def rank_results(results: List[Dict[str, Any]], metric: str) -> List[Dict[str, Any]]:
+    """
+    Results best first: finalists ahead of candidates eliminated at an
+    earlier rung, whose scores on fewer rows are not comparable
+    """
+    return sorted(results, key=lambda result: (is_finalist(result), result[metric]), reverse=True)
+
+
+def _head(values: Any, rows: int) -> Any:
+    return values.iloc[:rows] if isinstance(values, (pd.Series, pd.DataFrame)) else values[:rows]
+
+
+def _dominated(scores: List[float], best: float, remaining_rungs: int) -> bool:
+    """Whether a learning curve stays below the leader even if it keeps its last improvement for every remaining rung"""
+    if len(scores) < 2:
+        return False
+    projected = scores[-1] + max(0.0, scores[-1] - scores[-2]) * remaining_rungs
+    return projected < best
+
+
+def train_budgeted(
+    train_candidates: Callable[..., List[Dict[str, Any]]],
+    fit_fn: Callable[..., Optional[Dict[str, Any]]],
+    models: Dict[str, Any],
+    X_train: pd.DataFrame,
+    X_test: pd.DataFrame,
+    y_train: Any,
+    y_test: Any,
+    extra_args: tuple,
+    metric: str,
+    time_budget: float,
+    on_model_trained: Optional[Callable[[Dict[str, Any]], None]] = None,
+    cpu_budget: Optional[int] = None
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Successive halving of model candidates within a wall-clock budget
+
+    Args:
+        train_candidates: ml_service.train_candidates (fits one rung's candidates)
+        fit_fn: Candidate fit function, fit_fn(name, model, X_train, X_test, y_train, y_test, *extra_args)
+        models: Candidate name -> unfitted estimator
+        X_train, X_test, y_train, y_test: Shuffled training rows and the test split
+        extra_args: Remaining fit_fn arguments
+        metric: Result key to maximise ("r2_score", "accuracy")
+        time_budget: Seconds available
+        on_model_trained: Called with each candidate's final result
+        cpu_budget: Cores available (see train_candidates)
+
+    Returns:
+        (final result per candidate, each with its "automl" rung details,
+        ranked by rank_results; budget report for training_info)
+    """
+    start = time.monotonic()
+    deadline = start + time_budget
+    n_rows = len(X_train)
+    eta = max(2, AUTOML_HALVING_FACTOR)
+    # Rungs multiply the rows by eta up to every training row
+    n_rungs = 1 + int(math.floor(math.log(n_rows / AUTOML_MIN_ROWS, eta))) if n_rows > AUTOML_MIN_ROWS else 1
+    rows = n_rows if n_rungs == 1 else int(math.ceil(n_rows / eta ** (n_rungs - 1)))
+
+    candidates = dict(models)
+    scores: Dict[str, List[float]] = {name: [] for name in models}
+    seconds: Dict[str, float] = {}
+    latest: Dict[str, Dict[str, Any]] = {}
+    rungs = []
+    stopped = None
+    rung_index = 0
+
+    def finish(name: str, reason: Optional[str]):
+        result = latest.get(name)
+        if result is None:
+            return
+        result["automl"]["stopped"] = reason
+        if on_model_trained:
+            on_model_trained({key: value for key, value in result.items() if key != "estimator"})
+
+    while True:
+        rung_start = time.monotonic()
+        fitted = train_candidates(
+            partial(_timed_fit, fit_fn),
+            {name: clone(model) for name, model in candidates.items()},
+            (X_train.iloc[:rows], X_test, _head(y_train, rows), y_test) + tuple(extra_args),
+            n_rows=rows,
+            cpu_budget=cpu_budget
+        )
+        rung_seconds = time.monotonic() - rung_start
+        for result in fitted:
+            name = result["model_name"]
+            seconds[name] = result.pop("fit_seconds")
+            result["automl"] = {"rung": rung_index, "rows": rows, "seconds": round(seconds[name], 3)}
+            rounds = boosting_rounds(result.get("estimator"))
+            if rounds is not None:
+                result["automl"]["boosting_rounds"] = rounds
+            latest[name] = result
+            scores[name].append(result[metric])
+        rungs.append({"rows": rows, "candidates": sorted(candidates), "seconds": round(rung_seconds, 3)})
+        fitted_names = {result["model_name"] for result in fitted}
+        for name in candidates:
+            if name not in fitted_names:
+                finish(name, "failed")
+        candidates = {name: candidates[name] for name in candidates if name in fitted_names}
+        if rows >= n_rows or not candidates:
+            break
+
+        # Keep the best 1/eta, without candidates that cannot catch up with the leader
+        ranked = sorted(candidates, key=lambda name: scores[name][-1], reverse=True)
+        best = scores[ranked[0]][-1]
+        remaining = max(1, math.ceil(math.log(n_rows / rows, eta)))
+        kept = ranked[:max(1, math.ceil(len(ranked) / eta))]
+        survivors = [name for name in kept if name == ranked[0] or not _dominated(scores[name], best, remaining)]
+        for name in ranked:
+            if name not in survivors:
+                finish(name, "dominated" if name in kept else "halved")
+        candidates = {name: candidates[name] for name in survivors}
+
+        # A single survivor goes straight to every row; otherwise rows grow by eta, within the budget
+        next_rows = n_rows if len(candidates) == 1 else min(n_rows, rows * eta)
+        # Survivors' own fit times (summed, so concurrent fitting only adds headroom)
+        seconds_per_row = sum(seconds[name] for name in candidates) / rows
+        affordable = int((deadline - time.monotonic()) / max(seconds_per_row, 1e-9))
+        if affordable < next_rows:
+            stopped = "time_budget"
+            if affordable < rows * 1.5:
+                break
+            next_rows = affordable
+        rows = next_rows
+        rung_index += 1
+
+    for name in candidates:
+        finish(name, stopped)
+
+    report = {
+        "time_budget_s": time_budget,
+        "elapsed_s": round(time.monotonic() - start, 3),
+        "halving_factor": eta,
+        "rungs": rungs,
+        "stopped": stopped
+    }
+    logger.info(
+        f"AutoML: {len(rungs)} rung(s) up to {rungs[-1]['rows']:,} of {n_rows:,} rows "
+        f"in {report['elapsed_s']}s (budget {time_budget}s)"
+    )
+    return rank_results(list(latest.values()), metric), report
@@ -0,0 +1,103 @@
+"""
+Batch Scoring Service
+Scores datasets with registered models chunk by chunk in the CPU pool. Each
+worker loads a model artifact once and keeps it for the following chunks;
+at most BATCH_SCORING_IN_FLIGHT chunks are read ahead and scored at a time,
+so memory stays bounded whatever the size of the input.
+"""
+import asyncio
+import logging
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, Any, List, AsyncIterator, AsyncIterable, Optional, Tuple
+
+import pandas as pd
+
+from app.config import BATCH_SCORING_IN_FLIGHT
+from app.services.executor_service import run_cpu_bound
+from app.services.model_registry import RegisteredModel, deserialize_model
+
+logger = logging.getLogger(__name__)
+
+# Models loaded by this (worker) process, keyed by artifact path
+_WORKER_MODELS: "OrderedDict[str, RegisteredModel]" = OrderedDict()
+_WORKER_MODELS_MAX = 2
+_worker_lock = threading.Lock()
+
+
+def _worker_model(model_file: str, record: Dict[str, Any]) -> RegisteredModel:
+    with _worker_lock:
+        model = _WORKER_MODELS.get(model_file)
+        if model is not None:
+            _WORKER_MODELS.move_to_end(model_file)
+            return model
+    with open(model_file, "rb") as f:
+        estimator = deserialize_model(record["format"], f.read(), record.get("format_details"))
+    model = RegisteredModel(record, estimator)
+    with _worker_lock:
+        _WORKER_MODELS[model_file] = model
+        while len(_WORKER_MODELS) > _WORKER_MODELS_MAX:
+            _WORKER_MODELS.popitem(last=False)
+    return model
+
+
+def score_chunk(model_file: str, record: Dict[str, Any], chunk: pd.DataFrame, output_column: str, probabilities: bool) -> pd.DataFrame:
+    """
+    Score one chunk (runs in a CPU worker)
+
+    Returns:
+        The prediction column, plus "<output_column>_proba_<label>" per class
+        when probabilities are requested from a classifier
+    """
+    predictions, class_probabilities, classes = _worker_model(model_file, record).score(chunk)
+    scores = pd.DataFrame({output_column: predictions})
+    if probabilities and class_probabilities is not None:
+        names = [f"{output_column}_proba_{label}" for label in classes]
+        scores = pd.concat([scores, pd.DataFrame(class_probabilities, columns=names)], axis=1)
+    return scores
+
+
+async def score_chunks(
+    chunks: AsyncIterable[pd.DataFrame],
+    model_file: str,
+    record: Dict[str, Any],
+    input_columns: List[str],
+    output_column: str,
+    probabilities: bool = False,
+    in_flight: Optional[int] = None
+) -> AsyncIterator[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    Score chunks in the CPU pool, reading ahead while earlier chunks are scored
+
+    Args:
+        chunks: Input chunks (every input column of the model must be present)
+        model_file: Local path of the model artifact (see ModelRegistry.artifact_file)
+        record: Registry record of the model
+        input_columns: Raw input columns of the model
+        output_column: Name of the prediction column
+        probabilities: Also return class probability columns (classifiers)
+        in_flight: Chunks scored at once (defaults to BATCH_SCORING_IN_FLIGHT)
+
+    Yields:
+        (input chunk, its output columns), in input order
+    """
+    in_flight = max(1, in_flight or BATCH_SCORING_IN_FLIGHT)
+    pending: "deque[Tuple[pd.DataFrame, asyncio.Future]]" = deque()
+    try:
+        async for chunk in chunks:
+            missing = [col for col in input_columns if col not in chunk.columns]
+            if missing:
+                raise ValueError(f"Input is missing model feature column(s): {', '.join(missing)}")
+            task = asyncio.ensure_future(run_cpu_bound(
+                score_chunk, model_file, record, chunk[input_columns], output_column, probabilities
+            ))
+            pending.append((chunk, task))
+            if len(pending) >= in_flight:
+                done_chunk, done_task = pending.popleft()
+                yield done_chunk, (await done_task).set_axis(done_chunk.index)
+        while pending:
+            done_chunk, done_task = pending.popleft()
+            yield done_chunk, (await done_task).set_axis(done_chunk.index)
+    finally:
+        for _, task in pending:
+            task.cancel()
@@ -0,0 +1,206 @@
+"""
+Correlation Service
+Vectorized Pearson/Spearman correlation matrices, significant-pair extraction
+over the upper triangle, and a per-version matrix cache shared by every
+consumer (correlation analysis, holistic analysis, variable suggestions)
+"""
+import logging
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.config import (
+    CORRELATION_THRESHOLD, CORRELATION_MAX_PAIRS, CORRELATION_MATRIX_MAX_COLUMNS,
+    CORRELATION_WIDE_COLUMNS, CORRELATION_SAMPLE_ROWS, CORRELATION_CACHE_MAX_MB
+)
+from app.services.dataframe_cache import DataFrameCache
+from app.services.sketches import StreamingCovariance
+
+logger = logging.getLogger(__name__)
+
+CORRELATION_METHODS = ("pearson", "spearman")
+
+
+def _pearson(block: np.ndarray) -> np.ndarray:
+    """Pearson correlation of the columns of a (rows, k) float block"""
+    if not np.isnan(block).any():
+        # Complete data: one (k x k) matrix product of the centered block
+        centered = block - block.mean(axis=0)
+        norms = np.sqrt(np.einsum('ij,ij->j', centered, centered))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = (centered.T @ centered) / np.outer(norms, norms)
+        corr = np.clip(corr, -1.0, 1.0)
+        np.fill_diagonal(corr, np.where(norms > 0, 1.0, np.nan))
+        return corr
+
+    # Missing values: pairwise-complete rows, like DataFrame.corr()
+    covariance = StreamingCovariance(block.shape[1])
+    covariance.update(block)
+    return covariance.correlation()
+
+
+def compute_correlation_matrix(
+    df: pd.DataFrame,
+    method: str = "pearson",
+    approximate: Optional[bool] = None,
+    sample_rows: Optional[int] = None,
+    random_state: int = 42
+) -> pd.DataFrame:
+    """
+    Correlation matrix of the numeric columns
+
+    Spearman is Pearson over average ranks; it matches DataFrame.corr('spearman')
+    when there are no missing values (pandas re-ranks each pair's complete rows).
+    Wide frames (CORRELATION_WIDE_COLUMNS columns or more) are correlated on a
+    uniform row sample - with 50k rows a coefficient is within ~0.01 of its
+    full-data value.
+
+    Args:
+        df: DataFrame
+        method: 'pearson' or 'spearman'
+        approximate: Correlate a row sample (None decides from the frame width)
+        sample_rows: Sample size in approximate mode (defaults to CORRELATION_SAMPLE_ROWS)
+        random_state: Seed of the row sample
+
+    Returns:
+        (k x k) DataFrame; attrs carry method, approximate and rows_used
+    """
+    if method not in CORRELATION_METHODS:
+        raise ValueError(f"Unknown correlation method '{method}', expected one of {', '.join(CORRELATION_METHODS)}")
+
+    numeric = df.select_dtypes(include=[np.number])
+    block = numeric.to_numpy(dtype=np.float64, na_value=np.nan)
+    sample_rows = sample_rows or CORRELATION_SAMPLE_ROWS
+    if approximate is None:
+        approximate = block.shape[1] >= CORRELATION_WIDE_COLUMNS
+    sampled = approximate and len(block) > sample_rows
+    if sampled:
+        rng = np.random.default_rng(random_state)
+        block = block[np.sort(rng.choice(len(block), sample_rows, replace=False))]
+        logger.info(f"Correlating {numeric.shape[1]} columns on a {sample_rows}-row sample of {len(df)} rows")
+
+    if method == "spearman":
+        block = pd.DataFrame(block).rank().to_numpy()
+
+    matrix = pd.DataFrame(_pearson(block), index=numeric.columns, columns=numeric.columns)
+    matrix.attrs = {"method": method, "approximate": bool(sampled), "rows_used": int(len(block))}
+    return matrix
+
+
+def correlation_pairs(
+    matrix: pd.DataFrame,
+    threshold: Optional[float] = None,
+    max_pairs: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Significant column pairs of a correlation matrix, strongest first
+
+    Pairs come from a mask over the upper triangle; dicts are only built for
+    the max_pairs returned, not for every pair of a wide matrix.
+
+    Returns:
+        Dict with correlations (pair dicts) and significant_pairs (count before the cap)
+    """
+    threshold = CORRELATION_THRESHOLD if threshold is None else threshold
+    max_pairs = CORRELATION_MAX_PAIRS if max_pairs is None else max_pairs
+
+    values = matrix.to_numpy(dtype=np.float64)
+    rows, cols = np.triu_indices(len(values), 1)
+    corr = values[rows, cols]
+    with np.errstate(invalid='ignore'):
+        significant = np.abs(corr) > threshold
+    rows, cols, corr = rows[significant], cols[significant], corr[significant]
+
+    # Stable sort keeps matrix order among equally strong pairs
+    order = np.argsort(-np.abs(corr), kind="stable")[:max_pairs]
+    rows, cols, corr = rows[order], cols[order], corr[order]
+    strength = np.select([np.abs(corr) > 0.7, np.abs(corr) > 0.4], ["strong", "moderate"], "weak")
+    direction = np.where(corr > 0, "positive", "negative")
+
+    names = np.asarray(matrix.columns, dtype=object)
+    return {
+        "correlations": [
+            {"feature1": f1, "feature2": f2, "correlation": value, "strength": s, "direction": d}
+            for f1, f2, value, s, d in zip(
+                names[rows].tolist(), names[cols].tolist(), corr.tolist(), strength.tolist(), direction.tolist()
+            )
+        ],
+        "significant_pairs": int(significant.sum())
+    }
+
+
+def _report_columns(matrix: pd.DataFrame, pairs: List[Dict[str, Any]]) -> List[Any]:
+    """Columns of the strongest pairs, in matrix order, capped at CORRELATION_MATRIX_MAX_COLUMNS"""
+    if len(matrix.columns) <= CORRELATION_MATRIX_MAX_COLUMNS:
+        return list(matrix.columns)
+    chosen = set()
+    for pair in pairs:
+        for name in (pair["feature1"], pair["feature2"]):
+            if name not in chosen and len(chosen) < CORRELATION_MATRIX_MAX_COLUMNS:
+                chosen.add(name)
+    if not chosen:
+        return list(matrix.columns[:CORRELATION_MATRIX_MAX_COLUMNS])
+    return [col for col in matrix.columns if col in chosen]
+
+
+def correlation_report(matrix: pd.DataFrame, max_pairs: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Significant pairs and the matrix from a correlation matrix (in-memory or streamed)
+
+    Matrices wider than CORRELATION_MATRIX_MAX_COLUMNS are returned for the
+    columns of the strongest pairs only (matrix_truncated is then True).
+    """
+    if len(matrix.columns) < 2:
+        return {"correlations": [], "matrix": {}}
+
+    pairs = correlation_pairs(matrix, max_pairs=max_pairs)
+    columns = _report_columns(matrix, pairs["correlations"])
+    return {
+        "correlations": pairs["correlations"],
+        "matrix": matrix.loc[columns, columns].to_dict(),
+        "significant_pairs": pairs["significant_pairs"],
+        "column_count": len(matrix.columns),
+        "matrix_truncated": len(columns) < len(matrix.columns),
+        "method": matrix.attrs.get("method", "pearson"),
+        "approximate": matrix.attrs.get("approximate", False)
+    }
+
+
+def target_correlations(df: pd.DataFrame, target: str, matrix: Optional[pd.DataFrame] = None) -> pd.Series:
+    """
+    Correlation of every numeric column with a numeric target
+
+    Read from a cached matrix when it covers the target, otherwise computed
+    in one vectorized pass.
+    """
+    if matrix is not None and target in matrix.columns:
+        return matrix[target].drop(target)
+    if target not in df.columns or not pd.api.types.is_numeric_dtype(df[target]):
+        return pd.Series(dtype=np.float64)
+    numeric = df.select_dtypes(include=[np.number]).drop(columns=[target])
+    return numeric.corrwith(df[target])
+
+
+def _cache_key(dataset_id: str, method: str) -> str:
+    return f"{dataset_id}:{method}"
+
+
+def get_cached_matrix(dataset_id: str, version: int, method: str = "pearson") -> Optional[pd.DataFrame]:
+    """Cached correlation matrix of a dataset version, or None"""
+    return correlation_cache.get(_cache_key(dataset_id, method), version)
+
+
+def cache_matrix(dataset_id: str, version: int, matrix: pd.DataFrame):
+    """Cache a dataset version's correlation matrix for every consumer"""
+    correlation_cache.put(_cache_key(dataset_id, matrix.attrs.get("method", "pearson")), version, matrix)
+
+
+def invalidate_correlations(dataset_id: str):
+    """Drop the cached correlation matrices of a dataset"""
+    for method in CORRELATION_METHODS:
+        correlation_cache.invalidate(_cache_key(dataset_id, method))
+
+
+# Singleton instance
+correlation_cache = DataFrameCache(CORRELATION_CACHE_MAX_MB * 1024 * 1024)
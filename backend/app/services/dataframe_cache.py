@@ -0,0 +1,101 @@
+"""
+DataFrame Cache Service
+Memory-bounded in-process LRU cache of loaded datasets keyed by dataset id and version
+"""
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+import pandas as pd
+
+from app.config import DATAFRAME_CACHE_MAX_MB
+from app.services.storage_planner import estimate_frame_bytes
+
+logger = logging.getLogger(__name__)
+
+
+class DataFrameCache:
+    """
+    LRU cache of DataFrames with eviction by total byte size
+
+    Entries are keyed by (dataset_id, version). Callers get a copy of the cached
+    frame so in-place edits (fillna(inplace=True), column assignment) never leak
+    back into the cache.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[pd.DataFrame, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, dataset_id: str, version: int) -> Optional[pd.DataFrame]:
+        """Return a copy of the cached DataFrame, or None on a miss"""
+        key = (dataset_id, version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            df = entry[0]
+        return df.copy()
+
+    def put(self, dataset_id: str, version: int, df: pd.DataFrame):
+        """Cache a DataFrame, evicting least recently used entries to stay within budget"""
+        size = estimate_frame_bytes(df)
+        if size > self.max_bytes:
+            logger.info(f"Dataset {dataset_id} ({size / (1024 * 1024):.1f} MB) exceeds cache budget, not cached")
+            return
+
+        key = (dataset_id, version)
+        df = df.copy()
+        with self._lock:
+            # Older versions of the same dataset are stale once a new one is cached
+            for stale_key in [k for k in self._entries if k[0] == dataset_id]:
+                self._remove(stale_key)
+
+            self._entries[key] = (df, size)
+            self.current_bytes += size
+
+            while self.current_bytes > self.max_bytes and self._entries:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def invalidate(self, dataset_id: str):
+        """Drop every cached version of a dataset"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == dataset_id]:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def _remove(self, key: Tuple[str, int]):
+        _, size = self._entries.pop(key)
+        self.current_bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "size_mb": round(self.current_bytes / (1024 * 1024), 2),
+                "max_size_mb": round(self.max_bytes / (1024 * 1024), 2),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+# Singleton instance
+dataframe_cache = DataFrameCache(DATAFRAME_CACHE_MAX_MB * 1024 * 1024)
@@ -0,0 +1,193 @@
+"""
+Executor Service
+Runs blocking pandas/sklearn work and blocking DB drivers off the asyncio event loop
+"""
+import asyncio
+import functools
+import multiprocessing
+import threading
+import time
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Optional
+
+from app.config import CPU_EXECUTOR_KIND, CPU_EXECUTOR_WORKERS, IO_EXECUTOR_WORKERS, PREDICT_EXECUTOR_WORKERS
+
+logger = logging.getLogger(__name__)
+
+_EXHAUSTED = object()
+
+
+def _timed_call(fn: Callable, args: tuple, kwargs: dict):
+    """Run fn in the worker and report when it started and finished (wall clock)"""
+    started = time.time()
+    result = fn(*args, **kwargs)
+    return result, started, time.time()
+
+
+def _next_or_exhausted(iterator):
+    return next(iterator, _EXHAUSTED)
+
+
+class WorkerPool:
+    """
+    Lazily created process or thread pool with queue-depth metrics
+
+    Process pools use the 'spawn' start method: forking a server that already
+    runs threads (Motor, the IO pool) can deadlock the child. Functions and
+    arguments submitted to a process pool must be picklable (module-level
+    functions, DataFrames, plain dicts).
+    """
+
+    def __init__(self, name: str, kind: str, max_workers: int):
+        if kind not in ("process", "thread"):
+            raise ValueError(f"Unsupported executor kind: {kind}")
+        self.name = name
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.queue_wait_total = 0.0
+        self.run_time_total = 0.0
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn")
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix=f"{self.name}-worker"
+                    )
+                logger.info(f"Started {self.name} {self.kind} pool with {self.max_workers} workers")
+            return self._executor
+
+    def _reset_broken(self, executor: Executor):
+        """Drop a process pool whose worker died so the next call starts a fresh one"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs) in the pool and await its result
+
+        Args:
+            fn: Blocking callable (module-level for process pools)
+
+        Returns:
+            Whatever fn returns
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        call = functools.partial(_timed_call, fn, args, kwargs)
+
+        with self._lock:
+            self.submitted += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        submitted_at = time.time()
+
+        try:
+            result, started, finished = await loop.run_in_executor(executor, call)
+        except BrokenProcessPool:
+            self._reset_broken(executor)
+            with self._lock:
+                self.failed += 1
+            raise
+        except BaseException:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+        with self._lock:
+            self.completed += 1
+            self.queue_wait_total += max(0.0, started - submitted_at)
+            self.run_time_total += finished - started
+        return result
+
+    async def iterate(self, iterable: Iterable) -> AsyncIterator[Any]:
+        """Consume a blocking iterator (DB cursor, file parser) one item per pool call"""
+        if self.kind != "thread":
+            raise ValueError("Iterators can only be consumed in a thread pool")
+        iterator = iter(iterable)
+        try:
+            while True:
+                item = await self.run(_next_or_exhausted, iterator)
+                if item is _EXHAUSTED:
+                    break
+                yield item
+        finally:
+            # Release cursors/connections promptly if the consumer stops early
+            # (in the pool too: closing a cursor or connection blocks)
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                try:
+                    await asyncio.get_running_loop().run_in_executor(self._get_executor(), close)
+                except Exception as e:
+                    logger.warning(f"Closing {self.name} pool iterator failed: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            finished = self.completed + self.failed
+            return {
+                "kind": self.kind,
+                "max_workers": self.max_workers,
+                "started": self._executor is not None,
+                "in_flight": self.in_flight,
+                "queue_depth": max(0, self.in_flight - self.max_workers),
+                "peak_in_flight": self.peak_in_flight,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "avg_queue_wait_s": round(self.queue_wait_total / self.completed, 4) if self.completed else 0.0,
+                "avg_run_time_s": round(self.run_time_total / self.completed, 4) if self.completed else 0.0,
+                "error_rate": round(self.failed / finished, 4) if finished else 0.0
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Singleton instances
+cpu_pool = WorkerPool("cpu", CPU_EXECUTOR_KIND, CPU_EXECUTOR_WORKERS)
+io_pool = WorkerPool("io", "thread", IO_EXECUTOR_WORKERS)
+# Online predictions get their own threads so they never queue behind DB or file work
+predict_pool = WorkerPool("predict", "thread", PREDICT_EXECUTOR_WORKERS)
+
+
+async def run_cpu_bound(fn: Callable, *args, **kwargs) -> Any:
+    """Run training/profiling/charting work in the CPU pool"""
+    return await cpu_pool.run(fn, *args, **kwargs)
+
+
+async def run_blocking_io(fn: Callable, *args, **kwargs) -> Any:
+    """Run a blocking driver call (DB connect/query, file parsing) in the IO thread pool"""
+    return await io_pool.run(fn, *args, **kwargs)
+
+
+def executor_stats() -> Dict[str, Any]:
+    return {"cpu": cpu_pool.stats(), "io": io_pool.stats(), "predict": predict_pool.stats()}
+
+
+def shutdown_executors():
+    cpu_pool.shutdown()
+    io_pool.shutdown()
+    predict_pool.shutdown()
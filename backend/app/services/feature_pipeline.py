@@ -0,0 +1,298 @@
+"""
+Feature Pipeline
+One fitted feature preparation shared by training, tuning, feature selection
+and prediction: numeric imputation, one-hot encoded categoricals, datetime
+parts and text length features. A pipeline is fitted once per dataset
+version, target and feature selection, cached, and stored with registered
+models so that rows are scored exactly as the training rows were prepared.
+"""
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.config import FEATURE_PIPELINE_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+FEATURE_KINDS = ("numeric", "categorical", "datetime", "text")
+
+# Columns with more distinct values are treated as text rather than one-hot encoded
+MAX_CATEGORIES = 50
+
+# Share of distinct values above which a string column of single tokens is an identifier
+IDENTIFIER_DISTINCT_RATIO = 0.95
+
+DATETIME_PARTS = ("year", "month", "day", "dayofweek")
+
+
+def infer_feature_types(df: pd.DataFrame, columns: Iterable[str], max_categories: int = MAX_CATEGORIES) -> Dict[str, List[str]]:
+    """
+    Split columns into numeric, categorical, datetime and text features
+
+    String columns with at most max_categories distinct values are
+    categorical; the others are text, except identifiers (IDs, emails,
+    URLs), which are left out. Boolean columns are numeric.
+    """
+    spec = {kind: [] for kind in FEATURE_KINDS}
+    identifiers = []
+    for col in columns:
+        dtype = df[col].dtype
+        if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_numeric_dtype(dtype):
+            spec["numeric"].append(col)
+        elif pd.api.types.is_datetime64_any_dtype(dtype):
+            spec["datetime"].append(col)
+        elif isinstance(dtype, pd.CategoricalDtype) or df[col].nunique() <= max_categories:
+            spec["categorical"].append(col)
+        elif _is_identifier(df[col]):
+            identifiers.append(col)
+        else:
+            spec["text"].append(col)
+    if identifiers:
+        logger.info(f"Skipped identifier columns as features: {identifiers[:10]}")
+    return spec
+
+
+def _is_identifier(values: pd.Series) -> bool:
+    """
+    Whether a string column holds near-unique single tokens
+
+    Such values (IDs, emails, URLs) only identify rows; their length
+    features would let models memorise rows instead of learning. Free text
+    is near-unique too but has words, so it stays a text feature.
+    """
+    values = values.dropna().astype(str)
+    if values.empty or values.nunique() < IDENTIFIER_DISTINCT_RATIO * len(values):
+        return False
+    return values.str.contains(r"\s").mean() < 0.1
+
+
+def _as_naive_datetimes(values: pd.Series) -> pd.Series:
+    if not pd.api.types.is_datetime64_any_dtype(values.dtype):
+        values = pd.to_datetime(values, errors="coerce", utc=True)
+    if getattr(values.dtype, "tz", None) is not None:
+        values = values.dt.tz_convert("UTC").dt.tz_localize(None)
+    return values
+
+
+def _numbers(values: pd.Series) -> np.ndarray:
+    if pd.api.types.is_bool_dtype(values.dtype) or pd.api.types.is_numeric_dtype(values.dtype):
+        return values.to_numpy(dtype=np.float64, na_value=np.nan)
+    return pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+class FeaturePipeline:
+    """
+    Fitted feature preparation
+
+    Attributes:
+        numeric: Numeric input columns (used as they are, missing values imputed)
+        categorical: Input column -> [[dummy column, category], ...] (first category dropped)
+        datetime: Datetime input columns (expanded into "<column>_<part>" features)
+        text: Text input columns (expanded into "<column>_length" and "<column>_words")
+        fill_values: Feature column -> training mean used for missing values
+    """
+
+    def __init__(
+        self,
+        numeric: List[str],
+        categorical: Dict[str, List[List[str]]],
+        datetime: Optional[List[str]] = None,
+        text: Optional[List[str]] = None,
+        fill_values: Optional[Dict[str, float]] = None
+    ):
+        self.numeric = list(numeric)
+        self.categorical = {col: [list(pair) for pair in dummies] for col, dummies in categorical.items()}
+        self.datetime = list(datetime or [])
+        self.text = list(text or [])
+        self.fill_values = dict(fill_values or {})
+        self.feature_columns = (
+            self.numeric
+            + [dummy for dummies in self.categorical.values() for dummy, _ in dummies]
+            + [f"{col}_{part}" for col in self.datetime for part in DATETIME_PARTS]
+            + [f"{col}_{feature}" for col in self.text for feature in ("length", "words")]
+        )
+
+    @classmethod
+    def fit(
+        cls,
+        df: pd.DataFrame,
+        numeric: Iterable[str] = (),
+        categorical: Iterable[str] = (),
+        datetime: Iterable[str] = (),
+        text: Iterable[str] = ()
+    ) -> "FeaturePipeline":
+        """
+        Fit the preparation of the given input columns on training data
+
+        Categories are named and ordered as pd.get_dummies(drop_first=True)
+        names them; fill values are the means of the prepared features.
+        """
+        dummies = {}
+        for col in categorical:
+            categories = pd.Categorical(df[col].dropna()).categories
+            dummies[col] = [[f"{col}_{category}", str(category)] for category in categories[1:]]
+        pipeline = cls(list(numeric), dummies, list(datetime), list(text))
+
+        # Means of the unfilled features (one-hot columns have no missing values)
+        fill_values = {}
+        for name, values in pipeline._raw_features(df, with_dummies=False):
+            mean = np.nanmean(values) if len(values) and not np.isnan(values).all() else np.nan
+            if not np.isnan(mean):
+                fill_values[name] = float(mean)
+        pipeline.fill_values = fill_values
+        return pipeline
+
+    @classmethod
+    def merge(cls, pipelines: Iterable["FeaturePipeline"]) -> "FeaturePipeline":
+        """Union of pipelines fitted on the same data (e.g. one per target)"""
+        numeric, categorical, datetime, text, fill_values = [], {}, [], [], {}
+        for pipeline in pipelines:
+            numeric.extend(col for col in pipeline.numeric if col not in numeric)
+            for col, dummies in pipeline.categorical.items():
+                categorical.setdefault(col, dummies)
+            datetime.extend(col for col in pipeline.datetime if col not in datetime)
+            text.extend(col for col in pipeline.text if col not in text)
+            for name, value in pipeline.fill_values.items():
+                fill_values.setdefault(name, value)
+        return cls(numeric, categorical, datetime, text, fill_values)
+
+    def subset(
+        self,
+        numeric: Iterable[str] = (),
+        categorical: Iterable[str] = (),
+        datetime: Iterable[str] = (),
+        text: Iterable[str] = ()
+    ) -> "FeaturePipeline":
+        """Pipeline for some of this pipeline's input columns (fitted values are kept)"""
+        pipeline = FeaturePipeline(
+            [col for col in numeric if col in self.numeric],
+            {col: self.categorical[col] for col in categorical if col in self.categorical},
+            [col for col in datetime if col in self.datetime],
+            [col for col in text if col in self.text]
+        )
+        pipeline.fill_values = {name: value for name, value in self.fill_values.items() if name in pipeline.feature_columns}
+        return pipeline
+
+    @property
+    def input_columns(self) -> Dict[str, str]:
+        """Raw input column -> feature kind"""
+        columns = {col: "numeric" for col in self.numeric}
+        columns.update({col: "categorical" for col in self.categorical})
+        columns.update({col: "datetime" for col in self.datetime})
+        columns.update({col: "text" for col in self.text})
+        return columns
+
+    def feature_sources(self) -> Dict[str, str]:
+        """Feature column -> input column it was derived from"""
+        sources = {col: col for col in self.numeric}
+        for col, dummies in self.categorical.items():
+            sources.update({dummy: col for dummy, _ in dummies})
+        sources.update({f"{col}_{part}": col for col in self.datetime for part in DATETIME_PARTS})
+        sources.update({f"{col}_{feature}": col for col in self.text for feature in ("length", "words")})
+        return sources
+
+    def _raw_features(self, df: pd.DataFrame, with_dummies: bool = True) -> Iterable[Tuple[str, np.ndarray]]:
+        """(feature column, values) before imputation; absent input columns give missing values"""
+        n = len(df)
+        missing = np.full(n, np.nan)
+        for col in self.numeric:
+            yield col, _numbers(df[col]) if col in df.columns else missing
+        if with_dummies:
+            for col, dummies in self.categorical.items():
+                if col not in df.columns:
+                    codes = np.full(n, -1)
+                else:
+                    values = df[col]
+                    strings = values.astype(str).where(values.notna())
+                    codes = pd.Categorical(strings, categories=[category for _, category in dummies]).codes
+                for position, (dummy, _) in enumerate(dummies):
+                    yield dummy, (codes == position).astype(np.int64)
+        for col in self.datetime:
+            stamps = _as_naive_datetimes(df[col]) if col in df.columns else None
+            for part in DATETIME_PARTS:
+                yield f"{col}_{part}", (
+                    getattr(stamps.dt, part).to_numpy(dtype=np.float64, na_value=np.nan) if stamps is not None else missing
+                )
+        for col in self.text:
+            strings = df[col].astype("string") if col in df.columns else None
+            yield f"{col}_length", strings.str.len().to_numpy(dtype=np.float64, na_value=np.nan) if strings is not None else missing
+            yield f"{col}_words", strings.str.split().str.len().to_numpy(dtype=np.float64, na_value=np.nan) if strings is not None else missing
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Feature matrix for raw rows, with the training columns in training order
+
+        Unseen categories encode as the dropped baseline (all zeros); missing
+        values, including absent input columns, get the training fill values.
+        """
+        features = {}
+        for name, values in self._raw_features(df):
+            fill = self.fill_values.get(name)
+            if fill is not None and values.dtype == np.float64:
+                values = np.where(np.isnan(values), fill, values)
+            features[name] = values
+        return pd.DataFrame(features, index=df.index, columns=self.feature_columns)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON form, stored as the preprocessing of registered models"""
+        return {
+            "numeric": self.numeric,
+            "categorical": self.categorical,
+            "datetime": self.datetime,
+            "text": self.text,
+            "feature_columns": self.feature_columns,
+            "fill_values": self.fill_values
+        }
+
+    @classmethod
+    def from_dict(cls, stored: Dict[str, Any]) -> "FeaturePipeline":
+        return cls(
+            stored.get("numeric", []), stored.get("categorical", {}),
+            stored.get("datetime"), stored.get("text"), stored.get("fill_values")
+        )
+
+
+def pipeline_key(spec: Optional[Dict[str, List[str]]]) -> str:
+    """Cache key of a feature selection ("auto" when every numeric column is used)"""
+    if not spec:
+        return "auto"
+    return json.dumps({kind: sorted(spec.get(kind) or []) for kind in FEATURE_KINDS}, sort_keys=True)
+
+
+class FeaturePipelineCache:
+    """LRU of fitted pipelines keyed by (dataset_id, version, target, feature selection key)"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, int, str, str], FeaturePipeline]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, dataset_id: str, version: int, target: str, key: str) -> Optional[FeaturePipeline]:
+        with self._lock:
+            pipeline = self._entries.get((dataset_id, version, target, key))
+            if pipeline is not None:
+                self._entries.move_to_end((dataset_id, version, target, key))
+            return pipeline
+
+    def put(self, dataset_id: str, version: int, target: str, key: str, pipeline: FeaturePipeline):
+        with self._lock:
+            # Pipelines fitted on other versions can never be used again
+            for stale_key in [k for k in self._entries if k[0] == dataset_id and k[1] != version]:
+                del self._entries[stale_key]
+            self._entries[(dataset_id, version, target, key)] = pipeline
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, dataset_id: str):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == dataset_id]:
+                del self._entries[key]
+
+
+# Singleton instance
+feature_pipeline_cache = FeaturePipelineCache(FEATURE_PIPELINE_CACHE_SIZE)
@@ -4,11 +4,13 @@ AI-powered feature selection and explanation generation
 """
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
 from sklearn.feature_selection import mutual_info_regression, mutual_info_classif
 import logging
 
+from app.services.feature_pipeline import FeaturePipeline, infer_feature_types
+
 logger = logging.getLogger(__name__)
 
 
@@ -40,10 +42,42 @@ def detect_variable_types(df: pd.DataFrame) -> Dict[str, List[str]]:
     }
 
 
+def selection_pipeline(df: pd.DataFrame, target_col: str) -> FeaturePipeline:
+    """Feature preparation of every column but the target, for scoring features"""
+    columns = [col for col in df.columns if col != target_col]
+    return FeaturePipeline.fit(df, **infer_feature_types(df, columns))
+
+
+def encode_features(
+    df: pd.DataFrame,
+    target_col: str,
+    pipeline: Optional[FeaturePipeline] = None
+) -> Tuple[pd.DataFrame, pd.Series, Dict[str, str]]:
+    """
+    Encoded feature matrix, target and feature -> original column mapping
+    
+    Rows with a missing target are dropped; the matrix is built once and
+    shared by the scoring methods below.
+    """
+    pipeline = pipeline or selection_pipeline(df, target_col)
+    rows = df[df[target_col].notna()]
+    return pipeline.transform(rows), rows[target_col], pipeline.feature_sources()
+
+
+def _aggregate_scores(columns: pd.Index, scores: np.ndarray, sources: Dict[str, str]) -> Dict[str, float]:
+    """Sum the scores of the encoded columns derived from each original feature"""
+    original_scores = {}
+    for col, score in zip(columns, scores):
+        source = sources[col]
+        original_scores[source] = original_scores.get(source, 0) + score
+    return original_scores
+
+
 def calculate_feature_importance_rf(
     df: pd.DataFrame, 
     target_col: str,
-    task_type: str = 'auto'
+    task_type: str = 'auto',
+    encoded: Optional[Tuple[pd.DataFrame, pd.Series, Dict[str, str]]] = None
 ) -> Dict[str, float]:
     """
     Calculate feature importance using Random Forest
@@ -52,17 +86,14 @@ def calculate_feature_importance_rf(
         df: DataFrame with features and target
         target_col: Target column name
         task_type: 'regression', 'classification', or 'auto'
+        encoded: Output of encode_features (computed when not given)
     
     Returns:
         Dict of feature names to importance scores
     """
     try:
-        # Prepare features
-        X = df.drop(columns=[target_col])
-        y = df[target_col]
-        
-        # Handle categorical variables
-        X_encoded = pd.get_dummies(X, drop_first=True)
+        # Prepare features (categoricals one-hot encoded, missing values filled)
+        X_encoded, y, sources = encoded or encode_features(df, target_col)
         
         # Auto-detect task type
         if task_type == 'auto':
@@ -81,17 +112,8 @@ def calculate_feature_importance_rf(
         
         model.fit(X_encoded, y)
         
-        # Get feature importance
-        importance_dict = dict(zip(X_encoded.columns, model.feature_importances_))
-        
-        # Aggregate importance for original features (before one-hot encoding)
-        original_importance = {}
-        for col in X.columns:
-            # Sum importance of all encoded columns that came from this feature
-            related_cols = [c for c in X_encoded.columns if c.startswith(col)]
-            original_importance[col] = sum(importance_dict.get(c, 0) for c in related_cols)
-        
-        return original_importance
+        # Aggregate importance for original features (before encoding)
+        return _aggregate_scores(X_encoded.columns, model.feature_importances_, sources)
     
     except Exception as e:
         logger.error(f"Error calculating RF feature importance: {str(e)}")
@@ -101,7 +123,8 @@ def calculate_feature_importance_rf(
 def calculate_mutual_information(
     df: pd.DataFrame,
     target_col: str,
-    task_type: str = 'auto'
+    task_type: str = 'auto',
+    encoded: Optional[Tuple[pd.DataFrame, pd.Series, Dict[str, str]]] = None
 ) -> Dict[str, float]:
     """
     Calculate mutual information between features and target
@@ -110,16 +133,13 @@ def calculate_mutual_information(
         df: DataFrame with features and target
         target_col: Target column name
         task_type: 'regression', 'classification', or 'auto'
+        encoded: Output of encode_features (computed when not given)
     
     Returns:
         Dict of feature names to MI scores
     """
     try:
-        X = df.drop(columns=[target_col])
-        y = df[target_col]
-        
-        # Handle categorical variables
-        X_encoded = pd.get_dummies(X, drop_first=True)
+        X_encoded, y, sources = encoded or encode_features(df, target_col)
         
         # Auto-detect task type
         if task_type == 'auto':
@@ -134,15 +154,8 @@ def calculate_mutual_information(
         else:
             mi_scores = mutual_info_classif(X_encoded, y, random_state=42)
         
-        mi_dict = dict(zip(X_encoded.columns, mi_scores))
-        
         # Aggregate MI for original features
-        original_mi = {}
-        for col in X.columns:
-            related_cols = [c for c in X_encoded.columns if c.startswith(col)]
-            original_mi[col] = sum(mi_dict.get(c, 0) for c in related_cols)
-        
-        return original_mi
+        return _aggregate_scores(X_encoded.columns, mi_scores, sources)
     
     except Exception as e:
         logger.error(f"Error calculating mutual information: {str(e)}")
@@ -183,7 +196,8 @@ def calculate_correlation_scores(
 def suggest_features_ai(
     df: pd.DataFrame,
     target_col: str,
-    top_n: int = 10
+    top_n: int = 10,
+    pipeline: Optional[FeaturePipeline] = None
 ) -> Dict[str, any]:
     """
     AI-powered feature suggestion combining multiple methods
@@ -192,14 +206,16 @@ def suggest_features_ai(
         df: DataFrame with features and target
         target_col: Target column name
         top_n: Number of top features to suggest
+        pipeline: Fitted selection_pipeline to reuse (fitted here when not given)
     
     Returns:
         Dict with suggested features and their scores/explanations
     """
     try:
-        # Calculate feature importance using multiple methods
-        rf_importance = calculate_feature_importance_rf(df, target_col)
-        mi_scores = calculate_mutual_information(df, target_col)
+        # Calculate feature importance using multiple methods on one encoded matrix
+        encoded = encode_features(df, target_col, pipeline)
+        rf_importance = calculate_feature_importance_rf(df, target_col, encoded=encoded)
+        mi_scores = calculate_mutual_information(df, target_col, encoded=encoded)
         corr_scores = calculate_correlation_scores(df, target_col)
         
         # Combine scores (weighted average)
@@ -0,0 +1,220 @@
+"""
+GridFS Dataset Files
+Single-file datasets in GridFS (legacy uploads and database results): written
+with their serialization format in the file metadata, and read by streaming
+the download into the matching parser instead of buffering the whole blob
+"""
+import io
+import os
+import json
+import asyncio
+import logging
+import tempfile
+from typing import Dict, Any, Optional, BinaryIO
+
+import pandas as pd
+from bson import ObjectId
+
+from app.config import GRIDFS_DATASET_FORMAT, GRIDFS_SPOOL_MAX_MB
+from app.database.mongodb import fs
+from app.services.executor_service import run_blocking_io
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+logger = logging.getLogger(__name__)
+
+GRIDFS_FORMATS = ("parquet", "feather", "csv", "json", "xlsx", "xls")
+WRITABLE_FORMATS = ("parquet", "feather", "csv", "json")
+
+_EXTENSIONS = {
+    ".parquet": "parquet", ".feather": "feather", ".arrow": "feather", ".csv": "csv",
+    ".json": "json", ".xlsx": "xlsx", ".xls": "xls"
+}
+
+# Leading bytes of the binary formats
+_MAGIC = ((b"PAR1", "parquet"), (b"ARROW1", "feather"), (b"PK\x03\x04", "xlsx"), (b"\xd0\xcf\x11\xe0", "xls"))
+
+_READ_BUFFER = 1024 * 1024
+
+
+def detect_format(
+    metadata: Optional[Dict[str, Any]],
+    filename: Optional[str] = None,
+    dataset_name: Optional[str] = None,
+    head: bytes = b""
+) -> str:
+    """
+    Serialization format of a GridFS dataset file
+
+    The format tag in the file metadata wins; untagged (legacy) files are
+    recognised by the file extension, then by their first bytes, then by the
+    dataset name. Database results stored as JSON records carry no useful
+    name, which is why content is checked before the dataset name.
+    """
+    tagged = (metadata or {}).get("format")
+    if tagged in GRIDFS_FORMATS:
+        return tagged
+
+    extension = os.path.splitext((filename or "").lower())[1]
+    if extension in _EXTENSIONS:
+        return _EXTENSIONS[extension]
+
+    for magic, fmt in _MAGIC:
+        if head.startswith(magic):
+            return fmt
+    if head.lstrip()[:1] in (b"[", b"{"):
+        return "json"
+
+    extension = os.path.splitext((dataset_name or "").lower())[1]
+    return _EXTENSIONS.get(extension, "csv")
+
+
+class _GridOutReader(io.RawIOBase):
+    """
+    Blocking file object over an open GridFS download
+
+    Used by parsers running in a worker thread: each read pulls the next
+    GridFS chunk through the event loop, so only the parser's buffer and
+    one chunk are in memory at a time.
+    """
+
+    def __init__(self, grid_out, loop: asyncio.AbstractEventLoop, head: bytes = b""):
+        self._grid_out = grid_out
+        self._loop = loop
+        self._pending = memoryview(head)
+        self._eof = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending and not self._eof:
+            chunk = asyncio.run_coroutine_threadsafe(self._grid_out.readchunk(), self._loop).result()
+            if chunk:
+                self._pending = memoryview(chunk)
+            else:
+                self._eof = True
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+async def _spool(grid_out, head: bytes) -> BinaryIO:
+    """Copy a download chunk by chunk into a temporary file (in memory while small)"""
+    spool = tempfile.SpooledTemporaryFile(max_size=GRIDFS_SPOOL_MAX_MB * 1024 * 1024)
+    chunk = head
+    while chunk:
+        spool.write(chunk)
+        chunk = await grid_out.readchunk()
+    spool.seek(0)
+    return spool
+
+
+def _read_json(file_obj: BinaryIO) -> pd.DataFrame:
+    payload = file_obj.read()
+    records = None
+    if HAS_ORJSON:
+        try:
+            records = orjson.loads(payload)
+        except orjson.JSONDecodeError:
+            pass  # json.dumps output may hold NaN/Infinity, which orjson rejects
+    if records is None:
+        records = json.loads(payload)
+    return pd.DataFrame.from_records(records) if isinstance(records, list) else pd.DataFrame(records)
+
+
+_PARSERS = {
+    "parquet": pd.read_parquet,
+    "feather": pd.read_feather,
+    "json": _read_json,
+    "xlsx": pd.read_excel,
+    "xls": pd.read_excel,
+}
+
+
+async def read_gridfs_dataframe(dataset: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Load a dataset stored as a single GridFS file
+
+    CSV is parsed while it downloads; the other formats need the whole file
+    (random access or a single document) and are spooled to a temporary file
+    chunk by chunk first. Parsing runs in the IO pool.
+
+    Args:
+        dataset: Dataset document with gridfs_file_id
+
+    Returns:
+        DataFrame
+    """
+    file_id = dataset.get("gridfs_file_id")
+    if not file_id:
+        raise ValueError("GridFS file ID not found")
+
+    grid_out = await fs.open_download_stream(ObjectId(file_id))
+    head = await grid_out.readchunk()
+    fmt = detect_format(getattr(grid_out, "metadata", None), getattr(grid_out, "filename", None), dataset.get("name"), head)
+    logger.info(f"Reading GridFS dataset {dataset.get('id')} as {fmt} ({getattr(grid_out, 'length', 0)} bytes)")
+
+    if fmt == "csv":
+        reader = io.BufferedReader(_GridOutReader(grid_out, asyncio.get_running_loop(), head), _READ_BUFFER)
+        return await run_blocking_io(pd.read_csv, reader)
+
+    spool = await _spool(grid_out, head)
+    try:
+        return await run_blocking_io(_PARSERS[fmt], spool)
+    finally:
+        spool.close()
+
+
+def _serialize(df: pd.DataFrame, fmt: str) -> bytes:
+    buffer = io.BytesIO()
+    if fmt == "parquet":
+        df.to_parquet(buffer, index=False)
+    elif fmt == "feather":
+        df.reset_index(drop=True).to_feather(buffer)
+    elif fmt == "csv":
+        df.to_csv(buffer, index=False)
+    else:
+        df.to_json(buffer, orient="records", date_format="iso")
+    return buffer.getvalue()
+
+
+async def write_gridfs_dataframe(
+    dataset_id: str,
+    df: pd.DataFrame,
+    fmt: Optional[str] = None,
+    metadata: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Store a DataFrame as one GridFS file tagged with its format
+
+    Args:
+        dataset_id: Dataset ID
+        df: Data to store
+        fmt: One of WRITABLE_FORMATS (defaults to GRIDFS_DATASET_FORMAT)
+        metadata: Extra file metadata
+
+    Returns:
+        Dataset document fields (storage_type, gridfs_file_id, storage_format, storage_size)
+    """
+    fmt = fmt or GRIDFS_DATASET_FORMAT
+    if fmt not in WRITABLE_FORMATS:
+        raise ValueError(f"Unsupported GridFS dataset format '{fmt}', expected one of {', '.join(WRITABLE_FORMATS)}")
+
+    payload = await run_blocking_io(_serialize, df, fmt)
+    file_id = await fs.upload_from_stream(
+        f"dataset_{dataset_id}.{fmt}",
+        payload,
+        metadata={**(metadata or {}), "dataset_id": dataset_id, "type": "dataset", "format": fmt}
+    )
+    return {
+        "storage_type": "gridfs",
+        "gridfs_file_id": str(file_id),
+        "storage_format": fmt,
+        "storage_size": len(payload)
+    }
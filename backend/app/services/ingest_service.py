@@ -0,0 +1,278 @@
+"""
+Streaming Ingest Service
+Reads uploads in chunks and writes them straight to dataset storage
+"""
+import logging
+from typing import Dict, Any, List, Iterator, Iterable, Optional, Union, AsyncIterable, BinaryIO
+
+import numpy as np
+import pandas as pd
+
+from app.config import DATASET_CHUNK_ROWS
+from app.database.dataset_storage import DatasetWriter, DerivedDatasetWriter, split_parts
+from app.services.executor_service import run_blocking_io
+from app.services.profiling_service import ProfileAccumulator, widen_dtype
+
+logger = logging.getLogger(__name__)
+
+
+def preview_records(df: pd.DataFrame, n: int = 10) -> List[dict]:
+    """First rows as JSON-friendly records (datetimes rendered as strings)"""
+    preview = df.head(n).copy()
+    for col in preview.columns:
+        if pd.api.types.is_datetime64_any_dtype(preview[col]):
+            preview[col] = preview[col].astype(str)
+    return preview.to_dict('records')
+
+
+def _records_frame(records: List[tuple], columns: List[str]) -> pd.DataFrame:
+    """DataFrame of worksheet rows, with empty cells as NaN as pd.read_excel reads them"""
+    df = pd.DataFrame.from_records(records, columns=columns)
+    for col in df.select_dtypes(include=['object']).columns:
+        df[col] = df[col].where(df[col].notna(), np.nan)
+    return df
+
+
+def _iter_xlsx_chunks(file_obj: BinaryIO, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """Stream rows of the first worksheet with openpyxl's read-only mode"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_obj, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(c) if c is not None else f"Unnamed: {i}" for i, c in enumerate(header)]
+
+        batch = []
+        yielded = False
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunk_rows:
+                yield _records_frame(batch, columns)
+                yielded = True
+                batch = []
+        # A header-only sheet still yields its (empty) columns, as CSV parsing does
+        if batch or not yielded:
+            yield _records_frame(batch, columns)
+    finally:
+        workbook.close()
+
+
+def iter_file_chunks(
+    file_obj: BinaryIO,
+    filename: str,
+    chunk_rows: Optional[int] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Parse an uploaded CSV/Excel file incrementally
+
+    Args:
+        file_obj: Binary file object positioned at the start of the upload
+        filename: Original file name (used to pick the parser)
+        chunk_rows: Rows per yielded DataFrame
+
+    Returns:
+        Iterator of DataFrame chunks
+    """
+    chunk_rows = chunk_rows or DATASET_CHUNK_ROWS
+    lower_name = filename.lower()
+
+    if lower_name.endswith('.csv'):
+        with pd.read_csv(file_obj, chunksize=chunk_rows) as reader:
+            for chunk in reader:
+                yield chunk
+    elif lower_name.endswith('.xlsx'):
+        yield from _iter_xlsx_chunks(file_obj, chunk_rows)
+    elif lower_name.endswith('.xls'):
+        # Legacy .xls has no streaming reader - parse once, store in chunks
+        df = pd.read_excel(file_obj)
+        for start in range(0, len(df), chunk_rows):
+            yield df.iloc[start:start + chunk_rows]
+    else:
+        raise ValueError("Unsupported file format. Please upload CSV or Excel files.")
+
+
+async def ingest_chunks(
+    dataset_id: str,
+    chunks: Union[Iterable[pd.DataFrame], AsyncIterable[pd.DataFrame]],
+    backend: Optional[str] = None,
+    profiler: Optional[ProfileAccumulator] = None,
+    first_part: int = 0
+) -> Dict[str, Any]:
+    """
+    Write DataFrame chunks to dataset storage while building the schema,
+    row count and preview incrementally
+
+    Only one chunk is held in memory at a time. If ingestion fails midway the
+    chunks already written are removed.
+
+    Args:
+        dataset_id: Dataset ID
+        chunks: DataFrame chunks (sync or async iterable)
+        backend: Storage backend override
+        profiler: Accumulator that also profiles every chunk
+        first_part: Part number of the first chunk (when appending to a dataset)
+
+    Returns:
+        Dataset document fields (schema, counts, preview and storage manifest)
+    """
+    writer = DatasetWriter(dataset_id, backend=backend, first_part=first_part)
+    columns: List[str] = []
+    dtypes: Dict[str, Any] = {}
+    preview: List[dict] = []
+
+    async def _consume(chunk: pd.DataFrame):
+        nonlocal columns, preview
+        if not columns:
+            columns = [str(c) for c in chunk.columns]
+            preview = preview_records(chunk)
+        for col, dtype in chunk.dtypes.items():
+            dtypes[str(col)] = widen_dtype(dtypes.get(str(col)), dtype)
+        await writer.write(chunk)
+        if profiler is not None:
+            await run_blocking_io(profiler.add, chunk)
+
+    try:
+        if hasattr(chunks, "__aiter__"):
+            async for chunk in chunks:
+                await _consume(chunk)
+        else:
+            for chunk in chunks:
+                await _consume(chunk)
+    except Exception:
+        await writer.abort()
+        raise
+
+    logger.info(f"Ingested dataset {dataset_id}: {writer.row_count} rows in {len(writer.chunks)} chunk(s)")
+
+    return {
+        "row_count": writer.row_count,
+        "column_count": len(columns),
+        "columns": columns,
+        "dtypes": {col: str(dtype) for col, dtype in dtypes.items()},
+        "data_preview": preview,
+        **writer.manifest()
+    }
+
+
+def rewritten_columns(before: pd.DataFrame, after: pd.DataFrame) -> Optional[List[str]]:
+    """
+    Columns a derived DataFrame has to store anew when it keeps the rows of its base
+
+    Returns:
+        New or changed column names, or None when the rows differ (nothing can be shared)
+    """
+    if len(before) != len(after) or not before.index.equals(after.index):
+        return None
+    return [
+        str(col) for col in after.columns
+        if col not in before.columns or not before[col].equals(after[col])
+    ]
+
+
+async def ingest_derived(
+    dataset_id: str,
+    base: Dict[str, Any],
+    df: pd.DataFrame,
+    changed: Iterable[str]
+) -> Dict[str, Any]:
+    """
+    Store a DataFrame that keeps the rows of a Parquet-stored dataset as a
+    copy-on-write version of it
+
+    Only the changed columns are written; every other column references the
+    base's files, part by part.
+
+    Args:
+        dataset_id: ID of the dataset being written (the base itself or a derived dataset)
+        base: Dataset document (or version) whose rows df keeps, in order
+        df: Data of the new version
+        changed: Columns whose values differ from the base
+
+    Returns:
+        Dataset document fields (schema, counts, preview and storage manifest)
+    """
+    changed = list(changed)
+    writer = DerivedDatasetWriter(dataset_id, base, list(df.columns))
+    try:
+        for part in split_parts(base, df):
+            await writer.write_part(part, changed)
+        manifest = writer.manifest()
+    except Exception:
+        await writer.abort()
+        raise
+
+    logger.info(
+        f"Derived dataset {dataset_id} from {base['id']}: {len(writer.new_files)} new file(s), "
+        f"{manifest['shared_size']} bytes shared"
+    )
+
+    return {
+        "row_count": writer.row_count,
+        "column_count": len(df.columns),
+        "columns": [str(c) for c in df.columns],
+        "dtypes": {str(col): str(dtype) for col, dtype in df.dtypes.items()},
+        "data_preview": preview_records(df),
+        **manifest
+    }
+
+
+async def ingest_added_columns(
+    dataset_id: str,
+    base: Dict[str, Any],
+    parts: AsyncIterable[pd.DataFrame]
+) -> Dict[str, Any]:
+    """
+    Store columns computed part by part for a Parquet-stored dataset as a
+    copy-on-write version of it (e.g. batch predictions)
+
+    Unlike ingest_derived the base is never loaded: each part holds only the
+    new (or replaced) columns for the rows of the matching base part, and
+    every base column stays shared.
+
+    Args:
+        dataset_id: ID of the dataset being written (usually the base itself)
+        base: Dataset document whose parts the columns belong to
+        parts: One DataFrame per base part, in order, all with the same columns
+
+    Returns:
+        Dataset document fields (schema, counts, preview and storage manifest)
+    """
+    base_columns = list(base.get("columns", []))
+    writer = None
+    dtypes = dict(base.get("dtypes") or {})
+    preview = list(base.get("data_preview") or [])
+    try:
+        async for part in parts:
+            part = part.rename(columns=str)
+            if writer is None:
+                added = list(part.columns)
+                columns = [col for col in base_columns if col not in added] + added
+                writer = DerivedDatasetWriter(dataset_id, base, columns)
+                preview = [
+                    {**{key: value for key, value in row.items() if key not in added}, **new}
+                    for row, new in zip(preview, preview_records(part, len(preview)))
+                ]
+            for col, dtype in part.dtypes.items():
+                dtypes[col] = str(dtype)
+            await writer.write_part(part, added)
+        if writer is None:
+            raise ValueError(f"Dataset {base['id']} has no stored parts")
+        manifest = writer.manifest()
+    except Exception:
+        if writer is not None:
+            await writer.abort()
+        raise
+
+    logger.info(f"Added {len(added)} column(s) to dataset {dataset_id}: {len(writer.new_files)} new file(s)")
+
+    return {
+        "row_count": writer.row_count,
+        "column_count": len(columns),
+        "columns": columns,
+        "dtypes": {col: dtypes[col] for col in columns if col in dtypes},
+        "data_preview": preview,
+        **manifest
+    }
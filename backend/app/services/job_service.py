@@ -0,0 +1,384 @@
+"""
+Background Job Service
+Mongo-backed job queue for long-running analysis and tuning requests
+"""
+import asyncio
+import json
+import os
+import socket
+import uuid
+import logging
+from contextvars import ContextVar
+from datetime import datetime, timezone, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from bson import ObjectId
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from pymongo import ReturnDocument
+
+from app.config import (
+    JOB_WORKER_CONCURRENCY, JOB_POLL_INTERVAL, JOB_HEARTBEAT_INTERVAL,
+    JOB_STALE_AFTER, JOB_MAX_ATTEMPTS, JOB_RESULT_INLINE_MAX_MB
+)
+from app.database.mongodb import db, fs
+from app.services.storage_planner import plan_document, decode_document
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+FINISHED_STATUSES = (JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED)
+
+# Fields returned when polling - the payload and full result are fetched separately
+_STATUS_PROJECTION = {"_id": 0, "payload": 0, "result": 0}
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+JOB_HANDLERS: Dict[str, JobHandler] = {}
+
+
+class JobCancelled(BaseException):
+    """
+    Raised inside a running job once cancellation has been requested
+
+    A BaseException so that route handlers' `except Exception` blocks (which
+    turn errors into HTTP 500s) let it through to JobWorker.execute.
+    """
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def register_job_handler(job_type: str, handler: JobHandler):
+    """Make an async handler(payload) runnable as a background job"""
+    JOB_HANDLERS[job_type] = handler
+
+
+class JobContext:
+    """Progress reporting handle for the job currently executing"""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+
+    async def progress(
+        self,
+        stage: str,
+        percent: Optional[float] = None,
+        message: Optional[str] = None,
+        partial: Optional[Dict[str, Any]] = None
+    ):
+        update = {
+            "progress.stage": stage,
+            "progress.updated_at": _now(),
+            "heartbeat_at": _now()
+        }
+        if percent is not None:
+            update["progress.percent"] = round(float(percent), 1)
+        if message is not None:
+            update["progress.message"] = message
+        for key, value in (partial or {}).items():
+            update[f"partial_results.{key}"] = jsonable_encoder(value)
+
+        job = await db.jobs.find_one_and_update(
+            {"id": self.job_id},
+            {"$set": update},
+            projection={"cancel_requested": True},
+            return_document=ReturnDocument.AFTER
+        )
+        if job and job.get("cancel_requested"):
+            raise JobCancelled(f"Job {self.job_id} was cancelled")
+
+
+_current_job: ContextVar[Optional[JobContext]] = ContextVar("current_job", default=None)
+
+
+async def report_progress(
+    stage: str,
+    percent: Optional[float] = None,
+    message: Optional[str] = None,
+    partial: Optional[Dict[str, Any]] = None
+):
+    """
+    Record progress for the job running in this task (no-op for plain HTTP requests)
+
+    Args:
+        stage: Short stage name (e.g. "training")
+        percent: Overall completion 0-100
+        message: Human readable status
+        partial: Partial results merged into the job document
+    """
+    job = _current_job.get()
+    if job is not None:
+        await job.progress(stage, percent, message, partial)
+
+
+async def submit_job(job_type: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Queue a job and return its status document"""
+    if job_type not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job type: {job_type}")
+
+    job = {
+        "id": str(uuid.uuid4()),
+        "type": job_type,
+        "status": JOB_QUEUED,
+        "payload": payload,
+        "dataset_id": payload.get("dataset_id"),
+        "progress": {"stage": "queued", "percent": 0.0},
+        "partial_results": {},
+        "result": None,
+        "result_file_id": None,
+        "error": None,
+        "attempts": 0,
+        "cancel_requested": False,
+        "worker_id": None,
+        "created_at": _now(),
+        "started_at": None,
+        "finished_at": None,
+        "heartbeat_at": None
+    }
+    await db.jobs.insert_one(job)
+    logger.info(f"Queued {job_type} job {job['id']}")
+    return {k: v for k, v in job.items() if k not in ("_id", "payload", "result")}
+
+
+async def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Job status, progress and partial results (without the final result)"""
+    return await db.jobs.find_one({"id": job_id}, _STATUS_PROJECTION)
+
+
+async def get_job_result(job_id: str) -> Optional[Dict[str, Any]]:
+    """Final result of a job (loaded from GridFS when it was stored there)"""
+    job = await db.jobs.find_one({"id": job_id}, {"_id": 0, "payload": 0})
+    if job and job.get("result_file_id"):
+        grid_out = await fs.open_download_stream(ObjectId(job["result_file_id"]))
+        payload = await grid_out.read()
+        if (grid_out.metadata or {}).get("format") == "bson":
+            job["result"] = decode_document(payload)["result"]
+        else:
+            job["result"] = json.loads(payload)
+    return job
+
+
+async def list_jobs(status: Optional[str] = None, job_type: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+    query = {}
+    if status:
+        query["status"] = status
+    if job_type:
+        query["type"] = job_type
+    cursor = db.jobs.find(query, {**_STATUS_PROJECTION, "partial_results": 0}).sort("created_at", -1).limit(limit)
+    return await cursor.to_list(limit)
+
+
+async def cancel_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Cancel a job
+
+    Queued jobs are cancelled immediately; running jobs stop at their next
+    progress report.
+    """
+    await db.jobs.update_one(
+        {"id": job_id, "status": JOB_QUEUED},
+        {"$set": {"status": JOB_CANCELLED, "finished_at": _now(), "cancel_requested": True}}
+    )
+    await db.jobs.update_one(
+        {"id": job_id, "status": JOB_RUNNING},
+        {"$set": {"cancel_requested": True}}
+    )
+    return await get_job(job_id)
+
+
+async def _store_result(job_id: str, result: Any) -> Dict[str, Any]:
+    """Result fields for the job document, spilling large results to GridFS"""
+    # Encoded once: the same BSON is stored inline or as the GridFS file
+    plan = plan_document({"result": jsonable_encoder(result)}, JOB_RESULT_INLINE_MAX_MB * 1024 * 1024)
+    if plan.inline:
+        return {"result": plan.fields()["result"], "result_file_id": None}
+
+    file_id = await fs.upload_from_stream(
+        f"job_{job_id}_result.bson",
+        plan.payload,
+        metadata={"job_id": job_id, "type": "job_result", "format": "bson"}
+    )
+    logger.info(f"Stored job {job_id} result in GridFS ({plan.size / (1024 * 1024):.2f} MB)")
+    return {"result": None, "result_file_id": str(file_id)}
+
+
+async def _delete_stored_result(job: Dict[str, Any]):
+    if job.get("result_file_id"):
+        try:
+            await fs.delete(ObjectId(job["result_file_id"]))
+        except Exception as e:
+            logger.warning(f"Failed to delete result of job {job.get('id')}: {str(e)}")
+
+
+async def delete_job(job_id: str) -> bool:
+    job = await db.jobs.find_one({"id": job_id}, {"_id": 0, "result_file_id": 1, "id": 1})
+    if not job:
+        return False
+    await _delete_stored_result(job)
+    await db.jobs.delete_one({"id": job_id})
+    return True
+
+
+class JobWorker:
+    """
+    Claims queued jobs from Mongo and runs their handlers
+
+    Claiming is a single find_one_and_update, so any number of workers (API
+    pods with the embedded worker, or dedicated `python worker.py` pods) can
+    share the queue. Running jobs send heartbeats; jobs whose worker died are
+    requeued until JOB_MAX_ATTEMPTS is reached.
+    """
+
+    def __init__(self, concurrency: int = JOB_WORKER_CONCURRENCY, worker_id: Optional[str] = None):
+        self.concurrency = max(1, concurrency)
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._stopping = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    async def _claim(self) -> Optional[Dict[str, Any]]:
+        now = _now()
+        job = await db.jobs.find_one_and_update(
+            {"status": JOB_QUEUED},
+            {
+                "$set": {"status": JOB_RUNNING, "worker_id": self.worker_id, "started_at": now, "heartbeat_at": now},
+                "$inc": {"attempts": 1}
+            },
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+        if job:
+            job.pop("_id", None)
+        return job
+
+    async def requeue_stale_jobs(self):
+        """Put back jobs whose worker stopped sending heartbeats"""
+        cutoff = (datetime.now(timezone.utc) - timedelta(seconds=JOB_STALE_AFTER)).isoformat()
+        stale = {"status": JOB_RUNNING, "heartbeat_at": {"$lt": cutoff}}
+
+        requeued = await db.jobs.update_many(
+            {**stale, "attempts": {"$lt": JOB_MAX_ATTEMPTS}, "cancel_requested": {"$ne": True}},
+            {"$set": {"status": JOB_QUEUED, "worker_id": None, "progress.stage": "requeued"}}
+        )
+        failed = await db.jobs.update_many(
+            stale,
+            {"$set": {"status": JOB_FAILED, "finished_at": _now(), "error": "Worker stopped responding"}}
+        )
+        if requeued.modified_count or failed.modified_count:
+            logger.warning(
+                f"Stale jobs: {requeued.modified_count} requeued, {failed.modified_count} marked failed"
+            )
+
+    async def _heartbeat(self, job_id: str, done: asyncio.Event):
+        while not done.is_set():
+            try:
+                await asyncio.wait_for(done.wait(), timeout=JOB_HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                await db.jobs.update_one(
+                    {"id": job_id, "status": JOB_RUNNING},
+                    {"$set": {"heartbeat_at": _now()}}
+                )
+
+    async def execute(self, job: Dict[str, Any]):
+        """Run one claimed job and record its outcome"""
+        job_id = job["id"]
+        handler = JOB_HANDLERS.get(job["type"])
+        done = asyncio.Event()
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, done))
+        token = _current_job.set(JobContext(job_id))
+        logger.info(f"Worker {self.worker_id} running {job['type']} job {job_id} (attempt {job.get('attempts')})")
+
+        try:
+            if handler is None:
+                raise ValueError(f"No handler registered for job type: {job['type']}")
+            result = await handler(job.get("payload") or {})
+            update = {
+                "status": JOB_COMPLETED,
+                "progress.stage": "completed",
+                "progress.percent": 100.0,
+                "progress.message": "Completed",
+                **(await _store_result(job_id, result))
+            }
+        except JobCancelled:
+            update = {"status": JOB_CANCELLED, "progress.stage": "cancelled"}
+        except HTTPException as e:
+            update = {"status": JOB_FAILED, "error": str(e.detail), "error_status_code": e.status_code}
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}", exc_info=True)
+            update = {"status": JOB_FAILED, "error": str(e)}
+        finally:
+            _current_job.reset(token)
+            done.set()
+            await heartbeat
+
+        update["finished_at"] = _now()
+        await db.jobs.update_one({"id": job_id}, {"$set": update})
+        logger.info(f"Job {job_id} finished with status {update['status']}")
+
+    async def _run_slot(self):
+        while not self._stopping.is_set():
+            try:
+                job = await self._claim()
+            except Exception as e:
+                logger.error(f"Job claim failed: {str(e)}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self.execute(job)
+            except Exception as e:
+                # Recording the outcome failed; the stale-job check will retry the job
+                logger.error(f"Job {job.get('id')} bookkeeping failed: {str(e)}", exc_info=True)
+
+    async def _run_maintenance(self):
+        while not self._stopping.is_set():
+            try:
+                await self.requeue_stale_jobs()
+            except Exception as e:
+                logger.error(f"Stale job check failed: {str(e)}")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=JOB_STALE_AFTER / 2)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        """Start the worker loops on the running event loop"""
+        if self._tasks:
+            return
+        self._stopping.clear()
+        self._tasks = [asyncio.create_task(self._run_slot()) for _ in range(self.concurrency)]
+        self._tasks.append(asyncio.create_task(self._run_maintenance()))
+        logger.info(f"Job worker {self.worker_id} started with concurrency {self.concurrency}")
+
+    async def stop(self, timeout: Optional[float] = None):
+        """
+        Stop claiming new jobs and wait for the running ones to finish
+
+        Jobs still running after timeout are cancelled; they stay 'running'
+        and are requeued by the stale-job check once their heartbeat expires.
+        """
+        self._stopping.set()
+        if self._tasks:
+            _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def run_forever(self):
+        self.start()
+        await asyncio.gather(*self._tasks)
+
+
+# Singleton instance
+job_worker = JobWorker()
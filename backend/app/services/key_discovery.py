@@ -0,0 +1,316 @@
+"""
+Key Discovery
+Foreign-key candidates from per-column signatures instead of value sets.
+Each column is reduced once per dataset version to its type family, distinct
+count and a bottom-k sketch (the k smallest 64-bit hashes of its distinct
+values); containment between every pair of compatible columns is then
+estimated from the sketches with array operations.
+"""
+import math
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.config import KEY_SKETCH_SIZE, KEY_MIN_DISTINCT, KEY_MIN_COVERAGE, KEY_SIGNATURE_CACHE_SIZE
+
+# Fast string-to-integer parsing for IDs stored as text
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+logger = logging.getLogger(__name__)
+
+FAMILY_NUMBER = "number"
+FAMILY_TEXT = "text"
+FAMILY_DATETIME = "datetime"
+
+# Sketch padding: sorts after every real hash
+_EMPTY = np.iinfo(np.uint64).max
+
+_PROBE_ROWS = 64
+
+
+def _distinct_values(values: pd.Series) -> Tuple[Optional[str], int, Optional[np.ndarray]]:
+    """
+    Type family, non-null rows and distinct values of a column, or family None if it cannot be a key
+
+    Integers, integral floats and text holding integers all become int64 so
+    that 42, 42.0 and "42" hash alike; continuous floats and booleans are not
+    key material. Distinct integers come from a bincount when their range is
+    small; wide-ranged integers are returned with duplicates, which the
+    bottom-k sketch drops by hash.
+    """
+    dtype = values.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy()
+        used = values.cat.categories[np.flatnonzero(np.bincount(codes[codes >= 0], minlength=len(values.cat.categories)))]
+        family, _, distinct = _distinct_values(pd.Series(used))
+        return family, int((codes >= 0).sum()), distinct
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_timedelta64_dtype(dtype):
+        return None, 0, None
+
+    if pd.api.types.is_integer_dtype(dtype):
+        numbers = values.dropna().to_numpy(dtype=np.int64) if values.hasnans else values.to_numpy(dtype=np.int64)
+        return FAMILY_NUMBER, len(numbers), _integers(numbers)
+    if pd.api.types.is_float_dtype(dtype):
+        array = values.to_numpy(dtype=np.float64)
+        array = array[~np.isnan(array)]
+        probe = array[:_PROBE_ROWS]
+        if not np.array_equal(probe, np.round(probe)) or not np.array_equal(array, np.round(array)):
+            return None, 0, None
+        if len(array) and np.abs(array).max() >= 2 ** 63:
+            return None, 0, None
+        return FAMILY_NUMBER, len(array), _integers(array.astype(np.int64))
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        if getattr(dtype, "tz", None) is not None:
+            values = values.dt.tz_convert("UTC").dt.tz_localize(None)
+        stamps = values.dropna().dt.as_unit("ns").to_numpy().view(np.int64)
+        return FAMILY_DATETIME, len(stamps), stamps
+    if pd.api.types.is_numeric_dtype(dtype):
+        return None, 0, None
+
+    # Text: a single hashing pass finds the distinct values and the missing ones
+    codes, uniques = pd.factorize(values.to_numpy(dtype=object), use_na_sentinel=True)
+    rows = int((codes >= 0).sum())
+    uniques = pd.Series(uniques, dtype=object)
+    # Integer IDs stored as strings join against numeric IDs
+    probe = pd.to_numeric(uniques.iloc[:_PROBE_ROWS], errors="coerce")
+    if len(probe) and probe.notna().all():
+        numbers = _parse_integers(uniques)
+        if numbers is not None:
+            return FAMILY_NUMBER, rows, pd.unique(numbers)
+    return FAMILY_TEXT, rows, uniques.astype(str).to_numpy(dtype=object)
+
+
+def _parse_integers(text: pd.Series) -> Optional[np.ndarray]:
+    """int64 values of text that holds only integers, else None"""
+    if HAS_PYARROW:
+        try:
+            return pc.cast(pa.array(text.to_numpy(), type=pa.string()), pa.int64()).to_numpy()
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            pass  # e.g. padded or mixed-type values: parse them with pandas
+    numbers = pd.to_numeric(text, errors="coerce")
+    if numbers.notna().all() and np.array_equal(numbers, np.round(numbers)):
+        return numbers.to_numpy(dtype=np.float64).astype(np.int64)
+    return None
+
+
+def _integers(numbers: np.ndarray) -> np.ndarray:
+    """Distinct integers when their range is narrow enough for a bincount, else the values as given"""
+    if not len(numbers):
+        return numbers
+    low, high = int(numbers.min()), int(numbers.max())
+    if high - low <= len(numbers) // 8:
+        return np.flatnonzero(np.bincount(numbers - low)) + low
+    return numbers
+
+
+def _bottom_k(hashes: np.ndarray, k: int) -> Tuple[np.ndarray, int]:
+    """
+    Sorted k smallest distinct hashes, and the distinct count
+
+    The candidates are grown from the k smallest hashes until k distinct ones
+    are found, so duplicates cost a partition rather than a full hash table.
+    The count is exact when every distinct hash fits in the sketch and a
+    k-minimum-values estimate otherwise.
+    """
+    size = 2 * k
+    while True:
+        candidates = np.partition(hashes, size - 1)[:size] if size < len(hashes) else hashes
+        smallest = np.unique(candidates)
+        if len(smallest) >= k or size >= len(hashes):
+            break
+        size *= 8
+    if len(smallest) <= k and size >= len(hashes):
+        return smallest, len(smallest)
+    smallest = smallest[:k]
+    return smallest, int(round((k - 1) / (float(smallest[-1]) / float(_EMPTY))))
+
+
+class KeySignatures:
+    """
+    Per-column key signatures of one table
+
+    Attributes:
+        columns: Signed column names
+        families: Type family per column
+        rows: Non-null rows per column
+        distinct: Distinct count per column (exact up to k values, estimated beyond)
+        sketches: (columns, k) sorted bottom-k hashes, padded with the max uint64
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self.columns: List[str] = []
+        self.families: List[str] = []
+        self.rows: List[int] = []
+        self.distinct: List[int] = []
+        self._sketches: List[np.ndarray] = []
+        self.sketches = np.empty((0, k), dtype=np.uint64)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, k: Optional[int] = None) -> "KeySignatures":
+        """Sign every key-capable column of a DataFrame"""
+        signatures = cls(k or KEY_SKETCH_SIZE)
+        for column in df.columns:
+            signatures.add(str(column), df[column])
+        signatures.sketches = (
+            np.vstack(signatures._sketches) if signatures._sketches
+            else np.empty((0, signatures.k), dtype=np.uint64)
+        )
+        signatures._sketches = []
+        return signatures
+
+    def add(self, column: str, values: pd.Series):
+        family, rows, distinct_values = _distinct_values(values)
+        if family is None:
+            return
+        hashes = pd.util.hash_array(distinct_values, categorize=False)
+        smallest, distinct = _bottom_k(hashes, self.k) if len(hashes) else (hashes, 0)
+        sketch = np.full(self.k, _EMPTY, dtype=np.uint64)
+        sketch[:len(smallest)] = smallest
+
+        self.columns.append(column)
+        self.families.append(family)
+        self.rows.append(rows)
+        self.distinct.append(min(distinct, rows))
+        self._sketches.append(sketch)
+
+    def unique(self, index: int) -> bool:
+        """Whether a column's values are (nearly) all distinct, as a referenced key's are"""
+        rows = self.rows[index]
+        # Estimated counts are within a few 1/sqrt(k) of the truth
+        tolerance = 0.01 if self.distinct[index] < self.k else 3 / math.sqrt(self.k)
+        return rows > 0 and self.distinct[index] >= (1 - tolerance) * rows
+
+
+def _intersections(left: KeySignatures, index: int, right: KeySignatures) -> np.ndarray:
+    """
+    Estimated distinct values shared by one left column and every right column
+
+    Below the smaller of the two sketch thresholds both sketches hold every
+    hash of their column, so shared hashes there are counted exactly and
+    scaled up by the fraction of the hash space they cover (exact when both
+    sketches hold their whole column).
+    """
+    # A sketch holding its whole column ends in padding, i.e. has no threshold
+    sketch = left.sketches[index]
+    threshold = np.minimum(sketch[-1], right.sketches[:, -1])
+
+    shared = np.isin(right.sketches, sketch[sketch != _EMPTY])
+    shared &= right.sketches <= threshold[:, None]
+    counts = shared.sum(axis=1).astype(np.float64)
+
+    scale = np.where(threshold == _EMPTY, 1.0, threshold.astype(np.float64) / float(_EMPTY))
+    return np.minimum(counts / np.maximum(scale, 1e-300), np.minimum(left.distinct[index], right.distinct))
+
+
+def _names_match(left: str, right: str, referenced: str) -> bool:
+    """Whether the names pair up as a key, e.g. customer_id referencing id (but not id referencing order_id)"""
+    left, right = left.lower(), right.lower()
+    if left == right:
+        return True
+    if left.endswith("_id") and right == "id":
+        return referenced == "right"
+    if right.endswith("_id") and left == "id":
+        return referenced == "left"
+    return False
+
+
+def discover_keys(
+    left: KeySignatures,
+    right: KeySignatures,
+    threshold: float = 0.8
+) -> List[Dict[str, Any]]:
+    """
+    Rank foreign-key candidates between two signed tables
+
+    A pair qualifies when its columns share a type family and the smaller
+    column's distinct values are at least `threshold` contained in the
+    other's. Pairs without matching names need stronger evidence: they
+    must point at a unique column, hold at least KEY_MIN_DISTINCT values
+    and use at least KEY_MIN_COVERAGE of the key's values, which keeps
+    counts, ages and other small-range measures from matching an ID
+    column by coincidence.
+
+    Returns:
+        Candidates (left, right, match_ratio, left_containment,
+        right_containment, name_match, referenced side), name matches first
+        and then by match ratio
+    """
+    candidates = []
+    if not left.columns or not right.columns:
+        return candidates
+
+    right_families = np.asarray(right.families)
+    right_distinct = np.asarray(right.distinct, dtype=np.float64)
+    for i, column in enumerate(left.columns):
+        compatible = right_families == left.families[i]
+        if not compatible.any() or not left.distinct[i]:
+            continue
+        shared = _intersections(left, i, right)
+        left_containment = shared / left.distinct[i]
+        right_containment = shared / np.maximum(right_distinct, 1)
+        match_ratio = np.maximum(left_containment, right_containment)
+
+        for j in np.flatnonzero(compatible & (match_ratio >= threshold) & (right_distinct > 0)):
+            # The side whose values are contained in the other refers to it
+            referenced = "right" if left_containment[j] >= right_containment[j] else "left"
+            name_match = _names_match(column, right.columns[j], referenced)
+            if not name_match:
+                key_unique = right.unique(j) if referenced == "right" else left.unique(i)
+                fewer, more = sorted((left.distinct[i], right.distinct[j]))
+                if not key_unique or fewer < KEY_MIN_DISTINCT or fewer < KEY_MIN_COVERAGE * more:
+                    continue
+            candidates.append({
+                "left": column,
+                "right": right.columns[j],
+                "match_ratio": round(float(min(match_ratio[j], 1.0)), 4),
+                "left_containment": round(float(min(left_containment[j], 1.0)), 4),
+                "right_containment": round(float(min(right_containment[j], 1.0)), 4),
+                "name_match": name_match,
+                "referenced": referenced
+            })
+
+    candidates.sort(key=lambda c: (not c["name_match"], -c["match_ratio"]))
+    return candidates
+
+
+class KeySignatureCache:
+    """LRU of table signatures keyed by (dataset_id, version)"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, int], KeySignatures]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, dataset_id: str, version: int) -> Optional[KeySignatures]:
+        with self._lock:
+            signatures = self._entries.get((dataset_id, version))
+            if signatures is not None:
+                self._entries.move_to_end((dataset_id, version))
+            return signatures
+
+    def put(self, dataset_id: str, version: int, signatures: KeySignatures):
+        with self._lock:
+            for stale_key in [key for key in self._entries if key[0] == dataset_id]:
+                del self._entries[stale_key]
+            self._entries[(dataset_id, version)] = signatures
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, dataset_id: str):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == dataset_id]:
+                del self._entries[key]
+
+
+# Singleton instance
+key_signature_cache = KeySignatureCache(KEY_SIGNATURE_CACHE_SIZE)
@@ -2,9 +2,10 @@
 Machine Learning Service
 Handles model training, prediction, and evaluation
 """
+import math
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Tuple, Optional, Callable
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LinearRegression
 from sklearn.ensemble import RandomForestRegressor
@@ -12,6 +13,11 @@ from sklearn.tree import DecisionTreeRegressor
 from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
 import xgboost as xgb
 import logging
+from joblib import Parallel, delayed, parallel_config
+
+from app.config import PARALLEL_TRAINING, TRAINING_RUN_CPU_BUDGET, PARALLEL_TRAINING_MIN_ROWS, AUTOML_TIME_BUDGET_S
+from app.services.automl_service import train_budgeted, enable_early_stopping, fit_estimator, rank_results
+from app.services.feature_pipeline import FeaturePipeline, FEATURE_KINDS
 
 # Try to import LightGBM (optional)
 try:
@@ -22,13 +28,228 @@ except ImportError:
     logging.warning("LightGBM not available, skipping in model training")
 
 
+def plan_training(n_rows: int, n_candidates: int, cpu_budget: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Split the CPU budget (default TRAINING_RUN_CPU_BUDGET) between model candidates
+    
+    Returns:
+        (candidates fitted at once, threads per candidate)
+    """
+    budget = max(1, cpu_budget or TRAINING_RUN_CPU_BUDGET)
+    if not PARALLEL_TRAINING or budget < 2 or n_candidates < 2 or n_rows < PARALLEL_TRAINING_MIN_ROWS:
+        return 1, budget
+    n_parallel = min(n_candidates, budget)
+    return n_parallel, max(1, budget // n_parallel)
+
+
+def train_candidates(
+    fit_fn: Callable[..., Optional[Dict[str, Any]]],
+    models: Dict[str, Any],
+    fit_args: tuple,
+    n_rows: int = 0,
+    on_model_trained: Optional[Callable[[Dict[str, Any]], None]] = None,
+    cpu_budget: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Fit independent model candidates, concurrently when the data is large enough
+    
+    Scikit-learn style estimators are fitted in joblib's loky process pool with
+    their n_jobs (and BLAS/OpenMP threads) capped so the candidates together stay
+    within the run's CPU budget. LSTM candidates hold a Keras model and are fitted
+    in-process afterwards.
+    
+    Args:
+        fit_fn: fit_fn(model_name, model, *fit_args) -> result dict or None on failure
+        models: Candidate name -> estimator (or LSTM spec dict)
+        fit_args: Shared training data/arguments passed to fit_fn
+        n_rows: Training rows (small sets are fitted sequentially)
+        on_model_trained: Called with each result as soon as it is available
+        cpu_budget: Cores available to this call (defaults to TRAINING_RUN_CPU_BUDGET)
+    
+    Returns:
+        Results of the candidates that trained successfully, in completion order
+    """
+    estimators = {name: m for name, m in models.items() if not (isinstance(m, dict) and m.get("is_lstm"))}
+    in_process = {name: m for name, m in models.items() if name not in estimators}
+    
+    n_parallel, threads_per_model = plan_training(n_rows, len(estimators), cpu_budget)
+    for model in estimators.values():
+        # Only multi-threaded estimators (n_jobs=-1) are capped
+        if model.get_params().get("n_jobs") is not None:
+            model.set_params(n_jobs=threads_per_model)
+    
+    results = []
+    finished = set()
+    
+    def collect(model_name: str, result: Optional[Dict[str, Any]]):
+        finished.add(model_name)
+        if result is None:
+            return
+        results.append(result)
+        if on_model_trained:
+            on_model_trained({key: value for key, value in result.items() if key != "estimator"})
+    
+    if n_parallel > 1:
+        logging.info(
+            f"Training {len(estimators)} candidates in parallel: "
+            f"{n_parallel} at once, {threads_per_model} thread(s) each"
+        )
+        try:
+            with parallel_config(backend="loky", inner_max_num_threads=threads_per_model):
+                outputs = Parallel(n_jobs=n_parallel, return_as="generator_unordered")(
+                    delayed(_fit_named)(fit_fn, name, model, fit_args) for name, model in estimators.items()
+                )
+                for model_name, result in outputs:
+                    collect(model_name, result)
+        except Exception as e:
+            logging.warning(f"Parallel training failed ({str(e)}), fitting remaining candidates sequentially")
+    
+    for model_name, model in {**estimators, **in_process}.items():
+        if model_name not in finished:
+            collect(model_name, fit_fn(model_name, model, *fit_args))
+    
+    return results
+
+
+def _fit_named(fit_fn: Callable, model_name: str, model: Any, fit_args: tuple) -> Tuple[str, Optional[Dict[str, Any]]]:
+    return model_name, fit_fn(model_name, model, *fit_args)
+
+
+def _fit_regression_candidate(
+    model_name: str,
+    model_obj: Any,
+    X_train: pd.DataFrame,
+    X_test: pd.DataFrame,
+    y_train: pd.Series,
+    y_test: pd.Series,
+    feature_cols: List[str],
+    target_column: str
+) -> Optional[Dict[str, Any]]:
+    """Fit one regression candidate and compute its metrics (runs in a training worker)"""
+    try:
+        # Handle LSTM special case
+        is_lstm = isinstance(model_obj, dict) and model_obj.get("is_lstm")
+        
+        if is_lstm:
+            model = model_obj["model"]
+            X_train_data = model_obj["X_train"]
+            X_test_data = model_obj["X_test"]
+            
+            # Train LSTM
+            model.fit(X_train_data, y_train, epochs=50, batch_size=32, verbose=0, validation_split=0.2)
+            
+            # Make predictions
+            y_pred_train = model.predict(X_train_data, verbose=0).flatten()
+            y_pred_test = model.predict(X_test_data, verbose=0).flatten()
+        else:
+            model = model_obj
+            # Train model (boosted models may stop early on a validation split)
+            fit_estimator(model, X_train, y_train)
+            
+            # Make predictions
+            y_pred_train = model.predict(X_train)
+            y_pred_test = model.predict(X_test)
+        
+        # Calculate metrics
+        r2_train = r2_score(y_train, y_pred_train)
+        r2_test = r2_score(y_test, y_pred_test)
+        
+        # RMSE calculation (compatible with older scikit-learn versions)
+        mse_train = mean_squared_error(y_train, y_pred_train)
+        mse_test = mean_squared_error(y_test, y_pred_test)
+        rmse_train = np.sqrt(mse_train)
+        rmse_test = np.sqrt(mse_test)
+        
+        mae_test = mean_absolute_error(y_test, y_pred_test)
+        
+        # Feature importance (if available)
+        feature_importance_dict = {}
+        if not is_lstm:
+            if hasattr(model, 'feature_importances_'):
+                # For tree-based models (Random Forest, XGBoost, Decision Tree)
+                importances = model.feature_importances_
+                feature_imp_pairs = sorted(zip(feature_cols, importances), key=lambda x: x[1], reverse=True)
+                feature_importance_dict = {feat: float(imp) for feat, imp in feature_imp_pairs[:10]}
+            elif hasattr(model, 'coef_'):
+                # For Linear Regression - use absolute coefficients as importance
+                importances = np.abs(model.coef_)
+                feature_imp_pairs = sorted(zip(feature_cols, importances), key=lambda x: x[1], reverse=True)
+                feature_importance_dict = {feat: float(imp) for feat, imp in feature_imp_pairs[:10]}
+        elif is_lstm:
+            # For LSTM, use simple permutation importance
+            # Calculate baseline score
+            baseline_score = r2_test
+            
+            # Calculate feature importance by permuting each feature
+            importances = []
+            for i, feat in enumerate(feature_cols):
+                # Create a copy of test data
+                X_test_perm = X_test.copy()
+                # Permute this feature
+                X_test_perm.iloc[:, i] = np.random.permutation(X_test_perm.iloc[:, i].values)
+                # Reshape for LSTM
+                X_test_perm_lstm = X_test_perm.values.reshape((X_test_perm.shape[0], X_test_perm.shape[1], 1))
+                # Predict with permuted feature
+                y_pred_perm = model.predict(X_test_perm_lstm, verbose=0).flatten()
+                # Calculate score decrease
+                perm_score = r2_score(y_test, y_pred_perm)
+                importance = max(0, baseline_score - perm_score)  # How much performance dropped
+                importances.append(importance)
+            
+            # Normalize importances
+            if sum(importances) > 0:
+                importances = [imp / sum(importances) for imp in importances]
+                feature_imp_pairs = sorted(zip(feature_cols, importances), key=lambda x: x[1], reverse=True)
+                feature_importance_dict = {feat: float(imp) for feat, imp in feature_imp_pairs[:10]}
+            else:
+                # Fallback: equal importance for all features
+                equal_importance = 1.0 / len(feature_cols)
+                feature_importance_dict = {feat: equal_importance for feat in feature_cols[:10]}
+        
+        # Calculate confidence level based on R² score
+        if r2_test >= 0.7:
+            confidence = "High"
+        elif r2_test >= 0.5:
+            confidence = "Medium"
+        else:
+            confidence = "Low"
+        
+        model_result = {
+            "model_name": model_name,
+            "r2_score": float(r2_test),
+            "r2_train": float(r2_train),
+            "rmse": float(rmse_test),
+            "rmse_train": float(rmse_train),
+            "mae": float(mae_test),
+            "confidence": confidence,  # Frontend expects this
+            "feature_importance": feature_importance_dict,  # Frontend expects dict
+            "features_used": feature_cols,
+            "target": target_column,
+            "target_column": target_column,  # Frontend expects this
+            "n_train_samples": len(X_train),
+            "n_test_samples": len(X_test)
+        }
+        if not is_lstm:
+            model_result["estimator"] = model
+        
+        return model_result
+    
+    except Exception as e:
+        logging.warning(f"Failed to train {model_name}: {str(e)}")
+        return None
+
+
 def train_multiple_models(
     df: pd.DataFrame, 
     target_column: str,
     test_size: float = 0.2,
-    random_state: int = 42
+    random_state: int = 42,
+    on_model_trained: Optional[Callable[[Dict[str, Any]], None]] = None,
+    return_estimator: bool = False,
+    time_budget: Optional[float] = None,
+    cpu_budget: Optional[int] = None
 ) -> Dict[str, Any]:
-    """Train multiple ML models and return results"""
+    """Train multiple ML models and return results (candidates are fitted in parallel, see train_candidates)"""
     
     # Prepare data
     numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
@@ -42,7 +263,8 @@ def train_multiple_models(
         raise ValueError("No numeric features available for training")
     
     # Handle missing values
-    X = df[feature_cols].fillna(df[feature_cols].mean())
+    pipeline = FeaturePipeline.fit(df, numeric=feature_cols)
+    X = pipeline.transform(df)
     y = df[target_column].fillna(df[target_column].mean())
     
     # Split data
@@ -50,6 +272,41 @@ def train_multiple_models(
         X, y, test_size=test_size, random_state=random_state
     )
     
+    result = train_regression_split(
+        X_train, X_test, y_train, y_test, feature_cols, target_column,
+        test_size=test_size, random_state=random_state, on_model_trained=on_model_trained,
+        cpu_budget=cpu_budget, return_estimator=return_estimator, time_budget=time_budget
+    )
+    if return_estimator:
+        result["preprocessing"] = {**pipeline.to_dict(), "target": {"column": target_column}}
+    return result
+
+
+def train_regression_split(
+    X_train: pd.DataFrame,
+    X_test: pd.DataFrame,
+    y_train: pd.Series,
+    y_test: pd.Series,
+    feature_cols: List[str],
+    target_column: str,
+    test_size: float = 0.2,
+    random_state: int = 42,
+    on_model_trained: Optional[Callable[[Dict[str, Any]], None]] = None,
+    cpu_budget: Optional[int] = None,
+    return_estimator: bool = False,
+    time_budget: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Train the regression candidates on an already prepared train/test split
+    
+    With return_estimator the best result keeps its fitted model under
+    "estimator" (for the model registry); other fitted models are dropped.
+    With a time budget (default AUTOML_TIME_BUDGET_S, 0 = none) the candidates
+    are compared by successive halving within it, boosted models stop early
+    and the LSTM is left out (see automl_service.train_budgeted).
+    """
+    time_budget = AUTOML_TIME_BUDGET_S if time_budget is None else time_budget
+    
     # Define models
     models = {
         "Linear Regression": LinearRegression(),
@@ -62,8 +319,8 @@ def train_multiple_models(
     if HAS_LIGHTGBM:
         models["LightGBM"] = lgb.LGBMRegressor(n_estimators=100, random_state=random_state, n_jobs=-1, verbose=-1)
     
-    # Add LSTM for larger datasets (simplified version)
-    if len(X_train) >= 50:  # Only for datasets with sufficient data
+    # Add LSTM for larger datasets (simplified version; its epochs are not budgeted)
+    if len(X_train) >= 50 and not time_budget:  # Only for datasets with sufficient data
         try:
             import tensorflow as tf
             from tensorflow import keras
@@ -92,131 +349,30 @@ def train_multiple_models(
             logging.info("LSTM model added to training pipeline")
         except Exception as e:
             logging.warning(f"LSTM not available - {str(e)}")
-    else:
+    elif not time_budget:
         logging.info(f"Dataset too small for LSTM training (need 50+ rows, have {len(X_train)})")
     
-    results = []
-    best_model = None
-    best_score = -float('inf')
-    
-    for model_name, model_obj in models.items():
-        try:
-            # Handle LSTM special case
-            is_lstm = isinstance(model_obj, dict) and model_obj.get("is_lstm")
-            
-            if is_lstm:
-                model = model_obj["model"]
-                X_train_data = model_obj["X_train"]
-                X_test_data = model_obj["X_test"]
-                
-                # Train LSTM
-                model.fit(X_train_data, y_train, epochs=50, batch_size=32, verbose=0, validation_split=0.2)
-                
-                # Make predictions
-                y_pred_train = model.predict(X_train_data, verbose=0).flatten()
-                y_pred_test = model.predict(X_test_data, verbose=0).flatten()
-            else:
-                model = model_obj
-                # Train model
-                model.fit(X_train, y_train)
-                
-                # Make predictions
-                y_pred_train = model.predict(X_train)
-                y_pred_test = model.predict(X_test)
-            
-            # Calculate metrics
-            r2_train = r2_score(y_train, y_pred_train)
-            r2_test = r2_score(y_test, y_pred_test)
-            
-            # RMSE calculation (compatible with older scikit-learn versions)
-            mse_train = mean_squared_error(y_train, y_pred_train)
-            mse_test = mean_squared_error(y_test, y_pred_test)
-            rmse_train = np.sqrt(mse_train)
-            rmse_test = np.sqrt(mse_test)
-            
-            mae_test = mean_absolute_error(y_test, y_pred_test)
-            
-            # Feature importance (if available)
-            feature_importance_dict = {}
-            if not is_lstm:
-                if hasattr(model, 'feature_importances_'):
-                    # For tree-based models (Random Forest, XGBoost, Decision Tree)
-                    importances = model.feature_importances_
-                    feature_imp_pairs = sorted(zip(feature_cols, importances), key=lambda x: x[1], reverse=True)
-                    feature_importance_dict = {feat: float(imp) for feat, imp in feature_imp_pairs[:10]}
-                elif hasattr(model, 'coef_'):
-                    # For Linear Regression - use absolute coefficients as importance
-                    importances = np.abs(model.coef_)
-                    feature_imp_pairs = sorted(zip(feature_cols, importances), key=lambda x: x[1], reverse=True)
-                    feature_importance_dict = {feat: float(imp) for feat, imp in feature_imp_pairs[:10]}
-            elif is_lstm:
-                # For LSTM, use simple permutation importance
-                # Calculate baseline score
-                baseline_score = r2_test
-                
-                # Calculate feature importance by permuting each feature
-                importances = []
-                for i, feat in enumerate(feature_cols):
-                    # Create a copy of test data
-                    X_test_perm = X_test.copy()
-                    # Permute this feature
-                    X_test_perm.iloc[:, i] = np.random.permutation(X_test_perm.iloc[:, i].values)
-                    # Reshape for LSTM
-                    X_test_perm_lstm = X_test_perm.values.reshape((X_test_perm.shape[0], X_test_perm.shape[1], 1))
-                    # Predict with permuted feature
-                    y_pred_perm = model.predict(X_test_perm_lstm, verbose=0).flatten()
-                    # Calculate score decrease
-                    perm_score = r2_score(y_test, y_pred_perm)
-                    importance = max(0, baseline_score - perm_score)  # How much performance dropped
-                    importances.append(importance)
-                
-                # Normalize importances
-                if sum(importances) > 0:
-                    importances = [imp / sum(importances) for imp in importances]
-                    feature_imp_pairs = sorted(zip(feature_cols, importances), key=lambda x: x[1], reverse=True)
-                    feature_importance_dict = {feat: float(imp) for feat, imp in feature_imp_pairs[:10]}
-                else:
-                    # Fallback: equal importance for all features
-                    equal_importance = 1.0 / len(feature_cols)
-                    feature_importance_dict = {feat: equal_importance for feat in feature_cols[:10]}
-            
-            # Calculate confidence level based on R² score
-            if r2_test >= 0.7:
-                confidence = "High"
-            elif r2_test >= 0.5:
-                confidence = "Medium"
-            else:
-                confidence = "Low"
-            
-            model_result = {
-                "model_name": model_name,
-                "r2_score": float(r2_test),
-                "r2_train": float(r2_train),
-                "rmse": float(rmse_test),
-                "rmse_train": float(rmse_train),
-                "mae": float(mae_test),
-                "confidence": confidence,  # Frontend expects this
-                "feature_importance": feature_importance_dict,  # Frontend expects dict
-                "features_used": feature_cols,
-                "target": target_column,
-                "target_column": target_column,  # Frontend expects this
-                "n_train_samples": len(X_train),
-                "n_test_samples": len(X_test)
-            }
-            
-            results.append(model_result)
-            
-            # Track best model
-            if r2_test > best_score:
-                best_score = r2_test
-                best_model = model_name
-                
-        except Exception as e:
-            logging.warning(f"Failed to train {model_name}: {str(e)}")
-            continue
-    
-    # Sort by R² score
-    results.sort(key=lambda x: x["r2_score"], reverse=True)
+    automl = None
+    if time_budget:
+        enable_early_stopping(models)
+        results, automl = train_budgeted(
+            train_candidates, _fit_regression_candidate, models,
+            X_train, X_test, y_train, y_test, (feature_cols, target_column),
+            "r2_score", time_budget, on_model_trained=on_model_trained, cpu_budget=cpu_budget
+        )
+    else:
+        results = train_candidates(
+            _fit_regression_candidate,
+            models,
+            (X_train, X_test, y_train, y_test, feature_cols, target_column),
+            n_rows=len(X_train),
+            on_model_trained=on_model_trained,
+            cpu_budget=cpu_budget
+        )
+    # Sort by R² score (budgeted runs: models trained on every row first)
+    results = rank_results(results, "r2_score")
+    best_model = results[0]["model_name"] if results else None
+    _keep_best_estimator(results, return_estimator)
     
     return {
         "models": results,
@@ -227,22 +383,38 @@ def train_multiple_models(
             "test_size": test_size,
             "train_samples": len(X_train),
             "test_samples": len(X_test),
-            "total_features": len(feature_cols)
+            "total_features": len(feature_cols),
+            **({"automl": automl} if automl else {})
         }
     }
 
 
+def _keep_best_estimator(results: List[Dict[str, Any]], keep: bool):
+    """Drop fitted models from sorted results, except the best one's when keep is set"""
+    estimators = [result.pop("estimator", None) for result in results]
+    if keep and results:
+        results[0]["estimator"] = estimators[0]
+
+
 def predict_value(
-    model_data: Dict[str, Any],
-    input_features: Dict[str, float]
+    model: Any,
+    input_features: Dict[str, Any]
 ) -> Dict[str, Any]:
-    """Make prediction using trained model"""
-    # This would require model persistence (joblib/pickle)
-    # For now, return placeholder
-    return {
-        "prediction": None,
-        "note": "Model persistence not implemented yet"
-    }
+    """
+    Make prediction using trained model
+    
+    Args:
+        model: Registered model loaded with model_registry.load
+        input_features: Raw feature values of one row (column -> value)
+    
+    Returns:
+        Prediction (and class probabilities for classifiers)
+    """
+    result = model.predict(pd.DataFrame([input_features]))
+    prediction = {"prediction": result["predictions"][0], "model_id": model.id}
+    if "probabilities" in result:
+        prediction["probabilities"] = result["probabilities"][0]
+    return prediction
 
 
 def calculate_model_performance_metrics(
@@ -334,11 +506,161 @@ def detect_problem_type(df: pd.DataFrame, target_column: str) -> str:
     return "regression"
 
 
+def _fit_classification_candidate(
+    model_name: str,
+    model_obj: Any,
+    X_train: pd.DataFrame,
+    X_test: pd.DataFrame,
+    y_train: Any,
+    y_test: Any,
+    feature_cols: List[str],
+    target_column: str,
+    n_classes: int,
+    is_binary: bool,
+    class_labels: List[Any]
+) -> Optional[Dict[str, Any]]:
+    """Fit one classification candidate and compute its metrics (runs in a training worker)"""
+    try:
+        # Handle LSTM special case
+        is_lstm = isinstance(model_obj, dict) and model_obj.get("is_lstm")
+        
+        if is_lstm:
+            model = model_obj["model"]
+            X_train_data = model_obj["X_train"]
+            X_test_data = model_obj["X_test"]
+            
+            # Train LSTM
+            model.fit(X_train_data, y_train, epochs=50, batch_size=32, verbose=0, validation_split=0.2)
+            
+            # Make predictions
+            y_pred_train_proba = model.predict(X_train_data, verbose=0)
+            y_pred_test_proba = model.predict(X_test_data, verbose=0)
+            
+            if n_classes > 2:
+                y_pred_train = np.argmax(y_pred_train_proba, axis=1)
+                y_pred_test = np.argmax(y_pred_test_proba, axis=1)
+            else:
+                y_pred_train = (y_pred_train_proba > 0.5).astype(int).flatten()
+                y_pred_test = (y_pred_test_proba > 0.5).astype(int).flatten()
+        else:
+            model = model_obj
+            # Train model (boosted models may stop early on a validation split)
+            fit_estimator(model, X_train, y_train)
+            
+            # Make predictions
+            y_pred_train = model.predict(X_train)
+            y_pred_test = model.predict(X_test)
+        
+        # Calculate classification metrics
+        accuracy_train = accuracy_score(y_train, y_pred_train)
+        accuracy_test = accuracy_score(y_test, y_pred_test)
+        
+        # Multi-class metrics
+        precision_test = precision_score(y_test, y_pred_test, average='weighted', zero_division=0)
+        recall_test = recall_score(y_test, y_pred_test, average='weighted', zero_division=0)
+        f1_test = f1_score(y_test, y_pred_test, average='weighted', zero_division=0)
+        
+        # Confusion matrix
+        cm = confusion_matrix(y_test, y_pred_test)
+        cm_list = cm.tolist()
+        
+        # ROC-AUC (only for binary or if predict_proba available)
+        roc_auc = None
+        try:
+            if is_binary and not is_lstm:
+                if hasattr(model, 'predict_proba'):
+                    y_proba = model.predict_proba(X_test)[:, 1]
+                    roc_auc = roc_auc_score(y_test, y_proba)
+        except Exception as e:
+            logging.warning(f"Could not calculate ROC-AUC for {model_name}: {str(e)}")
+        
+        # Feature importance (if available)
+        feature_importance_dict = {}
+        if not is_lstm:
+            if hasattr(model, 'feature_importances_'):
+                importances = model.feature_importances_
+                feature_imp_pairs = sorted(zip(feature_cols, importances), key=lambda x: x[1], reverse=True)
+                feature_importance_dict = {feat: float(imp) for feat, imp in feature_imp_pairs[:10]}
+            elif hasattr(model, 'coef_'):
+                # For Logistic Regression
+                if len(model.coef_.shape) == 1:
+                    importances = np.abs(model.coef_)
+                else:
+                    importances = np.abs(model.coef_).mean(axis=0)
+                feature_imp_pairs = sorted(zip(feature_cols, importances), key=lambda x: x[1], reverse=True)
+                feature_importance_dict = {feat: float(imp) for feat, imp in feature_imp_pairs[:10]}
+        elif is_lstm:
+            # Permutation importance for LSTM
+            baseline_score = accuracy_test
+            importances = []
+            for i, feat in enumerate(feature_cols):
+                X_test_perm = X_test.copy()
+                X_test_perm.iloc[:, i] = np.random.permutation(X_test_perm.iloc[:, i].values)
+                X_test_perm_lstm = X_test_perm.values.reshape((X_test_perm.shape[0], X_test_perm.shape[1], 1))
+                y_pred_perm_proba = model.predict(X_test_perm_lstm, verbose=0)
+                if n_classes > 2:
+                    y_pred_perm = np.argmax(y_pred_perm_proba, axis=1)
+                else:
+                    y_pred_perm = (y_pred_perm_proba > 0.5).astype(int).flatten()
+                perm_score = accuracy_score(y_test, y_pred_perm)
+                importance = max(0, baseline_score - perm_score)
+                importances.append(importance)
+            
+            if sum(importances) > 0:
+                importances = [imp / sum(importances) for imp in importances]
+                feature_imp_pairs = sorted(zip(feature_cols, importances), key=lambda x: x[1], reverse=True)
+                feature_importance_dict = {feat: float(imp) for feat, imp in feature_imp_pairs[:10]}
+            else:
+                equal_importance = 1.0 / len(feature_cols)
+                feature_importance_dict = {feat: equal_importance for feat in feature_cols[:10]}
+        
+        # Calculate confidence level based on accuracy
+        if accuracy_test >= 0.85:
+            confidence = "High"
+        elif accuracy_test >= 0.70:
+            confidence = "Medium"
+        else:
+            confidence = "Low"
+        
+        model_result = {
+            "model_name": model_name,
+            "problem_type": "classification",
+            "accuracy": float(accuracy_test),
+            "accuracy_train": float(accuracy_train),
+            "precision": float(precision_test),
+            "recall": float(recall_test),
+            "f1_score": float(f1_test),
+            "confusion_matrix": cm_list,
+            "roc_auc": float(roc_auc) if roc_auc is not None else None,
+            "confidence": confidence,
+            "feature_importance": feature_importance_dict,
+            "features_used": feature_cols,
+            "target": target_column,
+            "target_column": target_column,
+            "n_train_samples": len(X_train),
+            "n_test_samples": len(X_test),
+            "n_classes": n_classes,
+            "class_labels": class_labels
+        }
+        if not is_lstm:
+            model_result["estimator"] = model
+        
+        return model_result
+    
+    except Exception as e:
+        logging.warning(f"Failed to train {model_name}: {str(e)}")
+        return None
+
+
 def train_classification_models(
     df: pd.DataFrame,
     target_column: str,
     test_size: float = 0.2,
-    random_state: int = 42
+    random_state: int = 42,
+    on_model_trained: Optional[Callable[[Dict[str, Any]], None]] = None,
+    return_estimator: bool = False,
+    time_budget: Optional[float] = None,
+    cpu_budget: Optional[int] = None
 ) -> Dict[str, Any]:
     """
     Train multiple classification models and return results with classification metrics
@@ -358,14 +680,38 @@ def train_classification_models(
         raise ValueError("No numeric features available for training")
     
     # Handle missing values in features
-    X = df[feature_cols].fillna(df[feature_cols].mean())
+    pipeline = FeaturePipeline.fit(df, numeric=feature_cols)
+    X = pipeline.transform(df)
     
     # Handle target variable
-    y = df[target_column].copy()
+    y, class_labels = prepare_classification_target(df[target_column])
+    
+    # Split data
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=test_size, random_state=random_state, stratify=y
+    )
+    
+    result = train_classification_split(
+        X_train, X_test, y_train, y_test, feature_cols, target_column, class_labels,
+        test_size=test_size, random_state=random_state, on_model_trained=on_model_trained,
+        cpu_budget=cpu_budget, return_estimator=return_estimator, time_budget=time_budget
+    )
+    if return_estimator:
+        target = {"column": target_column, "class_labels": class_labels, "encoded": _label_encoded(df[target_column])}
+        result["preprocessing"] = {**pipeline.to_dict(), "target": target}
+    return result
+
+
+def _label_encoded(target: pd.Series) -> bool:
+    """Whether prepare_classification_target label-encodes this target (models then predict label positions)"""
+    return pd.api.types.is_object_dtype(target) or isinstance(target.dtype, pd.CategoricalDtype)
+
+
+def prepare_classification_target(y: pd.Series) -> Tuple[Any, List[Any]]:
+    """Fill and label-encode a classification target; returns (encoded target, class labels)"""
+    y = y.copy()
     
     # Encode target if it's categorical
-    label_encoder = None
-    class_labels = None
     if pd.api.types.is_object_dtype(y) or pd.api.types.is_categorical_dtype(y):
         label_encoder = LabelEncoder()
         y = label_encoder.fit_transform(y.fillna('missing'))
@@ -374,17 +720,33 @@ def train_classification_models(
         y = y.fillna(y.mode()[0] if not y.mode().empty else 0)
         class_labels = sorted(y.unique().tolist())
     
+    return y, class_labels
+
+
+def train_classification_split(
+    X_train: pd.DataFrame,
+    X_test: pd.DataFrame,
+    y_train: Any,
+    y_test: Any,
+    feature_cols: List[str],
+    target_column: str,
+    class_labels: List[Any],
+    test_size: float = 0.2,
+    random_state: int = 42,
+    on_model_trained: Optional[Callable[[Dict[str, Any]], None]] = None,
+    cpu_budget: Optional[int] = None,
+    return_estimator: bool = False,
+    time_budget: Optional[float] = None
+) -> Dict[str, Any]:
+    """Train the classification candidates on an already prepared train/test split (see train_regression_split)"""
+    time_budget = AUTOML_TIME_BUDGET_S if time_budget is None else time_budget
+    
     # Check if binary or multiclass
     n_classes = len(class_labels)
     is_binary = n_classes == 2
     
     logging.info(f"Classification task: {n_classes} classes ({'binary' if is_binary else 'multiclass'})")
     
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=test_size, random_state=random_state, stratify=y
-    )
-    
     # Define classification models
     models = {
         "Logistic Regression": LogisticRegression(max_iter=1000, random_state=random_state),
@@ -397,8 +759,8 @@ def train_classification_models(
     if HAS_LIGHTGBM:
         models["LightGBM"] = lgb.LGBMClassifier(n_estimators=100, random_state=random_state, n_jobs=-1, verbose=-1)
     
-    # Add LSTM for larger datasets
-    if len(X_train) >= 50:
+    # Add LSTM for larger datasets (its epochs are not budgeted)
+    if len(X_train) >= 50 and not time_budget:
         try:
             import tensorflow as tf
             from tensorflow import keras
@@ -432,147 +794,27 @@ def train_classification_models(
         except Exception as e:
             logging.warning(f"LSTM classifier not available - {str(e)}")
     
-    results = []
-    best_model = None
-    best_score = -float('inf')
-    
-    for model_name, model_obj in models.items():
-        try:
-            # Handle LSTM special case
-            is_lstm = isinstance(model_obj, dict) and model_obj.get("is_lstm")
-            
-            if is_lstm:
-                model = model_obj["model"]
-                X_train_data = model_obj["X_train"]
-                X_test_data = model_obj["X_test"]
-                
-                # Train LSTM
-                model.fit(X_train_data, y_train, epochs=50, batch_size=32, verbose=0, validation_split=0.2)
-                
-                # Make predictions
-                y_pred_train_proba = model.predict(X_train_data, verbose=0)
-                y_pred_test_proba = model.predict(X_test_data, verbose=0)
-                
-                if n_classes > 2:
-                    y_pred_train = np.argmax(y_pred_train_proba, axis=1)
-                    y_pred_test = np.argmax(y_pred_test_proba, axis=1)
-                else:
-                    y_pred_train = (y_pred_train_proba > 0.5).astype(int).flatten()
-                    y_pred_test = (y_pred_test_proba > 0.5).astype(int).flatten()
-            else:
-                model = model_obj
-                # Train model
-                model.fit(X_train, y_train)
-                
-                # Make predictions
-                y_pred_train = model.predict(X_train)
-                y_pred_test = model.predict(X_test)
-            
-            # Calculate classification metrics
-            accuracy_train = accuracy_score(y_train, y_pred_train)
-            accuracy_test = accuracy_score(y_test, y_pred_test)
-            
-            # Multi-class metrics
-            precision_test = precision_score(y_test, y_pred_test, average='weighted', zero_division=0)
-            recall_test = recall_score(y_test, y_pred_test, average='weighted', zero_division=0)
-            f1_test = f1_score(y_test, y_pred_test, average='weighted', zero_division=0)
-            
-            # Confusion matrix
-            cm = confusion_matrix(y_test, y_pred_test)
-            cm_list = cm.tolist()
-            
-            # ROC-AUC (only for binary or if predict_proba available)
-            roc_auc = None
-            try:
-                if is_binary and not is_lstm:
-                    if hasattr(model, 'predict_proba'):
-                        y_proba = model.predict_proba(X_test)[:, 1]
-                        roc_auc = roc_auc_score(y_test, y_proba)
-            except Exception as e:
-                logging.warning(f"Could not calculate ROC-AUC for {model_name}: {str(e)}")
-            
-            # Feature importance (if available)
-            feature_importance_dict = {}
-            if not is_lstm:
-                if hasattr(model, 'feature_importances_'):
-                    importances = model.feature_importances_
-                    feature_imp_pairs = sorted(zip(feature_cols, importances), key=lambda x: x[1], reverse=True)
-                    feature_importance_dict = {feat: float(imp) for feat, imp in feature_imp_pairs[:10]}
-                elif hasattr(model, 'coef_'):
-                    # For Logistic Regression
-                    if len(model.coef_.shape) == 1:
-                        importances = np.abs(model.coef_)
-                    else:
-                        importances = np.abs(model.coef_).mean(axis=0)
-                    feature_imp_pairs = sorted(zip(feature_cols, importances), key=lambda x: x[1], reverse=True)
-                    feature_importance_dict = {feat: float(imp) for feat, imp in feature_imp_pairs[:10]}
-            elif is_lstm:
-                # Permutation importance for LSTM
-                baseline_score = accuracy_test
-                importances = []
-                for i, feat in enumerate(feature_cols):
-                    X_test_perm = X_test.copy()
-                    X_test_perm.iloc[:, i] = np.random.permutation(X_test_perm.iloc[:, i].values)
-                    X_test_perm_lstm = X_test_perm.values.reshape((X_test_perm.shape[0], X_test_perm.shape[1], 1))
-                    y_pred_perm_proba = model.predict(X_test_perm_lstm, verbose=0)
-                    if n_classes > 2:
-                        y_pred_perm = np.argmax(y_pred_perm_proba, axis=1)
-                    else:
-                        y_pred_perm = (y_pred_perm_proba > 0.5).astype(int).flatten()
-                    perm_score = accuracy_score(y_test, y_pred_perm)
-                    importance = max(0, baseline_score - perm_score)
-                    importances.append(importance)
-                
-                if sum(importances) > 0:
-                    importances = [imp / sum(importances) for imp in importances]
-                    feature_imp_pairs = sorted(zip(feature_cols, importances), key=lambda x: x[1], reverse=True)
-                    feature_importance_dict = {feat: float(imp) for feat, imp in feature_imp_pairs[:10]}
-                else:
-                    equal_importance = 1.0 / len(feature_cols)
-                    feature_importance_dict = {feat: equal_importance for feat in feature_cols[:10]}
-            
-            # Calculate confidence level based on accuracy
-            if accuracy_test >= 0.85:
-                confidence = "High"
-            elif accuracy_test >= 0.70:
-                confidence = "Medium"
-            else:
-                confidence = "Low"
-            
-            model_result = {
-                "model_name": model_name,
-                "problem_type": "classification",
-                "accuracy": float(accuracy_test),
-                "accuracy_train": float(accuracy_train),
-                "precision": float(precision_test),
-                "recall": float(recall_test),
-                "f1_score": float(f1_test),
-                "confusion_matrix": cm_list,
-                "roc_auc": float(roc_auc) if roc_auc is not None else None,
-                "confidence": confidence,
-                "feature_importance": feature_importance_dict,
-                "features_used": feature_cols,
-                "target": target_column,
-                "target_column": target_column,
-                "n_train_samples": len(X_train),
-                "n_test_samples": len(X_test),
-                "n_classes": n_classes,
-                "class_labels": class_labels
-            }
-            
-            results.append(model_result)
-            
-            # Track best model (by accuracy)
-            if accuracy_test > best_score:
-                best_score = accuracy_test
-                best_model = model_name
-        
-        except Exception as e:
-            logging.warning(f"Failed to train {model_name}: {str(e)}")
-            continue
-    
-    # Sort by accuracy
-    results.sort(key=lambda x: x["accuracy"], reverse=True)
+    automl = None
+    if time_budget:
+        enable_early_stopping(models)
+        results, automl = train_budgeted(
+            train_candidates, _fit_classification_candidate, models,
+            X_train, X_test, y_train, y_test, (feature_cols, target_column, n_classes, is_binary, class_labels),
+            "accuracy", time_budget, on_model_trained=on_model_trained, cpu_budget=cpu_budget
+        )
+    else:
+        results = train_candidates(
+            _fit_classification_candidate,
+            models,
+            (X_train, X_test, y_train, y_test, feature_cols, target_column, n_classes, is_binary, class_labels),
+            n_rows=len(X_train),
+            on_model_trained=on_model_trained,
+            cpu_budget=cpu_budget
+        )
+    # Sort by accuracy (budgeted runs: models trained on every row first)
+    results = rank_results(results, "accuracy")
+    best_model = results[0]["model_name"] if results else None
+    _keep_best_estimator(results, return_estimator)
     
     return {
         "models": results,
@@ -586,7 +828,8 @@ def train_classification_models(
             "test_size": test_size,
             "train_samples": len(X_train),
             "test_samples": len(X_test),
-            "total_features": len(feature_cols)
+            "total_features": len(feature_cols),
+            **({"automl": automl} if automl else {})
         }
     }
 
@@ -596,7 +839,11 @@ def train_models_auto(
     target_column: str,
     problem_type: str = "auto",
     test_size: float = 0.2,
-    random_state: int = 42
+    random_state: int = 42,
+    on_model_trained: Optional[Callable[[Dict[str, Any]], None]] = None,
+    return_estimator: bool = False,
+    time_budget: Optional[float] = None,
+    cpu_budget: Optional[int] = None
 ) -> Dict[str, Any]:
     """
     Unified function to train models with automatic problem type detection.
@@ -607,9 +854,16 @@ def train_models_auto(
         problem_type: "auto", "regression", "classification", or "time_series"
         test_size: Test split ratio
         random_state: Random seed
+        on_model_trained: Optional callback receiving each model result as it completes
+        return_estimator: Keep the best fitted model under "estimator" of the best
+            result and the feature preparation under "preprocessing" (model registry)
+        time_budget: Wall-clock seconds for training (defaults to AUTOML_TIME_BUDGET_S;
+            0 fits every candidate on every row)
+        cpu_budget: Cores available to this call (defaults to TRAINING_RUN_CPU_BUDGET)
     
     Returns:
-        Dictionary with model results and metadata
+        Dictionary with model results and metadata (the budgeted run is
+        described under training_info["automl"])
     """
     
     # Auto-detect problem type if requested
@@ -620,9 +874,15 @@ def train_models_auto(
     
     # Route to appropriate training function
     if problem_type == "classification":
-        return train_classification_models(df, target_column, test_size, random_state)
+        return train_classification_models(
+            df, target_column, test_size, random_state, on_model_trained, return_estimator,
+            time_budget=time_budget, cpu_budget=cpu_budget
+        )
     elif problem_type == "regression":
-        result = train_multiple_models(df, target_column, test_size, random_state)
+        result = train_multiple_models(
+            df, target_column, test_size, random_state, on_model_trained, return_estimator,
+            time_budget=time_budget, cpu_budget=cpu_budget
+        )
         # Add problem_type to result for consistency
         result["problem_type"] = "regression"
         return result
@@ -631,3 +891,207 @@ def train_models_auto(
         raise ValueError("Time series forecasting should use time_series_service.py")
     else:
         raise ValueError(f"Unknown problem type: {problem_type}")
+
+
+def train_models_multi_target(
+    df: pd.DataFrame,
+    targets: Dict[str, Optional[Dict[str, List[str]]]],
+    problem_type: str = "auto",
+    test_size: float = 0.2,
+    random_state: int = 42,
+    cpu_budget: Optional[int] = None,
+    return_estimators: bool = False,
+    pipelines: Optional[Dict[str, FeaturePipeline]] = None,
+    time_budget: Optional[float] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Train models for several targets on one shared feature matrix and split
+    
+    One FeaturePipeline is fitted for the union of all targets' features and
+    the feature matrix is built once from it as a float64 array; every target
+    uses its columns of that matrix and the same train/test row split.
+    Targets are trained concurrently in loky workers with the CPU budget
+    divided between them; joblib hands large arrays to the workers as one
+    shared memory map instead of pickling the matrix (or df) per target.
+    
+    Args:
+        df: DataFrame with features and targets
+        targets: Target column -> {"numeric": [...], "categorical": [...],
+            "datetime": [...], "text": [...]} selected features, or None to use
+            every other numeric column
+        problem_type: "auto", "regression" or "classification"
+        test_size: Test split ratio
+        random_state: Random seed
+        cpu_budget: Cores available to this call (defaults to TRAINING_RUN_CPU_BUDGET)
+        return_estimators: Keep each target's best fitted model under "estimator"
+            of its best result, with the feature preparation under "preprocessing"
+        pipelines: Already fitted pipelines per target (reused when every target has one)
+        time_budget: Wall-clock seconds for the whole call (defaults to AUTOML_TIME_BUDGET_S;
+            targets trained one wave after another share it)
+    
+    Returns:
+        Target column -> train_models_auto style result, with the target's
+        fitted FeaturePipeline under "pipeline", or {"error": message}
+    """
+    numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+    
+    # Input columns per target
+    feature_plan = {}
+    for target_column, spec in targets.items():
+        if spec is None:
+            feature_plan[target_column] = {"numeric": [col for col in numeric_cols if col != target_column]}
+        else:
+            feature_plan[target_column] = {
+                kind: [col for col in spec.get(kind, []) if col != target_column] for kind in FEATURE_KINDS
+            }
+    
+    # Fit the preparation once for all targets
+    if pipelines and all(target_column in pipelines for target_column in targets):
+        target_pipelines = {target_column: pipelines[target_column] for target_column in targets}
+        union = FeaturePipeline.merge(target_pipelines.values())
+    else:
+        union_spec = {kind: [] for kind in FEATURE_KINDS}
+        for plan in feature_plan.values():
+            for kind, columns in plan.items():
+                union_spec[kind].extend(col for col in columns if col not in union_spec[kind])
+        union = FeaturePipeline.fit(df, **union_spec)
+        target_pipelines = {target_column: union.subset(**plan) for target_column, plan in feature_plan.items()}
+    X_values = union.transform(df).to_numpy(dtype=np.float64)
+    column_positions = {col: position for position, col in enumerate(union.feature_columns)}
+    
+    jobs = []
+    results: Dict[str, Dict[str, Any]] = {}
+    for target_column, pipeline in target_pipelines.items():
+        if target_column not in df.columns:
+            results[target_column] = {"error": f"Target column '{target_column}' not found in dataframe"}
+            continue
+        if not pipeline.feature_columns:
+            results[target_column] = {"error": "No numeric features available for training"}
+            continue
+        jobs.append((target_column, pipeline.feature_columns, df[target_column]))
+    
+    # One split shared by every target
+    train_idx, test_idx = _shared_split(
+        len(df), [target for _, _, target in jobs], problem_type, test_size, random_state
+    )
+    
+    n_parallel, budget_per_target = plan_training(len(df), len(jobs), cpu_budget)
+    time_budget = AUTOML_TIME_BUDGET_S if time_budget is None else time_budget
+    waves = math.ceil(len(jobs) / n_parallel) if jobs else 1
+    args = dict(
+        X_values=X_values, column_positions=column_positions, train_idx=train_idx, test_idx=test_idx, problem_type=problem_type,
+        test_size=test_size, random_state=random_state, cpu_budget=budget_per_target,
+        return_estimator=return_estimators, time_budget=time_budget / waves
+    )
+    
+    if n_parallel > 1:
+        logging.info(f"Training {len(jobs)} targets in parallel: {n_parallel} at once, {budget_per_target} core(s) each")
+        with parallel_config(backend="loky"):
+            outputs = Parallel(n_jobs=n_parallel, return_as="generator_unordered")(
+                delayed(_train_target)(target_column, feature_cols, target, **args) for target_column, feature_cols, target in jobs
+            )
+            for target_column, result in outputs:
+                results[target_column] = result
+    else:
+        for target_column, feature_cols, target in jobs:
+            results[target_column] = _train_target(target_column, feature_cols, target, **args)[1]
+    
+    for target_column, result in results.items():
+        if "error" in result:
+            continue
+        pipeline = target_pipelines[target_column]
+        target_encoding = result.pop("target_encoding")
+        result["pipeline"] = pipeline
+        if return_estimators:
+            result["preprocessing"] = {**pipeline.to_dict(), "target": target_encoding}
+    
+    return {target_column: results[target_column] for target_column in targets}
+
+
+def _shared_split(
+    n_rows: int,
+    targets: List[pd.Series],
+    problem_type: str,
+    test_size: float,
+    random_state: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Train and test row positions shared by every target of a multi-target run
+
+    The split is stratified on the first classification target, as in
+    train_classification_models, so rare classes reach the training rows.
+    It falls back to a plain split when that target has a class with fewer
+    than 2 rows or more classes than test rows.
+    """
+    rows = np.arange(n_rows)
+    classification_targets = [
+        target for target in targets
+        if problem_type == "classification"
+        or (problem_type == "auto" and detect_problem_type(target.to_frame(), target.name) == "classification")
+    ]
+    if classification_targets:
+        y, _ = prepare_classification_target(classification_targets[0])
+        try:
+            train_idx, test_idx = train_test_split(rows, test_size=test_size, random_state=random_state, stratify=y)
+            return train_idx, test_idx
+        except ValueError as e:
+            logging.info(f"Shared split not stratified on {classification_targets[0].name}: {str(e)}")
+    train_idx, test_idx = train_test_split(rows, test_size=test_size, random_state=random_state)
+    return train_idx, test_idx
+
+
+def _train_target(
+    target_column: str,
+    feature_cols: List[str],
+    target: pd.Series,
+    X_values: np.ndarray,
+    column_positions: Dict[str, int],
+    train_idx: np.ndarray,
+    test_idx: np.ndarray,
+    problem_type: str,
+    test_size: float,
+    random_state: int,
+    cpu_budget: int,
+    return_estimator: bool = False,
+    time_budget: float = 0
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Train one target of train_models_multi_target; failures are returned, not raised
+
+    X_values is the shared feature matrix (a read-only memory map in loky
+    workers); only this target's train and test rows are copied out of it.
+    """
+    try:
+        target_type = detect_problem_type(target.to_frame(), target_column) if problem_type == "auto" else problem_type
+        positions = [column_positions[col] for col in feature_cols]
+        X_train = pd.DataFrame(X_values[np.ix_(train_idx, positions)], index=target.index[train_idx], columns=feature_cols)
+        X_test = pd.DataFrame(X_values[np.ix_(test_idx, positions)], index=target.index[test_idx], columns=feature_cols)
+        
+        if target_type == "classification":
+            y, class_labels = prepare_classification_target(target)
+            y = np.asarray(y)
+            result = train_classification_split(
+                X_train, X_test, y[train_idx], y[test_idx], feature_cols, target_column, class_labels,
+                test_size=test_size, random_state=random_state, cpu_budget=cpu_budget,
+                return_estimator=return_estimator, time_budget=time_budget
+            )
+            result["target_encoding"] = {
+                "column": target_column, "class_labels": class_labels, "encoded": _label_encoded(target)
+            }
+            return target_column, result
+        if target_type == "regression":
+            if not pd.api.types.is_numeric_dtype(target):
+                raise ValueError(f"Target column '{target_column}' must be numeric")
+            y = target.fillna(target.mean())
+            result = train_regression_split(
+                X_train, X_test, y.iloc[train_idx], y.iloc[test_idx], feature_cols, target_column,
+                test_size=test_size, random_state=random_state, cpu_budget=cpu_budget,
+                return_estimator=return_estimator, time_budget=time_budget
+            )
+            result["problem_type"] = "regression"
+            result["target_encoding"] = {"column": target_column}
+            return target_column, result
+        raise ValueError(f"Unsupported problem type for multi-target training: {target_type}")
+    except Exception as e:
+        logging.warning(f"Training failed for target {target_column}: {str(e)}")
+        return target_column, {"error": str(e)}
@@ -0,0 +1,381 @@
+"""
+Model Registry
+Persists fitted estimators together with what is needed to score new rows:
+the preprocessing applied at training time, the feature list, metrics and
+the dataset version they were trained on. Artifacts are stored in GridFS or
+a local directory in the estimator's native format (XGBoost UBJSON,
+LightGBM text) or with joblib, and loaded models are kept in an in-memory LRU.
+"""
+import io
+import os
+import uuid
+import asyncio
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+from bson import ObjectId
+
+from app.config import MODEL_STORAGE_BACKEND, MODEL_STORAGE_DIR, MODEL_CACHE_SIZE, MODEL_REGISTRY_HISTORY
+from app.database.mongodb import db, fs
+from app.services.executor_service import run_blocking_io
+from app.services.feature_pipeline import FeaturePipeline
+
+try:
+    import xgboost as xgb
+    HAS_XGBOOST = True
+except ImportError:
+    HAS_XGBOOST = False
+
+try:
+    import lightgbm as lgb
+    HAS_LIGHTGBM = True
+except ImportError:
+    HAS_LIGHTGBM = False
+
+logger = logging.getLogger(__name__)
+
+MODEL_FORMATS = ("xgboost", "lightgbm", "joblib")
+
+_EXTENSIONS = {"xgboost": "ubj", "lightgbm": "txt", "joblib": "joblib"}
+
+
+class LightGBMBooster:
+    """
+    Scoring wrapper around a LightGBM Booster loaded from its text format
+
+    Mirrors the predict/predict_proba interface of the scikit-learn wrapper
+    the model was trained with.
+    """
+
+    def __init__(self, booster, classes: Optional[List[Any]] = None):
+        self.booster = booster
+        self.classes_ = np.asarray(classes) if classes is not None else None
+
+    def predict_proba(self, X: pd.DataFrame) -> np.ndarray:
+        raw = self.booster.predict(X)
+        return np.column_stack([1 - raw, raw]) if raw.ndim == 1 else raw
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        if self.classes_ is None:
+            return self.booster.predict(X)
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+def serialize_model(estimator: Any) -> Tuple[str, bytes, Dict[str, Any]]:
+    """
+    Serialize a fitted estimator in its native format where one exists
+
+    Returns:
+        (format, payload, format details needed to load it back)
+    """
+    if HAS_XGBOOST and isinstance(estimator, xgb.XGBModel):
+        details = {"estimator_class": type(estimator).__name__}
+        return "xgboost", bytes(estimator.get_booster().save_raw("ubj")), details
+    if HAS_LIGHTGBM and isinstance(estimator, lgb.LGBMModel):
+        classes = getattr(estimator, "classes_", None)
+        details = {"classes": classes.tolist() if classes is not None else None}
+        return "lightgbm", estimator.booster_.model_to_string().encode(), details
+    buffer = io.BytesIO()
+    joblib.dump(estimator, buffer)
+    return "joblib", buffer.getvalue(), {"estimator_class": type(estimator).__name__}
+
+
+def deserialize_model(fmt: str, payload: bytes, details: Optional[Dict[str, Any]] = None) -> Any:
+    """Rebuild an estimator stored by serialize_model"""
+    details = details or {}
+    if fmt == "xgboost":
+        estimator = getattr(xgb, details.get("estimator_class", "XGBRegressor"))()
+        estimator.load_model(bytearray(payload))
+        return estimator
+    if fmt == "lightgbm":
+        return LightGBMBooster(lgb.Booster(model_str=payload.decode()), details.get("classes"))
+    if fmt == "joblib":
+        return joblib.load(io.BytesIO(payload))
+    raise ValueError(f"Unsupported model format '{fmt}', expected one of {', '.join(MODEL_FORMATS)}")
+
+
+def prepare_features(frame: pd.DataFrame, preprocessing: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Turn raw rows into the feature matrix a registered model was trained on
+
+    The preprocessing is the stored FeaturePipeline of the model (plus its
+    target encoding); see FeaturePipeline.transform.
+    """
+    return FeaturePipeline.from_dict(preprocessing).transform(frame)
+
+
+class RegisteredModel:
+    """A loaded estimator with its registry record"""
+
+    def __init__(self, record: Dict[str, Any], estimator: Any):
+        self.record = record
+        self.estimator = estimator
+        self.pipeline = FeaturePipeline.from_dict(record["preprocessing"])
+
+    @property
+    def id(self) -> str:
+        return self.record["id"]
+
+    def score(self, frame: pd.DataFrame) -> Tuple[np.ndarray, Optional[np.ndarray], Optional[List[Any]]]:
+        """
+        Score raw rows as arrays
+
+        Returns:
+            (predictions, class probabilities or None, class label per probability column or None);
+            classifier predictions are decoded to the original labels
+        """
+        X = self.pipeline.transform(frame)
+        predictions = self.estimator.predict(X)
+        target = self.record["preprocessing"].get("target", {})
+        labels = target.get("class_labels")
+
+        if self.record["problem_type"] != "classification" or not labels:
+            return np.asarray(predictions, dtype=float), None, None
+
+        # Encoded targets were trained on label positions; numeric ones on the labels themselves
+        classes = np.asarray(getattr(self.estimator, "classes_", range(len(labels))))
+        if target.get("encoded"):
+            decode = np.asarray(labels, dtype=object)
+            predictions, classes = decode[np.asarray(predictions).astype(int)], decode[classes.astype(int)]
+        probabilities = self.estimator.predict_proba(X) if hasattr(self.estimator, "predict_proba") else None
+        return np.asarray(predictions), probabilities, [_native(label) for label in classes]
+
+    def predict(self, frame: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Score raw rows
+
+        Returns:
+            {"predictions": [...]} plus, for classifiers, "probabilities"
+            (one {class label: probability} dict per row)
+        """
+        predictions, probabilities, classes = self.score(frame)
+        result = {"predictions": [_native(value) for value in predictions]}
+        if probabilities is not None:
+            result["probabilities"] = [
+                {str(label): round(float(p), 6) for label, p in zip(classes, row)} for row in probabilities
+            ]
+        return result
+
+
+def _native(value: Any) -> Any:
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class ModelRegistry:
+    """
+    Registry of trained models (metadata in db.models, artifacts in GridFS or on disk)
+
+    Loaded models are kept in an LRU of `cache_size` entries.
+    """
+
+    def __init__(self, cache_size: int, backend: Optional[str] = None):
+        self.cache_size = cache_size
+        self.backend = backend or MODEL_STORAGE_BACKEND
+        self._cache: "OrderedDict[str, RegisteredModel]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: Dict[str, asyncio.Future] = {}
+
+    async def register(
+        self,
+        estimator: Any,
+        result: Dict[str, Any],
+        preprocessing: Dict[str, Any],
+        dataset_id: str,
+        dataset_version: int,
+        problem_type: str,
+        training: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Store a fitted estimator and its metadata
+
+        Args:
+            estimator: Fitted model
+            result: Training result of the model (name, metrics, features)
+            preprocessing: Feature preparation (see prepare_features)
+            dataset_id: Dataset the model was trained on
+            dataset_version: Version of that dataset
+            problem_type: "regression" or "classification"
+            training: Extra training details (e.g. sampling)
+
+        Returns:
+            Registry record (without the MongoDB _id)
+        """
+        fmt, payload, details = await run_blocking_io(serialize_model, estimator)
+        model_id = str(uuid.uuid4())
+        location = await self._store(model_id, fmt, payload)
+
+        metric_keys = ("r2_score", "rmse", "mae", "accuracy", "precision", "recall", "f1_score", "roc_auc")
+        record = {
+            "id": model_id,
+            "dataset_id": dataset_id,
+            "dataset_version": dataset_version,
+            "target_column": result.get("target_column"),
+            "model_name": result.get("model_name"),
+            "problem_type": problem_type,
+            "format": fmt,
+            "format_details": details,
+            "storage_backend": self.backend,
+            **location,
+            "size": len(payload),
+            "feature_columns": preprocessing["feature_columns"],
+            "preprocessing": preprocessing,
+            "metrics": {key: result[key] for key in metric_keys if result.get(key) is not None},
+            "training": {
+                "n_train_samples": result.get("n_train_samples"),
+                "n_test_samples": result.get("n_test_samples"),
+                **(training or {})
+            },
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }
+        await db.models.insert_one(record)
+        record.pop("_id", None)
+        self._remember(RegisteredModel(record, estimator))
+        logger.info(f"Registered {record['model_name']} for {record['target_column']} as {model_id} ({fmt}, {len(payload)} bytes)")
+
+        await self._prune(dataset_id, record["target_column"])
+        return record
+
+    async def get_record(self, model_id: str) -> Optional[Dict[str, Any]]:
+        return await db.models.find_one({"id": model_id}, {"_id": 0})
+
+    async def load(self, model_id: str) -> RegisteredModel:
+        """Load a registered model, from the LRU when possible (concurrent loads of one model share a read)"""
+        with self._lock:
+            model = self._cache.get(model_id)
+            if model is not None:
+                self._cache.move_to_end(model_id)
+                return model
+
+        loading = self._loading.get(model_id)
+        if loading is None:
+            loading = asyncio.ensure_future(self._load(model_id))
+            self._loading[model_id] = loading
+            loading.add_done_callback(lambda _: self._loading.pop(model_id, None))
+        return await asyncio.shield(loading)
+
+    async def _load(self, model_id: str) -> RegisteredModel:
+        record = await self.get_record(model_id)
+        if not record:
+            raise KeyError(f"Model {model_id} not found")
+        payload = await self._read(record)
+        estimator = await run_blocking_io(deserialize_model, record["format"], payload, record.get("format_details"))
+        model = RegisteredModel(record, estimator)
+        self._remember(model)
+        return model
+
+    async def latest_model_id(self, dataset_id: str, target_column: str) -> Optional[str]:
+        """ID of the newest model trained for a dataset and target"""
+        records = await db.models.find(
+            {"dataset_id": dataset_id, "target_column": target_column}, {"_id": 0, "id": 1}
+        ).sort("created_at", -1).limit(1).to_list(length=1)
+        return records[0]["id"] if records else None
+
+    def resident(self) -> List[str]:
+        """IDs of the models held in memory, most recently used last"""
+        with self._lock:
+            return list(self._cache)
+
+    async def list_models(self, dataset_id: Optional[str] = None, target_column: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Registry records, newest first (preprocessing details omitted)"""
+        query = {}
+        if dataset_id:
+            query["dataset_id"] = dataset_id
+        if target_column:
+            query["target_column"] = target_column
+        cursor = db.models.find(query, {"_id": 0, "preprocessing": 0}).sort("created_at", -1)
+        return await cursor.to_list(length=None)
+
+    async def delete(self, model_id: str) -> bool:
+        record = await self.get_record(model_id)
+        if not record:
+            return False
+        await self._delete_artifact(record)
+        await db.models.delete_one({"id": model_id})
+        with self._lock:
+            self._cache.pop(model_id, None)
+        return True
+
+    async def delete_dataset_models(self, dataset_id: str) -> int:
+        """Remove every model trained on a dataset"""
+        records = await db.models.find({"dataset_id": dataset_id}, {"_id": 0, "id": 1}).to_list(length=None)
+        for record in records:
+            await self.delete(record["id"])
+        return len(records)
+
+    async def _prune(self, dataset_id: str, target_column: str):
+        """Keep the newest MODEL_REGISTRY_HISTORY models per dataset and target"""
+        stale = await db.models.find(
+            {"dataset_id": dataset_id, "target_column": target_column}, {"_id": 0, "id": 1}
+        ).sort("created_at", -1).skip(MODEL_REGISTRY_HISTORY).to_list(length=None)
+        for record in stale:
+            await self.delete(record["id"])
+
+    def _remember(self, model: RegisteredModel):
+        with self._lock:
+            self._cache[model.id] = model
+            self._cache.move_to_end(model.id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    async def _store(self, model_id: str, fmt: str, payload: bytes) -> Dict[str, Any]:
+        filename = f"model_{model_id}.{_EXTENSIONS[fmt]}"
+        if self.backend == "gridfs":
+            file_id = await fs.upload_from_stream(
+                filename, payload, metadata={"model_id": model_id, "type": "model", "format": fmt}
+            )
+            return {"file_id": str(file_id)}
+
+        def write():
+            os.makedirs(MODEL_STORAGE_DIR, exist_ok=True)
+            with open(os.path.join(MODEL_STORAGE_DIR, filename), "wb") as f:
+                f.write(payload)
+        await run_blocking_io(write)
+        return {"path": filename}
+
+    async def _read(self, record: Dict[str, Any]) -> bytes:
+        if record.get("storage_backend", "gridfs") == "gridfs":
+            grid_out = await fs.open_download_stream(ObjectId(record["file_id"]))
+            return await grid_out.read()
+
+        def read():
+            with open(os.path.join(MODEL_STORAGE_DIR, record["path"]), "rb") as f:
+                return f.read()
+        return await run_blocking_io(read)
+
+    async def artifact_file(self, record: Dict[str, Any]) -> Tuple[str, bool]:
+        """
+        Path of a model's artifact on local disk, for loading it in worker processes
+
+        Returns:
+            (path, temporary) - GridFS artifacts are downloaded to a temporary
+            file that the caller removes
+        """
+        if record.get("storage_backend", "gridfs") != "gridfs":
+            return os.path.join(MODEL_STORAGE_DIR, record["path"]), False
+        payload = await self._read(record)
+
+        def write() -> str:
+            with tempfile.NamedTemporaryFile(suffix=f".{_EXTENSIONS[record['format']]}", delete=False) as f:
+                f.write(payload)
+                return f.name
+        return await run_blocking_io(write), True
+
+    async def _delete_artifact(self, record: Dict[str, Any]):
+        try:
+            if record.get("storage_backend", "gridfs") == "gridfs":
+                await fs.delete(ObjectId(record["file_id"]))
+            else:
+                os.remove(os.path.join(MODEL_STORAGE_DIR, record["path"]))
+        except Exception as e:
+            logger.warning(f"Could not delete artifact of model {record['id']}: {str(e)}")
+
+
+# Singleton instance
+model_registry = ModelRegistry(MODEL_CACHE_SIZE)
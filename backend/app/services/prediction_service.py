@@ -0,0 +1,225 @@
+"""
+Prediction Service
+Online scoring of registered models. Concurrent requests for the same model
+wait up to PREDICT_BATCH_WAIT_MS for each other and are scored by a single
+vectorized predict call in the predict thread pool; inputs are validated
+against the feature schema stored with the model, and request latencies are
+kept for percentile reporting.
+"""
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.config import PREDICT_BATCH_WAIT_MS, PREDICT_MAX_BATCH_ROWS, PREDICT_LATENCY_WINDOW
+from app.services.executor_service import predict_pool
+from app.services.feature_pipeline import FeaturePipeline
+from app.services.model_registry import model_registry, ModelRegistry, RegisteredModel
+
+logger = logging.getLogger(__name__)
+
+_MAX_REPORTED_ERRORS = 20
+
+
+class PredictionInputError(ValueError):
+    """Rows that do not match a model's feature schema"""
+
+    def __init__(self, errors: List[str]):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+def input_schema(record: Dict[str, Any]) -> Dict[str, str]:
+    """Raw input columns of a registered model: column -> "numeric", "categorical", "datetime" or "text" """
+    return FeaturePipeline.from_dict(record["preprocessing"]).input_columns
+
+
+def _is_number(value: Any) -> bool:
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, (int, float, np.number)):
+        return True
+    if isinstance(value, str):
+        try:
+            float(value)
+            return True
+        except ValueError:
+            return False
+    return False
+
+
+def validate_rows(rows: List[Any], schema: Dict[str, str]) -> List[str]:
+    """
+    Schema violations of input rows (empty when they can be scored)
+
+    Every input column must be present; null values are allowed and filled as
+    at training time. Numeric columns take numbers or numeric strings. Fields
+    the model does not use are ignored.
+    """
+    errors = []
+    for i, row in enumerate(rows):
+        if not isinstance(row, dict):
+            errors.append(f"row {i}: expected an object of feature values")
+        else:
+            missing = [col for col in schema if col not in row]
+            if missing:
+                errors.append(f"row {i}: missing {', '.join(missing)}")
+            invalid = [
+                col for col, kind in schema.items()
+                if kind == "numeric" and row.get(col) is not None and not _is_number(row[col])
+            ]
+            if invalid:
+                errors.append(f"row {i}: non-numeric value for {', '.join(invalid)}")
+        if len(errors) >= _MAX_REPORTED_ERRORS:
+            break
+    return errors
+
+
+class _ModelStats:
+    def __init__(self, window: int):
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=window)
+
+
+def _percentiles(latencies) -> Dict[str, float]:
+    if not latencies:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+    p50, p95, p99 = np.percentile(np.fromiter(latencies, dtype=np.float64), [50, 95, 99]) * 1000
+    return {"p50_ms": round(float(p50), 3), "p95_ms": round(float(p95), 3), "p99_ms": round(float(p99), 3)}
+
+
+class PredictionBatcher:
+    """
+    Micro-batches prediction requests per model
+
+    The first request for a model opens a batch and schedules its flush
+    after `wait_ms`; requests arriving meanwhile join it. A batch reaching
+    `max_rows` rows is flushed at once.
+    """
+
+    def __init__(
+        self,
+        registry: ModelRegistry,
+        wait_ms: float = PREDICT_BATCH_WAIT_MS,
+        max_rows: int = PREDICT_MAX_BATCH_ROWS,
+        latency_window: int = PREDICT_LATENCY_WINDOW
+    ):
+        self.registry = registry
+        self.wait = wait_ms / 1000
+        self.max_rows = max_rows
+        self.latency_window = latency_window
+        self._pending: Dict[str, List[Tuple[RegisteredModel, List[Dict[str, Any]], asyncio.Future]]] = {}
+        self._pending_rows: Dict[str, int] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._scoring = set()
+        self._stats: Dict[str, _ModelStats] = {}
+
+    async def predict(self, model_id: str, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Score raw rows with a registered model
+
+        Raises:
+            KeyError: Unknown model
+            PredictionInputError: Rows not matching the model's feature schema
+
+        Returns:
+            {"predictions": [...]} plus "probabilities" for classifiers
+        """
+        started = time.perf_counter()
+        stats = self._stats.setdefault(model_id, _ModelStats(self.latency_window))
+        stats.requests += 1
+        try:
+            model = await self.registry.load(model_id)
+            errors = validate_rows(rows, model.pipeline.input_columns)
+            if errors:
+                raise PredictionInputError(errors)
+
+            future = asyncio.get_running_loop().create_future()
+            self._pending.setdefault(model_id, []).append((model, rows, future))
+            self._pending_rows[model_id] = self._pending_rows.get(model_id, 0) + len(rows)
+            if self._pending_rows[model_id] >= self.max_rows:
+                self._flush(model_id)
+            elif model_id not in self._timers:
+                self._timers[model_id] = asyncio.get_running_loop().call_later(self.wait, self._flush, model_id)
+            result = await future
+        except Exception:
+            stats.errors += 1
+            raise
+        stats.rows += len(rows)
+        stats.latencies.append(time.perf_counter() - started)
+        return result
+
+    def _flush(self, model_id: str):
+        timer = self._timers.pop(model_id, None)
+        if timer is not None:
+            timer.cancel()
+        requests = self._pending.pop(model_id, None)
+        self._pending_rows.pop(model_id, None)
+        if requests:
+            task = asyncio.ensure_future(self._score(model_id, requests))
+            self._scoring.add(task)
+            task.add_done_callback(self._scoring.discard)
+
+    async def _score(self, model_id: str, requests: List[Tuple[RegisteredModel, List[Dict[str, Any]], asyncio.Future]]):
+        """
+        Score a batch in one predict call and hand each request its slice
+
+        When the batched call fails, each request is scored on its own so
+        that only the requests whose rows cause the error fail.
+        """
+        model = requests[0][0]
+        self._stats[model_id].batches += 1
+        try:
+            frame = pd.DataFrame([row for _, rows, _ in requests for row in rows])
+            result = await predict_pool.run(model.predict, frame)
+        except Exception as e:
+            if len(requests) == 1:
+                logger.error(f"Prediction failed for model {model_id}: {str(e)}")
+                if not requests[0][2].done():
+                    requests[0][2].set_exception(e)
+                return
+            logger.warning(f"Prediction batch failed for model {model_id}, scoring its {len(requests)} requests separately: {str(e)}")
+            await asyncio.gather(*(self._score(model_id, [request]) for request in requests))
+            return
+
+        offset = 0
+        for _, rows, future in requests:
+            end = offset + len(rows)
+            part = {key: values[offset:end] for key, values in result.items()}
+            if not future.done():
+                future.set_result(part)
+            offset = end
+
+    def stats(self, model_id: Optional[str] = None) -> Dict[str, Any]:
+        """Request counts, batching and latency percentiles (per model and overall)"""
+        models = {}
+        all_latencies = []
+        for key, stats in self._stats.items():
+            if model_id and key != model_id:
+                continue
+            all_latencies.extend(stats.latencies)
+            models[key] = {
+                "requests": stats.requests,
+                "rows": stats.rows,
+                "errors": stats.errors,
+                "batches": stats.batches,
+                "avg_batch_rows": round(stats.rows / stats.batches, 2) if stats.batches else 0.0,
+                **_percentiles(stats.latencies)
+            }
+        return {
+            "requests": sum(m["requests"] for m in models.values()),
+            **_percentiles(all_latencies),
+            "models": models,
+            "resident_models": self.registry.resident()
+        }
+
+
+# Singleton instance
+prediction_batcher = PredictionBatcher(model_registry)
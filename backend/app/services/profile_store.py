@@ -0,0 +1,336 @@
+"""
+Dataset Profile Store
+Keeps each dataset's profile in its metadata document so serving it is a
+single indexed read, with per-column stat versions and a mergeable running
+state in GridFS for extending the profile when rows are appended. Correlation
+matrices are computed once per dataset version and served from the
+correlation cache.
+"""
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+
+import pandas as pd
+from bson import ObjectId
+
+from app.database.mongodb import db, fs
+from app.database.dataset_storage import iter_dataframe_chunks
+from app.services.executor_service import run_cpu_bound, run_blocking_io
+from app.services.profiling_service import ProfileAccumulator, changed_columns, refresh_profile
+from app.services.data_service import generate_data_profile
+from app.services.streaming_stats import stream_statistics
+from app.services.correlation_service import compute_correlation_matrix, get_cached_matrix, cache_matrix
+from app.services.sampling_service import ReservoirSampler
+from app.config import STREAM_STATS_MIN_ROWS, CORRELATION_SAMPLE_ROWS
+
+logger = logging.getLogger(__name__)
+
+PROFILE_STATE_TYPE = "profile_state"
+PROFILE_PROJECTION = {"_id": 0, "id": 1, "version": 1, "profile": 1, "profile_version": 1, "profile_state_file_id": 1}
+
+
+def _bson_key(value: Any) -> Any:
+    """Value-count keys as BSON-safe scalars"""
+    if hasattr(value, "item"):
+        value = value.item()
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def compact_profile(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Profile as stored in the dataset document
+
+    Drops the fields the API repeats for frontend compatibility (columns_info,
+    statistics, unique_values) and stores value counts as [value, count] pairs
+    because data values are not valid Mongo field names.
+    """
+    columns = []
+    for info in profile["columns"]:
+        info = {key: value for key, value in info.items() if key not in ("statistics", "unique_values")}
+        if "top_values" in info:
+            info["top_values"] = [[key, count] for key, count in info["top_values"].items()]
+        columns.append(info)
+
+    return {
+        **{key: value for key, value in profile.items() if key not in ("columns", "columns_info")},
+        "columns": columns,
+        "numeric_summary": [{"column": col, **summary} for col, summary in profile["numeric_summary"].items()],
+        "categorical_summary": [
+            {"column": col, "values": [[_bson_key(key), int(count)] for key, count in counts.items()]}
+            for col, counts in profile["categorical_summary"].items()
+        ]
+    }
+
+
+def expand_profile(stored: Dict[str, Any]) -> Dict[str, Any]:
+    """Rebuild the API profile layout from its stored form"""
+    columns = []
+    for info in stored["columns"]:
+        info = {**info, "unique_values": info["unique_count"]}
+        if "top_values" in info:
+            info["top_values"] = {key: count for key, count in info["top_values"]}
+        if info.get("stats") is not None:
+            info["statistics"] = info["stats"]
+        columns.append(info)
+
+    return {
+        **stored,
+        "columns": columns,
+        "columns_info": columns,
+        "numeric_summary": {
+            summary["column"]: {key: value for key, value in summary.items() if key != "column"}
+            for summary in stored["numeric_summary"]
+        },
+        "categorical_summary": {
+            summary["column"]: {key: count for key, count in summary["values"]}
+            for summary in stored["categorical_summary"]
+        }
+    }
+
+
+def is_streamed(dataset: Optional[Dict[str, Any]]) -> bool:
+    """Whether a dataset's statistics are computed over its stored chunks instead of a loaded DataFrame"""
+    return bool(dataset) and dataset.get("storage_type") == "parquet" \
+        and dataset.get("row_count", 0) >= STREAM_STATS_MIN_ROWS
+
+
+def _version_filter(dataset_id: str, version: int) -> Dict[str, Any]:
+    # Datasets that were never rewritten have no version field (version 1)
+    return {"id": dataset_id, "version": {"$in": [version, None]} if version == 1 else version}
+
+
+async def save_profile(
+    dataset_id: str,
+    version: int,
+    profile: Dict[str, Any],
+    state: Optional[ProfileAccumulator] = None,
+    changed: Optional[List[str]] = None,
+    previous: Optional[Dict[str, Any]] = None
+) -> bool:
+    """
+    Store a dataset profile with its metadata
+
+    Each column carries stats_version, the dataset version its statistics were
+    last recomputed at: columns in changed (all columns when changed is None)
+    get the new version, the others keep the one from the previous profile.
+    The write only applies if the dataset is still at version, so a profile
+    computed from superseded data is discarded.
+
+    Args:
+        dataset_id: Dataset ID
+        version: Dataset version the profile describes
+        profile: Profile dict
+        state: Accumulator the profile came from (its running state is kept for appends)
+        changed: Columns recomputed for this version
+        previous: Stored profile being replaced
+
+    Returns:
+        True if the profile was stored
+    """
+    previous_versions = {info["name"]: info.get("stats_version", version) for info in (previous or {}).get("columns", [])}
+    stored = compact_profile(profile)
+    for info in stored["columns"]:
+        recomputed = changed is None or info["name"] in changed or info["name"] not in previous_versions
+        info["stats_version"] = version if recomputed else previous_versions[info["name"]]
+
+    state_file_id = None
+    if state is not None and not state.exact:
+        payload = await run_blocking_io(state.to_bytes)
+        state_file_id = await fs.upload_from_stream(
+            f"profile_{dataset_id}_v{version}.npz",
+            payload,
+            metadata={"dataset_id": dataset_id, "type": PROFILE_STATE_TYPE, "version": version}
+        )
+
+    current = await db.datasets.find_one({"id": dataset_id}, {"_id": 0, "profile_state_file_id": 1})
+    result = await db.datasets.update_one(
+        _version_filter(dataset_id, version),
+        {"$set": {
+            "profile": stored,
+            "profile_version": version,
+            "profile_state_file_id": str(state_file_id) if state_file_id else None,
+            "profile_updated_at": datetime.now(timezone.utc).isoformat()
+        }}
+    )
+
+    if result.matched_count == 0:
+        logger.info(f"Dataset {dataset_id} changed past version {version}, profile not stored")
+        await _delete_state_file(str(state_file_id) if state_file_id else None)
+        return False
+    await _delete_state_file((current or {}).get("profile_state_file_id"))
+    return True
+
+
+async def store_accumulated_profile(
+    dataset_id: str,
+    version: int,
+    accumulator: ProfileAccumulator,
+    previous: Optional[Dict[str, Any]] = None
+):
+    """
+    Store the profile built while ingesting or appending rows
+
+    A failure is logged rather than raised - the profile is then computed on
+    first request instead.
+    """
+    try:
+        profile = await run_blocking_io(accumulator.to_profile)
+        await save_profile(dataset_id, version, profile, state=accumulator, previous=previous)
+    except Exception as e:
+        logger.warning(f"Failed to store profile of dataset {dataset_id}: {str(e)}")
+
+
+async def _delete_state_file(file_id: Optional[str]):
+    if not file_id:
+        return
+    try:
+        await fs.delete(ObjectId(file_id))
+    except Exception as e:
+        logger.warning(f"Failed to delete profile state {file_id}: {str(e)}")
+
+
+async def delete_profile_state(dataset: Dict[str, Any]):
+    """Delete the stored running profile state of a dataset"""
+    await _delete_state_file(dataset.get("profile_state_file_id"))
+
+
+async def get_dataset_profile(
+    dataset_id: str,
+    load_dataframe: Callable[[], Awaitable[pd.DataFrame]]
+) -> Optional[Dict[str, Any]]:
+    """
+    Profile of the current dataset version
+
+    Served from the dataset document when it is current; otherwise computed
+    from the loaded data and stored for the next request.
+
+    Args:
+        dataset_id: Dataset ID
+        load_dataframe: Coroutine function loading the dataset (called on a miss)
+
+    Returns:
+        Profile dict, or None if the dataset does not exist
+    """
+    dataset = await db.datasets.find_one({"id": dataset_id}, PROFILE_PROJECTION)
+    if not dataset:
+        return None
+
+    version = dataset.get("version", 1)
+    if dataset.get("profile") and dataset.get("profile_version") == version:
+        return expand_profile(dataset["profile"])
+
+    metadata = await db.datasets.find_one({"id": dataset_id}, {"_id": 0, "data": 0})
+    if is_streamed(metadata):
+        # Too large to load - profile the stored chunks in parallel and keep the running state
+        result = await stream_statistics(iter_dataframe_chunks(metadata), correlation=False)
+        profile, state = result["profile"], result["profile_state"]
+    else:
+        df = await load_dataframe()
+        profile, state = await run_cpu_bound(generate_data_profile, df), None
+    await save_profile(dataset_id, version, profile, state=state, previous=dataset.get("profile"))
+    return profile
+
+
+async def update_profile_after_rewrite(
+    dataset_id: str,
+    version: int,
+    before: pd.DataFrame,
+    after: pd.DataFrame,
+    previous: Optional[Dict[str, Any]] = None
+):
+    """
+    Bring the stored profile up to date after a dataset was rewritten (e.g. cleaned)
+
+    If rows were kept, only the columns whose values changed are re-profiled;
+    otherwise the whole profile is recomputed. The running state is dropped -
+    it is rebuilt from storage on the next append.
+
+    Args:
+        dataset_id: Dataset ID
+        version: New dataset version
+        before: Data of the previous version
+        after: Data of the new version
+        previous: Stored profile of the previous version
+    """
+    columns = await run_cpu_bound(changed_columns, before, after)
+    if previous is not None and columns is not None:
+        profile = await run_cpu_bound(refresh_profile, expand_profile(previous), after, columns)
+    else:
+        profile = await run_cpu_bound(generate_data_profile, after)
+    await save_profile(dataset_id, version, profile, changed=columns, previous=previous)
+
+
+async def load_profile_state(dataset: Dict[str, Any]) -> ProfileAccumulator:
+    """
+    Running profile state of a Parquet-stored dataset, to extend with appended rows
+
+    Uses the stored state when it matches the dataset version and otherwise
+    rebuilds it by streaming the stored chunks.
+    """
+    file_id = dataset.get("profile_state_file_id")
+    if file_id and dataset.get("profile_version") == dataset.get("version", 1):
+        try:
+            grid_out = await fs.open_download_stream(ObjectId(file_id))
+            payload = await grid_out.read()
+            return await run_blocking_io(ProfileAccumulator.from_bytes, payload)
+        except Exception as e:
+            logger.warning(f"Failed to read profile state of dataset {dataset['id']}, rebuilding: {str(e)}")
+
+    if is_streamed(dataset):
+        result = await stream_statistics(iter_dataframe_chunks(dataset), correlation=False)
+        return result["profile_state"]
+    accumulator = ProfileAccumulator()
+    async for chunk in iter_dataframe_chunks(dataset):
+        await run_blocking_io(accumulator.add, chunk)
+    return accumulator
+
+
+async def get_dataset_correlation_matrix(
+    dataset_id: str,
+    load_dataframe: Callable[[], Awaitable[pd.DataFrame]],
+    method: str = "pearson"
+) -> Optional[pd.DataFrame]:
+    """
+    Correlation matrix of the current dataset version
+
+    Served from the correlation cache when it holds this version; otherwise
+    computed from the loaded data, or for datasets too large to load, from the
+    stored chunks (Pearson exactly via streamed covariance, Spearman on a
+    reservoir sample because ranks need all rows at once).
+
+    Args:
+        dataset_id: Dataset ID
+        load_dataframe: Coroutine function loading the dataset (called on a miss)
+        method: 'pearson' or 'spearman'
+
+    Returns:
+        Correlation matrix DataFrame, or None if the dataset does not exist
+    """
+    dataset = await db.datasets.find_one({"id": dataset_id}, {"_id": 0, "data": 0, "profile": 0})
+    if not dataset:
+        return None
+
+    version = dataset.get("version", 1)
+    matrix = get_cached_matrix(dataset_id, version, method)
+    if matrix is not None:
+        return matrix
+
+    if is_streamed(dataset) and method == "pearson":
+        result = await stream_statistics(iter_dataframe_chunks(dataset), profile=False)
+        matrix = result["correlation_matrix"]
+        if matrix is None:
+            matrix = pd.DataFrame()
+    elif is_streamed(dataset):
+        sampler = ReservoirSampler(CORRELATION_SAMPLE_ROWS)
+        async for chunk in iter_dataframe_chunks(dataset):
+            await run_blocking_io(sampler.add, chunk)
+        matrix = await run_cpu_bound(compute_correlation_matrix, sampler.sample(), method, False)
+        matrix.attrs["approximate"] = sampler.rows_seen > len(sampler.sample())
+    else:
+        df = await load_dataframe()
+        matrix = await run_cpu_bound(compute_correlation_matrix, df, method)
+
+    cache_matrix(dataset_id, version, matrix)
+    return matrix
@@ -0,0 +1,720 @@
+"""
+Profiling Engine
+Column statistics in one vectorized pass over the numeric block and one
+value_counts pass per categorical column, with an approximate mode
+(HyperLogLog distinct counts, t-digest quantiles) for very large frames,
+and an accumulator that builds and extends profiles chunk by chunk
+"""
+import io
+import json
+import numpy as np
+import pandas as pd
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.config import (
+    PROFILE_APPROX_MIN_ROWS, PROFILE_BLOCK_CELLS, PROFILE_TRACKED_VALUES, PROFILE_MAX_ROW_HASHES,
+    PROFILE_EXACT_MAX_ROWS, PROFILE_EXACT_MAX_BYTES
+)
+from app.services.sketches import HyperLogLog, TDigest, RunningMoments, HeavyHitters
+
+logger = logging.getLogger(__name__)
+
+QUANTILES = (0.25, 0.5, 0.75)
+
+
+def is_profiled_numeric(series: pd.Series) -> bool:
+    """Numeric columns get statistics; booleans are profiled like categoricals"""
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+
+def _exact_quantiles(block: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """
+    Linear-interpolated quantiles (pandas default) of every column of a block
+
+    Columns without missing values share one np.partition call; columns with
+    missing values are partitioned individually on their non-null values.
+    """
+    result = np.full((len(QUANTILES), block.shape[1]), np.nan)
+    n_rows = block.shape[0]
+
+    complete = np.flatnonzero(counts == n_rows)
+    if complete.size and n_rows:
+        positions = np.array(QUANTILES) * (n_rows - 1)
+        lower, upper = np.floor(positions).astype(int), np.ceil(positions).astype(int)
+        part = np.partition(block[:, complete], np.unique(np.concatenate([lower, upper])), axis=0)
+        frac = (positions - lower)[:, None]
+        result[:, complete] = part[lower] + (part[upper] - part[lower]) * frac
+
+    for col in np.flatnonzero((counts < n_rows) & (counts > 0)):
+        values = block[:, col]
+        result[:, col] = np.quantile(values[~np.isnan(values)], QUANTILES)
+    return result
+
+
+def _numeric_stats(df: pd.DataFrame, columns: List[str], approximate: bool) -> Dict[str, Dict[str, Any]]:
+    """Count, missing, distinct, moments, extremes and quartiles for numeric columns, in column blocks"""
+    stats: Dict[str, Dict[str, Any]] = {}
+    n_rows = len(df)
+    block_cols = max(1, PROFILE_BLOCK_CELLS // max(1, n_rows))
+
+    for start in range(0, len(columns), block_cols):
+        names = columns[start:start + block_cols]
+        block = df[names].to_numpy(dtype=np.float64, na_value=np.nan)
+        missing_mask = np.isnan(block)
+        missing = missing_mask.sum(axis=0)
+        counts = n_rows - missing
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sums = np.where(missing_mask, 0.0, block).sum(axis=0)
+            means = sums / counts
+            centered = np.where(missing_mask, 0.0, block - means)
+            stds = np.sqrt((centered * centered).sum(axis=0) / (counts - 1))
+        del centered
+        filled = np.where(missing_mask, np.inf, block)
+        mins = filled.min(axis=0) if n_rows else np.full(len(names), np.inf)
+        filled = np.where(missing_mask, -np.inf, block)
+        maxs = filled.max(axis=0) if n_rows else np.full(len(names), -np.inf)
+        del filled
+
+        if approximate:
+            quartiles = np.full((len(QUANTILES), len(names)), np.nan)
+            for i in range(len(names)):
+                digest = TDigest()
+                digest.update(block[:, i])
+                quartiles[:, i] = [np.nan if q is None else q for q in digest.quantiles(QUANTILES)]
+        else:
+            quartiles = _exact_quantiles(block, counts)
+
+        for i, name in enumerate(names):
+            empty = counts[i] == 0
+            stats[name] = {
+                "count": int(counts[i]),
+                "missing": int(missing[i]),
+                "unique": _distinct_count(df[name], approximate),
+                "mean": float(means[i]),
+                "std": float(stds[i]) if counts[i] > 1 else np.nan,
+                "min": np.nan if empty else float(mins[i]),
+                "max": np.nan if empty else float(maxs[i]),
+                "q25": float(quartiles[0, i]),
+                "median": float(quartiles[1, i]),
+                "q75": float(quartiles[2, i])
+            }
+    return stats
+
+
+def _distinct_count(series: pd.Series, approximate: bool) -> int:
+    if not approximate:
+        return int(series.nunique())
+    sketch = HyperLogLog()
+    sketch.add(series)
+    return sketch.count()
+
+
+def _categorical_stats(series: pd.Series) -> Dict[str, Any]:
+    """Missing, distinct and top values from a single value_counts pass"""
+    counts = series.value_counts(dropna=False)
+    null_mask = counts.index.isna()
+    missing = int(counts[null_mask].sum())
+    counts = counts[~null_mask]
+    return {
+        "count": int(len(series) - missing),
+        "missing": missing,
+        "unique": int(len(counts)),
+        "top": counts.head(10)
+    }
+
+
+def _duplicate_rows(df: pd.DataFrame) -> int:
+    """Duplicate rows counted on 64-bit row hashes instead of comparing full rows"""
+    if df.empty or len(df.columns) == 0:
+        return 0
+    try:
+        row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    except TypeError:
+        # Unhashable cells (lists, dicts) - fall back to pandas
+        return int(df.astype(str).duplicated().sum())
+    return int(len(row_hashes) - len(pd.unique(row_hashes)))
+
+
+def _optional(value: float) -> Optional[float]:
+    return None if np.isnan(value) else value
+
+
+def _column_info(name: str, dtype: str, stats: Dict[str, Any], numeric: bool, n_rows: int) -> Dict[str, Any]:
+    col_info = {
+        "name": name,
+        "dtype": dtype,
+        "unique_count": stats["unique"],  # Frontend expects unique_count
+        "unique_values": stats["unique"],  # Keep for backward compatibility
+        "missing_count": stats["missing"],
+        "missing_percentage": float(stats["missing"] / n_rows * 100) if n_rows else 0.0
+    }
+
+    if numeric:
+        stats_dict = {key: _optional(stats[key]) for key in ("mean", "median", "std", "min", "max", "q25", "q75")}
+        if stats["count"]:
+            # A lone value has an undefined (NaN) standard deviation, as pandas reports it
+            stats_dict["std"] = stats["std"]
+        col_info["statistics"] = stats_dict
+        col_info["stats"] = stats_dict  # Frontend expects 'stats' field
+    else:
+        # Categorical column info (including boolean)
+        col_info["top_values"] = {str(k): int(v) for k, v in stats["top"].head(5).items()}
+        col_info["stats"] = None  # No stats for categorical
+    return col_info
+
+
+def _numeric_summary(stats: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "count": float(stats["count"]),
+        "mean": stats["mean"],
+        "std": stats["std"],
+        "min": stats["min"],
+        "25%": stats["q25"],
+        "50%": stats["median"],
+        "75%": stats["q75"],
+        "max": stats["max"]
+    }
+
+
+def _missing_data_summary(columns_info: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "total_missing": int(sum(info["missing_count"] for info in columns_info)),
+        "columns_with_missing": [
+            {
+                "column": info["name"],
+                "count": info["missing_count"],
+                "percentage": info["missing_percentage"]
+            }
+            for info in columns_info
+            if info["missing_count"] > 0
+        ]
+    }
+
+
+def _build_profile(
+    n_rows: int,
+    column_stats: List[Tuple[str, str, Dict[str, Any], bool, bool]],
+    duplicate_rows: int,
+    approximate: bool
+) -> Dict[str, Any]:
+    """
+    Assemble the profile layout from per-column statistics
+
+    Args:
+        n_rows: Number of rows profiled
+        column_stats: (name, dtype, stats, numeric, summarize) per column, where
+            summarize marks object/category columns listed in categorical_summary
+        duplicate_rows: Number of duplicate rows
+        approximate: Whether the statistics are sketch estimates
+
+    Returns:
+        Profile dict
+    """
+    columns_info = []
+    numeric_summary = {}
+    categorical_summary = {}
+    for name, dtype, stats, numeric, summarize in column_stats:
+        columns_info.append(_column_info(name, dtype, stats, numeric, n_rows))
+        if numeric:
+            numeric_summary[name] = _numeric_summary(stats)
+        elif summarize:
+            categorical_summary[name] = stats["top"].to_dict()
+
+    missing_data_summary = _missing_data_summary(columns_info)
+
+    return {
+        "row_count": n_rows,
+        "total_rows": int(n_rows),  # Frontend expects total_rows for percentage calculation
+        "column_count": len(columns_info),
+        "missing_values_total": missing_data_summary["total_missing"],  # Frontend expects this field
+        "duplicate_rows": duplicate_rows,  # Frontend expects this field
+        "columns": columns_info,
+        "columns_info": columns_info,  # Frontend expects this field
+        "missing_data_summary": missing_data_summary,
+        "numeric_summary": numeric_summary,
+        "categorical_summary": categorical_summary,
+        "approximate": approximate
+    }
+
+
+def _is_summarized(series: pd.Series) -> bool:
+    return isinstance(series.dtype, pd.CategoricalDtype) or pd.api.types.is_object_dtype(series)
+
+
+def profile_dataframe(df: pd.DataFrame, approximate: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    Build the data profile served by the analysis endpoints
+
+    Args:
+        df: DataFrame to profile
+        approximate: Use HyperLogLog distinct counts and t-digest quartiles
+            (defaults to True from PROFILE_APPROX_MIN_ROWS rows)
+
+    Returns:
+        Profile dict (same layout as generate_data_profile has always returned)
+    """
+    if approximate is None:
+        approximate = len(df) >= PROFILE_APPROX_MIN_ROWS
+
+    numeric_cols = [col for col in df.columns if is_profiled_numeric(df[col])]
+    numeric_stats = _numeric_stats(df, numeric_cols, approximate) if numeric_cols else {}
+
+    column_stats = []
+    for col in df.columns:
+        series = df[col]
+        if col in numeric_stats:
+            stats = numeric_stats[col]
+        else:
+            stats = _categorical_stats(series)
+            if approximate:
+                stats["unique"] = _distinct_count(series, approximate=True)
+        column_stats.append((col, str(series.dtype), stats, col in numeric_stats, _is_summarized(series)))
+
+    return _build_profile(len(df), column_stats, _duplicate_rows(df), approximate)
+
+
+def changed_columns(before: pd.DataFrame, after: pd.DataFrame) -> Optional[List[str]]:
+    """
+    Columns whose values or dtype differ between two versions of a dataset
+
+    Returns:
+        Changed column names, or None when rows or the column set changed
+        (every column statistic is affected)
+    """
+    if len(before) != len(after) or list(before.columns) != list(after.columns):
+        return None
+    before, after = before.reset_index(drop=True), after.reset_index(drop=True)
+    return [col for col in after.columns if not before[col].equals(after[col])]
+
+
+def refresh_profile(profile: Dict[str, Any], df: pd.DataFrame, columns: List[str]) -> Dict[str, Any]:
+    """
+    Recompute the statistics of some columns of an existing profile
+
+    Only the given columns are re-profiled; row-level totals (missing values,
+    duplicate rows) are recomputed because changed cells can affect them.
+
+    Args:
+        profile: Profile of the previous version of df (same rows and columns)
+        df: Current data
+        columns: Columns whose values changed
+
+    Returns:
+        Updated profile
+    """
+    partial = profile_dataframe(df[columns], approximate=profile.get("approximate", False))
+    refreshed = {info["name"]: info for info in partial["columns"]}
+
+    columns_info = [refreshed.get(info["name"], info) for info in profile["columns"]]
+    numeric_summary = {}
+    categorical_summary = {}
+    for info in columns_info:
+        name = info["name"]
+        source = partial if name in refreshed else profile
+        if name in source["numeric_summary"]:
+            numeric_summary[name] = source["numeric_summary"][name]
+        if name in source["categorical_summary"]:
+            categorical_summary[name] = source["categorical_summary"][name]
+
+    missing_data_summary = _missing_data_summary(columns_info)
+    return {
+        **profile,
+        "missing_values_total": missing_data_summary["total_missing"],
+        "duplicate_rows": _duplicate_rows(df),
+        "columns": columns_info,
+        "columns_info": columns_info,
+        "missing_data_summary": missing_data_summary,
+        "numeric_summary": numeric_summary,
+        "categorical_summary": categorical_summary
+    }
+
+
+def widen_dtype(current, new):
+    """Widen a column dtype seen in an earlier chunk to also cover a later chunk"""
+    if current is None or current == new:
+        return new
+    if pd.api.types.is_numeric_dtype(current) and pd.api.types.is_numeric_dtype(new) \
+            and current != bool and new != bool:
+        return np.promote_types(current, new)
+    return np.dtype(object)
+
+
+def _row_hashes(df: pd.DataFrame) -> np.ndarray:
+    try:
+        return pd.util.hash_pandas_object(df, index=False).to_numpy()
+    except TypeError:
+        return pd.util.hash_pandas_object(df.astype(str), index=False).to_numpy()
+
+
+class _NumericState:
+    """Running moments, extremes, t-digest quartiles and HyperLogLog distinct count of a numeric column"""
+
+    kind = "numeric"
+
+    def __init__(self):
+        self.moments = RunningMoments()
+        self.digest = TDigest()
+        self.distinct = HyperLogLog()
+        self.summarize = False
+
+    @property
+    def count(self) -> int:
+        return int(self.moments.count)
+
+    def add_missing(self, rows: int):
+        self.moments.missing += rows
+
+    def add(self, series: pd.Series):
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        self.moments.update(values)
+        valid = values[~np.isnan(values)]
+        if valid.size:
+            self.digest.update(valid)
+            # Hash the float values so int and float chunks of one column agree
+            self.distinct.add_hashes(pd.util.hash_array(valid))
+
+    def merge(self, other: "_NumericState"):
+        self.moments.merge(other.moments)
+        self.digest.merge(other.digest)
+        self.distinct.merge(other.distinct)
+
+    def stats(self) -> Dict[str, Any]:
+        q25, median, q75 = [np.nan if q is None else q for q in self.digest.quantiles(QUANTILES)]
+        moments = self.moments
+        empty = self.count == 0
+        return {
+            "count": self.count,
+            "missing": int(moments.missing),
+            "unique": 0 if empty else self.distinct.count(),
+            "mean": np.nan if empty else float(moments.mean),
+            "std": float(np.sqrt(moments.variance)),
+            "min": np.nan if empty else float(moments.min),
+            "max": np.nan if empty else float(moments.max),
+            "q25": q25,
+            "median": median,
+            "q75": q75
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "moments": self.moments.to_dict(),
+            "digest": self.digest.to_dict(),
+            "distinct": self.distinct.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "_NumericState":
+        state = cls()
+        state.moments = RunningMoments.from_dict(data["moments"])
+        state.digest = TDigest.from_dict(data["digest"])
+        state.distinct = HyperLogLog.from_dict(data["distinct"])
+        return state
+
+
+class _CategoricalState:
+    """
+    Value counts of a categorical column
+
+    The PROFILE_TRACKED_VALUES most frequent values are counted with a
+    heavy-hitters summary; once it had to drop values the distinct count
+    comes from HyperLogLog.
+    """
+
+    kind = "categorical"
+
+    def __init__(self, summarize: bool = False):
+        self.count = 0
+        self.missing = 0
+        self.hitters = HeavyHitters(PROFILE_TRACKED_VALUES)
+        self.distinct = HyperLogLog()
+        self.summarize = summarize
+        self.converted = False  # Started out numeric - those values are not ranked
+
+    @classmethod
+    def from_numeric(cls, state: _NumericState) -> "_CategoricalState":
+        """Continue a column that turned out not to be numeric (earlier values are no longer ranked)"""
+        converted = cls()
+        converted.count, converted.missing = state.count, int(state.moments.missing)
+        converted.distinct = state.distinct
+        converted.converted = state.count > 0
+        return converted
+
+    def add_missing(self, rows: int):
+        self.missing += rows
+
+    def add(self, series: pd.Series):
+        counts = series.value_counts(dropna=False)
+        null_mask = counts.index.isna()
+        self.missing += int(counts[null_mask].sum())
+        counts = counts[~null_mask]
+        self.count += int(counts.sum())
+
+        keys = counts.index.astype(str)
+        self.distinct.add_hashes(pd.util.hash_array(np.asarray(keys, dtype=object)))
+        self.hitters.update_counts(pd.Series(counts.to_numpy(), index=keys).groupby(level=0).sum())
+
+    def merge(self, other: "_CategoricalState"):
+        self.count += other.count
+        self.missing += other.missing
+        self.hitters.merge(other.hitters)
+        self.distinct.merge(other.distinct)
+        self.summarize = self.summarize or other.summarize
+        self.converted = self.converted or other.converted
+
+    def stats(self) -> Dict[str, Any]:
+        exact = self.hitters.exact and not self.converted
+        return {
+            "count": self.count,
+            "missing": self.missing,
+            "unique": int(len(self.hitters.counts)) if exact else self.distinct.count(),
+            "top": self.hitters.top(10)
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "missing": self.missing,
+            "hitters": self.hitters.to_dict(),
+            "summarize": self.summarize,
+            "converted": self.converted,
+            "distinct": self.distinct.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "_CategoricalState":
+        state = cls(data["summarize"])
+        state.count, state.missing = data["count"], data["missing"]
+        state.hitters = HeavyHitters.from_dict(data["hitters"])
+        state.converted = data["converted"]
+        state.distinct = HyperLogLog.from_dict(data["distinct"])
+        return state
+
+
+class ProfileAccumulator:
+    """
+    Incrementally built dataset profile
+
+    Chunks are fed as they are ingested or appended. While they stay under
+    PROFILE_EXACT_MAX_ROWS rows and PROFILE_EXACT_MAX_BYTES of memory the
+    chunks are kept and profiled exactly, matching profile_dataframe; larger
+    datasets switch to running column
+    states (Welford moments, t-digest quartiles, HyperLogLog distinct counts,
+    heavy-hitter value counts) plus row hashes for duplicate counting. The
+    running state serializes with to_bytes so later appends can extend it
+    without re-reading the stored rows, and accumulators built by separate
+    workers over parts of a dataset combine with merge.
+
+    Usage:
+        accumulator = ProfileAccumulator()
+        for chunk in chunks:
+            accumulator.add(chunk)
+        profile = accumulator.to_profile()
+    """
+
+    def __init__(self, exact_max_rows: Optional[int] = None, exact_max_bytes: Optional[int] = None):
+        self.exact_max_rows = PROFILE_EXACT_MAX_ROWS if exact_max_rows is None else exact_max_rows
+        self.exact_max_bytes = PROFILE_EXACT_MAX_BYTES if exact_max_bytes is None else exact_max_bytes
+        self.n_rows = 0
+        self.dtypes: Dict[str, Any] = {}
+        self.columns: Dict[str, Any] = {}
+        self.duplicate_rows = 0
+        self.row_hashes: Optional[np.ndarray] = np.empty(0, dtype=np.uint64)
+        self.row_distinct: Optional[HyperLogLog] = None
+        self._pending_hashes: List[np.ndarray] = []
+        self._rows_tracked = 0
+        self._retained: Optional[List[pd.DataFrame]] = []
+        self.retained_bytes = 0
+
+    @property
+    def exact(self) -> bool:
+        """True while the profile is computed from retained chunks"""
+        return self._retained is not None
+
+    def _over_exact_limit(self) -> bool:
+        return self.n_rows >= self.exact_max_rows or self.retained_bytes >= self.exact_max_bytes
+
+    def add(self, chunk: pd.DataFrame):
+        """Fold a chunk of rows into the profile"""
+        if not all(isinstance(col, str) for col in chunk.columns):
+            chunk = chunk.rename(columns=str)
+        for col, dtype in chunk.dtypes.items():
+            self.dtypes[col] = widen_dtype(self.dtypes.get(col), dtype)
+        self.n_rows += len(chunk)
+
+        if self._retained is not None:
+            self._retained.append(chunk)
+            self.retained_bytes += int(chunk.memory_usage(index=False, deep=True).sum())
+            if self._over_exact_limit():
+                self._stop_retaining()
+            return
+        self._track(chunk)
+
+    def _track(self, chunk: pd.DataFrame):
+        for col in chunk.columns:
+            series = chunk[col]
+            state = self.columns.get(col)
+            if state is None:
+                state = self.columns[col] = _NumericState() if is_profiled_numeric(series) else _CategoricalState()
+                state.add_missing(self._rows_tracked)  # Column absent from earlier chunks
+            elif state.kind == "numeric" and not is_profiled_numeric(series) and series.notna().any():
+                logger.warning(f"Column '{col}' changed from numeric to categorical while profiling")
+                state = self.columns[col] = _CategoricalState.from_numeric(state)
+            if state.kind == "categorical":
+                state.summarize = state.summarize or _is_summarized(series)
+            state.add(series)
+
+        for col, state in self.columns.items():
+            if col not in chunk.columns:
+                state.add_missing(len(chunk))
+
+        self._rows_tracked += len(chunk)
+        hashes = _row_hashes(chunk) if len(chunk.columns) else np.empty(0, dtype=np.uint64)
+        if self.row_hashes is None:
+            self.row_distinct.add_hashes(hashes)
+        else:
+            self._pending_hashes.append(hashes)
+
+    def _stop_retaining(self):
+        if self._retained is not None:
+            retained, self._retained = self._retained, None
+            self.retained_bytes = 0
+            for part in retained:
+                self._track(part)
+
+    def merge(self, other: "ProfileAccumulator") -> "ProfileAccumulator":
+        """
+        Fold in the profile of other rows, e.g. a partial result from another worker
+
+        Column statistics combine exactly (moments) or as mergeable sketches;
+        row hashes of both sides are pooled so duplicates across them are found.
+        """
+        for col, dtype in other.dtypes.items():
+            self.dtypes[col] = widen_dtype(self.dtypes.get(col), dtype)
+        self.n_rows += other.n_rows
+
+        if self._retained is not None and other._retained is not None:
+            self._retained.extend(other._retained)
+            self.retained_bytes += other.retained_bytes
+            if self._over_exact_limit():
+                self._stop_retaining()
+            return self
+        self._stop_retaining()
+        if other._retained is not None:
+            for part in other._retained:
+                self._track(part)
+            return self
+
+        for col, state in other.columns.items():
+            mine = self.columns.get(col)
+            if mine is None:
+                mine = self.columns[col] = _NumericState() if state.kind == "numeric" else _CategoricalState()
+                mine.add_missing(self._rows_tracked)
+            if mine.kind != state.kind:
+                if mine.kind == "numeric":
+                    mine = self.columns[col] = _CategoricalState.from_numeric(mine)
+                else:
+                    state = _CategoricalState.from_numeric(state)
+            mine.merge(state)
+        for col, mine in self.columns.items():
+            if col not in other.columns:
+                mine.add_missing(other._rows_tracked)
+        self._rows_tracked += other._rows_tracked
+
+        other._compact_row_hashes()
+        self.duplicate_rows += other.duplicate_rows
+        if self.row_hashes is not None and other.row_hashes is not None:
+            self._pending_hashes.append(other.row_hashes)
+        else:
+            self._estimate_duplicates()
+            if other.row_hashes is not None:
+                self.row_distinct.add_hashes(other.row_hashes)
+            else:
+                self.row_distinct.merge(other.row_distinct)
+        return self
+
+    def _compact_row_hashes(self):
+        """Fold pending row hashes into the sorted set of distinct row hashes"""
+        if self.row_hashes is None or not self._pending_hashes:
+            return
+        hashes = np.concatenate([self.row_hashes, *self._pending_hashes])
+        self._pending_hashes = []
+        self.row_hashes = np.unique(hashes)
+        self.duplicate_rows += int(hashes.size - self.row_hashes.size)
+        if self.row_hashes.size > PROFILE_MAX_ROW_HASHES:
+            # Too many rows to count duplicates exactly - keep estimating from here on
+            self._estimate_duplicates()
+
+    def _estimate_duplicates(self):
+        """Switch duplicate counting from exact row hashes to a HyperLogLog of them"""
+        if self.row_hashes is None:
+            return
+        self.row_distinct = HyperLogLog()
+        for hashes in [self.row_hashes, *self._pending_hashes]:
+            self.row_distinct.add_hashes(hashes)
+        self._pending_hashes = []
+        self.row_hashes = None
+
+    def _duplicate_count(self) -> int:
+        if self.row_hashes is None:
+            return max(self.duplicate_rows, self._rows_tracked - self.row_distinct.count())
+        return self.duplicate_rows
+
+    def to_profile(self) -> Dict[str, Any]:
+        """Profile of every row added so far"""
+        if self._retained is not None:
+            if not self._retained:
+                return profile_dataframe(pd.DataFrame(columns=list(self.dtypes)), approximate=False)
+            df = self._retained[0] if len(self._retained) == 1 else pd.concat(self._retained, ignore_index=True)
+            return profile_dataframe(df, approximate=False)
+
+        self._compact_row_hashes()
+        column_stats = [
+            (col, str(self.dtypes[col]), state.stats(), state.kind == "numeric", state.summarize)
+            for col, state in self.columns.items()
+        ]
+        return _build_profile(self.n_rows, column_stats, self._duplicate_count(), approximate=True)
+
+    def to_bytes(self) -> bytes:
+        """Serialize the running state (only available once the accumulator stopped retaining chunks)"""
+        if self._retained is not None:
+            raise ValueError("Exact profiles keep no running state - profile the stored rows instead")
+        self._compact_row_hashes()
+        meta = {
+            "n_rows": self.n_rows,
+            "rows_tracked": self._rows_tracked,
+            "duplicate_rows": self.duplicate_rows,
+            "dtypes": {col: str(dtype) for col, dtype in self.dtypes.items()},
+            "columns": [{"name": col, "kind": state.kind, **state.to_dict()} for col, state in self.columns.items()],
+            "row_distinct": self.row_distinct.to_dict() if self.row_distinct is not None else None
+        }
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer,
+            meta=np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8),
+            row_hashes=self.row_hashes if self.row_hashes is not None else np.empty(0, dtype=np.uint64)
+        )
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> "ProfileAccumulator":
+        with np.load(io.BytesIO(payload), allow_pickle=False) as archive:
+            meta = json.loads(archive["meta"].tobytes().decode())
+            row_hashes = archive["row_hashes"]
+
+        accumulator = cls()
+        accumulator._retained = None
+        accumulator.n_rows = meta["n_rows"]
+        accumulator._rows_tracked = meta["rows_tracked"]
+        accumulator.duplicate_rows = meta["duplicate_rows"]
+        accumulator.dtypes = {col: pd.api.types.pandas_dtype(dtype) for col, dtype in meta["dtypes"].items()}
+        for data in meta["columns"]:
+            state_cls = _NumericState if data["kind"] == "numeric" else _CategoricalState
+            accumulator.columns[data["name"]] = state_cls.from_dict(data)
+        if meta["row_distinct"] is not None:
+            accumulator.row_distinct = HyperLogLog.from_dict(meta["row_distinct"])
+            accumulator.row_hashes = None
+        else:
+            accumulator.row_hashes = row_hashes
+        return accumulator
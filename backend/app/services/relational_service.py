@@ -1,52 +1,197 @@
 """
 Relational Data Handling Service
-Supports multi-table joins and foreign key relationship management
+Supports multi-table joins and foreign key relationship management.
+Joins are hash joins on type-aligned keys: the result size is computed from
+the key columns before any rows are materialised, rows that cannot match are
+filtered out first, and joins of tables from one database can be pushed down
+to it as a single SQL query.
 """
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Tuple, Optional
 import logging
 
+from app.config import JOIN_SAMPLE_SIZE
+from app.services.sampling_service import key_sample
+from app.services.key_discovery import KeySignatures, discover_keys
+
+JOIN_TYPES = ("inner", "left", "right", "outer")
+
+
+class JoinTooLarge(Exception):
+    """Raised before materialising a join whose result exceeds the row limit"""
+
+    def __init__(self, cardinality: Dict[str, Any], max_rows: int):
+        self.cardinality = cardinality
+        self.max_rows = max_rows
+        super().__init__(f"Join would produce {cardinality['rows']:,} rows (limit {max_rows:,})")
+
 
 def detect_foreign_keys(
     left_df: pd.DataFrame,
     right_df: pd.DataFrame,
-    threshold: float = 0.8
+    threshold: float = 0.8,
+    left_signatures: Optional[KeySignatures] = None,
+    right_signatures: Optional[KeySignatures] = None
 ) -> List[Tuple[str, str]]:
     """
     Automatically detect potential foreign key relationships between two dataframes
     
+    Columns are compared through their key signatures (see key_discovery),
+    which callers can pass in from a cache instead of the dataframes.
+    
     Args:
         left_df: First dataframe
         right_df: Second dataframe
         threshold: Match threshold for considering columns as foreign keys
+        left_signatures: Precomputed signatures of left_df
+        right_signatures: Precomputed signatures of right_df
     
     Returns:
         List of tuples (left_column, right_column) representing potential FK relationships
     """
-    potential_fks = []
+    left_signatures = left_signatures or KeySignatures.from_frame(left_df)
+    right_signatures = right_signatures or KeySignatures.from_frame(right_df)
     
-    for left_col in left_df.columns:
-        for right_col in right_df.columns:
-            # Check if column names are similar
-            if left_col.lower() == right_col.lower() or \
-               left_col.lower().endswith('_id') and right_col.lower() == 'id':
-                
-                # Check if values overlap significantly
-                left_values = set(left_df[left_col].dropna().unique())
-                right_values = set(right_df[right_col].dropna().unique())
-                
-                if len(left_values) > 0 and len(right_values) > 0:
-                    overlap = len(left_values.intersection(right_values))
-                    match_ratio = overlap / min(len(left_values), len(right_values))
-                    
-                    if match_ratio >= threshold:
-                        potential_fks.append((left_col, right_col))
-                        logging.info(f"Detected potential FK: {left_col} <-> {right_col} (match: {match_ratio:.2f})")
+    potential_fks = []
+    for candidate in discover_keys(left_signatures, right_signatures, threshold):
+        potential_fks.append((candidate["left"], candidate["right"]))
+        logging.info(
+            f"Detected potential FK: {candidate['left']} <-> {candidate['right']} (match: {candidate['match_ratio']:.2f})"
+        )
     
     return potential_fks
 
 
+def _is_number(dtype) -> bool:
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+
+def _coerce_like(values: pd.Series, converter) -> Optional[pd.Series]:
+    """values converted with converter, or None if that loses any non-missing value"""
+    converted = converter(values, errors="coerce")
+    if converted.isna().sum() != values.isna().sum():
+        return None
+    return converted
+
+
+def align_join_keys(left: pd.Series, right: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    """
+    Bring two join key columns to one dtype
+
+    Numbers join as numbers (int64, or float64 if either side is float),
+    text that fully parses as numbers or datetimes is converted to match the
+    other side, and anything else is compared as strings. Keys that already
+    share a dtype are returned unchanged.
+    """
+    if left.dtype == right.dtype:
+        return left, right
+    if isinstance(left.dtype, pd.CategoricalDtype) or isinstance(right.dtype, pd.CategoricalDtype):
+        return align_join_keys(left.astype(object), right.astype(object))
+
+    if _is_number(left.dtype) and _is_number(right.dtype):
+        if pd.api.types.is_float_dtype(left.dtype) or pd.api.types.is_float_dtype(right.dtype) \
+                or left.hasnans or right.hasnans:
+            return left.astype(np.float64), right.astype(np.float64)
+        return left.astype(np.int64), right.astype(np.int64)
+
+    for is_kind, converter in ((_is_number, pd.to_numeric), (pd.api.types.is_datetime64_any_dtype, pd.to_datetime)):
+        if is_kind(left.dtype) and not is_kind(right.dtype):
+            converted = _coerce_like(right, converter)
+            if converted is not None:
+                return align_join_keys(left, converted)
+        if is_kind(right.dtype) and not is_kind(left.dtype):
+            converted = _coerce_like(left, converter)
+            if converted is not None:
+                return align_join_keys(converted, right)
+
+    as_text = lambda values: values.astype(str).where(values.notna())
+    return as_text(left), as_text(right)
+
+
+def join_cardinality(left_keys: pd.Series, right_keys: pd.Series, how: str = "inner") -> Dict[str, Any]:
+    """
+    Exact size of a join, computed from the key columns alone
+
+    Args:
+        left_keys: Join key column of the left table
+        right_keys: Join key column of the right table (same dtype)
+        how: Join type
+
+    Returns:
+        Dict with rows (result size), matched_rows, matched_keys, unmatched row
+        counts per side and whether each side's key is unique
+    """
+    left_counts = left_keys.value_counts(dropna=False)
+    right_counts = right_keys.value_counts(dropna=False)
+    common = left_counts.index.intersection(right_counts.index)
+    left_matched = left_counts.reindex(common).to_numpy(dtype=np.float64)
+    right_matched = right_counts.reindex(common).to_numpy(dtype=np.float64)
+
+    matched_rows = int(left_matched @ right_matched)
+    left_unmatched = int(len(left_keys) - left_matched.sum())
+    right_unmatched = int(len(right_keys) - right_matched.sum())
+    rows = matched_rows
+    if how in ("left", "outer"):
+        rows += left_unmatched
+    if how in ("right", "outer"):
+        rows += right_unmatched
+
+    return {
+        "rows": rows,
+        "matched_rows": matched_rows,
+        "matched_keys": int(len(common)),
+        "left_unmatched_rows": left_unmatched,
+        "right_unmatched_rows": right_unmatched,
+        "left_unique": bool(left_counts.max() <= 1) if len(left_counts) else True,
+        "right_unique": bool(right_counts.max() <= 1) if len(right_counts) else True
+    }
+
+
+def hash_join(
+    left_df: pd.DataFrame,
+    right_df: pd.DataFrame,
+    left_on: str,
+    right_on: str,
+    how: str = 'inner',
+    suffixes: Tuple[str, str] = ('_left', '_right'),
+    max_rows: Optional[int] = None
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Join two dataframes, checking the result size before materialising it
+
+    Keys are type-aligned, the exact result size is computed from the keys
+    (raising JoinTooLarge past max_rows), and rows of a side whose keys can
+    never match are dropped before the merge builds its hash table.
+
+    Returns:
+        (joined dataframe, cardinality report)
+    """
+    if how not in JOIN_TYPES:
+        raise ValueError(f"Unsupported join type '{how}', expected one of {', '.join(JOIN_TYPES)}")
+
+    left_keys, right_keys = align_join_keys(left_df[left_on], right_df[right_on])
+    if left_keys is not left_df[left_on]:
+        left_df = left_df.copy(deep=False)
+        left_df[left_on] = left_keys
+    if right_keys is not right_df[right_on]:
+        right_df = right_df.copy(deep=False)
+        right_df[right_on] = right_keys
+
+    cardinality = join_cardinality(left_keys, right_keys, how)
+    if max_rows and cardinality["rows"] > max_rows:
+        raise JoinTooLarge(cardinality, max_rows)
+
+    # Rows whose key has no partner only survive on the preserved side of an outer join
+    if how in ("inner", "right") and cardinality["left_unmatched_rows"]:
+        left_df = left_df[left_keys.isin(pd.unique(right_keys)).to_numpy()]
+    if how in ("inner", "left") and cardinality["right_unmatched_rows"]:
+        right_df = right_df[right_keys.isin(pd.unique(left_keys)).to_numpy()]
+
+    result = left_df.merge(right_df, left_on=left_on, right_on=right_on, how=how, suffixes=suffixes, sort=False)
+    return result, cardinality
+
+
 def join_tables(
     left_df: pd.DataFrame,
     right_df: pd.DataFrame,
@@ -70,13 +215,7 @@ def join_tables(
         Joined dataframe
     """
     try:
-        result = left_df.merge(
-            right_df,
-            left_on=left_on,
-            right_on=right_on,
-            how=how,
-            suffixes=suffixes
-        )
+        result, _ = hash_join(left_df, right_df, left_on, right_on, how=how, suffixes=suffixes)
         
         logging.info(f"Joined tables: {len(left_df)} x {len(right_df)} -> {len(result)} rows")
         
@@ -87,37 +226,191 @@ def join_tables(
         raise
 
 
+def merged_columns(
+    left_columns: List[str],
+    right_columns: List[str],
+    left_on: str,
+    right_on: str,
+    suffixes: Tuple[str, str] = ('_left', '_right')
+) -> List[Tuple[str, str, str]]:
+    """
+    Output columns of a merge, named the way DataFrame.merge names them
+
+    Returns:
+        (side, source column, output name) for every output column, side being
+        'left', 'right' or 'key' (a key column both sides share by name)
+    """
+    shared_key = left_on == right_on
+    overlap = (set(left_columns) & set(right_columns)) - ({left_on} if shared_key else set())
+    columns = []
+    for col in left_columns:
+        if shared_key and col == left_on:
+            columns.append(("key", col, col))
+        else:
+            columns.append(("left", col, f"{col}{suffixes[0]}" if col in overlap else col))
+    for col in right_columns:
+        if shared_key and col == right_on:
+            continue
+        columns.append(("right", col, f"{col}{suffixes[1]}" if col in overlap else col))
+    return columns
+
+
+def estimate_join_chain(
+    key_frames: List[pd.DataFrame],
+    join_keys: List[Tuple[str, str]],
+    how: str = 'inner'
+) -> List[Dict[str, Any]]:
+    """
+    Estimate the rows of every step of a chained join from key columns only
+
+    Step i joins the running result to table i+1. Its left key lives in one
+    of the earlier tables; the fanout of joining that table to table i+1 is
+    measured exactly and applied to the running row count, which is exact for
+    star schemas whose keys all come from the first table.
+
+    Args:
+        key_frames: Per table, a frame holding (at least) its join key columns
+        join_keys: (left_key, right_key) per step
+        how: Join type
+
+    Returns:
+        Per step: left_key, right_key, source table of the left key,
+        estimated_rows and the pairwise cardinality report
+    """
+    steps = []
+    rows = len(key_frames[0])
+    for step, (left_key, right_key) in enumerate(join_keys[:len(key_frames) - 1]):
+        right = key_frames[step + 1]
+        owner = next((i for i in range(step + 1) if left_key in key_frames[i].columns), None)
+        if owner is None or right_key not in right.columns:
+            raise ValueError(f"Join key '{left_key}' or '{right_key}' not found in the joined tables")
+
+        left_keys, right_keys = align_join_keys(key_frames[owner][left_key], right[right_key])
+        cardinality = join_cardinality(left_keys, right_keys, how)
+        fanout = cardinality["rows"] / max(len(left_keys), 1)
+        rows = cardinality["rows"] if step == 0 else int(round(rows * fanout))
+        steps.append({
+            "left_key": left_key,
+            "right_key": right_key,
+            "left_table": owner,
+            "right_table": step + 1,
+            "estimated_rows": rows,
+            "cardinality": cardinality
+        })
+    return steps
+
+
+def _quote(source_type: str, name: str) -> str:
+    """Quote a column name in the database's dialect"""
+    if source_type == 'mysql':
+        return f"`{name.replace('`', '``')}`"
+    if source_type == 'sqlserver':
+        return f"[{name.replace(']', ']]')}]"
+    return '"' + name.replace('"', '""') + '"'
+
+
+def build_join_query(
+    source_type: str,
+    tables: List[Dict[str, Any]],
+    join_keys: List[Tuple[str, str]],
+    how: str = 'inner',
+    suffixes: Tuple[str, str] = ('_left', '_right')
+) -> Optional[str]:
+    """
+    Express a chained join as one SQL query for the database holding every table
+
+    Output columns are named as join_tables would name them, so a pushed-down
+    join and an in-memory one produce the same dataset. Column names are
+    quoted as reported by the database cursor.
+
+    Args:
+        source_type: Database type
+        tables: Per table, "columns" and either "table_name" or "query"
+        join_keys: (left_key, right_key) per step
+        how: Join type
+
+    Returns:
+        SQL text, or None if the join cannot be expressed (MySQL has no FULL
+        OUTER JOIN; a left key must resolve to exactly one joined column)
+    """
+    if how not in JOIN_TYPES or (how == 'outer' and source_type == 'mysql') or len(join_keys) < len(tables) - 1:
+        return None
+    q = lambda name: _quote(source_type, name)
+
+    def source(index: int) -> str:
+        table = tables[index]
+        # Table names are used as given, as build_table_query does when loading them
+        relation = table["table_name"] if table.get("table_name") else f"({table['query'].strip().rstrip(';')})"
+        return f"{relation} {'AS ' if source_type != 'oracle' else ''}t{index}"
+
+    # Output name -> SQL expression of the columns joined so far
+    output = {col: f"t0.{q(col)}" for col in tables[0]["columns"]}
+    clauses = [source(0)]
+    join_sql = {"inner": "INNER JOIN", "left": "LEFT JOIN", "right": "RIGHT JOIN", "outer": "FULL OUTER JOIN"}[how]
+    for step in range(1, len(tables)):
+        left_key, right_key = join_keys[step - 1]
+        if left_key not in output:
+            return None
+        left_expr = output[left_key]
+        right_expr = f"t{step}.{q(right_key)}"
+        clauses.append(f"{join_sql} {source(step)} ON {left_expr} = {right_expr}")
+
+        expressions = list(output.values())
+        merged = {}
+        for side, col, name in merged_columns(list(output), tables[step]["columns"], left_key, right_key, suffixes):
+            if side == "key":
+                # merge keeps one key column; with unmatched right rows its value comes from the right
+                merged[name] = f"COALESCE({left_expr}, {right_expr})" if how in ("right", "outer") else left_expr
+            elif side == "left":
+                merged[name] = output[col]
+            else:
+                merged[name] = f"t{step}.{q(col)}"
+        if len(merged) != len(expressions) + len(tables[step]["columns"]) - (left_key == right_key):
+            return None
+        output = merged
+
+    select = ", ".join(f"{expr} AS {q(name)}" for name, expr in output.items())
+    return f"SELECT {select} FROM " + " ".join(clauses)
+
+
 def optimize_join(
     left_df: pd.DataFrame,
     right_df: pd.DataFrame,
     left_on: str,
     right_on: str,
-    sample_size: int = 10000
+    sample_size: Optional[int] = None
 ) -> pd.DataFrame:
     """
     Optimize join operation for large datasets by sampling
     
+    Both tables are sampled on the join key (see key_sample): the same subset
+    of key values is kept on each side, so the result is a sample of the full
+    join rather than the near-empty join of two independent random samples.
+    
     Args:
         left_df: First dataframe
         right_df: Second dataframe
         left_on: Column name in left dataframe
         right_on: Column name in right dataframe
-        sample_size: Maximum rows to keep from each table
+        sample_size: Target rows for the larger table (defaults to JOIN_SAMPLE_SIZE)
     
     Returns:
         Joined and optimized dataframe
     """
+    sample_size = sample_size or JOIN_SAMPLE_SIZE
+    largest = max(len(left_df), len(right_df))
+    
     # Sample if datasets are too large
-    if len(left_df) > sample_size:
-        left_df_sampled = left_df.sample(n=sample_size, random_state=42)
-        logging.info(f"Sampled left table: {len(left_df)} -> {sample_size} rows")
+    if largest > sample_size:
+        fraction = sample_size / largest
+        left_df_sampled = key_sample(left_df, left_on, fraction)
+        right_df_sampled = key_sample(right_df, right_on, fraction)
+        logging.info(
+            f"Key-sampled join inputs ({fraction:.2%} of keys): left {len(left_df)} -> {len(left_df_sampled)}, "
+            f"right {len(right_df)} -> {len(right_df_sampled)} rows"
+        )
     else:
         left_df_sampled = left_df
-    
-    if len(right_df) > sample_size:
-        right_df_sampled = right_df.sample(n=sample_size, random_state=42)
-        logging.info(f"Sampled right table: {len(right_df)} -> {sample_size} rows")
-    else:
         right_df_sampled = right_df
     
     return join_tables(left_df_sampled, right_df_sampled, left_on, right_on)
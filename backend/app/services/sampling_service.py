@@ -0,0 +1,414 @@
+"""
+Sampling Service
+Stratified, time-aware, reservoir and join-key sampling with adaptive sample sizes
+"""
+import time
+import logging
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+from sklearn.tree import DecisionTreeRegressor, DecisionTreeClassifier
+from sklearn.metrics import r2_score, accuracy_score
+
+from app.config import (
+    SAMPLE_THRESHOLD, SAMPLE_MIN_ROWS, SAMPLE_MAX_ROWS, SAMPLE_TIME_BUDGET,
+    SAMPLE_CURVE_TOLERANCE, SAMPLE_TRAINING_COST_FACTOR, DATASET_CHUNK_ROWS
+)
+from app.services.ml_service import detect_problem_type, prepare_classification_target, suggest_best_target_column
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ("auto", "random", "stratified", "time", "none")
+
+# Numeric columns with more distinct values than this are stratified by quantile bins
+MAX_STRATA = 50
+QUANTILE_BINS = 10
+
+# Learning-curve probe: first pilot size and rows held out for scoring
+PILOT_START_ROWS = 1250
+PILOT_HOLDOUT_ROWS = 2000
+
+
+def random_sample(df: pd.DataFrame, n: int, random_state: int = 42) -> pd.DataFrame:
+    """Uniform sample of n rows without replacement"""
+    if n >= len(df):
+        return df
+    return df.sample(n=n, random_state=random_state)
+
+
+def _strata_codes(values: pd.Series) -> np.ndarray:
+    """Integer stratum per row; missing values form their own stratum"""
+    if pd.api.types.is_numeric_dtype(values) and values.nunique() > MAX_STRATA:
+        values = pd.qcut(values, q=QUANTILE_BINS, duplicates='drop')
+    codes, _ = pd.factorize(values, use_na_sentinel=False)
+    return codes
+
+
+def _allocate(counts: np.ndarray, n: int) -> np.ndarray:
+    """
+    Proportional allocation with largest-remainder rounding, at least one row
+    per stratum, never more than n rows in total
+
+    With fewer rows than strata, the n largest strata get one row each.
+    """
+    if n < len(counts):
+        alloc = np.zeros(len(counts), dtype=int)
+        alloc[np.argsort(-counts, kind='stable')[:n]] = 1
+        return alloc
+
+    share = counts / counts.sum() * n
+    alloc = np.floor(share).astype(int)
+    remainder = n - alloc.sum()
+    if remainder > 0:
+        alloc[np.argsort(share - alloc)[::-1][:remainder]] += 1
+    alloc = np.minimum(np.maximum(alloc, 1), counts)
+
+    # Rows given to strata rounded down to zero are taken back from the largest allocations
+    for _ in range(alloc.sum() - n):
+        alloc[np.argmax(alloc)] -= 1
+    return alloc
+
+
+def stratified_sample(df: pd.DataFrame, column: str, n: int, random_state: int = 42) -> pd.DataFrame:
+    """
+    Sample n rows keeping the distribution of a column
+
+    Categorical (and low-cardinality numeric) columns are stratified by value,
+    continuous columns by quantile bin. Every stratum keeps at least one row,
+    so rare classes survive sampling.
+
+    Args:
+        df: DataFrame to sample
+        column: Column to stratify on (usually the target)
+        n: Rows to keep
+        random_state: Random seed
+
+    Returns:
+        Sampled DataFrame in original row order
+    """
+    if n >= len(df):
+        return df
+
+    codes = _strata_codes(df[column])
+    alloc = _allocate(np.bincount(codes), n)
+
+    # Shuffle once, then keep the first alloc[stratum] rows of every stratum
+    order = np.random.default_rng(random_state).permutation(len(df))
+    shuffled_codes = codes[order]
+    rank = pd.Series(shuffled_codes).groupby(shuffled_codes).cumcount().to_numpy()
+    keep = order[rank < alloc[shuffled_codes]]
+    return df.iloc[np.sort(keep)]
+
+
+def find_time_column(df: pd.DataFrame) -> Optional[str]:
+    """First datetime column, or text column whose leading values parse as dates"""
+    for col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            return col
+    for col in df.select_dtypes(include=['object']).columns:
+        head = df[col].dropna().head(100)
+        if head.empty:
+            continue
+        try:
+            pd.to_datetime(head, errors='raise', format='mixed')
+            return col
+        except (ValueError, TypeError):
+            continue
+    return None
+
+
+def time_aware_sample(df: pd.DataFrame, time_column: str, n: int) -> pd.DataFrame:
+    """
+    Evenly spaced rows across the time range, in chronological order
+
+    Unlike a random sample this keeps the whole period covered at a constant
+    rate, so trends, seasonality and the most recent rows are preserved.
+    Rows without a parseable timestamp are dropped.
+    """
+    timestamps = df[time_column]
+    if not pd.api.types.is_datetime64_any_dtype(timestamps):
+        timestamps = pd.to_datetime(timestamps, errors='coerce', format='mixed')
+
+    valid = np.flatnonzero(timestamps.notna().to_numpy())
+    chronological = valid[np.argsort(timestamps.to_numpy()[valid], kind='stable')]
+    if n >= len(chronological):
+        return df.iloc[chronological]
+
+    positions = np.unique(np.linspace(0, len(chronological) - 1, n).round().astype(int))
+    return df.iloc[chronological[positions]]
+
+
+class ReservoirSampler:
+    """
+    Uniform sample of a stream of DataFrame chunks of unknown length
+
+    Algorithm R applied a chunk at a time: memory stays at n rows however long
+    the stream is, and every row seen has the same chance to be kept.
+    """
+
+    def __init__(self, n: int, random_state: int = 42):
+        self.n = max(1, n)
+        self.rows_seen = 0
+        self._rng = np.random.default_rng(random_state)
+        self._reservoir: Optional[pd.DataFrame] = None
+
+    def add(self, chunk: pd.DataFrame):
+        chunk = chunk.reset_index(drop=True)
+
+        # Fill the reservoir first
+        filled = 0 if self._reservoir is None else len(self._reservoir)
+        if filled < self.n:
+            head = chunk.iloc[:self.n - filled]
+            self._reservoir = head if self._reservoir is None else pd.concat([self._reservoir, head], ignore_index=True)
+            self.rows_seen += len(head)
+            chunk = chunk.iloc[len(head):].reset_index(drop=True)
+            if chunk.empty:
+                return
+
+        # Row i (0-based over the stream) replaces slot j ~ U[0, i] when j < n
+        stream_pos = self.rows_seen + np.arange(len(chunk))
+        slots = (self._rng.random(len(chunk)) * (stream_pos + 1)).astype(np.int64)
+        rows = np.flatnonzero(slots < self.n)
+        self.rows_seen += len(chunk)
+        if rows.size == 0:
+            return
+
+        # A later row wins when several land in the same slot
+        slots = slots[rows]
+        _, last = np.unique(slots[::-1], return_index=True)
+        keep = len(rows) - 1 - last
+        slots, rows = slots[keep], rows[keep]
+
+        combined = pd.concat([self._reservoir, chunk.iloc[rows]], ignore_index=True)
+        indexer = np.arange(len(self._reservoir))
+        indexer[slots] = len(self._reservoir) + np.arange(len(rows))
+        self._reservoir = combined.iloc[indexer].reset_index(drop=True)
+
+    def sample(self) -> pd.DataFrame:
+        return self._reservoir if self._reservoir is not None else pd.DataFrame()
+
+
+def reservoir_sample(chunks: Iterable[pd.DataFrame], n: int, random_state: int = 42) -> Tuple[pd.DataFrame, int]:
+    """
+    Reservoir-sample a chunk stream (DB cursor, file reader)
+
+    Returns:
+        (sample of at most n rows, total rows seen)
+    """
+    sampler = ReservoirSampler(n, random_state)
+    for chunk in chunks:
+        sampler.add(chunk)
+    return sampler.sample(), sampler.rows_seen
+
+
+class ReservoirStream:
+    """
+    Chunk iterator yielding a reservoir sample of another chunk stream
+
+    The source is consumed completely on the first next() call; the sample is
+    then yielded in DATASET_CHUNK_ROWS slices so it can be passed to
+    ingest_chunks like any other stream.
+    """
+
+    def __init__(self, chunks: Iterable[pd.DataFrame], n: int, random_state: int = 42,
+                 chunk_rows: int = DATASET_CHUNK_ROWS):
+        self.chunks = chunks
+        self.sampler = ReservoirSampler(n, random_state)
+        self.chunk_rows = chunk_rows
+
+    @property
+    def rows_seen(self) -> int:
+        return self.sampler.rows_seen
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        try:
+            for chunk in self.chunks:
+                self.sampler.add(chunk)
+        finally:
+            close = getattr(self.chunks, "close", None)
+            if close is not None:
+                close()
+        sample = self.sampler.sample()
+        for start in range(0, len(sample), self.chunk_rows):
+            yield sample.iloc[start:start + self.chunk_rows]
+
+
+def key_sample(df: pd.DataFrame, column: str, fraction: float) -> pd.DataFrame:
+    """
+    Keep the rows whose join key hashes into the first `fraction` of the hash space
+
+    The same key values are kept in every table sampled this way, so joining
+    two key-sampled tables returns a sample of the full join - independent
+    random samples of both sides would lose most matching pairs.
+    """
+    if fraction >= 1:
+        return df
+    keys = df[column]
+    keys = keys.astype('float64') if pd.api.types.is_numeric_dtype(keys) else keys.astype(str)
+    hashes = pd.util.hash_pandas_object(keys, index=False)
+    threshold = np.uint64(fraction * np.iinfo(np.uint64).max)
+    return df[hashes.to_numpy() <= threshold]
+
+
+def estimate_sample_size(
+    df: pd.DataFrame,
+    target_column: str,
+    problem_type: str = "auto",
+    time_budget: Optional[float] = None,
+    random_state: int = 42
+) -> Dict[str, Any]:
+    """
+    Pick a training sample size from a learning curve and a time budget
+
+    A depth-limited decision tree is fitted on doubling sample sizes and scored
+    on a fixed holdout. Growth stops when doubling the rows no longer improves
+    the score by SAMPLE_CURVE_TOLERANCE, or when training the full candidate
+    set (estimated as SAMPLE_TRAINING_COST_FACTOR pilot fits) on the next size
+    would exceed the time budget.
+
+    Returns:
+        sample_size, reason ("plateau", "time_budget", "max_rows", "no_features")
+        and the measured learning_curve
+    """
+    budget = time_budget or SAMPLE_TIME_BUDGET
+    max_rows = min(len(df), SAMPLE_MAX_ROWS)
+    features = [col for col in df.select_dtypes(include=[np.number]).columns if col != target_column]
+
+    if not features or max_rows <= SAMPLE_MIN_ROWS:
+        return {"sample_size": min(SAMPLE_MIN_ROWS, len(df)), "reason": "no_features" if not features else "max_rows",
+                "learning_curve": []}
+
+    if problem_type not in ("regression", "classification"):
+        problem_type = detect_problem_type(df, target_column)
+    if problem_type == "regression" and not pd.api.types.is_numeric_dtype(df[target_column]):
+        problem_type = "classification"
+
+    # One random draw: holdout rows first, pilot samples are prefixes of the rest
+    holdout = min(PILOT_HOLDOUT_ROWS, len(df) - max_rows) or min(PILOT_HOLDOUT_ROWS, max_rows // 5)
+    rng = np.random.default_rng(random_state)
+    rows = rng.choice(len(df), size=min(len(df), max_rows + holdout), replace=False)
+    X = df[features].iloc[rows]
+    X = X.fillna(X.mean()).fillna(0).to_numpy()
+
+    if problem_type == "classification":
+        y, _ = prepare_classification_target(df[target_column].iloc[rows])
+        y = np.asarray(y)
+        model, score_fn = DecisionTreeClassifier(max_depth=8, random_state=random_state), accuracy_score
+    else:
+        target = df[target_column].iloc[rows]
+        y = target.fillna(target.mean()).to_numpy()
+        model, score_fn = DecisionTreeRegressor(max_depth=8, random_state=random_state), r2_score
+
+    X_holdout, y_holdout = X[:holdout], y[:holdout]
+    X_pool, y_pool = X[holdout:], y[holdout:]
+
+    curve: List[Dict[str, Any]] = []
+    size, chosen, reason = min(PILOT_START_ROWS, len(X_pool)), None, "max_rows"
+    while True:
+        started = time.perf_counter()
+        model.fit(X_pool[:size], y_pool[:size])
+        fit_seconds = time.perf_counter() - started
+        score = float(score_fn(y_holdout, model.predict(X_holdout)))
+        curve.append({"rows": size, "score": round(score, 4), "fit_seconds": round(fit_seconds, 4)})
+
+        if len(curve) > 1 and score - curve[-2]["score"] < SAMPLE_CURVE_TOLERANCE:
+            chosen, reason = curve[-2]["rows"], "plateau"
+            break
+        if size >= len(X_pool):
+            chosen = size
+            break
+        if fit_seconds * 2 * SAMPLE_TRAINING_COST_FACTOR > budget:
+            chosen, reason = size, "time_budget"
+            break
+        size = min(size * 2, len(X_pool))
+
+    return {
+        "sample_size": int(min(max(chosen, SAMPLE_MIN_ROWS), max_rows)),
+        "reason": reason,
+        "problem_type": problem_type,
+        "time_budget_s": budget,
+        "learning_curve": curve
+    }
+
+
+def sample_for_analysis(
+    df: pd.DataFrame,
+    target_column: Optional[str] = None,
+    problem_type: str = "auto",
+    strategy: str = "auto",
+    sample_size: Optional[int] = None,
+    time_budget: Optional[float] = None,
+    time_column: Optional[str] = None,
+    random_state: int = 42
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Sample a dataset for analysis/training and describe how it was done
+
+    Args:
+        df: Full dataset
+        target_column: Column to stratify on (defaults to the suggested target)
+        problem_type: "auto", "regression", "classification" or "time_series"
+        strategy: "auto", "random", "stratified", "time" or "none"
+        sample_size: Fixed sample size (otherwise chosen by estimate_sample_size)
+        time_budget: Seconds of training the adaptive size aims for
+        time_column: Datetime column for time-aware sampling (detected if omitted)
+        random_state: Random seed
+
+    Returns:
+        (sampled DataFrame, sampling info for the API response)
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown sampling strategy '{strategy}'. Available: {', '.join(STRATEGIES)}")
+
+    original_size = len(df)
+    info: Dict[str, Any] = {"sampled": False, "strategy": "none", "original_size": original_size, "sample_size": original_size}
+    if strategy == "none" or (sample_size is None and original_size <= SAMPLE_THRESHOLD):
+        return df, info
+
+    if target_column is None or target_column not in df.columns:
+        target_column = suggest_best_target_column(df)
+
+    # Resolve the strategy
+    if strategy == "auto":
+        if problem_type == "time_series" and (time_column or find_time_column(df)):
+            strategy = "time"
+        elif target_column is not None:
+            strategy = "stratified"
+        else:
+            strategy = "random"
+    if strategy == "stratified" and target_column is None:
+        raise ValueError("Stratified sampling needs a target column")
+    if strategy == "time":
+        time_column = time_column or find_time_column(df)
+        if time_column is None:
+            raise ValueError("Time-aware sampling needs a datetime column")
+
+    # Resolve the size
+    if sample_size:
+        info["size_reason"] = "requested"
+    elif target_column is not None and problem_type != "time_series":
+        estimate = estimate_sample_size(df, target_column, problem_type, time_budget, random_state)
+        sample_size = estimate["sample_size"]
+        info["size_reason"] = estimate["reason"]
+        info["learning_curve"] = estimate["learning_curve"]
+    else:
+        sample_size = SAMPLE_MIN_ROWS
+        info["size_reason"] = "default"
+
+    if sample_size >= original_size:
+        return df, info
+
+    if strategy == "time":
+        sample = time_aware_sample(df, time_column, sample_size)
+        info["time_column"] = time_column
+    elif strategy == "stratified":
+        sample = stratified_sample(df, target_column, sample_size, random_state)
+        info["stratify_column"] = target_column
+    else:
+        sample = random_sample(df, sample_size, random_state)
+
+    info.update({"sampled": True, "strategy": strategy, "sample_size": len(sample)})
+    logger.info(
+        f"Sampled {len(sample)} of {original_size} rows ({strategy}, size {info['size_reason']})"
+    )
+    return sample, info
@@ -0,0 +1,385 @@
+"""
+Approximate Statistics Sketches
+Mergeable summaries over numpy arrays: HyperLogLog distinct counts, t-digest
+quantiles, running moments, heavy hitters and pairwise covariance. Each can be
+built from a stream of chunks and merged with partial results from other workers.
+"""
+import base64
+import math
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, Iterable, Optional
+
+
+def hash_values(values: pd.Series) -> np.ndarray:
+    """64-bit hashes of the non-null values (equal values hash equally across chunks)"""
+    values = values.dropna()
+    if values.empty:
+        return np.empty(0, dtype=np.uint64)
+    return pd.util.hash_pandas_object(values, index=False).to_numpy()
+
+
+def _bit_length(words: np.ndarray) -> np.ndarray:
+    """Number of significant bits of each uint64"""
+    smeared = words.copy()
+    for shift in (1, 2, 4, 8, 16, 32):
+        smeared |= smeared >> np.uint64(shift)
+    return np.bitwise_count(smeared).astype(np.uint8)
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct-count sketch
+
+    2**precision one-byte registers (16 KB at the default precision 14, about
+    0.8% standard error). Sketches with the same precision merge by taking
+    the register-wise maximum, so partial counts from chunks or workers can
+    be combined.
+    """
+
+    def __init__(self, precision: int = 14):
+        if not 4 <= precision <= 18:
+            raise ValueError("HyperLogLog precision must be between 4 and 18")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes: np.ndarray):
+        if hashes.size == 0:
+            return
+        suffix_bits = 64 - self.precision
+        buckets = (hashes >> np.uint64(suffix_bits)).astype(np.int64)
+        suffix = hashes & np.uint64((1 << suffix_bits) - 1)
+        # Rank = position of the leftmost 1-bit in the suffix (suffix_bits + 1 when it is all zeros)
+        ranks = (suffix_bits + 1 - _bit_length(suffix)).astype(np.uint8)
+        np.maximum.at(self.registers, buckets, ranks)
+
+    def add(self, values: pd.Series):
+        self.add_hashes(hash_values(values))
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches with different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self) -> int:
+        m = self.registers.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        empty = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and empty:
+            # Small range: linear counting is more accurate
+            estimate = m * math.log(m / empty)
+        return int(round(estimate))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"precision": self.precision, "registers": base64.b64encode(self.registers.tobytes()).decode()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "HyperLogLog":
+        sketch = cls(data["precision"])
+        sketch.registers = np.frombuffer(base64.b64decode(data["registers"]), dtype=np.uint8).copy()
+        return sketch
+
+
+class TDigest:
+    """
+    Merging t-digest quantile sketch
+
+    Values are buffered and folded into at most ~compression centroids with
+    the k1 scale function, which keeps centroids small near the tails so
+    extreme quantiles stay accurate. Compression is vectorized: after sorting a
+    buffer, every point is assigned to the integer k-bucket of its cumulative
+    weight and buckets are aggregated with bincount. Digests merge by
+    compressing their combined centroids.
+    """
+
+    def __init__(self, compression: float = 200, buffer_size: int = 100000):
+        self.compression = compression
+        self.buffer_size = buffer_size
+        self.means = np.empty(0, dtype=np.float64)
+        self.weights = np.empty(0, dtype=np.float64)
+        self.count = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer = []
+        self._buffered = 0
+
+    def update(self, values: Iterable[float]):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        # Fold large inputs in buffer-sized slices so memory stays bounded
+        for start in range(0, values.size, self.buffer_size):
+            part = values[start:start + self.buffer_size]
+            self._buffer.append(part)
+            self._buffered += part.size
+            if self._buffered >= self.buffer_size:
+                self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        values = np.sort(np.concatenate(self._buffer))
+        self._buffer, self._buffered = [], 0
+        self.min = min(self.min, float(values[0]))
+        self.max = max(self.max, float(values[-1]))
+        # Existing centroids are already sorted - insert them instead of re-sorting everything
+        positions = np.searchsorted(values, self.means)
+        self._compress(np.insert(values, positions, self.means),
+                       np.insert(np.ones(values.size), positions, self.weights))
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray):
+        """Fold sorted (mean, weight) points into centroids"""
+        total = weights.sum()
+        cumulative = np.cumsum(weights)
+        q = (cumulative - weights / 2) / total
+        # k1 scale: k(q) = compression / (2 pi) * asin(2q - 1)
+        k = self.compression / (2 * math.pi) * np.arcsin(np.clip(2 * q - 1, -1, 1))
+        buckets = np.floor(k - k[0]).astype(np.int64)
+        self.weights = np.bincount(buckets, weights=weights)
+        nonempty = self.weights > 0
+        self.means = np.bincount(buckets, weights=weights * means)[nonempty] / self.weights[nonempty]
+        self.weights = self.weights[nonempty]
+        self.count = float(total)
+
+    def merge(self, other: "TDigest") -> "TDigest":
+        self._flush()
+        other._flush()
+        if other.count == 0:
+            return self
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        means = np.concatenate([self.means, other.means])
+        order = np.argsort(means, kind='stable')
+        self._compress(means[order], np.concatenate([self.weights, other.weights])[order])
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        return self.quantiles([q])[0]
+
+    def quantiles(self, qs: Iterable[float]) -> list:
+        self._flush()
+        qs = list(qs)
+        if self.count == 0:
+            return [None] * len(qs)
+        if self.means.size == 1:
+            return [float(self.means[0])] * len(qs)
+        # Interpolate between centroid midpoints, anchored at the exact min and max
+        positions = np.concatenate([[0.0], np.cumsum(self.weights) - self.weights / 2, [self.count]])
+        anchors = np.concatenate([[self.min], self.means, [self.max]])
+        return [float(np.interp(q * self.count, positions, anchors)) for q in qs]
+
+    def to_dict(self) -> Dict[str, Any]:
+        self._flush()
+        return {
+            "compression": self.compression,
+            "means": self.means.tolist(),
+            "weights": self.weights.tolist(),
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TDigest":
+        digest = cls(data["compression"])
+        digest.means = np.asarray(data["means"], dtype=np.float64)
+        digest.weights = np.asarray(data["weights"], dtype=np.float64)
+        digest.count = float(digest.weights.sum())
+        if digest.count:
+            digest.min, digest.max = data["min"], data["max"]
+        return digest
+
+
+class RunningMoments:
+    """
+    Count, missing, mean, variance and extremes of one or more columns
+
+    Chunks are folded in with Chan's parallel form of Welford's update (a
+    chunk's own mean and squared deviations are combined with the running
+    ones), which stays accurate for large means and merges exactly.
+    Shape () tracks a single column; shape (k,) tracks the k columns of 2-D blocks.
+    """
+
+    def __init__(self, shape: tuple = ()):
+        self.count = np.zeros(shape, dtype=np.int64)
+        self.missing = np.zeros(shape, dtype=np.int64)
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)
+        self.min = np.full(shape, np.inf)
+        self.max = np.full(shape, -np.inf)
+
+    def update(self, values: np.ndarray):
+        """Fold in a 1-D array (single column) or a (rows, k) block; NaN marks missing values"""
+        values = np.asarray(values, dtype=np.float64)
+        valid = ~np.isnan(values)
+        count = valid.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(valid, values, 0.0).sum(axis=0) / count
+            m2 = np.square(np.where(valid, values - mean, 0.0)).sum(axis=0)
+        chunk = RunningMoments(self.count.shape)
+        chunk.count = count.astype(np.int64)
+        chunk.missing = (values.shape[0] - count).astype(np.int64)
+        chunk.mean = np.where(count > 0, mean, 0.0)
+        chunk.m2 = np.where(count > 0, m2, 0.0)
+        if values.shape[0]:
+            chunk.min = np.where(valid, values, np.inf).min(axis=0)
+            chunk.max = np.where(valid, values, -np.inf).max(axis=0)
+        self.merge(chunk)
+
+    def merge(self, other: "RunningMoments") -> "RunningMoments":
+        total = self.count + other.count
+        with np.errstate(invalid='ignore', divide='ignore'):
+            delta = other.mean - self.mean
+            weight = np.where(total > 0, other.count / total, 0.0)
+            self.mean = self.mean + delta * weight
+            self.m2 = self.m2 + other.m2 + delta * delta * self.count * weight
+        self.count = total
+        self.missing = self.missing + other.missing
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+        return self
+
+    @property
+    def variance(self) -> np.ndarray:
+        """Sample variance (NaN below two values)"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count > 1, self.m2 / (self.count - 1), np.nan)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: getattr(self, key).tolist() for key in ("count", "missing", "mean", "m2", "min", "max")}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RunningMoments":
+        moments = cls(np.shape(data["count"]))
+        moments.count = np.asarray(data["count"], dtype=np.int64)
+        moments.missing = np.asarray(data["missing"], dtype=np.int64)
+        for key in ("mean", "m2", "min", "max"):
+            setattr(moments, key, np.asarray(data[key], dtype=np.float64))
+        return moments
+
+
+class HeavyHitters:
+    """
+    Most frequent values of a stream (Misra-Gries style frequent-items summary)
+
+    Chunk value counts are added exactly while at most capacity distinct
+    values have been seen. Beyond that only the capacity largest counters are
+    kept; floor bounds how much any count may be underestimated (a value
+    missing from the summary occurred at most floor times), and summaries
+    merge by adding counters and floors.
+    """
+
+    def __init__(self, capacity: int = 10000):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype=np.int64)
+        self.floor = 0
+
+    @property
+    def exact(self) -> bool:
+        """True while no counter has been dropped"""
+        return self.floor == 0
+
+    def update_counts(self, counts: pd.Series):
+        """Add value -> count pairs (e.g. one chunk's value_counts)"""
+        merged = self.counts.add(counts, fill_value=0).astype(np.int64)
+        self._truncate(merged)
+
+    def merge(self, other: "HeavyHitters") -> "HeavyHitters":
+        merged = self.counts.add(other.counts, fill_value=0).astype(np.int64)
+        self.floor += other.floor
+        self._truncate(merged)
+        return self
+
+    def _truncate(self, counts: pd.Series):
+        if len(counts) > self.capacity:
+            ordered = counts.sort_values(ascending=False, kind='stable')
+            self.floor += int(ordered.iloc[self.capacity])
+            counts = ordered.iloc[:self.capacity]
+        self.counts = counts
+
+    def top(self, n: int = 10) -> pd.Series:
+        return self.counts.sort_values(ascending=False, kind='stable').head(n)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "keys": self.counts.index.tolist(),
+            "counts": self.counts.tolist(),
+            "floor": self.floor
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "HeavyHitters":
+        hitters = cls(data["capacity"])
+        hitters.counts = pd.Series(data["counts"], index=pd.Index(data["keys"], dtype=object), dtype=np.int64)
+        hitters.floor = data["floor"]
+        return hitters
+
+
+class StreamingCovariance:
+    """
+    Pairwise-complete covariance and Pearson correlation of k numeric columns
+
+    Per column pair it keeps the number of rows where both values are present
+    and the sums, squared sums and cross products over those rows - each
+    block adds four (k x k) matrix products. Values are shifted by the first
+    block's column means so the sums do not lose precision to large offsets;
+    merging re-expresses the other summary around this one's shift. Matches
+    DataFrame.corr() (which also uses pairwise-complete rows).
+    """
+
+    def __init__(self, n_columns: int):
+        self.n_columns = n_columns
+        self.shift: Optional[np.ndarray] = None
+        self.n = np.zeros((n_columns, n_columns))
+        self.sums = np.zeros((n_columns, n_columns))  # [i, j]: sum of x_i over rows where x_i and x_j are present
+        self.squares = np.zeros((n_columns, n_columns))
+        self.cross = np.zeros((n_columns, n_columns))
+
+    def update(self, block: np.ndarray):
+        """Fold in a (rows, k) float block; NaN marks missing values"""
+        block = np.asarray(block, dtype=np.float64)
+        valid = ~np.isnan(block)
+        if self.shift is None:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                shift = np.where(valid, block, 0.0).sum(axis=0) / valid.sum(axis=0)
+            self.shift = np.nan_to_num(shift)
+        present = valid.astype(np.float64)
+        centered = np.where(valid, block - self.shift, 0.0)
+        self.n += present.T @ present
+        self.sums += centered.T @ present
+        self.squares += (centered * centered).T @ present
+        self.cross += centered.T @ centered
+
+    def merge(self, other: "StreamingCovariance") -> "StreamingCovariance":
+        if other.n_columns != self.n_columns:
+            raise ValueError("Cannot merge covariance summaries over different columns")
+        if other.shift is None:
+            return self
+        if self.shift is None:
+            self.shift = other.shift.copy()
+        d = (other.shift - self.shift)[:, None]
+        self.n += other.n
+        self.sums += other.sums + d * other.n
+        self.squares += other.squares + 2 * d * other.sums + d * d * other.n
+        self.cross += other.cross + other.sums * d.T + other.sums.T * d + (d @ d.T) * other.n
+        return self
+
+    def _centered(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cross = self.cross - self.sums * self.sums.T / self.n
+            squares = self.squares - self.sums * self.sums / self.n
+        return cross, squares
+
+    def covariance(self) -> np.ndarray:
+        cross, _ = self._centered()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.n > 1, cross / (self.n - 1), np.nan)
+
+    def correlation(self) -> np.ndarray:
+        cross, squares = self._centered()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = cross / np.sqrt(squares * squares.T)
+        corr = np.clip(corr, -1.0, 1.0)
+        np.fill_diagonal(corr, np.where(np.diag(squares) > 0, 1.0, np.nan))
+        return corr
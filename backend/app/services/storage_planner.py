@@ -0,0 +1,96 @@
+"""
+Storage Planner
+Sizes payloads for storage-tier decisions without throwaway serialization:
+documents are encoded to BSON once and that buffer is what gets stored -
+inline as a raw BSON document or as a GridFS file - and DataFrames are sized
+from their dtypes, sampling only the object columns
+"""
+import logging
+from typing import Dict, Any, Optional
+
+import bson
+import numpy as np
+import pandas as pd
+from bson.raw_bson import RawBSONDocument
+
+from app.config import STORAGE_SIZE_SAMPLE_ROWS
+
+logger = logging.getLogger(__name__)
+
+TIER_INLINE = "inline"
+TIER_GRIDFS = "gridfs"
+
+
+class StoragePlan:
+    """
+    A document encoded once, with the tier its size calls for
+
+    Attributes:
+        payload: BSON encoding of the document
+        size: Encoded size in bytes
+        tier: TIER_INLINE or TIER_GRIDFS
+    """
+
+    def __init__(self, payload: bytes, inline_max_bytes: int):
+        self.payload = payload
+        self.size = len(payload)
+        self.tier = TIER_INLINE if self.size <= inline_max_bytes else TIER_GRIDFS
+
+    @property
+    def inline(self) -> bool:
+        return self.tier == TIER_INLINE
+
+    def fields(self) -> RawBSONDocument:
+        """
+        The encoded document for inline storage
+
+        Its values are raw BSON slices that the driver copies into the
+        enclosing document without encoding them again.
+        """
+        return RawBSONDocument(self.payload)
+
+
+def plan_document(document: Dict[str, Any], inline_max_bytes: int) -> StoragePlan:
+    """
+    Encode a document once and choose where to store it
+
+    Args:
+        document: BSON-encodable mapping
+        inline_max_bytes: Largest encoded size kept in the MongoDB document
+
+    Returns:
+        StoragePlan whose payload is stored as-is in either tier
+    """
+    return StoragePlan(bson.encode(document), inline_max_bytes)
+
+
+def decode_document(payload: bytes) -> Dict[str, Any]:
+    """Decode a payload stored from a StoragePlan"""
+    return bson.decode(payload)
+
+
+def estimate_frame_bytes(df: pd.DataFrame, sample_rows: Optional[int] = None) -> int:
+    """
+    In-memory size of a DataFrame, close to memory_usage(deep=True)
+
+    Fixed-width and categorical columns are sized from their dtype; object
+    and string columns (the expensive part of a deep scan) from an evenly
+    spaced sample of rows.
+    """
+    sample_rows = sample_rows or STORAGE_SIZE_SAMPLE_ROWS
+    rows = len(df)
+    total = int(df.index.memory_usage(deep=False))
+    object_columns = []
+    for position, dtype in enumerate(df.dtypes):
+        if pd.api.types.is_string_dtype(dtype) and not isinstance(dtype, pd.CategoricalDtype):
+            object_columns.append(position)
+        else:
+            total += int(df.iloc[:, position].memory_usage(index=False, deep=True))
+
+    if object_columns and rows:
+        if rows > sample_rows:
+            sample = df.iloc[np.linspace(0, rows - 1, sample_rows).astype(np.int64), object_columns]
+            total += int(sample.memory_usage(index=False, deep=True).sum() * rows / sample_rows)
+        else:
+            total += int(df.iloc[:, object_columns].memory_usage(index=False, deep=True).sum())
+    return total
@@ -0,0 +1,141 @@
+"""
+Streaming Statistics Service
+Profiles and correlates datasets too large to load, one chunk at a time from
+chunked storage or a database cursor. Chunks are summarized in parallel in the
+CPU pool and the mergeable partial results are combined in stream order.
+"""
+import asyncio
+import logging
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple, Iterable, AsyncIterable, Union
+
+import numpy as np
+import pandas as pd
+
+from app.config import STREAM_STATS_WORKERS
+from app.services.executor_service import run_cpu_bound, run_blocking_io, io_pool
+from app.services.profiling_service import ProfileAccumulator
+from app.services.sketches import StreamingCovariance
+from app.services.correlation_service import correlation_report
+
+logger = logging.getLogger(__name__)
+
+
+def summarize_chunk(
+    chunk: pd.DataFrame,
+    profile: bool = True,
+    numeric_columns: Optional[List[str]] = None
+) -> Tuple[Optional[ProfileAccumulator], Optional[StreamingCovariance]]:
+    """
+    Partial statistics of one chunk (runs in a CPU worker)
+
+    Args:
+        chunk: Rows to summarize
+        profile: Build the column profile state
+        numeric_columns: Columns to accumulate covariance over (None skips it)
+
+    Returns:
+        (profile state, covariance state) to merge with other chunks
+    """
+    accumulator = None
+    if profile:
+        accumulator = ProfileAccumulator(exact_max_rows=0)
+        accumulator.add(chunk)
+
+    covariance = None
+    if numeric_columns is not None:
+        covariance = StreamingCovariance(len(numeric_columns))
+        block = chunk.reindex(columns=numeric_columns).to_numpy(dtype=np.float64, na_value=np.nan)
+        covariance.update(block)
+    return accumulator, covariance
+
+
+async def _aiter(chunks: Union[Iterable[pd.DataFrame], AsyncIterable[pd.DataFrame]]):
+    if hasattr(chunks, "__aiter__"):
+        async for chunk in chunks:
+            yield chunk
+    else:
+        # Blocking sources (DB cursors, file parsers) are pulled in the IO pool
+        async for chunk in io_pool.iterate(chunks):
+            yield chunk
+
+
+async def stream_statistics(
+    chunks: Union[Iterable[pd.DataFrame], AsyncIterable[pd.DataFrame]],
+    profile: bool = True,
+    correlation: bool = True,
+    workers: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Profile and/or correlate a stream of DataFrame chunks
+
+    At most `workers` chunks are in flight, so memory stays bounded by a few
+    chunks however long the stream is. Statistics are approximate where
+    sketches are involved (quartiles, distinct counts, duplicate rows beyond
+    PROFILE_MAX_ROW_HASHES); counts, means, variances and correlations are exact.
+
+    Args:
+        chunks: Chunks from iter_dataframe_chunks, stream_table_data, QueryStream, ...
+        profile: Compute the data profile
+        correlation: Compute the Pearson correlation of the numeric columns
+            (the numeric columns of the first chunk)
+        workers: Chunks summarized concurrently (defaults to STREAM_STATS_WORKERS)
+
+    Returns:
+        Dict with row_count, chunk_count, profile, profile_state
+        (ProfileAccumulator, for storing), correlation_matrix (for caching)
+        and correlations
+    """
+    workers = max(1, workers or STREAM_STATS_WORKERS)
+    accumulator = ProfileAccumulator(exact_max_rows=0) if profile else None
+    covariance = None
+    numeric_columns: Optional[List[str]] = None
+    pending = deque()
+    row_count = chunk_count = 0
+
+    async def _merge_oldest():
+        nonlocal covariance
+        partial_profile, partial_covariance = await pending.popleft()
+        if partial_profile is not None:
+            accumulator.merge(partial_profile)
+        if partial_covariance is not None:
+            covariance = partial_covariance if covariance is None else covariance.merge(partial_covariance)
+
+    try:
+        async for chunk in _aiter(chunks):
+            if correlation and numeric_columns is None:
+                numeric_columns = [str(col) for col in chunk.select_dtypes(include=[np.number]).columns]
+            if not all(isinstance(col, str) for col in chunk.columns):
+                chunk = chunk.rename(columns=str)
+            row_count += len(chunk)
+            chunk_count += 1
+            pending.append(asyncio.ensure_future(
+                run_cpu_bound(summarize_chunk, chunk, profile, numeric_columns if correlation else None)
+            ))
+            if len(pending) >= workers:
+                await _merge_oldest()
+        while pending:
+            await _merge_oldest()
+    finally:
+        for task in pending:
+            task.cancel()
+
+    logger.info(f"Streamed statistics over {row_count} rows in {chunk_count} chunk(s)")
+
+    matrix = correlations = None
+    if correlation:
+        if covariance is None or len(numeric_columns) < 2:
+            correlations = {"correlations": [], "matrix": {}}
+        else:
+            matrix = pd.DataFrame(covariance.correlation(), index=numeric_columns, columns=numeric_columns)
+            matrix.attrs = {"method": "pearson", "approximate": False, "rows_used": row_count}
+            correlations = correlation_report(matrix)
+
+    return {
+        "row_count": row_count,
+        "chunk_count": chunk_count,
+        "profile": await run_blocking_io(accumulator.to_profile) if accumulator is not None else None,
+        "profile_state": accumulator,
+        "correlation_matrix": matrix,
+        "correlations": correlations
+    }
@@ -7,6 +7,8 @@ import numpy as np
 from typing import Dict, List, Optional
 import logging
 
+from app.services.correlation_service import target_correlations
+
 logger = logging.getLogger(__name__)
 
 
@@ -17,7 +19,8 @@ class VariableIntelligenceService:
     def validate_variable_selection(
         df: pd.DataFrame,
         target_variables: List[str],
-        features: List[str]
+        features: List[str],
+        correlation_matrix: Optional[pd.DataFrame] = None
     ) -> Dict:
         """
         Validate user's variable selection and suggest overrides if needed
@@ -26,6 +29,7 @@ class VariableIntelligenceService:
             df: DataFrame with data
             target_variables: List of target variable names
             features: List of feature variable names
+            correlation_matrix: Cached correlation matrix of the dataset (computed here if omitted)
             
         Returns:
             {
@@ -150,7 +154,8 @@ class VariableIntelligenceService:
                 # Find best features
                 if suggested_target:
                     suggested_features = VariableIntelligenceService._suggest_best_features(
-                        df, suggested_target, top_n=min(10, len(df.columns) - 1)
+                        df, suggested_target, top_n=min(10, len(df.columns) - 1),
+                        correlation_matrix=correlation_matrix
                     )
                     confidence = 0.85  # Base confidence
                 else:
@@ -243,7 +248,12 @@ class VariableIntelligenceService:
         return best_target
     
     @staticmethod
-    def _suggest_best_features(df: pd.DataFrame, target: str, top_n: int = 10) -> List[str]:
+    def _suggest_best_features(
+        df: pd.DataFrame,
+        target: str,
+        top_n: int = 10,
+        correlation_matrix: Optional[pd.DataFrame] = None
+    ) -> List[str]:
         """Suggest best features based on correlation and data quality"""
         if target not in df.columns:
             return []
@@ -251,6 +261,9 @@ class VariableIntelligenceService:
         # Get all columns except target
         candidate_cols = [col for col in df.columns if col != target]
         
+        # Correlations with the target, from the cached matrix or one vectorized pass
+        correlations = target_correlations(df, target, correlation_matrix).abs()
+        
         feature_scores = []
         
         for col in candidate_cols:
@@ -280,13 +293,9 @@ class VariableIntelligenceService:
             
             # Correlation score (30%) - only for numeric columns
             correlation_score = 0.0
-            if pd.api.types.is_numeric_dtype(df[col]) and pd.api.types.is_numeric_dtype(df[target]):
-                try:
-                    corr = abs(df[col].corr(df[target]))
-                    if not np.isnan(corr):
-                        correlation_score = corr * 0.3
-                except:
-                    pass
+            corr = correlations.get(col, np.nan)
+            if not np.isnan(corr):
+                correlation_score = corr * 0.3
             
             score = quality_score + variance_score + correlation_score
             
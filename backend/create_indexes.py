@@ -42,6 +42,25 @@ async def create_indexes():
     await db.prediction_feedback.create_index("created_at")
     print("   ✅ Created indexes on: prediction_id, dataset_id+model_name, created_at")
     
+    # Background jobs collection indexes
+    print("\n⏳ Creating indexes for 'jobs' collection...")
+    await db.jobs.create_index("id", unique=True)
+    await db.jobs.create_index([("status", 1), ("created_at", 1)])
+    await db.jobs.create_index([("status", 1), ("heartbeat_at", 1)])
+    print("   ✅ Created indexes on: id, status+created_at, status+heartbeat_at")
+    
+    # Dataset version history indexes
+    print("\n🗂️  Creating indexes for 'dataset_versions' collection...")
+    await db.dataset_versions.create_index([("dataset_id", 1), ("version", 1)], unique=True)
+    await db.dataset_versions.create_index("file_keys")
+    print("   ✅ Created indexes on: dataset_id+version, file_keys")
+    
+    # Model registry indexes
+    print("\n🤖 Creating indexes for 'models' collection...")
+    await db.models.create_index("id", unique=True)
+    await db.models.create_index([("dataset_id", 1), ("target_column", 1), ("created_at", -1)])
+    print("   ✅ Created indexes on: id, dataset_id+target_column+created_at")
+    
     # GridFS indexes (if not already created)
     print("\n📁 Creating indexes for GridFS collections...")
     await db.fs.files.create_index("metadata.dataset_id")
@@ -0,0 +1,80 @@
+"""
+AutoML Tests
+Successive halving within a time budget and native early stopping
+"""
+import sys
+import os
+import numpy as np
+import pandas as pd
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import xgboost as xgb
+from sklearn.dummy import DummyRegressor
+
+from app.services import automl_service
+from app.services.automl_service import fit_estimator, boosting_rounds, enable_early_stopping
+from app.services.ml_service import train_models_auto
+
+
+def make_frame(n: int = 4000):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(n, 4)), columns=["a", "b", "c", "d"])
+    df["y"] = 2 * df["a"] + np.sin(3 * df["b"]) + rng.normal(size=n) * 0.3
+    return df
+
+
+class TestAutoML:
+
+    def test_boosted_models_stop_early(self):
+        df = make_frame()
+        models = {"XGBoost": xgb.XGBRegressor(n_estimators=100)}
+        enable_early_stopping(models)
+        model = fit_estimator(models["XGBoost"], df[["a", "b", "c", "d"]], df["y"])
+        assert 0 < boosting_rounds(model) < automl_service.AUTOML_MAX_ESTIMATORS
+
+    def test_successive_halving_rungs(self, monkeypatch):
+        monkeypatch.setattr(automl_service, "AUTOML_MIN_ROWS", 500)
+        result = train_models_auto(make_frame(), "y", "regression", time_budget=60, cpu_budget=1)
+        report = result["training_info"]["automl"]
+        rows = [rung["rows"] for rung in report["rungs"]]
+        # 3200 training rows: rungs of 800, 1600 and 3200 rows while several candidates remain
+        assert rows[0] == 800 and rows[-1] == result["training_info"]["train_samples"] == 3200
+        assert len(report["rungs"][0]["candidates"]) == 5 and len(report["rungs"][1]["candidates"]) <= 3
+        finalists = [model for model in result["models"] if model["automl"]["stopped"] is None]
+        assert finalists and all(model["automl"]["rows"] == 3200 for model in finalists)
+        # Models trained on every row rank ahead of every eliminated one
+        assert result["models"][:len(finalists)] == finalists
+        assert result["best_model"] == finalists[0]["model_name"]
+
+    def test_budget_stops_growing_rungs(self, monkeypatch):
+        monkeypatch.setattr(automl_service, "AUTOML_MIN_ROWS", 500)
+        result = train_models_auto(make_frame(), "y", "regression", time_budget=0.01, cpu_budget=1)
+        report = result["training_info"]["automl"]
+        assert report["stopped"] == "time_budget" and len(report["rungs"]) == 1
+        assert len(result["models"]) == 5
+
+    def test_eliminated_candidates_rank_after_finalists(self, monkeypatch):
+        monkeypatch.setattr(automl_service, "AUTOML_MIN_ROWS", 100)
+        # "early" loses the first rung, then the survivor scores lower on every row
+        scores = {("early", 100): 0.5, ("late", 100): 0.6, ("late", 200): 0.4}
+
+        def fit(name, model, X_train, X_test, y_train, y_test):
+            return {"model_name": name, "r2_score": scores[(name, len(X_train))]}
+
+        def train_candidates(fit_fn, models, args, n_rows=None, cpu_budget=None):
+            return [fit_fn(name, model, *args) for name, model in models.items()]
+
+        X = pd.DataFrame({"a": np.arange(200.0)})
+        results, report = automl_service.train_budgeted(
+            train_candidates, fit, {"early": DummyRegressor(), "late": DummyRegressor()},
+            X, X, X["a"], X["a"], (), "r2_score", time_budget=60
+        )
+        assert [rung["rows"] for rung in report["rungs"]] == [100, 200]
+        assert [result["model_name"] for result in results] == ["late", "early"]
+        assert results[1]["automl"]["stopped"] == "halved"
+        assert automl_service.is_finalist(results[0]) and not automl_service.is_finalist(results[1])
+
+    def test_dominated_learning_curve(self):
+        assert automl_service._dominated([0.50, 0.52], best=0.9, remaining_rungs=3)
+        assert not automl_service._dominated([0.50, 0.70], best=0.9, remaining_rungs=3)
+        assert not automl_service._dominated([0.50], best=0.9, remaining_rungs=3)
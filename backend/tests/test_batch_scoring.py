@@ -0,0 +1,62 @@
+"""
+Batch Scoring Tests
+Chunk scoring with worker-cached models and input checks
+"""
+import sys
+import os
+import asyncio
+import numpy as np
+import pandas as pd
+import pytest
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sklearn.linear_model import LogisticRegression
+
+from app.services.model_registry import serialize_model
+from app.services import batch_scoring_service
+from app.services.batch_scoring_service import score_chunk, score_chunks
+
+
+def make_record(tmp_path):
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({"a": rng.normal(size=200)})
+    estimator = LogisticRegression().fit(X, (X["a"] > 0).astype(int))
+    fmt, payload, details = serialize_model(estimator)
+    model_file = tmp_path / "model.joblib"
+    model_file.write_bytes(payload)
+    record = {
+        "id": "m1", "problem_type": "classification", "format": fmt, "format_details": details,
+        "preprocessing": {
+            "numeric": ["a"], "categorical": {}, "feature_columns": ["a"], "fill_values": {"a": 0.0},
+            "target": {"column": "label", "class_labels": ["low", "high"], "encoded": True},
+        },
+    }
+    return str(model_file), record
+
+
+class TestBatchScoring:
+    """Test scoring chunks"""
+
+    def test_score_chunk(self, tmp_path):
+        model_file, record = make_record(tmp_path)
+        chunk = pd.DataFrame({"a": [-2.0, 3.0, None]})
+        scores = score_chunk(model_file, record, chunk, "label_prediction", True)
+        assert scores.columns.tolist() == ["label_prediction", "label_prediction_proba_low", "label_prediction_proba_high"]
+        assert scores["label_prediction"].tolist()[:2] == ["low", "high"]
+        np.testing.assert_allclose(scores.iloc[:, 1:].sum(axis=1), 1.0)
+        # The artifact is read once per worker
+        assert model_file in batch_scoring_service._WORKER_MODELS
+        os.remove(model_file)
+        assert len(score_chunk(model_file, record, chunk, "label_prediction", False).columns) == 1
+
+    def test_missing_feature_columns_rejected(self, tmp_path):
+        model_file, record = make_record(tmp_path)
+
+        async def chunks():
+            yield pd.DataFrame({"b": [1.0]})
+
+        async def run():
+            return [scores async for _, scores in score_chunks(chunks(), model_file, record, ["a"], "p")]
+
+        with pytest.raises(ValueError, match="missing model feature"):
+            asyncio.run(run())
@@ -0,0 +1,94 @@
+"""
+Cleaning Pipeline Tests
+Declarative steps against pandas, and chunked cleaning with hash-based duplicate detection
+"""
+import sys
+import os
+import asyncio
+import numpy as np
+import pandas as pd
+import pytest
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.cleaning_service import CleaningPipeline
+from app.services.data_service import clean_data
+
+
+def make_frame(n: int = 4000) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "value": rng.normal(size=n),
+        "count": rng.integers(0, 5, n),
+        "city": rng.choice(["Paris", "Lyon", None], n, p=[0.5, 0.3, 0.2]),
+    })
+    df.loc[::7, "value"] = np.nan
+    return pd.concat([df, df.iloc[:300]], ignore_index=True)
+
+
+def chunks_of(df: pd.DataFrame, size: int = 700):
+    async def _chunks():
+        for start in range(0, len(df), size):
+            yield df.iloc[start:start + size]
+    return _chunks
+
+
+async def _concat(chunks) -> pd.DataFrame:
+    return pd.concat([chunk async for chunk in chunks])
+
+
+async def collect(pipeline: CleaningPipeline, df: pd.DataFrame) -> pd.DataFrame:
+    return await _concat(pipeline.stream(chunks_of(df)))
+
+
+class TestCleaningPipeline:
+    """Test in-memory and chunked cleaning"""
+
+    def test_default_pipeline_matches_pandas(self):
+        df = make_frame()
+        cleaned, report = clean_data(df)
+        expected = df.drop_duplicates()
+        expected = expected.fillna({"value": expected["value"].median(), "city": expected["city"].mode()[0]})
+        assert cleaned.equals(expected)
+        assert report[0]["details"] == f"Removed {int(df.duplicated().sum())} duplicate rows"
+        assert [entry["action"] for entry in report[1:]] == [
+            "Filled missing values in 'value'", "Filled missing values in 'city'"
+        ]
+
+    def test_chunked_run_matches_in_memory(self):
+        df = make_frame()
+        steps = [
+            {"op": "drop_duplicates"},
+            {"op": "fill_missing", "columns": ["city"], "strategy": "constant", "value": "Unknown"},
+            {"op": "fill_missing", "columns": "numeric", "strategy": "mean"},
+            {"op": "drop_columns", "columns": ["count"]},
+        ]
+        expected, expected_report = CleaningPipeline(steps).run(df)
+        pipeline = CleaningPipeline(steps)
+        cleaned = asyncio.run(collect(pipeline, df))
+        pd.testing.assert_frame_equal(cleaned, expected)
+        assert pipeline.report() == expected_report
+
+    def test_chunked_median_and_duplicates_across_chunks(self):
+        df = make_frame()
+
+        async def mixed_dtype_chunks():
+            # Later chunks read the integer column as float (as Parquet chunks with missing values would)
+            for start in range(0, len(df), 700):
+                chunk = df.iloc[start:start + 700]
+                yield chunk if start < 2000 else chunk.astype({"count": np.float64})
+
+        pipeline = CleaningPipeline([{"op": "drop_duplicates"}, {"op": "fill_missing", "columns": "numeric"}])
+        cleaned = asyncio.run(_concat(pipeline.stream(mixed_dtype_chunks)))
+        deduplicated = df.drop_duplicates()
+        assert len(cleaned) == len(deduplicated)
+        filled = cleaned["value"][deduplicated["value"].isna().to_numpy()]
+        assert abs(filled.iloc[0] - deduplicated["value"].median()) < 0.02
+        assert cleaned["value"].notna().all()
+
+    def test_invalid_steps(self):
+        with pytest.raises(ValueError):
+            CleaningPipeline([{"op": "explode"}])
+        with pytest.raises(ValueError):
+            CleaningPipeline([{"op": "fill_missing", "strategy": "constant"}])
+        with pytest.raises(ValueError):
+            CleaningPipeline([{"op": "drop_missing", "columns": "numbers"}])
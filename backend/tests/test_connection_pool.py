@@ -0,0 +1,133 @@
+"""
+Connection Pool Tests
+Pool reuse, health checks and idle expiry with an in-memory fake driver
+"""
+import pytest
+import sys
+import os
+import time
+import threading
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.database.connection_pool import ConnectionPoolManager, pool_key
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query):
+        if self.conn.broken:
+            raise RuntimeError("server closed the connection")
+
+    def fetchall(self):
+        return [(1,)]
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.broken = False
+        self.closed = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+CONFIG = {"host": "db.local", "port": 5432, "database": "sales", "username": "u", "password": "p"}
+
+
+@pytest.fixture
+def manager():
+    created = []
+
+    def factory(source_type, config):
+        conn = FakeConnection()
+        created.append(conn)
+        return conn
+
+    pools = ConnectionPoolManager(factory=factory, max_size=2, idle_timeout=60, acquire_timeout=0.2)
+    pools.created = created
+    return pools
+
+
+class TestConnectionPool:
+    """Test pooled connection checkout and release"""
+
+    def test_connection_reused_across_checkouts(self, manager):
+        with manager.connection('postgresql', CONFIG) as first:
+            pass
+        with manager.connection('postgresql', {**CONFIG, "query": "SELECT 1"}) as second:
+            pass
+        assert first is second
+        stats = manager.stats()
+        assert stats["pool_count"] == 1
+        pool_stats = next(iter(stats["pools"].values()))
+        assert pool_stats["created"] == 1
+        assert pool_stats["reused"] == 1
+
+    def test_different_configs_use_different_pools(self):
+        assert pool_key('postgresql', CONFIG) != pool_key('postgresql', {**CONFIG, "database": "hr"})
+        assert pool_key('postgresql', CONFIG) != pool_key('mysql', CONFIG)
+
+    def test_broken_connection_replaced_on_checkout(self, manager):
+        with manager.connection('postgresql', CONFIG) as conn:
+            pass
+        conn.broken = True
+        with manager.connection('postgresql', CONFIG) as replacement:
+            assert replacement is not conn
+        assert conn.closed
+        pool_stats = next(iter(manager.stats()["pools"].values()))
+        assert pool_stats["health_check_failures"] == 1
+
+    def test_connection_discarded_when_block_raises(self, manager):
+        with pytest.raises(ValueError):
+            with manager.connection('postgresql', CONFIG) as conn:
+                raise ValueError("query failed")
+        assert conn.closed
+        assert manager.stats()["connections"] == 0
+
+    def test_checkout_times_out_when_pool_exhausted(self, manager):
+        pool = manager.get_pool('postgresql', CONFIG)
+        held = [pool.acquire(), pool.acquire()]
+        with pytest.raises(TimeoutError):
+            pool.acquire()
+        for conn in held:
+            pool.release(conn)
+        assert pool.stats()["idle"] == 2
+
+    def test_idle_connections_expire(self, manager):
+        pool = manager.get_pool('postgresql', CONFIG)
+        pool.idle_timeout = 0.01
+        conn = pool.acquire()
+        pool.release(conn)
+        time.sleep(0.05)
+        pool.close_idle()
+        assert conn.closed
+        assert pool.stats()["idle_closed"] == 1
+
+    def test_counters_consistent_under_concurrent_checkouts(self, manager):
+        pool = manager.get_pool('postgresql', CONFIG)
+        pool.acquire_timeout = 5
+
+        def worker():
+            for _ in range(300):
+                pool.release(pool.acquire())
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = pool.stats()
+        assert stats["checkouts"] == 2400
+        assert stats["created"] + stats["reused"] == 2400 and stats["created"] <= 2
+        assert stats["in_use"] == 0
@@ -0,0 +1,86 @@
+"""
+Correlation Engine Tests
+Vectorized matrices and pair extraction against pandas, wide-frame sampling and the matrix cache
+"""
+import sys
+import os
+import numpy as np
+import pandas as pd
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.correlation_service import (
+    compute_correlation_matrix, correlation_pairs, correlation_report, target_correlations,
+    cache_matrix, get_cached_matrix
+)
+
+
+def make_frame(n: int = 5000) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "x": rng.normal(size=n),
+        "noise": rng.normal(size=n),
+        "const": 1.0,
+        "label": rng.choice(["a", "b"], n),
+    })
+    df["y"] = df["x"] * 2 + rng.normal(size=n)
+    df["z"] = np.exp(df["x"]) - 0.5 * df["y"]
+    return df
+
+
+def loop_pairs(matrix: pd.DataFrame):
+    # Reference: the pair walk the vectorized extraction replaced
+    pairs = []
+    columns = matrix.columns
+    for i in range(len(columns)):
+        for j in range(i + 1, len(columns)):
+            value = matrix.iloc[i, j]
+            if abs(value) > 0.1:
+                pairs.append((columns[i], columns[j], float(value)))
+    pairs.sort(key=lambda pair: abs(pair[2]), reverse=True)
+    return pairs
+
+
+class TestCorrelationEngine:
+    """Test correlation matrices and reports"""
+
+    def test_matrices_match_pandas(self):
+        df = make_frame()
+        numeric = df.select_dtypes(include=[np.number])
+        for method in ("pearson", "spearman"):
+            matrix = compute_correlation_matrix(df, method)
+            assert np.allclose(matrix.to_numpy(), numeric.corr(method).to_numpy(), equal_nan=True)
+            assert matrix.attrs["method"] == method
+
+        df.loc[::5, "y"] = np.nan
+        matrix = compute_correlation_matrix(df)
+        assert np.allclose(matrix.to_numpy(), df.select_dtypes(include=[np.number]).corr().to_numpy(), equal_nan=True)
+
+    def test_pairs_match_pair_loop(self):
+        matrix = compute_correlation_matrix(make_frame())
+        pairs = correlation_pairs(matrix)["correlations"]
+        assert [(p["feature1"], p["feature2"]) for p in pairs] == [(a, b) for a, b, _ in loop_pairs(matrix)]
+        assert pairs[0]["strength"] == "strong" and pairs[0]["direction"] == "positive"
+        assert correlation_pairs(matrix, max_pairs=1)["significant_pairs"] == len(pairs)
+
+    def test_wide_frame_is_sampled_and_truncated(self):
+        rng = np.random.default_rng(1)
+        base = rng.normal(size=(3000, 1))
+        wide = pd.DataFrame(rng.normal(size=(3000, 120)) + base * np.linspace(0, 2, 120))
+        wide.columns = [f"s{i}" for i in range(120)]
+        matrix = compute_correlation_matrix(wide, approximate=True, sample_rows=2000)
+        assert matrix.attrs["approximate"] and matrix.attrs["rows_used"] == 2000
+        assert np.abs(matrix.to_numpy() - wide.corr().to_numpy()).max() < 0.1
+
+        report = correlation_report(matrix, max_pairs=20)
+        assert len(report["correlations"]) == 20
+        assert report["matrix_truncated"] and report["column_count"] == 120
+        assert {p["feature1"] for p in report["correlations"]} <= set(report["matrix"])
+
+    def test_cached_matrix_serves_target_correlations(self):
+        df = make_frame()
+        cache_matrix("ds-corr", 3, compute_correlation_matrix(df))
+        cached = get_cached_matrix("ds-corr", 3)
+        assert get_cached_matrix("ds-corr", 2) is None
+        assert get_cached_matrix("ds-corr", 3, "spearman") is None
+        from_cache = target_correlations(df, "y", cached)
+        assert np.allclose(from_cache.drop("const"), target_correlations(df, "y").drop("const"))
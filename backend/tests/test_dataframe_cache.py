@@ -0,0 +1,61 @@
+"""
+DataFrame Cache Tests
+LRU eviction within the byte budget and version-keyed lookups
+"""
+import sys
+import os
+import numpy as np
+import pandas as pd
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.dataframe_cache import DataFrameCache
+from app.services.storage_planner import estimate_frame_bytes
+
+
+def make_frame(rows: int = 1000) -> pd.DataFrame:
+    return pd.DataFrame({"a": np.arange(rows, dtype=np.float64), "b": np.arange(rows)})
+
+
+class TestDataFrameCache:
+
+    def test_least_recently_used_evicted_first(self):
+        size = estimate_frame_bytes(make_frame())
+        cache = DataFrameCache(int(size * 2.5))
+        cache.put("d1", 1, make_frame())
+        cache.put("d2", 1, make_frame())
+        assert cache.get("d1", 1) is not None  # d2 is now the least recently used
+        cache.put("d3", 1, make_frame())
+        assert cache.get("d2", 1) is None
+        assert cache.get("d1", 1) is not None and cache.get("d3", 1) is not None
+        assert cache.stats()["evictions"] == 1
+
+    def test_byte_budget(self):
+        size = estimate_frame_bytes(make_frame())
+        cache = DataFrameCache(size * 3)
+        for i in range(10):
+            cache.put(f"d{i}", 1, make_frame())
+            assert cache.current_bytes <= cache.max_bytes
+        assert cache.stats()["entries"] == 3
+        cache.put("big", 1, make_frame(10000))
+        assert cache.get("big", 1) is None and cache.stats()["entries"] == 3
+
+    def test_versions_are_separate_entries(self):
+        cache = DataFrameCache(10 * 1024 * 1024)
+        cache.put("d1", 1, make_frame())
+        assert cache.get("d1", 2) is None
+        cache.put("d1", 2, make_frame(10))
+        assert cache.get("d1", 1) is None
+        assert len(cache.get("d1", 2)) == 10
+        cache.invalidate("d1")
+        assert cache.get("d1", 2) is None
+        stats = cache.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 3 and stats["entries"] == 0
+
+    def test_callers_get_copies(self):
+        cache = DataFrameCache(10 * 1024 * 1024)
+        df = make_frame()
+        cache.put("d1", 1, df)
+        df["a"] = 0.0
+        served = cache.get("d1", 1)
+        served["b"] = -1
+        assert cache.get("d1", 1)["a"].iloc[5] == 5.0 and cache.get("d1", 1)["b"].iloc[5] == 5
@@ -0,0 +1,56 @@
+"""
+Executor Service Tests
+Blocking iterators are consumed and closed in the worker pool, off the event loop
+"""
+import sys
+import os
+import asyncio
+import threading
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.executor_service import WorkerPool
+
+
+class BlockingRows:
+    """Iterator standing in for a DB cursor, recording the threads it runs on"""
+
+    def __init__(self, n: int):
+        self.remaining = n
+        self.threads = []
+        self.closed_on = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        self.threads.append(threading.current_thread().name)
+        if self.remaining == 0:
+            raise StopIteration
+        self.remaining -= 1
+        return self.remaining
+
+    def close(self):
+        self.closed_on = threading.current_thread().name
+
+
+class TestWorkerPool:
+
+    def test_iterator_consumed_and_closed_in_pool(self):
+        pool = WorkerPool("test", "thread", 1)
+        rows = BlockingRows(100)
+
+        async def run():
+            taken = []
+            async for item in pool.iterate(rows):
+                taken.append(item)
+                if len(taken) == 3:
+                    break
+            return taken, threading.current_thread().name
+
+        try:
+            taken, loop_thread = asyncio.run(run())
+        finally:
+            pool.shutdown()
+        assert taken == [99, 98, 97]
+        assert rows.closed_on is not None and rows.closed_on != loop_thread
+        assert all(name.startswith("test-worker") for name in rows.threads + [rows.closed_on])
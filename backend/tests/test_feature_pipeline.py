@@ -0,0 +1,81 @@
+"""
+Feature Pipeline Tests
+Fitted preparation matches the training encoding and is reused across targets
+"""
+import sys
+import os
+import numpy as np
+import pandas as pd
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.feature_pipeline import (
+    FeaturePipeline, FeaturePipelineCache, infer_feature_types, pipeline_key
+)
+from app.services.ml_service import train_models_multi_target
+
+
+def make_frame(n: int = 200):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "x": np.where(rng.random(n) < 0.1, np.nan, rng.normal(size=n)),
+        "city": rng.choice(["Lyon", "Paris", "Nice"], size=n),
+        "when": pd.date_range("2024-01-01", periods=n, freq="D"),
+        "note": [f"note number {i}" for i in range(n)],
+        "y": rng.normal(size=n),
+    })
+
+
+class TestFeaturePipeline:
+
+    def test_matches_get_dummies_and_mean_fill(self):
+        df = make_frame()
+        pipeline = FeaturePipeline.fit(df, numeric=["x"], categorical=["city"])
+        expected = pd.get_dummies(df[["x", "city"]], drop_first=True, dtype=int)
+        expected = expected.fillna(expected.mean())
+        X = pipeline.transform(df)
+        assert X.columns.tolist() == expected.columns.tolist()
+        np.testing.assert_allclose(X.to_numpy(dtype=float), expected.to_numpy(dtype=float))
+
+    def test_datetime_and_text_features(self):
+        df = make_frame()
+        spec = infer_feature_types(df, ["x", "city", "when", "note"])
+        assert spec == {"numeric": ["x"], "categorical": ["city"], "datetime": ["when"], "text": ["note"]}
+        X = FeaturePipeline.fit(df, **spec).transform(df.head(2))
+        assert X.loc[1, "when_day"] == 2 and X.loc[0, "when_year"] == 2024
+        assert X.loc[0, "note_words"] == 3 and X.loc[0, "note_length"] == len("note number 0")
+
+    def test_identifier_columns_skipped(self):
+        df = make_frame()
+        df["customer_ref"] = [f"C-{i:06d}" for i in range(len(df))]
+        df["email"] = [f"user{i}@example.com" for i in range(len(df))]
+        spec = infer_feature_types(df, ["x", "note", "customer_ref", "email"])
+        # Near-unique single tokens identify rows; free text stays a text feature
+        assert spec == {"numeric": ["x"], "categorical": [], "datetime": [], "text": ["note"]}
+
+    def test_round_trip_and_absent_columns(self):
+        df = make_frame()
+        pipeline = FeaturePipeline.fit(df, numeric=["x"], categorical=["city"], datetime=["when"])
+        restored = FeaturePipeline.from_dict(pipeline.to_dict())
+        X = restored.transform(pd.DataFrame({"city": ["Rome"]}))
+        assert X.columns.tolist() == pipeline.feature_columns
+        assert not X.isna().any().any()
+        assert X["x"].iloc[0] == pipeline.fill_values["x"]
+
+    def test_multi_target_reuses_pipelines(self):
+        df = make_frame()
+        targets = {"y": {"numeric": ["x"], "categorical": ["city"]}, "x": None}
+        results = train_models_multi_target(df, targets, problem_type="regression")
+        pipelines = {target: result["pipeline"] for target, result in results.items()}
+        assert pipelines["y"].feature_columns == ["x", "city_Nice", "city_Paris"]
+        assert pipelines["x"].feature_columns == ["y"]
+
+        again = train_models_multi_target(df, targets, problem_type="regression", pipelines=pipelines)
+        assert again["y"]["pipeline"] is pipelines["y"]
+
+    def test_cache_drops_other_versions(self):
+        cache = FeaturePipelineCache(8)
+        pipeline = FeaturePipeline(["x"], {})
+        cache.put("d1", 1, "y", pipeline_key(None), pipeline)
+        assert cache.get("d1", 1, "y", "auto") is pipeline
+        cache.put("d1", 2, "y", "auto", pipeline)
+        assert cache.get("d1", 1, "y", "auto") is None
@@ -0,0 +1,66 @@
+"""
+GridFS Dataset File Tests
+Format detection for tagged and legacy files, and parsing a download chunk by chunk
+"""
+import sys
+import os
+import io
+import json
+import asyncio
+import numpy as np
+import pandas as pd
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.gridfs_dataset_service import detect_format, _GridOutReader, _read_json, _serialize
+
+
+class FakeGridOut:
+    """Serves a payload in GridFS-sized chunks"""
+
+    def __init__(self, payload: bytes, chunk_size: int = 1000):
+        self.chunks = [payload[i:i + chunk_size] for i in range(0, len(payload), chunk_size)]
+        self.reads = 0
+
+    async def readchunk(self) -> bytes:
+        self.reads += 1
+        return self.chunks.pop(0) if self.chunks else b""
+
+
+def make_frame(n: int = 2000) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({"x": rng.normal(size=n), "city": rng.choice(["Paris", "Lyon"], n)})
+
+
+class TestGridFSDatasetFiles:
+    """Test format detection and streamed parsing"""
+
+    def test_detect_format(self):
+        df = make_frame(10)
+        assert detect_format({"format": "feather"}, "table_1.json") == "feather"
+        assert detect_format(None, "table_1.json", "postgresql_sales") == "json"
+        # Untagged database results: JSON records without an extension in any name
+        records = json.dumps(df.to_dict("records")).encode()
+        assert detect_format({}, "blob", "postgresql_sales", records[:100]) == "json"
+        assert detect_format({}, None, "sales.xlsx", _serialize(df, "parquet")[:100]) == "parquet"
+        assert detect_format({}, None, "sales.csv", b"x,city\n1,Paris") == "csv"
+
+    def test_csv_parsed_while_downloading(self):
+        df = make_frame()
+        grid_out = FakeGridOut(df.to_csv(index=False).encode())
+        total_chunks = len(grid_out.chunks)
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            head = await grid_out.readchunk()
+            reader = io.BufferedReader(_GridOutReader(grid_out, loop, head), 4096)
+            return await loop.run_in_executor(None, pd.read_csv, reader)
+
+        pd.testing.assert_frame_equal(asyncio.run(run()), df, check_exact=False)
+        assert grid_out.reads == total_chunks + 1
+
+    def test_json_records_with_nan(self):
+        df = make_frame(50)
+        df.loc[3, "x"] = np.nan
+        payload = json.dumps(df.to_dict("records")).encode()  # NaN literal, as json.dumps writes it
+        parsed = _read_json(io.BytesIO(payload))
+        pd.testing.assert_frame_equal(parsed, df)
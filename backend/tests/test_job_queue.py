@@ -0,0 +1,190 @@
+"""
+Job Queue Tests
+Claiming, stale job recovery, cancellation and progress of background jobs
+"""
+import sys
+import os
+import asyncio
+from datetime import datetime, timezone, timedelta
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from fastapi import HTTPException
+
+from app.services import job_service
+from app.services.job_service import JobWorker, cancel_job, register_job_handler, report_progress, submit_job
+
+
+class UpdateResult:
+    def __init__(self, modified_count: int):
+        self.modified_count = modified_count
+
+
+class FakeJobs:
+    """In-memory jobs collection supporting the queries the job service runs"""
+
+    def __init__(self):
+        self.docs = []
+
+    @staticmethod
+    def _matches(doc, query):
+        for key, condition in query.items():
+            value = doc.get(key)
+            if isinstance(condition, dict):
+                if "$lt" in condition and not (value is not None and value < condition["$lt"]):
+                    return False
+                if "$ne" in condition and value == condition["$ne"]:
+                    return False
+            elif value != condition:
+                return False
+        return True
+
+    @staticmethod
+    def _apply(doc, update):
+        for key, value in update.get("$set", {}).items():
+            target = doc
+            *parents, field = key.split(".")
+            for parent in parents:
+                target = target.setdefault(parent, {})
+            target[field] = value
+        for key, value in update.get("$inc", {}).items():
+            doc[key] = doc.get(key, 0) + value
+
+    async def insert_one(self, doc):
+        self.docs.append(dict(doc))
+
+    async def find_one(self, query, projection=None):
+        return next((dict(doc) for doc in self.docs if self._matches(doc, query)), None)
+
+    async def find_one_and_update(self, query, update, projection=None, sort=None, return_document=None):
+        matches = [doc for doc in self.docs if self._matches(doc, query)]
+        for key, direction in sort or []:
+            matches.sort(key=lambda doc: doc.get(key), reverse=direction < 0)
+        if not matches:
+            return None
+        self._apply(matches[0], update)
+        return dict(matches[0])
+
+    async def update_one(self, query, update):
+        for doc in self.docs:
+            if self._matches(doc, query):
+                self._apply(doc, update)
+                return UpdateResult(1)
+        return UpdateResult(0)
+
+    async def update_many(self, query, update):
+        matches = [doc for doc in self.docs if self._matches(doc, query)]
+        for doc in matches:
+            self._apply(doc, update)
+        return UpdateResult(len(matches))
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.jobs = FakeJobs()
+
+
+def use_fake_db(monkeypatch) -> FakeJobs:
+    database = FakeDatabase()
+    monkeypatch.setattr(job_service, "db", database)
+    return database.jobs
+
+
+def job(jobs: FakeJobs, job_id: str):
+    return next(doc for doc in jobs.docs if doc["id"] == job_id)
+
+
+class TestJobQueue:
+
+    def test_claim_oldest_queued_job(self, monkeypatch):
+        jobs = use_fake_db(monkeypatch)
+
+        async def noop(payload):
+            return None
+
+        register_job_handler("test_noop", noop)
+        worker = JobWorker(worker_id="w1")
+
+        async def run():
+            first = await submit_job("test_noop", {})
+            await submit_job("test_noop", {})
+            claimed = await worker._claim()
+            return first, claimed
+
+        first, claimed = asyncio.run(run())
+        assert claimed["id"] == first["id"]
+        assert claimed["status"] == "running" and claimed["worker_id"] == "w1" and claimed["attempts"] == 1
+        assert [doc["status"] for doc in jobs.docs] == ["running", "queued"]
+
+    def test_stale_jobs_requeued_until_max_attempts(self, monkeypatch):
+        jobs = use_fake_db(monkeypatch)
+        expired = (datetime.now(timezone.utc) - timedelta(seconds=job_service.JOB_STALE_AFTER + 60)).isoformat()
+        fresh = datetime.now(timezone.utc).isoformat()
+        for job_id, attempts, heartbeat in [("retry", 1, expired), ("exhausted", job_service.JOB_MAX_ATTEMPTS, expired), ("alive", 1, fresh)]:
+            jobs.docs.append({
+                "id": job_id, "status": "running", "attempts": attempts, "heartbeat_at": heartbeat,
+                "cancel_requested": False, "worker_id": "dead", "progress": {}
+            })
+
+        asyncio.run(JobWorker().requeue_stale_jobs())
+        assert job(jobs, "retry")["status"] == "queued" and job(jobs, "retry")["worker_id"] is None
+        assert job(jobs, "exhausted")["status"] == "failed"
+        assert job(jobs, "alive")["status"] == "running"
+
+    def test_heartbeat_keeps_running_job_alive(self, monkeypatch):
+        jobs = use_fake_db(monkeypatch)
+        monkeypatch.setattr(job_service, "JOB_HEARTBEAT_INTERVAL", 0.01)
+        jobs.docs.append({"id": "j1", "status": "running", "heartbeat_at": "2000-01-01T00:00:00+00:00"})
+
+        async def run():
+            done = asyncio.Event()
+            beating = asyncio.create_task(JobWorker()._heartbeat("j1", done))
+            await asyncio.sleep(0.05)
+            done.set()
+            await beating
+
+        asyncio.run(run())
+        assert job(jobs, "j1")["heartbeat_at"] > "2000-01-01T00:00:00+00:00"
+
+    def test_cancel_queued_and_running_jobs(self, monkeypatch):
+        jobs = use_fake_db(monkeypatch)
+        jobs.docs.append({"id": "queued", "status": "queued", "cancel_requested": False})
+        jobs.docs.append({"id": "running", "status": "running", "cancel_requested": False})
+
+        async def run():
+            await cancel_job("queued")
+            await cancel_job("running")
+
+        asyncio.run(run())
+        assert job(jobs, "queued")["status"] == "cancelled"
+        assert job(jobs, "running")["status"] == "running" and job(jobs, "running")["cancel_requested"]
+
+    def test_progress_and_cancellation_through_route_handler(self, monkeypatch):
+        jobs = use_fake_db(monkeypatch)
+        reached = []
+
+        async def handler(payload):
+            # Route handlers turn unexpected errors into HTTP 500s
+            try:
+                await report_progress("training", 40, "Training", partial={"rows": 10})
+                job(jobs, payload["id"])["cancel_requested"] = True
+                await report_progress("training", 60)
+                reached.append("after cancel")
+            except HTTPException:
+                raise
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+        register_job_handler("test_cancellable", handler)
+        worker = JobWorker()
+
+        async def run():
+            submitted = await submit_job("test_cancellable", {})
+            job(jobs, submitted["id"])["payload"] = {"id": submitted["id"]}
+            await worker.execute(await worker._claim())
+            return submitted["id"]
+
+        job_id = asyncio.run(run())
+        finished = job(jobs, job_id)
+        assert finished["status"] == "cancelled" and not reached
+        assert finished["progress"]["stage"] == "cancelled" and finished["progress"]["percent"] == 60.0
+        assert finished["partial_results"] == {"rows": 10}
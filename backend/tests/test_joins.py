@@ -0,0 +1,86 @@
+"""
+Relational Join Tests
+Key alignment, exact cardinality from keys, pre-filtered hash joins and SQL pushdown
+"""
+import sys
+import os
+import numpy as np
+import pandas as pd
+import pytest
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.relational_service import (
+    align_join_keys, join_cardinality, hash_join, estimate_join_chain, build_join_query, JoinTooLarge
+)
+
+
+def make_tables(n: int = 3000):
+    rng = np.random.default_rng(0)
+    orders = pd.DataFrame({
+        "order_id": np.arange(n),
+        "customer_id": rng.integers(0, 400, n),
+        "amount": rng.normal(100, 20, n),
+    })
+    customers = pd.DataFrame({
+        "customer_id": np.arange(0, 500, 2).astype(str),  # ids loaded as text from another source
+        "region": rng.choice(["north", "south"], 250),
+        "amount": rng.normal(size=250),
+    })
+    return orders, customers
+
+
+class TestJoins:
+    """Test the hash join engine"""
+
+    def test_align_join_keys(self):
+        left, right = align_join_keys(pd.Series([1, 2, 3]), pd.Series(["1", "2", "x"]))
+        assert left.dtype == right.dtype == object
+        left, right = align_join_keys(pd.Series([1, 2, 3]), pd.Series(["1", "2", "3"]))
+        assert pd.api.types.is_integer_dtype(right.dtype) and list(right) == [1, 2, 3]
+        left, right = align_join_keys(pd.Series([1, 2]), pd.Series([1.0, np.nan]))
+        assert left.dtype == right.dtype == np.float64
+
+    @pytest.mark.parametrize("how", ["inner", "left", "right", "outer"])
+    def test_hash_join_matches_merge(self, how):
+        orders, customers = make_tables()
+        result, cardinality = hash_join(orders, customers, "customer_id", "customer_id", how)
+
+        expected = orders.merge(customers.astype({"customer_id": np.int64}), on="customer_id", how=how, suffixes=("_left", "_right"))
+        assert cardinality["rows"] == len(result) == len(expected)
+        sort = ["order_id", "region", "amount_right"]
+        pd.testing.assert_frame_equal(
+            result.sort_values(sort).reset_index(drop=True),
+            expected.sort_values(sort).reset_index(drop=True),
+            check_dtype=False
+        )
+        assert cardinality["right_unique"] and not cardinality["left_unique"]
+
+        with pytest.raises(JoinTooLarge):
+            hash_join(orders, customers, "customer_id", "customer_id", how, max_rows=10)
+
+    def test_chain_estimate_from_keys(self):
+        orders, customers = make_tables()
+        items = pd.DataFrame({"item_order": np.repeat(np.arange(0, 3000, 3), 2)})
+        steps = estimate_join_chain(
+            [orders[["customer_id", "order_id"]], customers[["customer_id"]], items],
+            [("customer_id", "customer_id"), ("order_id", "item_order")]
+        )
+        actual = orders.merge(customers.astype({"customer_id": np.int64}), on="customer_id")
+        assert steps[0]["estimated_rows"] == len(actual)
+        assert steps[1]["left_table"] == 0 and steps[1]["estimated_rows"] > 0
+        assert join_cardinality(pd.Series([1, 1, 2]), pd.Series([1, 1, 3]))["rows"] == 4
+
+    def test_pushdown_query_names_columns_like_merge(self):
+        tables = [
+            {"table_name": "sales.orders", "columns": ["order_id", "customer_id", "amount"]},
+            {"query": "SELECT customer_id, region, amount FROM customers;", "columns": ["customer_id", "region", "amount"]},
+        ]
+        sql = build_join_query("postgresql", tables, [("customer_id", "customer_id")], "left")
+        assert sql == (
+            'SELECT t0."order_id" AS "order_id", t0."customer_id" AS "customer_id", t0."amount" AS "amount_left", '
+            't1."region" AS "region", t1."amount" AS "amount_right" '
+            'FROM sales.orders AS t0 LEFT JOIN (SELECT customer_id, region, amount FROM customers) AS t1 '
+            'ON t0."customer_id" = t1."customer_id"'
+        )
+        assert "COALESCE" in build_join_query("sqlserver", tables, [("customer_id", "customer_id")], "right")
+        assert build_join_query("mysql", tables, [("customer_id", "customer_id")], "outer") is None
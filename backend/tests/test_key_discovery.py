@@ -0,0 +1,72 @@
+"""
+Key Discovery Tests
+Signature-based foreign-key detection across dtypes and its containment estimates
+"""
+import sys
+import os
+import numpy as np
+import pandas as pd
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.key_discovery import KeySignatures, discover_keys
+from app.services.relational_service import detect_foreign_keys
+
+
+def make_tables(n: int = 200000):
+    rng = np.random.default_rng(0)
+    customers = pd.DataFrame({
+        "id": np.arange(50000).astype(str),  # text IDs, as read from a CSV with quoted keys
+        "segment": rng.choice(["retail", "corporate"], 50000),
+        "score": rng.normal(size=50000),
+    })
+    orders = pd.DataFrame({
+        "order_ref": rng.permutation(np.arange(10 ** 6, 10 ** 6 + n)),
+        "customer_id": rng.integers(0, 40000, n).astype(float),
+        "quantity": rng.integers(1, 10, n),
+        "amount": rng.normal(100, 10, n),
+    })
+    return orders, customers
+
+
+class TestKeyDiscovery:
+    """Test signatures and candidate ranking"""
+
+    def test_detects_key_across_dtypes(self):
+        orders, customers = make_tables()
+        assert detect_foreign_keys(orders, customers) == [("customer_id", "id")]
+
+        candidates = discover_keys(KeySignatures.from_frame(orders), KeySignatures.from_frame(customers))
+        best = candidates[0]
+        assert best["name_match"] and best["referenced"] == "right"
+        assert best["left_containment"] > 0.95
+        assert abs(best["right_containment"] - 40000 / 50000) < 0.08
+
+    def test_signatures_skip_measures(self):
+        orders, _ = make_tables(5000)
+        signatures = KeySignatures.from_frame(orders)
+        assert signatures.columns == ["order_ref", "customer_id", "quantity"]
+        assert signatures.distinct[2] == 9 and signatures.unique(0)
+        assert abs(signatures.distinct[1] - orders["customer_id"].nunique()) / orders["customer_id"].nunique() < 0.1
+
+    def test_value_match_needs_unique_key(self):
+        rng = np.random.default_rng(1)
+        events = pd.DataFrame({"device": rng.integers(0, 300, 20000), "level": rng.integers(0, 5, 20000)})
+        devices = pd.DataFrame({"serial": np.arange(300), "tier": rng.integers(0, 5, 300)})
+        pairs = [(c["left"], c["right"]) for c in discover_keys(KeySignatures.from_frame(events), KeySignatures.from_frame(devices))]
+        assert pairs == [("device", "serial")]
+
+    def test_measures_do_not_match_id_columns(self):
+        rng = np.random.default_rng(2)
+        customers = pd.DataFrame({
+            "id": np.arange(1, 1001),
+            "zip": rng.integers(10000, 100000, 1000),
+            "score": rng.integers(0, 100, 1000),
+        })
+        orders = pd.DataFrame({
+            "order_id": np.arange(1, 5001),
+            "customer_id": rng.integers(1, 1001, 5000),
+            "quantity": rng.integers(1, 60, 5000),
+            "age": rng.integers(18, 90, 5000),
+        })
+        pairs = [(c["left"], c["right"]) for c in discover_keys(KeySignatures.from_frame(orders), KeySignatures.from_frame(customers))]
+        assert pairs == [("customer_id", "id")]
@@ -0,0 +1,68 @@
+"""
+Model Registry Tests
+Native-format round trips and scoring raw rows with the training preprocessing
+"""
+import sys
+import os
+import numpy as np
+import pandas as pd
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import lightgbm as lgb
+import xgboost as xgb
+from sklearn.linear_model import LogisticRegression
+
+from app.services.model_registry import serialize_model, deserialize_model, prepare_features, RegisteredModel
+
+
+def make_data(n: int = 300):
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({"a": rng.normal(size=n), "b": rng.normal(size=n)})
+    return X, (X["a"] + X["b"] > 0).astype(int).to_numpy()
+
+
+class TestModelRegistry:
+    """Test model serialization and scoring"""
+
+    def test_native_round_trips(self):
+        X, y = make_data()
+        for estimator, fmt in [
+            (xgb.XGBClassifier(n_estimators=10), "xgboost"),
+            (lgb.LGBMClassifier(n_estimators=10, verbose=-1), "lightgbm"),
+            (LogisticRegression(), "joblib"),
+        ]:
+            estimator.fit(X, y)
+            stored_format, payload, details = serialize_model(estimator)
+            assert stored_format == fmt
+            loaded = deserialize_model(stored_format, payload, details)
+            np.testing.assert_allclose(loaded.predict_proba(X), estimator.predict_proba(X), rtol=1e-5)
+            np.testing.assert_array_equal(loaded.predict(X), estimator.predict(X))
+
+    def test_prepare_features(self):
+        preprocessing = {
+            "numeric": ["a"],
+            "categorical": {"city": [["city_Lyon", "Lyon"], ["city_Paris", "Paris"]]},
+            "feature_columns": ["a", "city_Lyon", "city_Paris"],
+            "fill_values": {"a": 2.5},
+        }
+        frame = pd.DataFrame({"a": ["1", None, "x"], "city": ["Paris", "Berlin", "Lyon"]})
+        X = prepare_features(frame, preprocessing)
+        assert X.columns.tolist() == preprocessing["feature_columns"]
+        assert X["a"].tolist() == [1.0, 2.5, 2.5]
+        # Unseen categories encode as the dropped baseline
+        assert X[["city_Lyon", "city_Paris"]].values.tolist() == [[0, 1], [0, 0], [1, 0]]
+
+    def test_classification_labels_decoded(self):
+        X, y = make_data()
+        estimator = LogisticRegression().fit(X, y)
+        record = {
+            "id": "m1",
+            "problem_type": "classification",
+            "preprocessing": {
+                "numeric": ["a", "b"], "categorical": {}, "feature_columns": ["a", "b"], "fill_values": {},
+                "target": {"column": "label", "class_labels": ["no", "yes"], "encoded": True},
+            },
+        }
+        result = RegisteredModel(record, estimator).predict(pd.DataFrame({"a": [3.0, -3.0], "b": [1.0, -1.0]}))
+        assert result["predictions"] == ["yes", "no"]
+        assert set(result["probabilities"][0]) == {"no", "yes"} and result["probabilities"][0]["yes"] > 0.9
@@ -0,0 +1,159 @@
+"""
+Parallel Training Tests
+Candidates fitted concurrently within the CPU budget give the serial results
+"""
+import sys
+import os
+import numpy as np
+import pandas as pd
+import pytest
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from joblib import Parallel
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression, LogisticRegression
+from sklearn.tree import DecisionTreeRegressor
+
+from app.services import ml_service
+from app.services.ml_service import plan_training, train_candidates, train_models_multi_target, _fit_regression_candidate
+
+
+class RecordingParallel(Parallel):
+    """joblib.Parallel remembering the worker count it was asked for"""
+
+    n_jobs_seen = []
+
+    def __init__(self, n_jobs=None, **kwargs):
+        RecordingParallel.n_jobs_seen.append(n_jobs)
+        super().__init__(n_jobs=n_jobs, **kwargs)
+
+
+def make_candidates():
+    return {
+        "Linear Regression": LinearRegression(),
+        "Decision Tree": DecisionTreeRegressor(max_depth=6, random_state=0),
+        "Random Forest": RandomForestRegressor(n_estimators=20, max_depth=6, random_state=0, n_jobs=-1),
+    }
+
+
+def make_fit_args(n: int = 2000):
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(n, 3)), columns=["a", "b", "c"])
+    y = pd.Series(3 * X["a"] - X["b"] ** 2 + rng.normal(size=n) * 0.1, name="y")
+    split = int(n * 0.8)
+    return (X.iloc[:split], X.iloc[split:], y.iloc[:split], y.iloc[split:], ["a", "b", "c"], "y")
+
+
+def make_targets_frame(n: int = 1500):
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame(rng.normal(size=(n, 3)), columns=["a", "b", "c"])
+    df["city"] = rng.choice(["Lyon", "Paris", "Nice"], size=n)
+    df["y1"] = 2 * df["a"] + (df["city"] == "Paris") + rng.normal(size=n) * 0.1
+    df["y2"] = df["b"] - df["c"] + rng.normal(size=n) * 0.1
+    return df
+
+
+def by_name(results):
+    return {result["model_name"]: result for result in results}
+
+
+class TestParallelTraining:
+
+    def test_parallel_matches_serial(self, monkeypatch):
+        monkeypatch.setattr(ml_service, "PARALLEL_TRAINING_MIN_ROWS", 0)
+        monkeypatch.setattr(ml_service, "Parallel", RecordingParallel)
+        RecordingParallel.n_jobs_seen = []
+        fit_args = make_fit_args()
+
+        serial = by_name(train_candidates(_fit_regression_candidate, make_candidates(), fit_args, n_rows=1600, cpu_budget=1))
+        parallel = by_name(train_candidates(_fit_regression_candidate, make_candidates(), fit_args, n_rows=1600, cpu_budget=3))
+        assert RecordingParallel.n_jobs_seen == [3]
+        assert set(serial) == set(parallel) == set(make_candidates())
+        for name in serial:
+            assert np.isclose(serial[name]["r2_score"], parallel[name]["r2_score"])
+            assert np.isclose(serial[name]["rmse"], parallel[name]["rmse"])
+
+    def test_cpu_budget_caps_concurrency(self, monkeypatch):
+        monkeypatch.setattr(ml_service, "PARALLEL_TRAINING_MIN_ROWS", 1000)
+        assert plan_training(5000, 5, cpu_budget=4) == (4, 1)
+        assert plan_training(5000, 2, cpu_budget=8) == (2, 4)
+        assert plan_training(500, 5, cpu_budget=8) == (1, 8)
+        assert plan_training(5000, 5, cpu_budget=1) == (1, 1)
+        # Without an explicit budget a run gets its share of the machine's cores
+        monkeypatch.setattr(ml_service, "TRAINING_RUN_CPU_BUDGET", 3)
+        assert plan_training(5000, 5) == (3, 1)
+
+        monkeypatch.setattr(ml_service, "Parallel", RecordingParallel)
+        RecordingParallel.n_jobs_seen = []
+        candidates = make_candidates()
+        train_candidates(_fit_regression_candidate, candidates, make_fit_args(), n_rows=1600, cpu_budget=2)
+        assert RecordingParallel.n_jobs_seen == [2]
+        # Multi-threaded estimators share what is left of the budget
+        assert candidates["Random Forest"].get_params()["n_jobs"] == 1
+
+    @pytest.mark.parametrize("cpu_budget", [1, 2])
+    def test_failing_candidate_dropped_and_callback_per_candidate(self, monkeypatch, cpu_budget):
+        monkeypatch.setattr(ml_service, "PARALLEL_TRAINING_MIN_ROWS", 0)
+        candidates = {**make_candidates(), "Logistic Regression": LogisticRegression()}
+        trained = []
+        results = train_candidates(
+            _fit_regression_candidate, candidates, make_fit_args(), n_rows=1600,
+            on_model_trained=trained.append, cpu_budget=cpu_budget
+        )
+        # A classifier cannot fit the continuous target
+        assert sorted(result["model_name"] for result in results) == sorted(make_candidates())
+        assert sorted(result["model_name"] for result in trained) == sorted(make_candidates())
+        assert all("estimator" not in result for result in trained)
+
+    def test_targets_share_one_feature_matrix(self, monkeypatch):
+        seen = []
+        train_target = ml_service._train_target
+
+        def recording_train_target(target_column, feature_cols, target, X_values, **kwargs):
+            seen.append((target_column, X_values))
+            return train_target(target_column, feature_cols, target, X_values, **kwargs)
+
+        df = make_targets_frame()
+        targets = {"y1": {"numeric": ["a", "b"], "categorical": ["city"]}, "y2": None}
+        monkeypatch.setattr(ml_service, "_train_target", recording_train_target)
+        sequential = train_models_multi_target(df, targets, problem_type="regression", cpu_budget=1)
+        assert [target for target, _ in seen] == ["y1", "y2"]
+        # One numpy matrix (memory-mapped by joblib for loky workers) serves every target
+        assert seen[0][1] is seen[1][1] and isinstance(seen[0][1], np.ndarray)
+        assert seen[0][1].shape == (len(df), 6)
+
+        monkeypatch.setattr(ml_service, "_train_target", train_target)
+        monkeypatch.setattr(ml_service, "PARALLEL_TRAINING_MIN_ROWS", 0)
+        monkeypatch.setattr(ml_service, "Parallel", RecordingParallel)
+        RecordingParallel.n_jobs_seen = []
+        parallel = train_models_multi_target(df, targets, problem_type="regression", cpu_budget=2)
+        assert RecordingParallel.n_jobs_seen[0] == 2
+        for target in targets:
+            expected = {model["model_name"]: model["r2_score"] for model in sequential[target]["models"]}
+            actual = {model["model_name"]: model["r2_score"] for model in parallel[target]["models"]}
+            assert expected.keys() == actual.keys()
+            assert all(np.isclose(expected[name], actual[name]) for name in expected)
+
+    def test_shared_split_keeps_rare_classes_in_training_rows(self, monkeypatch):
+        splits = []
+        train_target = ml_service._train_target
+
+        def recording_train_target(target_column, feature_cols, target, X_values, **kwargs):
+            splits.append(kwargs["train_idx"])
+            return train_target(target_column, feature_cols, target, X_values, **kwargs)
+
+        df = make_targets_frame(300)
+        df["segment"] = np.where(df["a"] > 0, "high", "low")
+        rare_rows = [10, 20]
+        df.loc[rare_rows, "segment"] = "rare"
+        monkeypatch.setattr(ml_service, "_train_target", recording_train_target)
+        results = train_models_multi_target(df, {"y2": None, "segment": {"numeric": ["a", "b", "c"]}}, cpu_budget=1)
+
+        assert set(rare_rows) & set(splits[0])
+        assert "error" not in results["segment"] and "error" not in results["y2"]
+        assert "XGBoost" in {model["model_name"] for model in results["segment"]["models"]}
+
+        # A class with a single row cannot be stratified; the split falls back to a plain one
+        df.loc[20, "segment"] = "high"
+        train_idx, test_idx = ml_service._shared_split(len(df), [df["segment"]], "auto", 0.2, 42)
+        assert len(train_idx) + len(test_idx) == len(df)
@@ -0,0 +1,93 @@
+"""
+Online Prediction Tests
+Micro-batching of concurrent requests and input validation against the model schema
+"""
+import sys
+import os
+import asyncio
+import numpy as np
+import pandas as pd
+import pytest
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sklearn.linear_model import LinearRegression
+
+from app.services.model_registry import RegisteredModel
+from app.services.prediction_service import PredictionBatcher, PredictionInputError, validate_rows, input_schema
+
+
+class FakeRegistry:
+    def __init__(self, model: RegisteredModel):
+        self.model = model
+
+    async def load(self, model_id: str) -> RegisteredModel:
+        if model_id != self.model.id:
+            raise KeyError(model_id)
+        return self.model
+
+    def resident(self):
+        return [self.model.id]
+
+
+class PickyRegression(LinearRegression):
+    """Fails on a = 13, like a model hitting a value it cannot score"""
+
+    def predict(self, X):
+        if (X["a"] == 13).any():
+            raise ValueError("cannot score a = 13")
+        return super().predict(X)
+
+
+def make_model(estimator_class=LinearRegression) -> RegisteredModel:
+    X = pd.DataFrame({"a": np.arange(20.0), "city_Paris": np.arange(20) % 2})
+    estimator = estimator_class().fit(X, 2 * X["a"] + 10 * X["city_Paris"])
+    record = {
+        "id": "m1",
+        "problem_type": "regression",
+        "preprocessing": {
+            "numeric": ["a"], "categorical": {"city": [["city_Paris", "Paris"]]},
+            "feature_columns": ["a", "city_Paris"], "fill_values": {"a": 0.0}, "target": {"column": "y"},
+        },
+    }
+    return RegisteredModel(record, estimator)
+
+
+class TestPredictionBatching:
+    """Test batched online scoring"""
+
+    def test_concurrent_requests_share_a_batch(self):
+        batcher = PredictionBatcher(FakeRegistry(make_model()), wait_ms=20, max_rows=1000)
+
+        async def run():
+            requests = [batcher.predict("m1", [{"a": i, "city": "Paris" if i % 2 else "Lyon"}]) for i in range(50)]
+            return await asyncio.gather(*requests)
+
+        results = asyncio.run(run())
+        assert [round(r["predictions"][0], 6) for r in results] == [2 * i + 10 * (i % 2) for i in range(50)]
+        stats = batcher.stats()
+        assert stats["models"]["m1"]["batches"] == 1 and stats["requests"] == 50
+
+    def test_inputs_validated_against_schema(self):
+        schema = input_schema(make_model().record)
+        assert schema == {"a": "numeric", "city": "categorical"}
+        assert validate_rows([{"a": "1.5", "city": None, "extra": 1}], schema) == []
+        errors = validate_rows([{"a": "x", "city": "Paris"}, {"city": "Lyon"}], schema)
+        assert errors == ["row 0: non-numeric value for a", "row 1: missing a"]
+
+        batcher = PredictionBatcher(FakeRegistry(make_model()))
+        with pytest.raises(PredictionInputError):
+            asyncio.run(batcher.predict("m1", [{"a": True, "city": "Paris"}]))
+        with pytest.raises(KeyError):
+            asyncio.run(batcher.predict("unknown", [{"a": 1, "city": "Paris"}]))
+
+    def test_failing_request_does_not_fail_its_batch(self):
+        batcher = PredictionBatcher(FakeRegistry(make_model(PickyRegression)), wait_ms=20, max_rows=1000)
+
+        async def run():
+            requests = [batcher.predict("m1", [{"a": i, "city": "Lyon"}]) for i in range(20)]
+            return await asyncio.gather(*requests, return_exceptions=True)
+
+        results = asyncio.run(run())
+        assert isinstance(results[13], ValueError)
+        assert [round(r["predictions"][0], 6) for i, r in enumerate(results) if i != 13] == [2 * i for i in range(20) if i != 13]
+        assert batcher.stats()["models"]["m1"]["errors"] == 1
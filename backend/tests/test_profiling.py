@@ -0,0 +1,151 @@
+"""
+Profiling Engine Tests
+Vectorized profile statistics against pandas, incremental profiles, and sketch accuracy
+"""
+import sys
+import os
+import json
+import numpy as np
+import pandas as pd
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.profiling_service import profile_dataframe, ProfileAccumulator, changed_columns, refresh_profile
+from app.services.profile_store import compact_profile, expand_profile
+from app.services.sketches import HyperLogLog, TDigest
+
+
+def make_frame(n: int = 2000) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "value": rng.normal(size=n),
+        "count": rng.integers(0, 40, n),
+        "empty": np.nan,
+        "city": rng.choice(["Paris", "Lyon", None], n),
+        "flag": rng.random(n) < 0.3,
+    })
+    df.loc[::9, "value"] = np.nan
+    return pd.concat([df, df.iloc[:15]], ignore_index=True)
+
+
+def same_profile(left: dict, right: dict) -> bool:
+    # NaN statistics compare equal once serialized
+    return json.dumps(left, sort_keys=True, default=str) == json.dumps(right, sort_keys=True, default=str)
+
+
+class TestProfiling:
+    """Test profile statistics"""
+
+    def test_numeric_stats_match_pandas(self):
+        df = make_frame()
+        profile = profile_dataframe(df, approximate=False)
+        columns = {info["name"]: info for info in profile["columns"]}
+        stats = columns["value"]["stats"]
+        assert columns["value"]["missing_count"] == int(df["value"].isnull().sum())
+        assert columns["value"]["unique_count"] == df["value"].nunique()
+        assert np.isclose(stats["mean"], df["value"].mean())
+        assert np.isclose(stats["std"], df["value"].std())
+        assert np.isclose(stats["median"], df["value"].median())
+        assert np.isclose(stats["q75"], df["value"].quantile(0.75))
+        assert profile["numeric_summary"]["count"]["50%"] == df["count"].median()
+        assert columns["empty"]["stats"]["mean"] is None
+
+    def test_categorical_and_row_level_stats(self):
+        df = make_frame()
+        profile = profile_dataframe(df, approximate=False)
+        columns = {info["name"]: info for info in profile["columns"]}
+        assert columns["city"]["missing_count"] == int(df["city"].isnull().sum())
+        assert columns["city"]["unique_count"] == 2
+        assert columns["flag"]["stats"] is None
+        assert "flag" not in profile["numeric_summary"]
+        assert profile["categorical_summary"]["city"] == df["city"].value_counts().head(10).to_dict()
+        assert profile["duplicate_rows"] == int(df.duplicated().sum())
+        assert profile["missing_values_total"] == int(df.isnull().sum().sum())
+
+    def test_approximate_mode_close_to_exact(self):
+        df = make_frame(20000)
+        exact = {info["name"]: info for info in profile_dataframe(df, approximate=False)["columns"]}
+        approx_profile = profile_dataframe(df, approximate=True)
+        approx = {info["name"]: info for info in approx_profile["columns"]}
+        assert approx_profile["approximate"] is True
+        assert abs(approx["value"]["unique_count"] - exact["value"]["unique_count"]) / exact["value"]["unique_count"] < 0.03
+        assert abs(approx["value"]["stats"]["median"] - exact["value"]["stats"]["median"]) < 0.02
+
+
+class TestIncrementalProfiles:
+    """Test accumulated, stored and refreshed profiles"""
+
+    def test_small_accumulated_profile_is_exact(self):
+        df = make_frame()
+        accumulator = ProfileAccumulator()
+        for start in range(0, len(df), 700):
+            accumulator.add(df.iloc[start:start + 700])
+        assert same_profile(accumulator.to_profile(), profile_dataframe(df, approximate=False))
+
+    def test_running_state_survives_serialization(self):
+        df = make_frame(20000)
+        accumulator = ProfileAccumulator(exact_max_rows=0)
+        accumulator.add(df.iloc[:12000])
+        resumed = ProfileAccumulator.from_bytes(accumulator.to_bytes())
+        resumed.add(df.iloc[12000:])
+        profile = resumed.to_profile()
+        columns = {info["name"]: info for info in profile["columns"]}
+        assert profile["approximate"] is True
+        assert profile["duplicate_rows"] == int(df.duplicated().sum())
+        assert columns["value"]["missing_count"] == int(df["value"].isnull().sum())
+        assert np.isclose(columns["value"]["stats"]["mean"], df["value"].mean())
+        assert np.isclose(columns["value"]["stats"]["std"], df["value"].std())
+        assert abs(columns["value"]["stats"]["median"] - df["value"].median()) < 0.02
+        assert profile["categorical_summary"]["city"] == df["city"].value_counts().to_dict()
+
+    def test_retained_rows_bounded_during_ingest(self):
+        df = make_frame(20000)
+        chunk_bytes = df.iloc[:1000].memory_usage(index=False, deep=True).sum()
+        accumulator = ProfileAccumulator(exact_max_rows=100000, exact_max_bytes=int(2.5 * chunk_bytes))
+        switched_at = None
+        for start in range(0, len(df), 1000):
+            accumulator.add(df.iloc[start:start + 1000])
+            assert accumulator.retained_bytes < 2.5 * chunk_bytes
+            if switched_at is None and not accumulator.exact:
+                switched_at = accumulator.n_rows
+        # Retention stops at the first chunk past the byte cap, then running sketches take over
+        assert switched_at == 3000
+        profile = accumulator.to_profile()
+        assert profile["approximate"] is True and profile["row_count"] == len(df)
+        assert profile["duplicate_rows"] == int(df.duplicated().sum())
+
+    def test_refresh_only_changed_columns(self):
+        df = make_frame()
+        cleaned = df.copy()
+        cleaned["value"] = cleaned["value"].fillna(0.0)
+        columns = changed_columns(df, cleaned)
+        assert columns == ["value"]
+        refreshed = refresh_profile(profile_dataframe(df, approximate=False), cleaned, columns)
+        assert same_profile(refreshed, profile_dataframe(cleaned, approximate=False))
+        assert changed_columns(df, cleaned.iloc[1:]) is None
+
+    def test_stored_profile_round_trip(self):
+        profile = profile_dataframe(make_frame(), approximate=False)
+        stored = compact_profile(profile)
+        assert "columns_info" not in stored
+        assert same_profile(expand_profile(stored), profile)
+
+
+class TestSketches:
+    """Test mergeable sketches"""
+
+    def test_hyperloglog_merge(self):
+        left, right = HyperLogLog(), HyperLogLog()
+        left.add(pd.Series(np.arange(0, 60000)))
+        right.add(pd.Series(np.arange(40000, 100000)))
+        merged = HyperLogLog.from_dict(left.to_dict()).merge(right)
+        assert abs(merged.count() - 100000) / 100000 < 0.03
+
+    def test_tdigest_merge_quantiles(self):
+        values = np.random.default_rng(1).normal(size=200000)
+        first, second = TDigest(), TDigest()
+        first.update(values[:100000])
+        second.update(values[100000:])
+        merged = TDigest.from_dict(first.to_dict()).merge(second)
+        for q in (0.01, 0.5, 0.99):
+            assert abs(merged.quantile(q) - np.quantile(values, q)) < 0.02
+        assert merged.quantile(0) == values.min()
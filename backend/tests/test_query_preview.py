@@ -0,0 +1,67 @@
+"""
+Query Preview Tests
+Previews fetch only their rows from the database cursor
+"""
+import sys
+import os
+import asyncio
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.database import connections
+from app.database.connection_pool import ConnectionPoolManager
+from app.routes.datasource import execute_query_preview, QUERY_PREVIEW_ROWS
+
+
+class FakeCursor:
+    description = [("id",), ("name",)]
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query):
+        self.position = 0
+
+    def fetchmany(self, size):
+        rows = [(i, f"row {i}") for i in range(self.position, min(self.position + size, self.conn.total_rows))]
+        self.position += len(rows)
+        self.conn.rows_read += len(rows)
+        return rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, total_rows: int):
+        self.total_rows = total_rows
+        self.rows_read = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def preview(monkeypatch, total_rows: int):
+    conn = FakeConnection(total_rows)
+    monkeypatch.setattr(connections, "connection_pools", ConnectionPoolManager(factory=lambda source_type, config: conn))
+    result = asyncio.run(execute_query_preview({"db_type": "sqlserver", "query": "SELECT id, name FROM events", "host": "db"}))
+    return result, conn
+
+
+class TestQueryPreview:
+
+    def test_large_result_stops_after_preview_rows(self, monkeypatch):
+        result, conn = preview(monkeypatch, 1_000_000)
+        assert result["row_count"] == QUERY_PREVIEW_ROWS and result["has_more"] is True
+        assert result["columns"] == ["id", "name"] and result["data_preview"][0] == {"id": 0, "name": "row 0"}
+        # One row past the preview tells that there are more
+        assert conn.rows_read == QUERY_PREVIEW_ROWS + 1
+
+    def test_small_result_is_complete(self, monkeypatch):
+        result, conn = preview(monkeypatch, 3)
+        assert result["row_count"] == 3 and result["has_more"] is False
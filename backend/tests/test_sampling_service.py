@@ -0,0 +1,84 @@
+"""
+Sampling Service Tests
+Stratified, time-aware, reservoir and join-key sampling
+"""
+import sys
+import os
+import numpy as np
+import pandas as pd
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.sampling_service import (
+    _allocate, stratified_sample, time_aware_sample, reservoir_sample, key_sample, sample_for_analysis
+)
+
+
+def make_frame(n: int = 20000) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "a": rng.normal(size=n),
+        "b": rng.normal(size=n),
+        "ts": pd.date_range("2021-01-01", periods=n, freq="h"),
+        "label": np.where(rng.random(n) < 0.01, "rare", "common"),
+    })
+    df["y"] = df["a"] * 2 + rng.normal(size=n) * 0.1
+    return df
+
+
+class TestSampling:
+    """Test sampling strategies"""
+
+    def test_stratified_sample_keeps_rare_class(self):
+        df = make_frame()
+        sample = stratified_sample(df, "label", 1000)
+        assert len(sample) == 1000
+        rare_share = (sample["label"] == "rare").mean()
+        assert abs(rare_share - (df["label"] == "rare").mean()) < 0.005
+
+    def test_allocation_never_exceeds_sample_size(self):
+        counts = np.array([500, 3, 2, 1, 1, 1, 1, 1])
+        assert _allocate(counts, 10).sum() == 10
+        assert _allocate(counts, 10).min() == 1
+        # Fewer rows than strata: one row for each of the largest strata
+        assert _allocate(counts, 3).tolist() == [1, 1, 1, 0, 0, 0, 0, 0]
+
+        df = pd.DataFrame({"label": [f"class_{i}" for i in range(40)] * 5 + ["common"] * 800})
+        sample = stratified_sample(df, "label", 25)
+        assert len(sample) == 25 and (sample["label"] == "common").any()
+
+    def test_time_aware_sample_covers_whole_range(self):
+        df = make_frame().sample(frac=1, random_state=1)
+        sample = time_aware_sample(df, "ts", 50)
+        assert len(sample) == 50
+        assert sample["ts"].is_monotonic_increasing
+        assert sample["ts"].iloc[0] == df["ts"].min()
+        assert sample["ts"].iloc[-1] == df["ts"].max()
+
+    def test_reservoir_sample_is_uniform_over_stream(self):
+        df = pd.DataFrame({"pos": np.arange(50000)})
+        chunks = (df.iloc[start:start + 4000] for start in range(0, len(df), 4000))
+        sample, rows_seen = reservoir_sample(chunks, 2000)
+        assert rows_seen == 50000
+        assert len(sample) == 2000
+        assert sample["pos"].is_unique
+        assert abs(sample["pos"].mean() - 25000) < 1500
+
+    def test_key_sample_keeps_same_keys_on_both_sides(self):
+        left = pd.DataFrame({"id": np.arange(10000)})
+        right = pd.DataFrame({"customer_id": np.repeat(np.arange(10000), 3).astype(float)})
+        left_sample = key_sample(left, "id", 0.1)
+        right_sample = key_sample(right, "customer_id", 0.1)
+        assert set(right_sample["customer_id"].astype(int)) == set(left_sample["id"])
+
+    def test_small_dataset_not_sampled(self):
+        df = make_frame(500)
+        sample, info = sample_for_analysis(df, "y")
+        assert sample is df
+        assert info["sampled"] is False
+
+    def test_sampling_strategy_reported(self):
+        df = make_frame()
+        sample, info = sample_for_analysis(df, "label", sample_size=3000)
+        assert info["sampled"] is True
+        assert info["strategy"] == "stratified"
+        assert info["sample_size"] == len(sample) == 3000
@@ -0,0 +1,43 @@
+"""
+Storage Planner Tests
+Single-encoding tier decisions and dtype-based DataFrame sizing
+"""
+import sys
+import os
+import bson
+import numpy as np
+import pandas as pd
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.storage_planner import plan_document, decode_document, estimate_frame_bytes, TIER_GRIDFS
+
+
+class TestStoragePlanner:
+    """Test storage plans and size estimates"""
+
+    def test_plan_reuses_the_encoding(self):
+        document = {"analysis_data": {"models": [{"name": "rf", "r2": 0.91}] * 50}, "chat_history": [{"role": "user"}]}
+        plan = plan_document(document, inline_max_bytes=1024 * 1024)
+        assert plan.inline and plan.size == len(bson.encode(document))
+
+        # Inline fields are raw slices of the payload: embedding them re-encodes nothing
+        fields = plan.fields()
+        embedded = bson.encode({"id": "s1", "analysis_data": fields["analysis_data"], "chat_history": fields["chat_history"]})
+        assert bson.decode(embedded) == {"id": "s1", **document}
+
+        spilled = plan_document(document, inline_max_bytes=100)
+        assert spilled.tier == TIER_GRIDFS
+        assert decode_document(spilled.payload) == document
+
+    def test_frame_estimate_close_to_deep_scan(self):
+        rng = np.random.default_rng(0)
+        n = 200000
+        df = pd.DataFrame({
+            "x": rng.normal(size=n),
+            "n": rng.integers(0, 100, n),
+            "city": rng.choice(["Paris", "Lyon", "Marseille"], n).astype(object),
+            "grade": pd.Categorical(rng.choice(["a", "b"], n)),
+        })
+        exact = int(df.memory_usage(deep=True).sum())
+        assert abs(estimate_frame_bytes(df) - exact) / exact < 0.02
+        assert estimate_frame_bytes(df.head(10)) == int(df.head(10).memory_usage(deep=True).sum())
@@ -0,0 +1,102 @@
+"""
+Streaming Statistics Tests
+Mergeable moments, heavy hitters and covariance, and chunked profiling/correlation
+"""
+import sys
+import os
+import asyncio
+import numpy as np
+import pandas as pd
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.sketches import RunningMoments, HeavyHitters, StreamingCovariance
+from app.services.profiling_service import ProfileAccumulator
+from app.services.streaming_stats import stream_statistics
+from app.services.data_service import get_correlation_matrix
+
+
+def make_frame(n: int = 30000) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "big": 1e9 + rng.normal(size=n),
+        "x": rng.normal(size=n),
+        "city": rng.choice(["Paris", "Lyon", "Nice"], n, p=[0.6, 0.3, 0.1]),
+    })
+    df["y"] = df["x"] * 3 + rng.normal(size=n)
+    df.loc[::7, "y"] = np.nan
+    return df
+
+
+def chunks_of(df: pd.DataFrame, size: int = 4000):
+    return [df.iloc[start:start + size] for start in range(0, len(df), size)]
+
+
+class TestMergeableSummaries:
+    """Test sketch merges against exact results"""
+
+    def test_running_moments_merge(self):
+        df = make_frame()
+        columns = ["big", "x", "y"]
+        merged = RunningMoments((3,))
+        for chunk in chunks_of(df):
+            part = RunningMoments((3,))
+            part.update(chunk[columns].to_numpy())
+            merged.merge(part)
+        assert np.allclose(merged.mean, df[columns].mean())
+        assert np.allclose(np.sqrt(merged.variance), df[columns].std())
+        assert merged.missing.tolist() == df[columns].isnull().sum().tolist()
+
+    def test_covariance_matches_pandas_with_missing_values(self):
+        df = make_frame()
+        columns = ["big", "x", "y"]
+        parts = []
+        for chunk in chunks_of(df):
+            part = StreamingCovariance(3)
+            part.update(chunk[columns].to_numpy())
+            parts.append(part)
+        merged = parts[0]
+        for part in parts[1:]:
+            merged.merge(part)
+        assert np.allclose(merged.correlation(), df[columns].corr().to_numpy(), atol=1e-9)
+        assert np.allclose(merged.covariance(), df[columns].cov().to_numpy(), atol=1e-7)
+
+    def test_heavy_hitters_bound(self):
+        values = pd.Series(np.concatenate([np.repeat(["a", "b"], [5000, 3000]), np.arange(20000).astype(str)]))
+        hitters = HeavyHitters(capacity=100)
+        for start in range(0, len(values), 1000):
+            hitters.update_counts(values.iloc[start:start + 1000].value_counts())
+        top = hitters.top(2)
+        assert top.index.tolist() == ["a", "b"]
+        assert 5000 - hitters.floor <= top["a"] <= 5000
+        assert not hitters.exact
+
+    def test_profile_accumulators_merge(self):
+        df = make_frame()
+        merged = ProfileAccumulator(exact_max_rows=0)
+        for chunk in chunks_of(pd.concat([df, df.iloc[:50]])):
+            part = ProfileAccumulator(exact_max_rows=0)
+            part.add(chunk)
+            merged.merge(part)
+        profile = merged.to_profile()
+        assert profile["row_count"] == len(df) + 50
+        assert profile["duplicate_rows"] == 50
+        assert profile["categorical_summary"]["city"] == (
+            pd.concat([df, df.iloc[:50]])["city"].value_counts().to_dict()
+        )
+
+
+class TestStreamStatistics:
+    """Test chunked profiling and correlation"""
+
+    def test_stream_matches_in_memory(self):
+        df = make_frame()
+        result = asyncio.run(stream_statistics(chunks_of(df), workers=2))
+        assert result["row_count"] == len(df)
+        assert result["chunk_count"] == len(chunks_of(df))
+        expected = get_correlation_matrix(df)
+        assert [(c["feature1"], c["feature2"]) for c in result["correlations"]["correlations"]] == \
+            [(c["feature1"], c["feature2"]) for c in expected["correlations"]]
+        assert np.isclose(result["correlations"]["matrix"]["y"]["x"], expected["matrix"]["y"]["x"])
+        columns = {info["name"]: info for info in result["profile"]["columns"]}
+        assert columns["y"]["missing_count"] == int(df["y"].isnull().sum())
+        assert np.isclose(columns["big"]["stats"]["mean"], df["big"].mean())
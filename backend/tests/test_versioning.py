@@ -0,0 +1,84 @@
+"""
+Dataset Versioning Tests
+Copy-on-write versions that share column files with their base, and reference-aware deletion
+"""
+import sys
+import os
+import asyncio
+import numpy as np
+import pandas as pd
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.database import dataset_storage
+from app.database.dataset_storage import (
+    DatasetWriter, read_dataframe, delete_dataset_storage, storage_file_keys
+)
+from app.services.ingest_service import ingest_derived, rewritten_columns
+
+
+def make_frame(n: int = 5000) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "a": rng.normal(size=n),
+        "b": rng.integers(0, 9, n),
+        "c": rng.choice(["x", "y"], n),
+    })
+    df.loc[::5, "a"] = np.nan
+    return df
+
+
+async def store(dataset_id: str, df: pd.DataFrame) -> dict:
+    writer = DatasetWriter(dataset_id, backend="local", chunk_rows=2000)
+    await writer.write(df)
+    return {"id": dataset_id, "columns": list(df.columns), **writer.manifest()}
+
+
+def stored_files(root) -> set:
+    return {os.path.relpath(os.path.join(d, f), root) for d, _, files in os.walk(root) for f in files}
+
+
+class TestCopyOnWriteVersions:
+    """Test derived versions in local storage"""
+
+    def test_derived_version_shares_unchanged_columns(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(dataset_storage, "DATASET_STORAGE_DIR", str(tmp_path))
+        df = make_frame()
+
+        async def run():
+            base = await store("base", df)
+            cleaned = df.fillna({"a": 0.0}).drop(columns=["b"])
+            changed = rewritten_columns(df, cleaned)
+            assert changed == ["a"]
+            derived = {"id": "base", **await ingest_derived("base", base, cleaned, changed)}
+
+            # Only the changed column is stored again, once per base part
+            assert len(stored_files(tmp_path)) == 2 * len(base["chunks"])
+            assert derived["shared_size"] == base["storage_size"]
+            pd.testing.assert_frame_equal(await read_dataframe(derived), cleaned)
+            pd.testing.assert_frame_equal(await read_dataframe(derived, ["c", "a"]), cleaned[["c", "a"]])
+            pd.testing.assert_frame_equal(await read_dataframe(base), df)
+
+            # Dropping the old version leaves the files the new one still reads
+            await delete_dataset_storage(base, keep=set(storage_file_keys(derived)))
+            assert len(stored_files(tmp_path)) == 2 * len(base["chunks"])
+            pd.testing.assert_frame_equal(await read_dataframe(derived), cleaned)
+
+        asyncio.run(run())
+
+    def test_derived_dataset_reads_base_files(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(dataset_storage, "DATASET_STORAGE_DIR", str(tmp_path))
+        df = make_frame()
+
+        async def run():
+            base = await store("left", df)
+            joined = df.merge(pd.DataFrame({"b": range(9), "label": list("abcdefghi")}), on="b", how="left")
+            derived = {"id": "joined", **await ingest_derived("joined", base, joined, rewritten_columns(df, joined))}
+            pd.testing.assert_frame_equal(await read_dataframe(derived), joined)
+            assert {entry.get("owner") for chunk in derived["chunks"] for entry in chunk["files"]} == {"left", "joined"}
+
+        asyncio.run(run())
+
+    def test_rows_changed_shares_nothing(self):
+        df = make_frame()
+        assert rewritten_columns(df, df.drop_duplicates(subset=["b"])) is None
+        assert rewritten_columns(df, df.copy()) == []
@@ -0,0 +1,34 @@
+"""
+Background Job Worker Entry Point
+Runs queued analysis/tuning/scoring jobs separately from the API pods
+
+Usage:
+    JOB_WORKER_EMBEDDED=false uvicorn server:app   # API pods only enqueue
+    python worker.py                              # worker pods execute jobs
+"""
+import asyncio
+import logging
+
+from app.config import JOB_WORKER_CONCURRENCY
+# Importing the routes registers the job handlers
+from app.routes import analysis, models  # noqa: F401
+from app.services.job_service import JobWorker
+from app.services.executor_service import shutdown_executors
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+
+async def main():
+    worker = JobWorker(concurrency=JOB_WORKER_CONCURRENCY)
+    try:
+        await worker.run_forever()
+    finally:
+        await worker.stop()
+        shutdown_executors()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -289,13 +289,14 @@ const DataSourceSelector = ({ onDatasetLoaded }) => {
       // Store results for loading later
       setQueryResults({
         row_count: response.data.row_count,
+        has_more: response.data.has_more,
         column_count: response.data.column_count,
         columns: response.data.columns,
         preview: response.data.data_preview,
         queryConfig: queryConfig
       });
       
-      toast.success(`Query executed successfully! Found ${response.data.row_count} rows`, {
+      toast.success(`Query executed successfully! Found ${response.data.row_count}${response.data.has_more ? "+" : ""} rows`, {
         description: `Click "Load Data" to save this dataset`
       });
       
@@ -831,7 +832,7 @@ const DataSourceSelector = ({ onDatasetLoaded }) => {
                       <div>
                         <h4 className="font-semibold text-green-900">✓ Query Executed Successfully</h4>
                         <p className="text-sm text-green-700 mt-1">
-                          Found {queryResults.row_count} rows × {queryResults.column_count} columns
+                          Found {queryResults.row_count}{queryResults.has_more ? "+" : ""} rows × {queryResults.column_count} columns
                         </p>
                       </div>
                       <X 
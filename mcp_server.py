@@ -39,8 +39,12 @@ API_BASE = f"{BACKEND_URL}/api"
 # Initialize MCP server
 server = Server("promise-ai-server")
 
-# HTTP client for API calls
-client = httpx.AsyncClient(timeout=300.0)
+# HTTP client for API calls - long-running work goes through the job queue
+client = httpx.AsyncClient(timeout=60.0)
+
+# Job polling settings
+JOB_POLL_SECONDS = float(os.getenv('MCP_JOB_POLL_SECONDS', 2))
+JOB_MAX_WAIT_SECONDS = float(os.getenv('MCP_JOB_MAX_WAIT_SECONDS', 1800))
 
 
 @server.list_tools()
@@ -293,6 +297,32 @@ async def list_datasets(args: Dict[str, Any]) -> Dict[str, Any]:
     return response.json()
 
 
+async def run_job(job_type: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Submit a background job and poll until it finishes"""
+    response = await client.post(f"{API_BASE}/jobs", json={"type": job_type, "payload": payload})
+    response.raise_for_status()
+    job_id = response.json()["id"]
+    
+    waited = 0.0
+    while waited < JOB_MAX_WAIT_SECONDS:
+        await asyncio.sleep(JOB_POLL_SECONDS)
+        waited += JOB_POLL_SECONDS
+        status_response = await client.get(f"{API_BASE}/jobs/{job_id}")
+        status_response.raise_for_status()
+        job = status_response.json()
+        if job["status"] in ("completed", "failed", "cancelled"):
+            break
+    else:
+        raise TimeoutError(f"Job {job_id} did not finish within {JOB_MAX_WAIT_SECONDS:.0f}s")
+    
+    if job["status"] != "completed":
+        raise RuntimeError(f"Job {job_id} {job['status']}: {job.get('error')}")
+    
+    result_response = await client.get(f"{API_BASE}/jobs/{job_id}/result")
+    result_response.raise_for_status()
+    return result_response.json()["result"]
+
+
 async def run_predictive_analysis(args: Dict[str, Any]) -> Dict[str, Any]:
     """Run predictive analysis"""
     payload = {
@@ -306,9 +336,7 @@ async def run_predictive_analysis(args: Dict[str, Any]) -> Dict[str, Any]:
         }
     }
     
-    response = await client.post(f"{API_BASE}/analysis/holistic", json=payload)
-    response.raise_for_status()
-    return response.json()
+    return await run_job("holistic_analysis", payload)
 
 
 async def run_time_series_analysis(args: Dict[str, Any]) -> Dict[str, Any]:
@@ -336,9 +364,7 @@ async def tune_hyperparameters(args: Dict[str, Any]) -> Dict[str, Any]:
         "search_type": args.get("search_type", "grid")
     }
     
-    response = await client.post(f"{API_BASE}/analysis/hyperparameter-tuning", json=payload)
-    response.raise_for_status()
-    return response.json()
+    return await run_job("hyperparameter_tuning", payload)
 
 
 async def get_training_metadata(args: Dict[str, Any]) -> Dict[str, Any]: